@@ -266,6 +266,89 @@ class MultiCropDiseaseDetector:
             logger.error(f"Prediction error: {str(e)}")
             return {"error": str(e)}
 
+    # ------------------------------------------------------------------------------------
+    # BATCH PREDICTION
+    # ------------------------------------------------------------------------------------
+    def predict_batch(self, items, batch_size=16):
+        """
+        Predict diseases for many images in one pass per crop model.
+
+        items: list of (image_file, crop_type) tuples
+        Returns a list of result dicts in the same order as items. Each entry
+        has the same shape as predict(), or {"error": ...} for that image only.
+        """
+        results = [None] * len(items)
+
+        # Group item indexes by crop so each model sees full tensors
+        by_crop = {}
+        for index, (image_file, crop_type) in enumerate(items):
+            if not self.models.get(crop_type):
+                results[index] = {"error": f"No model loaded for crop: {crop_type}"}
+                continue
+            by_crop.setdefault(crop_type, []).append(index)
+
+        for crop_type, indexes in by_crop.items():
+            for start in range(0, len(indexes), batch_size):
+                chunk = indexes[start:start + batch_size]
+
+                # Decode images one at a time; a bad file only fails itself
+                images, decoded = [], []
+                for index in chunk:
+                    try:
+                        images.append(Image.open(items[index][0]).convert("RGB"))
+                        decoded.append(index)
+                    except Exception as e:
+                        results[index] = {"error": f"Invalid image: {str(e)}"}
+
+                if not images:
+                    continue
+
+                try:
+                    for index, (disease, confidence) in zip(decoded, self._classify(crop_type, images)):
+                        results[index] = {
+                            "crop_type": crop_type,
+                            "disease": disease,
+                            "confidence_percentage": round(confidence, 2),
+                            "solution": self.get_solution(crop_type, disease)
+                        }
+                except Exception as e:
+                    logger.error(f"Batch prediction error for {crop_type}: {str(e)}")
+                    for index in decoded:
+                        results[index] = {"error": str(e)}
+
+        return results
+
+    def _classify(self, crop_type, images):
+        """Run one forward pass for a list of PIL images, return (label, confidence) pairs"""
+        model = self.models[crop_type]
+
+        if crop_type == "soybean":
+            import torchvision.transforms as transforms
+            transform = transforms.ToTensor()
+            batch = torch.stack([transform(image.resize((224, 224))) for image in images])
+
+            with torch.no_grad():
+                logits = model(batch)
+            labels = self.soybean_labels
+        else:
+            inputs = self.processors[crop_type](images=images, return_tensors="pt")
+
+            with torch.no_grad():
+                logits = model(**inputs).logits
+            labels = None
+
+        probabilities = torch.softmax(logits, dim=-1)
+        confidences, pred_indexes = probabilities.max(dim=-1)
+
+        predictions = []
+        for pred_idx, confidence in zip(pred_indexes.tolist(), confidences.tolist()):
+            if labels is not None:
+                disease = labels[pred_idx]
+            else:
+                disease = model.config.id2label[pred_idx].replace("_", " ").title()
+            predictions.append((disease, confidence * 100))
+        return predictions
+
 
     # ------------------------------------------------------------------------------------
     # SOLUTION FETCHER
@@ -2,6 +2,7 @@
 from django.urls import path
 from .views import (
     DiseasePredictionAPIView,
+    BulkDiseasePredictionAPIView,
     MarketForecastAPIView,
     QuickPriceForecastAPIView,
     QuickDemandForecastAPIView,
@@ -10,7 +11,8 @@ from .views import (
     AllCropsPriceForecastAPIView,
 )
 
-"""GET /api/advisories/market-forecast/?role=farmer
+"""POST /api/advisories/disease-predict/bulk/?output=jsonl|csv
+GET /api/advisories/market-forecast/?role=farmer
 GET /api/advisories/market-forecast/?role=fpo
 GET /api/advisories/market-forecast/?role=processor
 GET /api/advisories/market-forecast/?role=retailer
@@ -26,6 +28,7 @@ app_name = 'advisories'
 urlpatterns = [
     # Disease Prediction
     path('disease-predict/', DiseasePredictionAPIView.as_view(), name='disease-prediction'),
+    path('disease-predict/bulk/', BulkDiseasePredictionAPIView.as_view(), name='disease-prediction-bulk'),
     
     # Main Market Forecast (Simple - Just Role Required)
     path('market-forecast/', MarketForecastAPIView.as_view(), name='market-forecast'),
@@ -32,16 +32,24 @@ def dataframe_to_columnar_json(df):
         "month": [2, 3],
         "demand_supply_gap": [5442.15, 5246.00]
     }
+    
+    Numeric and boolean columns without gaps stay NumPy arrays: the
+    renderer (apps.core.renderers) writes them straight from the buffer.
+    Other columns become lists with None for missing values.
     """
     if df.empty:
         return {}
     
     result = {}
     for column in df.columns:
+        series = df[column]
+        if isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biuf' and not series.isna().any():
+            result[column] = series.to_numpy()
+            continue
         # Convert to list, handling NaN values
-        values = df[column].astype(object).where(pd.notnull(df[column]), None).tolist()
+        values = series.astype(object).where(series.notna(), None).tolist()
         # Convert numpy types to Python types
-        result[column] = [v.item() if hasattr(v, 'item') else v for v in values]
+        result[column] = [v.item() if isinstance(v, np.generic) else v for v in values]
     
     return result
 
@@ -6,8 +6,17 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework import status
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from apps.core.utils import response_success
+from apps.core.cache import cache_response
+from apps.core.db_router import ReplicaReadMixin
+from apps.core.permissions import IsFPO
+import csv
+import io
+import json
 import logging
+import zipfile
 
 from .utils.market_data_extractor import MarketDataExtractor
 from .utils.market_forecaster import MarketForecaster
@@ -15,6 +24,9 @@ from .disease_detector import detector_instance
 
 logger = logging.getLogger(__name__)
 
+DISEASE_SUPPORTED_CROPS = ['groundnut', 'soybean', 'sunflower']
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
 
 class DiseasePredictionAPIView(APIView):
     """Disease prediction using AI model"""
@@ -30,7 +42,7 @@ class DiseasePredictionAPIView(APIView):
             if not crop_type:
                 return Response({"success": False, "message": "crop_type is required"}, 400)
 
-            if crop_type not in ['groundnut', 'soybean', 'sunflower']:
+            if crop_type not in DISEASE_SUPPORTED_CROPS:
                 return Response({"success": False, "message": "Invalid crop_type"}, 400)
 
             if not image_file:
@@ -63,9 +75,240 @@ class DiseasePredictionAPIView(APIView):
             return Response({"success": False, "message": str(e)}, 500)
 
 
+class _Echo:
+    """Pseudo-buffer for csv.writer: return each written row instead of storing it"""
+    def write(self, value):
+        return value
+
+
+class BulkDiseasePredictionAPIView(APIView):
+    """
+    Bulk disease screening for FPO field surveys
+
+    POST /api/advisories/disease-predict/bulk/?output=jsonl|csv
+
+    Upload one of:
+    - archive: a .zip of leaf images. Crop type per image comes from crop_types
+      (JSON object of file name -> crop), else the top-level folder name
+      (soybean/leaf_01.jpg), else the crop_type field.
+    - images: several image files with a matching crop_types list,
+      or a single crop_type for all of them.
+
+    Images are decoded chunk by chunk and run through the batched detector.
+    Results stream back as JSON Lines (default) or a CSV download. The last
+    record carries the per-crop disease frequency for the FPO.
+
+    Images over MAX_IMAGE_BYTES fail on their own row without being read; an
+    archive that would unpack to more than MAX_ARCHIVE_BYTES is rejected.
+    """
+    permission_classes = [IsAuthenticated, IsFPO]
+    parser_classes = (MultiPartParser, FormParser)
+
+    MAX_IMAGES = 1000
+    MAX_IMAGE_BYTES = 10 * 1024 * 1024
+    MAX_ARCHIVE_BYTES = 500 * 1024 * 1024  # uncompressed, all images together
+    BATCH_SIZE = 16
+    CSV_COLUMNS = [
+        'record_type', 'image', 'crop_type', 'disease',
+        'confidence_percentage', 'severity', 'count', 'error'
+    ]
+
+    def post(self, request):
+        output = request.query_params.get('output', 'jsonl').lower()
+        if output not in ['jsonl', 'csv']:
+            return Response({"success": False, "message": "output must be jsonl or csv"}, 400)
+
+        default_crop = request.data.get("crop_type", "").lower().strip()
+        archive_file = request.FILES.get("archive")
+
+        try:
+            if archive_file:
+                entries = self._entries_from_archive(archive_file, default_crop, request.data.get("crop_types"))
+            else:
+                entries = self._entries_from_files(
+                    request.FILES.getlist("images"),
+                    default_crop,
+                    request.data.getlist("crop_types") if hasattr(request.data, 'getlist') else []
+                )
+        except (zipfile.BadZipFile, ValueError) as e:
+            return Response({"success": False, "message": str(e)}, 400)
+
+        if not entries:
+            return Response({"success": False, "message": "archive or images are required"}, 400)
+
+        if len(entries) > self.MAX_IMAGES:
+            return Response({
+                "success": False,
+                "message": f"Too many images. Maximum {self.MAX_IMAGES} per upload"
+            }, 400)
+
+        fpo = getattr(request.user, 'fpo_profile', None)
+        rows = self._stream_results(entries, fpo)
+
+        if output == 'csv':
+            writer = csv.DictWriter(_Echo(), fieldnames=self.CSV_COLUMNS)
+            lines = (writer.writerow(row) for row in self._csv_rows(rows))
+            response = StreamingHttpResponse(
+                self._with_header(writer, lines), content_type='text/csv'
+            )
+            filename = f"disease_screening_{timezone.now().strftime('%Y%m%d_%H%M')}.csv"
+            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+            return response
+
+        lines = (json.dumps(row, default=str) + "\n" for row in rows)
+        return StreamingHttpResponse(lines, content_type='application/x-ndjson')
+
+    # ------------------------------------------------------------------
+    # Upload parsing (no image is decoded here)
+    # ------------------------------------------------------------------
+    def _too_large(self, size):
+        if size <= self.MAX_IMAGE_BYTES:
+            return None
+        return f"Image is {size // 1024} KB; the limit is {self.MAX_IMAGE_BYTES // 1024} KB"
+
+    def _entries_from_archive(self, archive_file, default_crop, crop_types):
+        """Return (name, open_fn, crop_type, error) for each image in the zip"""
+        mapping = {}
+        if crop_types:
+            mapping = json.loads(crop_types) if isinstance(crop_types, str) else crop_types
+            if not isinstance(mapping, dict):
+                raise ValueError("crop_types must be a JSON object of file name -> crop type")
+
+        archive = zipfile.ZipFile(archive_file)
+        entries = []
+        total_bytes = 0
+        for info in archive.infolist():
+            name = info.filename
+            if info.is_dir() or not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            if name.startswith('__MACOSX/'):
+                continue
+
+            folder = name.split('/')[0].lower() if '/' in name else ''
+            crop_type = mapping.get(name) or mapping.get(name.split('/')[-1])
+            if not crop_type:
+                crop_type = folder if folder in DISEASE_SUPPORTED_CROPS else default_crop
+
+            # Sizes come from the zip headers, checked before anything is
+            # decompressed; zipfile stops reading a member at its declared size
+            error = self._too_large(info.file_size)
+            if error is None:
+                total_bytes += info.file_size
+                if total_bytes > self.MAX_ARCHIVE_BYTES:
+                    raise ValueError(
+                        f"Archive unpacks to more than {self.MAX_ARCHIVE_BYTES // (1024 * 1024)} MB of images"
+                    )
+
+            entries.append((
+                name,
+                lambda info=info: io.BytesIO(archive.read(info)),
+                str(crop_type).lower().strip(),
+                error
+            ))
+        return entries
+
+    def _entries_from_files(self, files, default_crop, crop_types):
+        """Return (name, open_fn, crop_type, error) for each uploaded image"""
+        if crop_types and len(crop_types) not in (1, len(files)):
+            raise ValueError("crop_types must have one entry per image")
+
+        entries = []
+        for index, image_file in enumerate(files):
+            if len(crop_types) == len(files):
+                crop_type = crop_types[index]
+            elif crop_types:
+                crop_type = crop_types[0]
+            else:
+                crop_type = default_crop
+
+            entries.append((
+                image_file.name, self._rewind(image_file), crop_type.lower().strip(), self._too_large(image_file.size)
+            ))
+        return entries
+
+    @staticmethod
+    def _rewind(image_file):
+        def open_fn():
+            image_file.seek(0)
+            return image_file
+        return open_fn
+
+    # ------------------------------------------------------------------
+    # Streaming
+    # ------------------------------------------------------------------
+    def _stream_results(self, entries, fpo):
+        """Yield one result dict per image, then a summary dict"""
+        frequency = {}
+        processed = failed = 0
+
+        for start in range(0, len(entries), self.BATCH_SIZE):
+            chunk = entries[start:start + self.BATCH_SIZE]
+
+            valid = [i for i, entry in enumerate(chunk) if entry[3] is None and entry[2] in DISEASE_SUPPORTED_CROPS]
+            predictions = dict(zip(valid, detector_instance.predict_batch(
+                [(chunk[i][1](), chunk[i][2]) for i in valid],
+                batch_size=self.BATCH_SIZE
+            )))
+
+            for i, (name, _, crop_type, error) in enumerate(chunk):
+                prediction = predictions.get(i) or {
+                    "error": error or f"Invalid crop_type '{crop_type}'. Choose from: {', '.join(DISEASE_SUPPORTED_CROPS)}"
+                }
+
+                if "error" in prediction:
+                    failed += 1
+                    yield {"image": name, "crop_type": crop_type, "error": prediction["error"]}
+                    continue
+
+                processed += 1
+                crop_counts = frequency.setdefault(crop_type, {})
+                crop_counts[prediction["disease"]] = crop_counts.get(prediction["disease"], 0) + 1
+
+                yield {
+                    "image": name,
+                    "crop_type": crop_type,
+                    "disease": prediction["disease"],
+                    "confidence_percentage": prediction["confidence_percentage"],
+                    "severity": (prediction.get("solution") or {}).get("severity"),
+                    "error": None
+                }
+
+        yield {
+            "summary": {
+                "fpo_id": str(fpo.id) if fpo else None,
+                "fpo_name": fpo.organization_name if fpo else None,
+                "total_images": len(entries),
+                "processed": processed,
+                "failed": failed,
+                "disease_frequency": frequency,
+                "generated_at": timezone.now().isoformat()
+            }
+        }
+
+    def _csv_rows(self, rows):
+        """Flatten streamed result dicts into CSV rows"""
+        for row in rows:
+            if "summary" not in row:
+                yield dict(row, record_type='prediction')
+                continue
+
+            for crop_type, diseases in row["summary"]["disease_frequency"].items():
+                for disease, count in diseases.items():
+                    yield {
+                        'record_type': 'summary',
+                        'crop_type': crop_type,
+                        'disease': disease,
+                        'count': count
+                    }
+
+    def _with_header(self, writer, lines):
+        yield writer.writerow(dict(zip(self.CSV_COLUMNS, self.CSV_COLUMNS)))
+        yield from lines
+
+
 # ==================== MARKET FORECASTING API ====================
 
-class MarketForecastAPIView(APIView):
+class MarketForecastAPIView(ReplicaReadMixin, APIView):
     """
     Complete Market Forecast for All Roles
     
@@ -78,6 +321,7 @@ class MarketForecastAPIView(APIView):
     """
     permission_classes = [AllowAny]
     
+    @cache_response(ttl=900, stale_ttl=3600, vary_on=['role'])
     def get(self, request):
         # Get role parameter
         role = request.query_params.get('role')
@@ -347,10 +591,11 @@ class MarketForecastAPIView(APIView):
 
 # Individual analysis endpoints (optional - for advanced users)
 
-class QuickPriceForecastAPIView(APIView):
+class QuickPriceForecastAPIView(ReplicaReadMixin, APIView):
     """Quick price forecast for all crops - shows individual crop forecasts"""
     permission_classes = [AllowAny]
     
+    @cache_response(ttl=900, stale_ttl=3600, vary_on=[])
     def get(self, request):
         try:
             extractor = MarketDataExtractor()
@@ -413,10 +658,11 @@ class QuickPriceForecastAPIView(APIView):
             return Response({'success': False, 'message': str(e)}, status=500)
 
 
-class QuickDemandForecastAPIView(APIView):
+class QuickDemandForecastAPIView(ReplicaReadMixin, APIView):
     """Quick demand forecast for all crops - shows individual crop forecasts"""
     permission_classes = [AllowAny]
     
+    @cache_response(ttl=900, stale_ttl=3600, vary_on=[])
     def get(self, request):
         try:
             extractor = MarketDataExtractor()
@@ -474,10 +720,11 @@ class QuickDemandForecastAPIView(APIView):
             return Response({'success': False, 'message': str(e)}, status=500)
 
 
-class TopCropsAPIView(APIView):
+class TopCropsAPIView(ReplicaReadMixin, APIView):
     """Show top crops by demand and price"""
     permission_classes = [AllowAny]
     
+    @cache_response(ttl=900, stale_ttl=3600, vary_on=[])
     def get(self, request):
         try:
             extractor = MarketDataExtractor()
@@ -512,10 +759,11 @@ class TopCropsAPIView(APIView):
             return Response({'success': False, 'message': str(e)}, status=500)
 
 
-class CropSpecificPriceForecastAPIView(APIView):
+class CropSpecificPriceForecastAPIView(ReplicaReadMixin, APIView):
     """Get price forecast for a specific crop"""
     permission_classes = [AllowAny]
     
+    @cache_response(ttl=900, stale_ttl=3600, vary_on=['crop_type', 'days'])
     def get(self, request):
         crop_type = request.query_params.get('crop_type', '').lower().strip()
         days_ahead = int(request.query_params.get('days', 30))
@@ -575,10 +823,11 @@ class CropSpecificPriceForecastAPIView(APIView):
             return Response({'success': False, 'message': str(e)}, status=500)
 
 
-class AllCropsPriceForecastAPIView(APIView):
+class AllCropsPriceForecastAPIView(ReplicaReadMixin, APIView):
     """Get price forecasts for all major crops"""
     permission_classes = [AllowAny]
     
+    @cache_response(ttl=900, stale_ttl=3600, vary_on=['days', 'top_crops'])
     def get(self, request):
         days_ahead = int(request.query_params.get('days', 30))
         top_n = int(request.query_params.get('top_crops', 5))
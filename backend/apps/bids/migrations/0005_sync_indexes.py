@@ -0,0 +1,21 @@
+# Generated by Django 4.2.27 on 2026-10-19 10:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bids', '0004_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['bidder_user', 'updated_at'], name='bids_bidder__f0b2ef_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(fields=['lot', 'updated_at'], name='bids_lot_id_d080d5_idx'),
+        ),
+    ]
@@ -102,6 +102,8 @@ class Bid(TimeStampedModel):
         indexes = [
             models.Index(fields=['lot', 'status']),
             models.Index(fields=['bidder_user', 'status']),
+            models.Index(fields=['bidder_user', 'updated_at']),
+            models.Index(fields=['lot', 'updated_at']),
         ]
     
     def __str__(self):
@@ -110,13 +112,17 @@ class Bid(TimeStampedModel):
     def save(self, *args, **kwargs):
         # Calculate total amount
         self.total_amount = self.offered_price_per_quintal * self.quantity_quintals
+        adding = self._state.adding
         super().save(*args, **kwargs)
+        if adding:
+            self.lot.increment_bid_count()
     
     def accept(self, farmer_response=""):
         """Accept the bid and create payment record"""
         from django.utils import timezone
         from django.db import transaction
         from decimal import Decimal
+        from apps.notifications.signals import push_bid_updates
         
         with transaction.atomic():
             self.status = 'accepted'
@@ -131,10 +137,19 @@ class Bid(TimeStampedModel):
             self.lot.save()
             
             # Reject other pending bids
-            self.lot.bids.filter(status='pending').exclude(id=self.id).update(
+            losing_bids = list(self.lot.bids.filter(status='pending').exclude(id=self.id))
+            now = timezone.now()
+            Bid.objects.filter(id__in=[bid.id for bid in losing_bids]).update(
                 status='rejected',
-                farmer_response="Another bid was accepted"
+                farmer_response="Another bid was accepted",
+                updated_at=now
             )
+            # .update() sends no post_save: tell the losing bidders
+            for bid in losing_bids:
+                bid.status = 'rejected'
+                bid.farmer_response = "Another bid was accepted"
+                bid.updated_at = now
+            push_bid_updates(losing_bids)
             
             # Create bid acceptance record
             bid_acceptance = BidAcceptance.objects.create(
@@ -193,13 +208,10 @@ class Bid(TimeStampedModel):
                 tax_amount=Decimal('0'),  # Can add tax calculation later
                 payment_method='wallet',
                 status='pending',
-                notes=f'Payment for lot {lot.lot_number} - FPO managed (Commission: ₹{commission_amount} to {fpo.organization_name})'
+                notes=f'Payment for lot {lot.lot_number} - FPO managed (Commission: ₹{commission_amount} to {fpo.organization_name})',
+                commission_payee_id=fpo.id
             )
             
-            # Store FPO info in notes for commission distribution
-            payment.notes += f'\nFPO: {fpo.organization_name} (ID: {fpo.id})'
-            payment.save()
-            
         # Case 2: FPO-aggregated lot (no specific farmer, FPO is payee)
         elif lot.listing_type == 'fpo_aggregated' and lot.fpo and not lot.farmer:
             fpo = lot.fpo
@@ -1,8 +1,10 @@
 """Bids Serializers"""
 from rest_framework import serializers
+from apps.core.fieldsets import SparseFieldsetMixin
 from .models import Bid, BidAcceptance
 
-class BidSerializer(serializers.ModelSerializer):
+class BidSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Bid; supports ?fields= and ?expand=lot"""
     bidder_name = serializers.CharField(source='bidder_user.get_full_name', read_only=True)
     lot_number = serializers.CharField(source='lot.lot_number', read_only=True)
     lot_details = serializers.SerializerMethodField()
@@ -11,6 +13,13 @@ class BidSerializer(serializers.ModelSerializer):
         model = Bid
         fields = '__all__'
         read_only_fields = ['id', 'created_at', 'updated_at']
+        expandable_fields = {
+            'lot': ('apps.lots.serializers.ProcurementLotSerializer', {}),
+        }
+        field_sources = {
+            'bidder_name': ('bidder_user.profile', 'bidder_user.phone_number'),
+            'lot_details': ('lot.crop_type', 'lot.quantity_quintals', 'lot.quality_grade'),
+        }
     
     def get_lot_details(self, obj):
         """Return detailed lot information"""
@@ -6,8 +6,9 @@ from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Bid, BidAcceptance
 from .serializers import BidSerializer, BidAcceptanceSerializer
+from apps.core.fieldsets import SparseFieldsetViewMixin
 
-class BidViewSet(viewsets.ModelViewSet):
+class BidViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     queryset = Bid.objects.filter(is_active=True)
     serializer_class = BidSerializer
     permission_classes = [IsAuthenticated]
@@ -54,9 +55,10 @@ class BidViewSet(viewsets.ModelViewSet):
                 # Farmer profile doesn't exist, no received bids
                 pass
         
-        # Serialize the data
-        sent_serializer = BidSerializer(sent_bids, many=True)
-        received_serializer = BidSerializer(received_bids, many=True)
+        # Serialize the data (?fields= / ?expand= apply to both lists)
+        context = self.get_serializer_context()
+        sent_serializer = BidSerializer(self.narrow_queryset(sent_bids), many=True, context=context)
+        received_serializer = BidSerializer(self.narrow_queryset(received_bids), many=True, context=context)
         
         return Response({
             'received': received_serializer.data,
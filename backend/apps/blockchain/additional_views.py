@@ -5,8 +5,11 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.http import HttpResponse
+from django.db.models import F
 from django.utils import timezone
 from apps.core.utils import response_success, response_error
+from apps.core.cache import cache_response
+from apps.core.write_queue import enqueue_write
 from .models import BlockchainTransaction, TraceabilityRecord, QRCode
 from apps.lots.models import ProcurementLot
 import qrcode
@@ -115,6 +118,25 @@ class TraceabilityAPIView(APIView):
     permission_classes = [AllowAny]
     
     def get(self, request, lot_number):
+        # Count every scan, including ones served from cache
+        enqueue_write(
+            QRCode.objects.filter(lot__lot_number=lot_number).update,
+            scan_count=F('scan_count') + 1,
+            last_scanned_at=timezone.now()
+        )
+        response = self._trace_response(request, lot_number=lot_number)
+        
+        # Scan counts change on every request, so they are merged in after the cache read
+        qr_code = response.data.get('data', {}).get('qr_code') if response.status_code == 200 else None
+        if qr_code is not None:
+            scans = QRCode.objects.filter(lot__lot_number=lot_number).values('scan_count', 'last_scanned_at').first()
+            if scans:
+                qr_code['scan_count'] = scans['scan_count']
+                qr_code['last_scanned'] = scans['last_scanned_at'].isoformat() if scans['last_scanned_at'] else None
+        return response
+    
+    @cache_response(ttl=300, vary_on=[], tags=['traceability:{lot_number}'])
+    def _trace_response(self, request, lot_number):
         try:
             lot = ProcurementLot.objects.select_related(
                 'farmer', 'farmer__user', 'fpo'
@@ -138,13 +160,8 @@ class TraceabilityAPIView(APIView):
         try:
             qr_obj = QRCode.objects.get(lot=lot)
             qr_code = {
-                'qr_url': request.build_absolute_uri(qr_obj.qr_image.url) if qr_obj.qr_image else None,
-                'scan_count': qr_obj.scan_count,
-                'last_scanned': qr_obj.last_scanned_at.isoformat() if qr_obj.last_scanned_at else None
+                'qr_url': request.build_absolute_uri(qr_obj.qr_image.url) if qr_obj.qr_image else None
             }
-            
-            # Increment scan count
-            qr_obj.increment_scan_count()
         except QRCode.DoesNotExist:
             pass
         
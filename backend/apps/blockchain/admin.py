@@ -1,7 +1,8 @@
 """Blockchain Admin"""
 from django.contrib import admin
-from .models import BlockchainTransaction, TraceabilityRecord, QRCode
+from .models import BlockchainTransaction, TraceabilityRecord, QRCode, LineageLink
 
 admin.site.register(BlockchainTransaction)
 admin.site.register(TraceabilityRecord)
 admin.site.register(QRCode)
+admin.site.register(LineageLink)
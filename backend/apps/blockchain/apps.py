@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class BlockchainConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.blockchain'
+
+    def ready(self):
+        from apps.blockchain.services.lineage_service import connect_lineage_signals
+        connect_lineage_signals()
+        
+        from apps.core.cache import invalidate_on_change
+        from apps.blockchain.models import TraceabilityRecord
+        invalidate_on_change(TraceabilityRecord, 'traceability_record:{pk}')
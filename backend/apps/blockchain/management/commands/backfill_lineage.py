@@ -0,0 +1,14 @@
+"""
+Rebuild the lineage closure table from lots, batches, products and orders
+"""
+from django.core.management.base import BaseCommand
+
+from apps.blockchain.services import backfill_lineage
+
+
+class Command(BaseCommand):
+    help = "Recompute LineageLink rows for existing aggregation, batch, product and order data"
+
+    def handle(self, *args, **options):
+        created = backfill_lineage(progress=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(f"Lineage rebuilt: {created} links"))
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.27 on 2026-10-19 09:58
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain', '0003_alter_blockchaintransaction_action_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LineageLink',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('ancestor_type', models.CharField(choices=[('lot', 'Procurement Lot'), ('batch', 'Processing Batch'), ('finished_product', 'Finished Product'), ('processed_product', 'Processed Product'), ('retailer_order', 'Retailer Order')], max_length=20)),
+                ('ancestor_id', models.UUIDField()),
+                ('descendant_type', models.CharField(choices=[('lot', 'Procurement Lot'), ('batch', 'Processing Batch'), ('finished_product', 'Finished Product'), ('processed_product', 'Processed Product'), ('retailer_order', 'Retailer Order')], max_length=20)),
+                ('descendant_id', models.UUIDField()),
+                ('depth', models.PositiveSmallIntegerField(help_text='Hops between the two nodes (1 = direct edge)')),
+                ('edge_type', models.CharField(choices=[('aggregation', 'Aggregated into bulk lot'), ('processing', 'Processed in batch'), ('output', 'Batch output'), ('sale', 'Sold to retailer')], help_text='Kind of the last hop, into the descendant', max_length=20)),
+            ],
+            options={
+                'verbose_name': 'Lineage Link',
+                'verbose_name_plural': 'Lineage Links',
+                'db_table': 'lineage_links',
+                'ordering': ['depth'],
+                'indexes': [models.Index(fields=['descendant_type', 'descendant_id', 'depth'], name='lineage_lin_descend_c81f7d_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='lineagelink',
+            constraint=models.UniqueConstraint(fields=('ancestor_type', 'ancestor_id', 'descendant_type', 'descendant_id'), name='unique_lineage_link'),
+        ),
+    ]
@@ -114,6 +114,61 @@ class BlockchainTransaction(TimeStampedModel):
                 self.previous_hash = "0" * 64  # Genesis block
         
         super().save(*args, **kwargs)
+    
+    @classmethod
+    def bulk_record(cls, transactions):
+        """
+        Append many ledger entries in one batch
+        
+        Fills transaction_id, data_hash and previous_hash the same way save()
+        does, chaining entries for the same lot within the batch, then writes
+        them with one INSERT and refreshes the lots' traceability journeys.
+        Used by bulk pipelines where per-row post_save signals are skipped.
+        
+        Runs through run_serialized: inline when the caller is already in a
+        transaction, on the writer thread otherwise. The lots are locked
+        before their chain heads are read, so concurrent appends to one lot
+        cannot chain onto the same entry.
+        """
+        from apps.core.write_queue import run_serialized
+        
+        transactions = list(transactions)
+        if not transactions:
+            return []
+        return run_serialized(cls._bulk_record, transactions)
+    
+    @classmethod
+    def _bulk_record(cls, transactions):
+        from django.db import transaction
+        from django.utils import timezone
+        from apps.lots.models import ProcurementLot
+        
+        lot_ids = {tx.lot_id for tx in transactions}
+        
+        with transaction.atomic():
+            # Lock in id order so two batches touching the same lots cannot deadlock
+            list(ProcurementLot.objects.select_for_update().filter(pk__in=lot_ids).order_by('pk').values_list('pk', flat=True))
+            
+            # Last hash per lot already on the chain (one query for the whole batch)
+            chain_heads = {}
+            for lot_id, data_hash in cls.objects.filter(lot_id__in=lot_ids).order_by(
+                'created_at'
+            ).values_list('lot_id', 'data_hash'):
+                chain_heads[lot_id] = data_hash
+            
+            now = timezone.now()
+            for index, tx in enumerate(transactions):
+                if not tx.transaction_id:
+                    tx.transaction_id = generate_hash(f"{tx.lot_id}{tx.action_type}{now.isoformat()}{index}")
+                if not tx.data_hash:
+                    tx.data_hash = generate_hash(json.dumps(tx.transaction_data, sort_keys=True))
+                if not tx.previous_hash:
+                    tx.previous_hash = chain_heads.get(tx.lot_id, "0" * 64)
+                chain_heads[tx.lot_id] = tx.data_hash
+            
+            created = cls.objects.bulk_create(transactions)
+            TraceabilityRecord.append_journeys(created)
+        return created
 
 
 class TraceabilityRecord(TimeStampedModel):
@@ -167,27 +222,65 @@ class TraceabilityRecord(TimeStampedModel):
         """Update journey from blockchain transactions"""
         transactions = self.lot.blockchain_transactions.all().order_by('created_at')
         
-        journey_data = []
-        for tx in transactions:
-            journey_data.append({
-                'stage': tx.get_action_type_display(),
-                'action_code': tx.action_type,
-                'actor': tx.actor_name,
-                'actor_role': tx.actor_role,
-                'timestamp': tx.timestamp.isoformat(),
-                'location': {
-                    'lat': float(tx.location_latitude) if tx.location_latitude else None,
-                    'lng': float(tx.location_longitude) if tx.location_longitude else None
-                },
-                'transaction_id': tx.transaction_id,
-                'data': tx.transaction_data
-            })
+        journey_data = [self.journey_entry(tx) for tx in transactions]
         
         self.journey = journey_data
         self.total_transactions = len(journey_data)
         self.save()
         
+        from apps.core.cache import invalidate_tags
+        invalidate_tags(f"traceability:{self.lot.lot_number}")
+        
         return journey_data
+    
+    @staticmethod
+    def journey_entry(tx):
+        """Journey item for one blockchain transaction"""
+        return {
+            'stage': tx.get_action_type_display(),
+            'action_code': tx.action_type,
+            'actor': tx.actor_name,
+            'actor_role': tx.actor_role,
+            'timestamp': tx.timestamp.isoformat(),
+            'location': {
+                'lat': float(tx.location_latitude) if tx.location_latitude else None,
+                'lng': float(tx.location_longitude) if tx.location_longitude else None
+            },
+            'transaction_id': tx.transaction_id,
+            'data': tx.transaction_data
+        }
+    
+    @classmethod
+    def append_journeys(cls, transactions):
+        """
+        Append freshly recorded transactions to their lots' journeys
+        One read, one bulk update and one bulk insert for the whole batch
+        """
+        entries_by_lot = {}
+        for tx in transactions:
+            entries_by_lot.setdefault(tx.lot_id, []).append(cls.journey_entry(tx))
+        lot_ids = list(entries_by_lot)
+        
+        existing = list(cls.objects.filter(lot_id__in=entries_by_lot.keys()))
+        for record in existing:
+            record.journey = list(record.journey) + entries_by_lot.pop(record.lot_id)
+            record.total_transactions = len(record.journey)
+        if existing:
+            cls.objects.bulk_update(existing, ['journey', 'total_transactions'])
+        record_ids = [record.pk for record in existing]
+        
+        cls.objects.bulk_create([
+            cls(lot_id=lot_id, journey=entries, total_transactions=len(entries))
+            for lot_id, entries in entries_by_lot.items()
+        ], ignore_conflicts=True)
+        
+        from apps.core.cache import invalidate_tags
+        from apps.lots.models import ProcurementLot
+        lot_numbers = ProcurementLot.objects.filter(id__in=lot_ids).values_list('lot_number', flat=True)
+        invalidate_tags(
+            *[f"traceability:{lot_number}" for lot_number in lot_numbers],
+            *[f"traceability_record:{record_id}" for record_id in record_ids]
+        )
 
 
 class QRCode(TimeStampedModel):
@@ -229,8 +322,76 @@ class QRCode(TimeStampedModel):
         return f"QR Code for {self.lot.lot_number}"
     
     def increment_scan_count(self):
-        """Increment scan counter"""
+        """Increment scan counter (queued F() update, so concurrent scans are not lost)"""
+        from django.db.models import F
         from django.utils import timezone
+        from apps.core.write_queue import enqueue_write
         self.scan_count += 1
         self.last_scanned_at = timezone.now()
-        self.save(update_fields=['scan_count', 'last_scanned_at'])
+        enqueue_write(
+            QRCode.objects.filter(pk=self.pk).update,
+            scan_count=F('scan_count') + 1, last_scanned_at=self.last_scanned_at
+        )
+
+
+class LineageLink(TimeStampedModel):
+    """
+    Closure table over the supply chain graph
+    One row per (ancestor, descendant) pair at any distance, so a node's full
+    upstream or downstream lineage is a single indexed lookup. Nodes are lots,
+    processing batches, finished/processed products and retailer orders.
+    """
+    NODE_LOT = 'lot'
+    NODE_BATCH = 'batch'
+    NODE_FINISHED_PRODUCT = 'finished_product'
+    NODE_PROCESSED_PRODUCT = 'processed_product'
+    NODE_RETAILER_ORDER = 'retailer_order'
+    
+    NODE_TYPES = [
+        (NODE_LOT, 'Procurement Lot'),
+        (NODE_BATCH, 'Processing Batch'),
+        (NODE_FINISHED_PRODUCT, 'Finished Product'),
+        (NODE_PROCESSED_PRODUCT, 'Processed Product'),
+        (NODE_RETAILER_ORDER, 'Retailer Order'),
+    ]
+    
+    EDGE_AGGREGATION = 'aggregation'
+    EDGE_PROCESSING = 'processing'
+    EDGE_OUTPUT = 'output'
+    EDGE_SALE = 'sale'
+    
+    EDGE_TYPES = [
+        (EDGE_AGGREGATION, 'Aggregated into bulk lot'),
+        (EDGE_PROCESSING, 'Processed in batch'),
+        (EDGE_OUTPUT, 'Batch output'),
+        (EDGE_SALE, 'Sold to retailer'),
+    ]
+    
+    ancestor_type = models.CharField(max_length=20, choices=NODE_TYPES)
+    ancestor_id = models.UUIDField()
+    descendant_type = models.CharField(max_length=20, choices=NODE_TYPES)
+    descendant_id = models.UUIDField()
+    depth = models.PositiveSmallIntegerField(help_text="Hops between the two nodes (1 = direct edge)")
+    edge_type = models.CharField(
+        max_length=20,
+        choices=EDGE_TYPES,
+        help_text="Kind of the last hop, into the descendant"
+    )
+    
+    class Meta:
+        db_table = 'lineage_links'
+        verbose_name = 'Lineage Link'
+        verbose_name_plural = 'Lineage Links'
+        ordering = ['depth']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['ancestor_type', 'ancestor_id', 'descendant_type', 'descendant_id'],
+                name='unique_lineage_link'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['descendant_type', 'descendant_id', 'depth']),
+        ]
+    
+    def __str__(self):
+        return f"{self.ancestor_type}:{self.ancestor_id} -> {self.descendant_type}:{self.descendant_id} ({self.depth})"
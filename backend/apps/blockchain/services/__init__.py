@@ -0,0 +1,9 @@
+# Services module
+from .lineage_service import (
+    Node, NODE_MODELS, node_for, add_edge, rebuild_subtree, backfill_lineage, get_lineage, recall_impact,
+)
+
+__all__ = [
+    'Node', 'NODE_MODELS', 'node_for', 'add_edge', 'rebuild_subtree', 'backfill_lineage',
+    'get_lineage', 'recall_impact',
+]
@@ -0,0 +1,481 @@
+"""
+Lineage Service
+Maintains the LineageLink closure table and answers lineage / recall queries
+
+Direct edges come from the source models:
+
+    lot --aggregation--> aggregated lot      (ProcurementLot.parent_lots)
+    lot --processing--> batch                (ProcessingBatch.lot)
+    batch --output--> finished product       (FinishedProduct.batch)
+    batch --output--> processed product      (ProcessedProduct.batch)
+    processed product --sale--> order        (OrderItem.product / order)
+
+A new edge adds one link from every ancestor of the parent (and the parent)
+to every descendant of the child (and the child): two indexed reads and one
+INSERT. Removed edges rebuild the links into the child's subtree. Either way
+the full upstream or downstream set of a node is then one query.
+"""
+import logging
+from collections import namedtuple
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from ..models import LineageLink
+
+logger = logging.getLogger(__name__)
+
+Node = namedtuple('Node', ['type', 'id'])
+
+# node type -> model label
+NODE_MODELS = {
+    LineageLink.NODE_LOT: 'lots.ProcurementLot',
+    LineageLink.NODE_BATCH: 'processors.ProcessingBatch',
+    LineageLink.NODE_FINISHED_PRODUCT: 'processors.FinishedProduct',
+    LineageLink.NODE_PROCESSED_PRODUCT: 'processors.ProcessedProduct',
+    LineageLink.NODE_RETAILER_ORDER: 'retailers.RetailerOrder',
+}
+
+BATCH_SIZE = 5000
+
+
+def _model(node_type):
+    from django.apps import apps
+    return apps.get_model(NODE_MODELS[node_type])
+
+
+def node_for(instance):
+    """Node for a model instance of one of NODE_MODELS"""
+    label = instance._meta.label
+    for node_type, model_label in NODE_MODELS.items():
+        if model_label == label:
+            return Node(node_type, instance.pk)
+    raise ValueError(f"{label} is not a lineage node")
+
+
+# ==================== Closure maintenance ====================
+
+def _ancestor_links(node):
+    return LineageLink.objects.filter(descendant_type=node.type, descendant_id=node.id)
+
+
+def _descendant_links(node):
+    return LineageLink.objects.filter(ancestor_type=node.type, ancestor_id=node.id)
+
+
+def add_edge(parent, child, edge_type):
+    """Record parent -> child and every path through it"""
+    ancestors = [(parent, 0)] + [
+        (Node(link.ancestor_type, link.ancestor_id), link.depth)
+        for link in _ancestor_links(parent).only('ancestor_type', 'ancestor_id', 'depth')
+    ]
+    descendants = [(child, 0, edge_type)] + [
+        (Node(link.descendant_type, link.descendant_id), link.depth, link.edge_type)
+        for link in _descendant_links(child).only('descendant_type', 'descendant_id', 'depth', 'edge_type')
+    ]
+
+    # ignore_conflicts: a pair already linked through another path keeps its row
+    LineageLink.objects.bulk_create([
+        LineageLink(
+            ancestor_type=ancestor.type, ancestor_id=ancestor.id,
+            descendant_type=descendant.type, descendant_id=descendant.id,
+            depth=up + down + 1, edge_type=last_hop,
+        )
+        for ancestor, up in ancestors
+        for descendant, down, last_hop in descendants
+    ], batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+
+def remove_node(node):
+    """Drop every link to or from a deleted node"""
+    LineageLink.objects.filter(
+        Q(ancestor_type=node.type, ancestor_id=node.id) | Q(descendant_type=node.type, descendant_id=node.id)
+    ).delete()
+
+
+def rebuild_subtree(node):
+    """
+    Recompute the links into `node` and everything below it from the source
+    models, e.g. after one of its edges was removed
+    """
+    subtree = {node} | {
+        Node(descendant_type, descendant_id)
+        for descendant_type, descendant_id in _descendant_links(node).values_list('descendant_type', 'descendant_id')
+    }
+    parents = _parents_by_child(source_edges(children=subtree))
+
+    def known(outside):
+        # Nodes above the subtree keep their links; read them from the table
+        return {
+            Node(link.ancestor_type, link.ancestor_id): (link.depth, link.edge_type)
+            for link in _ancestor_links(outside)
+        }
+
+    closure = compute_closure(subtree, parents, known)
+    with transaction.atomic():
+        condition = Q()
+        for member in subtree:
+            condition |= Q(descendant_type=member.type, descendant_id=member.id)
+        LineageLink.objects.filter(condition).delete()
+        LineageLink.objects.bulk_create(_links(closure), batch_size=BATCH_SIZE)
+
+
+# ==================== Backfill ====================
+
+def source_edges(children=None):
+    """
+    Direct (parent, child, edge_type) edges read from the source models
+    children: optional set of Nodes to restrict the edges to
+    """
+    from apps.lots.models import ProcurementLot
+    from apps.retailers.models import OrderItem
+
+    def ids(node_type):
+        return None if children is None else [node.id for node in children if node.type == node_type]
+
+    def restricted(queryset, field, node_type):
+        wanted = ids(node_type)
+        if wanted is None:
+            return queryset
+        return queryset.filter(**{f'{field}__in': wanted}) if wanted else queryset.none()
+
+    Aggregation = ProcurementLot.parent_lots.through
+    for child_id, parent_id in restricted(
+        Aggregation.objects.all(), 'from_procurementlot_id', LineageLink.NODE_LOT
+    ).values_list('from_procurementlot_id', 'to_procurementlot_id').iterator(chunk_size=BATCH_SIZE):
+        yield Node(LineageLink.NODE_LOT, parent_id), Node(LineageLink.NODE_LOT, child_id), LineageLink.EDGE_AGGREGATION
+
+    for child_id, parent_id in restricted(
+        _model(LineageLink.NODE_BATCH).objects.all(), 'id', LineageLink.NODE_BATCH
+    ).values_list('id', 'lot_id').iterator(chunk_size=BATCH_SIZE):
+        yield Node(LineageLink.NODE_LOT, parent_id), Node(LineageLink.NODE_BATCH, child_id), LineageLink.EDGE_PROCESSING
+
+    for node_type in (LineageLink.NODE_FINISHED_PRODUCT, LineageLink.NODE_PROCESSED_PRODUCT):
+        for child_id, parent_id in restricted(
+            _model(node_type).objects.filter(batch__isnull=False), 'id', node_type
+        ).values_list('id', 'batch_id').iterator(chunk_size=BATCH_SIZE):
+            yield Node(LineageLink.NODE_BATCH, parent_id), Node(node_type, child_id), LineageLink.EDGE_OUTPUT
+
+    for child_id, parent_id in restricted(
+        OrderItem.objects.all(), 'order_id', LineageLink.NODE_RETAILER_ORDER
+    ).values_list('order_id', 'product_id').distinct().iterator(chunk_size=BATCH_SIZE):
+        yield (
+            Node(LineageLink.NODE_PROCESSED_PRODUCT, parent_id),
+            Node(LineageLink.NODE_RETAILER_ORDER, child_id),
+            LineageLink.EDGE_SALE,
+        )
+
+
+def _parents_by_child(edges):
+    parents = {}
+    for parent, child, edge_type in edges:
+        parents.setdefault(child, []).append((parent, edge_type))
+    return parents
+
+
+def compute_closure(nodes, parents, known=None):
+    """
+    {node: {ancestor: (depth, last hop edge type)}} for each of `nodes`
+    parents: {child: [(parent, edge_type)]}; known(node) supplies the
+    ancestors of parents outside `nodes` (default: none). Keeps the shortest
+    path per pair; a cycle in the source data is logged and cut.
+    """
+    closure = {}
+    outside = {}
+    in_progress = set()
+
+    def ancestors_of(node):
+        if node in closure:
+            return closure[node]
+        if node not in nodes and known is not None:
+            if node not in outside:
+                outside[node] = known(node)
+            return outside[node]
+        if node in in_progress:
+            logger.warning(f"Lineage cycle through {node.type}:{node.id}; edge ignored")
+            return {}
+
+        in_progress.add(node)
+        result = {}
+        for parent, edge_type in parents.get(node, []):
+            candidates = [(parent, 1)] + [(ancestor, depth + 1) for ancestor, (depth, _) in ancestors_of(parent).items()]
+            for ancestor, depth in candidates:
+                if ancestor != node and (ancestor not in result or depth < result[ancestor][0]):
+                    result[ancestor] = (depth, edge_type)
+        in_progress.discard(node)
+        closure[node] = result
+        return result
+
+    for node in nodes:
+        ancestors_of(node)
+    return {node: closure[node] for node in nodes}
+
+
+def _links(closure):
+    for descendant, ancestors in closure.items():
+        for ancestor, (depth, edge_type) in ancestors.items():
+            yield LineageLink(
+                ancestor_type=ancestor.type, ancestor_id=ancestor.id,
+                descendant_type=descendant.type, descendant_id=descendant.id,
+                depth=depth, edge_type=edge_type,
+            )
+
+
+def backfill_lineage(progress=None):
+    """Rebuild the whole closure table from the source models; returns the link count"""
+    progress = progress or (lambda message: logger.info(message))
+
+    parents = _parents_by_child(source_edges())
+    progress(f"{sum(len(edges) for edges in parents.values())} direct edges")
+    closure = compute_closure(set(parents), parents)
+
+    created = 0
+    with transaction.atomic():
+        LineageLink.objects.all().delete()
+        batch = []
+        for link in _links(closure):
+            batch.append(link)
+            if len(batch) >= BATCH_SIZE:
+                LineageLink.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        LineageLink.objects.bulk_create(batch)
+        created += len(batch)
+    progress(f"{created} lineage links written")
+    return created
+
+
+# ==================== Queries ====================
+
+def get_links(node, direction='both', max_depth=None):
+    """(upstream, downstream) links of a node in one query"""
+    condition = Q()
+    if direction in ('both', 'upstream'):
+        condition |= Q(descendant_type=node.type, descendant_id=node.id)
+    if direction in ('both', 'downstream'):
+        condition |= Q(ancestor_type=node.type, ancestor_id=node.id)
+    links = LineageLink.objects.filter(condition)
+    if max_depth:
+        links = links.filter(depth__lte=max_depth)
+
+    upstream, downstream = [], []
+    for link in links.order_by('depth'):
+        if link.descendant_type == node.type and link.descendant_id == node.id:
+            upstream.append(link)
+        else:
+            downstream.append(link)
+    return upstream, downstream
+
+
+def describe_nodes(nodes):
+    """{Node: summary dict}, one query per node type present"""
+    by_type = {}
+    for node in nodes:
+        by_type.setdefault(node.type, set()).add(node.id)
+
+    described = {}
+    for node_type, ids in by_type.items():
+        model = _model(node_type)
+        if node_type == LineageLink.NODE_LOT:
+            rows = model.objects.filter(id__in=ids).select_related('farmer', 'fpo')
+            describe = lambda lot: {
+                'label': lot.lot_number, 'crop_type': lot.crop_type, 'status': lot.status,
+                'quantity_quintals': lot.quantity_quintals, 'listing_type': lot.listing_type,
+                'farmer': {
+                    'id': lot.farmer_id, 'name': lot.farmer.full_name,
+                    'district': lot.farmer.district, 'state': lot.farmer.state,
+                } if lot.farmer_id else None,
+                'fpo': {'id': lot.fpo_id, 'name': lot.fpo.organization_name} if lot.fpo_id else None,
+            }
+        elif node_type == LineageLink.NODE_BATCH:
+            rows = model.objects.filter(id__in=ids).select_related('plant__processor')
+            describe = lambda batch: {
+                'label': batch.batch_number, 'status': batch.status,
+                'initial_quantity_quintals': batch.initial_quantity_quintals,
+                'processor': {'id': batch.plant.processor_id, 'name': batch.plant.processor.company_name},
+            }
+        elif node_type == LineageLink.NODE_FINISHED_PRODUCT:
+            rows = model.objects.filter(id__in=ids)
+            describe = lambda product: {
+                'label': product.get_product_type_display(), 'product_type': product.product_type,
+                'quantity_liters': product.quantity_liters, 'quantity_quintals': product.quantity_quintals,
+            }
+        elif node_type == LineageLink.NODE_PROCESSED_PRODUCT:
+            rows = model.objects.filter(id__in=ids)
+            describe = lambda product: {
+                'label': product.sku, 'product_type': product.product_type,
+                'batch_number': product.batch_number, 'quantity_liters': product.quantity_liters,
+            }
+        else:
+            rows = model.objects.filter(id__in=ids).select_related('retailer')
+            describe = lambda order: {
+                'label': order.order_number, 'status': order.status,
+                'retailer': {'id': order.retailer_id, 'name': order.retailer.business_name},
+            }
+        for row in rows:
+            described[Node(node_type, row.pk)] = describe(row)
+    return described
+
+
+def _serialize(links, attr_type, attr_id, described):
+    items = []
+    for link in links:
+        node = Node(getattr(link, attr_type), getattr(link, attr_id))
+        items.append({
+            'type': node.type,
+            'id': node.id,
+            'depth': link.depth,
+            'edge_type': link.edge_type,
+            **described.get(node, {'label': None, 'missing': True}),
+        })
+    return items
+
+
+def get_lineage(node, direction='both', max_depth=None):
+    """Upstream and downstream nodes of `node` with summaries"""
+    upstream, downstream = get_links(node, direction, max_depth)
+    described = describe_nodes(
+        [node]
+        + [Node(link.ancestor_type, link.ancestor_id) for link in upstream]
+        + [Node(link.descendant_type, link.descendant_id) for link in downstream]
+    )
+    if node not in described:
+        raise _model(node.type).DoesNotExist(f"No {node.type} with id {node.id}")
+
+    upstream_items = _serialize(upstream, 'ancestor_type', 'ancestor_id', described)
+    farmers = {}
+    for item in upstream_items + [{'type': node.type, **described[node]}]:
+        if item['type'] == LineageLink.NODE_LOT and item.get('farmer'):
+            farmers[item['farmer']['id']] = item['farmer']
+
+    return {
+        'node': {'type': node.type, 'id': node.id, **described[node]},
+        'upstream': upstream_items,
+        'downstream': _serialize(downstream, 'descendant_type', 'descendant_id', described),
+        'source_farmers': list(farmers.values()),
+    }
+
+
+def recall_impact(node):
+    """
+    Everything downstream of `node` that a recall would have to reach:
+    batches, products, retailer orders and the retailers and liters involved
+    """
+    from apps.retailers.models import OrderItem, RetailerOrder
+
+    _, downstream = get_links(node, 'downstream')
+    affected = {}
+    for link in downstream:
+        affected.setdefault(link.descendant_type, set()).add(link.descendant_id)
+
+    if not _model(node.type).objects.filter(pk=node.id).exists():
+        raise _model(node.type).DoesNotExist(f"No {node.type} with id {node.id}")
+
+    order_ids = affected.get(LineageLink.NODE_RETAILER_ORDER, set())
+    product_ids = affected.get(LineageLink.NODE_PROCESSED_PRODUCT, set())
+    if node.type == LineageLink.NODE_PROCESSED_PRODUCT:
+        product_ids = product_ids | {node.id}
+
+    retailers = {}
+    for order in RetailerOrder.objects.filter(id__in=order_ids).select_related('retailer'):
+        retailer = retailers.setdefault(order.retailer_id, {
+            'id': order.retailer_id,
+            'business_name': order.retailer.business_name,
+            'contact_person': order.retailer.contact_person,
+            'phone': order.retailer.phone,
+            'email': order.retailer.email,
+            'city': order.retailer.city,
+            'state': order.retailer.state,
+            'orders': [],
+        })
+        retailer['orders'].append({'id': order.id, 'order_number': order.order_number, 'status': order.status})
+
+    # Only the order lines carrying affected products, not whole orders
+    liters = OrderItem.objects.filter(order_id__in=order_ids, product_id__in=product_ids).aggregate(
+        total=Sum('quantity_liters')
+    )['total'] or Decimal('0')
+
+    return {
+        'node': {'type': node.type, 'id': node.id},
+        'counts': {node_type: len(ids) for node_type, ids in affected.items()},
+        'affected': {node_type: sorted(ids, key=str) for node_type, ids in affected.items()},
+        'retailers': list(retailers.values()),
+        'liters_sold_to_retailers': liters,
+    }
+
+
+# ==================== Signals ====================
+
+def _on_aggregation_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """ProcurementLot.parent_lots changed (either side of the relation)"""
+    if action == 'post_add' and pk_set:
+        for pk in pk_set:
+            parent_id, child_id = (instance.pk, pk) if reverse else (pk, instance.pk)
+            add_edge(
+                Node(LineageLink.NODE_LOT, parent_id), Node(LineageLink.NODE_LOT, child_id),
+                LineageLink.EDGE_AGGREGATION
+            )
+    elif action in ('post_remove', 'post_clear'):
+        if reverse:
+            # The parent lost children; clear() does not say which, the closure still does
+            child_ids = pk_set or _descendant_links(Node(LineageLink.NODE_LOT, instance.pk)).filter(
+                depth=1, edge_type=LineageLink.EDGE_AGGREGATION
+            ).values_list('descendant_id', flat=True)
+            children = {Node(LineageLink.NODE_LOT, child_id) for child_id in child_ids}
+        else:
+            children = {Node(LineageLink.NODE_LOT, instance.pk)}
+        for child in children:
+            rebuild_subtree(child)
+
+
+def _on_node_saved(sender, instance, created, **kwargs):
+    """Link new batches and products to their parent; re-link when the parent changes"""
+    node = node_for(instance)
+    parent_type = LineageLink.NODE_LOT if node.type == LineageLink.NODE_BATCH else LineageLink.NODE_BATCH
+    parent_id = instance.lot_id if node.type == LineageLink.NODE_BATCH else instance.batch_id
+    edge_type = LineageLink.EDGE_PROCESSING if node.type == LineageLink.NODE_BATCH else LineageLink.EDGE_OUTPUT
+
+    if created:
+        if parent_id:
+            add_edge(Node(parent_type, parent_id), node, edge_type)
+        return
+    current = set(_ancestor_links(node).filter(depth=1).values_list('ancestor_id', flat=True))
+    if current != ({parent_id} if parent_id else set()):
+        rebuild_subtree(node)
+
+
+def _on_order_item_saved(sender, instance, created, **kwargs):
+    if created:
+        add_edge(
+            Node(LineageLink.NODE_PROCESSED_PRODUCT, instance.product_id),
+            Node(LineageLink.NODE_RETAILER_ORDER, instance.order_id),
+            LineageLink.EDGE_SALE
+        )
+
+
+def _on_order_item_deleted(sender, instance, **kwargs):
+    rebuild_subtree(Node(LineageLink.NODE_RETAILER_ORDER, instance.order_id))
+
+
+def _on_node_deleted(sender, instance, **kwargs):
+    remove_node(node_for(instance))
+
+
+def connect_lineage_signals():
+    from django.apps import apps
+
+    ProcurementLot = apps.get_model(NODE_MODELS[LineageLink.NODE_LOT])
+    m2m_changed.connect(
+        _on_aggregation_change, sender=ProcurementLot.parent_lots.through, dispatch_uid='lineage_aggregation'
+    )
+    for node_type in (LineageLink.NODE_BATCH, LineageLink.NODE_FINISHED_PRODUCT, LineageLink.NODE_PROCESSED_PRODUCT):
+        post_save.connect(_on_node_saved, sender=_model(node_type), dispatch_uid=f'lineage_save_{node_type}')
+
+    OrderItem = apps.get_model('retailers.OrderItem')
+    post_save.connect(_on_order_item_saved, sender=OrderItem, dispatch_uid='lineage_order_item_save')
+    post_delete.connect(_on_order_item_deleted, sender=OrderItem, dispatch_uid='lineage_order_item_delete')
+
+    for node_type in NODE_MODELS:
+        post_delete.connect(_on_node_deleted, sender=_model(node_type), dispatch_uid=f'lineage_delete_{node_type}')
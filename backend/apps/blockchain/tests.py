@@ -1,3 +1,118 @@
+import datetime
+from decimal import Decimal
+
 from django.test import TestCase
 
-# Create your tests here.
+from apps.farmers.models import FarmerProfile
+from apps.lots.models import ProcurementLot
+from apps.processors.models import ProcessingPlant, ProcessingBatch, FinishedProduct, ProcessedProduct, ProcessorProfile
+from apps.retailers.models import RetailerProfile, RetailerOrder, OrderItem
+from apps.users.models import User
+from .models import LineageLink
+from .services import backfill_lineage
+
+
+class LineageClosureTests(TestCase):
+    """The closure table kept by the signals matches a full rebuild from the source models"""
+
+    def setUp(self):
+        farmer = FarmerProfile.objects.create(
+            user=User.objects.create_user('9000000301', 'farmer'), full_name='Lineage Farmer',
+            total_land_acres=Decimal('2.5'), farming_experience_years=5, district='Indore', state='madhya_pradesh',
+        )
+        self.processor = ProcessorProfile.objects.create(
+            user=User.objects.create_user('9000000302', 'processor'), company_name='Lineage Mills',
+            contact_person='Mill Contact', phone='9000000302', email='mills@example.com', address='Industrial Area',
+            city='Indore', state='madhya_pradesh', processing_capacity_quintals_per_day=Decimal('100'),
+        )
+        self.retailer = RetailerProfile.objects.create(
+            user=User.objects.create_user('9000000303', 'retailer'), business_name='Lineage Retail',
+            contact_person='Shop Contact', phone='9000000303', email='shop@example.com', address='Main Market',
+            city='Indore', state='madhya_pradesh',
+        )
+        self.lots = [
+            ProcurementLot.objects.create(
+                farmer=farmer, crop_type='soybean', quantity_quintals=Decimal('10'),
+                available_quantity_quintals=Decimal('10'), quality_grade='A',
+                expected_price_per_quintal=Decimal('4500'), harvest_date=datetime.date(2026, 10, 1),
+            )
+            for _ in range(4)
+        ]
+        self.plant = ProcessingPlant.objects.create(
+            processor=self.processor, plant_name='Plant 1', address='Industrial Area', city='Indore',
+            state='madhya_pradesh', capacity_quintals_per_day=Decimal('10'),
+        )
+
+    def _product(self, batch, sku):
+        today = datetime.date(2026, 10, 15)
+        return ProcessedProduct.objects.create(
+            processor=self.processor, batch=batch, product_type='soybean_oil', processing_type='refined',
+            batch_number=batch.batch_number, sku=sku, quantity_liters=Decimal('100'),
+            available_quantity_liters=Decimal('100'), quality_grade='standard', packaging_type='bottle_1l',
+            packaging_date=today, manufacturing_date=today, expiry_date=today + datetime.timedelta(days=365),
+            cost_price_per_liter=Decimal('1'), selling_price_per_liter=Decimal('2'), storage_location='Store 1',
+        )
+
+    def _order(self, number, *products):
+        order = RetailerOrder.objects.create(
+            order_number=number, retailer=self.retailer, processor=self.processor, subtotal=Decimal('80'),
+            total_amount=Decimal('80'), delivery_address='Main Market', delivery_city='Indore',
+            delivery_state='madhya_pradesh', delivery_pincode='452001',
+        )
+        items = [
+            OrderItem.objects.create(
+                order=order, product=product, quantity_liters=Decimal('40'), unit_price=Decimal('2'),
+                subtotal=Decimal('80'), product_name='Soybean Oil', product_type='soybean_oil',
+                batch_number=product.batch_number,
+            )
+            for product in products
+        ]
+        return order, items
+
+    def _closure(self):
+        return set(LineageLink.objects.values_list(
+            'ancestor_type', 'ancestor_id', 'descendant_type', 'descendant_id', 'depth', 'edge_type'
+        ))
+
+    def assertMatchesBackfill(self):
+        incremental = self._closure()
+        backfill_lineage(progress=lambda message: None)
+        self.assertEqual(incremental, self._closure())
+
+    def test_closure_matches_backfill_after_edge_removals(self):
+        aggregate, first, second, third = self.lots
+        aggregate.parent_lots.add(first, second)
+        second.parent_lots.add(third)
+        batch = ProcessingBatch.objects.create(
+            plant=self.plant, lot=aggregate, batch_number='LB-1', initial_quantity_quintals=Decimal('10')
+        )
+        FinishedProduct.objects.create(
+            processor=self.processor, batch=batch, product_type='crude_oil', quantity_liters=Decimal('100'),
+            storage_location='Store 1', production_date=datetime.date(2026, 10, 15),
+        )
+        oil, other_oil = self._product(batch, 'SKU-LB-1'), self._product(batch, 'SKU-LB-2')
+        order, items = self._order('LO-1', oil, other_oil)
+
+        # third reaches the order through second, the aggregate, the batch and a product
+        self.assertEqual(
+            LineageLink.objects.get(ancestor_id=third.id, descendant_id=order.id).depth, 5
+        )
+        self.assertMatchesBackfill()
+
+        aggregate.parent_lots.remove(second)
+        items[0].delete()
+        self.assertFalse(LineageLink.objects.filter(ancestor_id=third.id, descendant_id=order.id).exists())
+        self.assertFalse(LineageLink.objects.filter(ancestor_id=oil.id, descendant_id=order.id).exists())
+        self.assertMatchesBackfill()
+
+    def test_closure_matches_backfill_after_clearing_parents(self):
+        aggregate, first, second, third = self.lots
+        aggregate.parent_lots.add(first, second, third)
+        batch = ProcessingBatch.objects.create(
+            plant=self.plant, lot=aggregate, batch_number='LB-2', initial_quantity_quintals=Decimal('10')
+        )
+        self._order('LO-2', self._product(batch, 'SKU-LB-3'))
+
+        aggregate.parent_lots.clear()
+        self.assertFalse(LineageLink.objects.filter(ancestor_id=first.id).exists())
+        self.assertMatchesBackfill()
@@ -1,7 +1,9 @@
 """Blockchain URLs"""
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import BlockchainTransactionViewSet, TraceabilityRecordViewSet, QRCodeViewSet
+from .views import (
+    BlockchainTransactionViewSet, TraceabilityRecordViewSet, QRCodeViewSet, LineageAPIView, RecallImpactAPIView
+)
 
 router = DefaultRouter()
 router.register(r'transactions', BlockchainTransactionViewSet, basename='blockchain-transaction')
@@ -9,4 +11,8 @@ router.register(r'traceability', TraceabilityRecordViewSet, basename='traceabili
 router.register(r'qr-codes', QRCodeViewSet, basename='qr-code')
 
 app_name = 'blockchain'
-urlpatterns = [path('', include(router.urls))]
+urlpatterns = [
+    path('lineage/<str:node_type>/<uuid:node_id>/', LineageAPIView.as_view(), name='lineage'),
+    path('recall-impact/<str:node_type>/<uuid:node_id>/', RecallImpactAPIView.as_view(), name='recall-impact'),
+    path('', include(router.urls)),
+]
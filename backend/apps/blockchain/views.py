@@ -1,10 +1,15 @@
 """Blockchain Views"""
-from django.utils import timezone
+from django.core.exceptions import ObjectDoesNotExist
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from .models import BlockchainTransaction, TraceabilityRecord, QRCode
+from rest_framework.views import APIView
+from apps.core.cache import cache_response
+from apps.core.permissions import IsGovernment, IsFPOOrProcessor
+from apps.core.utils import response_success, response_error
+from .models import BlockchainTransaction, TraceabilityRecord, QRCode, LineageLink
+from .services import Node, get_lineage, recall_impact
 from .serializers import BlockchainTransactionSerializer, TraceabilityRecordSerializer, QRCodeSerializer
 
 class BlockchainTransactionViewSet(viewsets.ReadOnlyModelViewSet):
@@ -18,6 +23,7 @@ class TraceabilityRecordViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     
     @action(detail=True, methods=['get'])
+    @cache_response(ttl=300, vary_on=[], tags=['traceability_record:{pk}'])
     def trace(self, request, pk=None):
         record = self.get_object()
         return Response(record.journey)
@@ -30,7 +36,63 @@ class QRCodeViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=True, methods=['post'])
     def scan(self, request, pk=None):
         qr = self.get_object()
-        qr.scan_count += 1
-        qr.last_scanned_at = timezone.now()
-        qr.save()
+        qr.increment_scan_count()
         return Response({'scan_count': qr.scan_count})
+
+
+def _lineage_node(node_type, node_id):
+    if node_type not in dict(LineageLink.NODE_TYPES):
+        return None
+    return Node(node_type, node_id)
+
+
+class LineageAPIView(APIView):
+    """
+    Upstream and downstream lineage of a lot, batch, product or retailer order
+    GET /api/blockchain/lineage/<node_type>/<id>/?direction=both|upstream|downstream&max_depth=N
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, node_type, node_id):
+        node = _lineage_node(node_type, node_id)
+        direction = request.query_params.get('direction', 'both')
+        if node is None or direction not in ('both', 'upstream', 'downstream'):
+            return Response(
+                response_error(
+                    message="Invalid lineage query",
+                    errors={'node_type': [t for t, _ in LineageLink.NODE_TYPES], 'direction': ['both', 'upstream', 'downstream']}
+                ),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            max_depth = int(request.query_params['max_depth']) if request.query_params.get('max_depth') else None
+            lineage = get_lineage(node, direction, max_depth)
+        except ValueError:
+            return Response(response_error(message="max_depth must be an integer"), status=status.HTTP_400_BAD_REQUEST)
+        except ObjectDoesNotExist:
+            return Response(response_error(message=f"{node_type} not found"), status=status.HTTP_404_NOT_FOUND)
+        
+        return Response(response_success(message="Lineage retrieved", data=lineage))
+
+
+class RecallImpactAPIView(APIView):
+    """
+    Everything downstream of a node that a recall must reach: batches,
+    products, retailer orders and the retailers' contacts
+    GET /api/blockchain/recall-impact/<node_type>/<id>/
+    """
+    permission_classes = [IsAuthenticated, IsGovernment | IsFPOOrProcessor]
+    
+    def get(self, request, node_type, node_id):
+        node = _lineage_node(node_type, node_id)
+        if node is None:
+            return Response(
+                response_error(message="Invalid node type", errors={'node_type': [t for t, _ in LineageLink.NODE_TYPES]}),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            impact = recall_impact(node)
+        except ObjectDoesNotExist:
+            return Response(response_error(message=f"{node_type} not found"), status=status.HTTP_404_NOT_FOUND)
+        
+        return Response(response_success(message="Recall impact computed", data=impact))
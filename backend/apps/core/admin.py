@@ -1,3 +1,17 @@
 from django.contrib import admin
+from .models import SequenceCounter, SearchDocument
 
-# Register your models here.
+
+@admin.register(SequenceCounter)
+class SequenceCounterAdmin(admin.ModelAdmin):
+    list_display = ['prefix', 'period', 'last_value', 'updated_at']
+    list_filter = ['prefix']
+    search_fields = ['prefix', 'period']
+    readonly_fields = ['last_value', 'created_at', 'updated_at']
+
+
+@admin.register(SearchDocument)
+class SearchDocumentAdmin(admin.ModelAdmin):
+    list_display = ['entity_type', 'title', 'state', 'district', 'status', 'updated_at']
+    list_filter = ['entity_type']
+    readonly_fields = ['updated_at']
@@ -8,3 +8,13 @@ class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.core'
     verbose_name = 'Core'
+
+    def ready(self):
+        from apps.core.services.profile_service import connect_profile_signals
+        connect_profile_signals()
+
+        from apps.core.services.search_service import connect_search_signals
+        connect_search_signals()
+
+        from apps.core.sqlite_tuning import connect_sqlite_tuning
+        connect_sqlite_tuning()
@@ -0,0 +1,26 @@
+"""
+Benchmark Suite for SeedSync Platform
+Synthetic data generation, endpoint scenarios and diffable reports
+
+    python manage.py generate_benchmark_data --scale small
+    python manage.py run_benchmarks --output bench/HEAD.json --compare bench/main.json
+    python manage.py compare_benchmarks bench/main.json bench/HEAD.json
+    python manage.py run_write_benchmark --writers 8
+    python manage.py run_routing_benchmark --lots 500
+    python manage.py run_render_benchmark --rows 100000
+"""
+from .synthetic import SCALES, SYNTHETIC_PHONE_PREFIX, SyntheticDataGenerator
+from .scenarios import SCENARIOS, Scenario, build_context, run_scenario
+from .report import build_report, compare_reports, dump_report, load_report, percentile
+from .concurrency import DEFAULT_PHASES, WRITE_PROFILES, run_write_benchmark
+from .routing import make_instance, run_routing_benchmark
+from .rendering import run_render_benchmark
+
+__all__ = [
+    'SCALES', 'SYNTHETIC_PHONE_PREFIX', 'SyntheticDataGenerator',
+    'SCENARIOS', 'Scenario', 'build_context', 'run_scenario',
+    'build_report', 'compare_reports', 'dump_report', 'load_report', 'percentile',
+    'DEFAULT_PHASES', 'WRITE_PROFILES', 'run_write_benchmark',
+    'make_instance', 'run_routing_benchmark',
+    'run_render_benchmark',
+]
@@ -0,0 +1,189 @@
+"""
+Concurrent Write Benchmark
+N writer threads appending ledger entries and bumping a shared counter
+
+Runs against a throwaway SQLite database (migrated and seeded once, then
+copied per phase), never the configured one. Each phase combines a pragma
+profile with a write mode:
+
+    direct  - every writer commits its own transaction, as request threads do
+    queued  - writers hand their writes to one SerialWriteQueue and wait
+
+A write is one BlockchainTransaction append (hash-chained per lot, with the
+lot's journey refreshed) plus one allocate_sequence() bump, the same work a
+procurement event does. Writers share a small pool of lots, so chains are
+contended; forked_chains counts lots where two entries claim the same
+previous hash.
+"""
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Count
+from django.test.utils import override_settings
+
+from apps.core.sqlite_tuning import current_pragmas
+from apps.core.write_queue import SerialWriteQueue
+from .report import percentile
+
+logger = logging.getLogger(__name__)
+
+# Driver defaults: rollback journal, fsync on every commit
+STOCK_PRAGMAS = {'journal_mode': 'delete', 'synchronous': 'full'}
+
+WRITE_PROFILES = {
+    'stock': lambda: STOCK_PRAGMAS,
+    'tuned': lambda: settings.SQLITE_PRAGMAS or STOCK_PRAGMAS,
+}
+
+DEFAULT_PHASES = [('stock', 'direct'), ('tuned', 'direct'), ('tuned', 'queued')]
+
+# Logs each failed job; silenced while writers run
+_NOISY_LOGGERS = ['apps.core.write_queue']
+
+
+def _point_default_at(path):
+    connections[DEFAULT_DB_ALIAS].close()
+    connections[DEFAULT_DB_ALIAS].settings_dict['NAME'] = path
+    settings.DATABASES[DEFAULT_DB_ALIAS]['NAME'] = path
+
+
+def prepare_template(directory, lots):
+    """Migrate a fresh database in `directory` and seed `lots` lots on it"""
+    from .synthetic import SyntheticDataGenerator
+
+    connection = connections[DEFAULT_DB_ALIAS]
+    path = os.path.join(directory, 'template.sqlite3')
+    connection.settings_dict.setdefault('TEST', {})['NAME'] = path
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+    SyntheticDataGenerator(
+        farmers=max(10, lots // 2), fpos=2, processors=2, retailers=1,
+        lots=lots, bids=0, transactions=0, mandi_days=1, progress=lambda message: None,
+    ).run()
+    connection.close()
+    return path
+
+
+def _write_once(lot, writer, sequence):
+    """record_blockchain_transaction() without its error handling, plus a counter bump"""
+    from apps.blockchain.models import BlockchainTransaction, TraceabilityRecord
+    from apps.core.constants import BLOCKCHAIN_QUALITY_CHECKED
+    from apps.core.services import allocate_sequence
+    from apps.core.utils import generate_hash
+
+    with transaction.atomic():
+        BlockchainTransaction.objects.create(
+            transaction_id=generate_hash(f'{lot.id}:{writer}:{sequence}'),
+            lot=lot, action_type=BLOCKCHAIN_QUALITY_CHECKED, actor_id=uuid.UUID(int=writer + 1),
+            actor_role='system', actor_name=f'writer-{writer}',
+            transaction_data={'event': 'benchmark', 'writer': writer, 'sequence': sequence},
+        )
+        TraceabilityRecord.objects.get_or_create(lot=lot)[0].update_journey()
+        allocate_sequence('BENCH', 'writes')
+
+
+def _writer(index, lots, writes, write_queue, barrier, latencies, errors):
+    try:
+        barrier.wait()
+        for sequence in range(writes):
+            lot = lots[(index + sequence) % len(lots)]
+            started = time.perf_counter()
+            try:
+                if write_queue is None:
+                    _write_once(lot, index, sequence)
+                else:
+                    write_queue.submit(_write_once, lot, index, sequence).result()
+            except Exception as e:
+                errors.append(type(e).__name__ if 'locked' not in str(e) else 'database is locked')
+            else:
+                latencies.append((time.perf_counter() - started) * 1000)
+    finally:
+        connections.close_all()
+
+
+def run_phase(template, directory, profile, mode, writers=8, writes=200, contended_lots=16):
+    """Copy the template, apply `profile`, run the writers; returns a result dict"""
+    from apps.blockchain.models import BlockchainTransaction
+    from apps.lots.models import ProcurementLot
+
+    path = os.path.join(directory, f'{profile}-{mode}.sqlite3')
+    shutil.copyfile(template, path)
+    _point_default_at(path)
+
+    with override_settings(SQLITE_PRAGMAS=WRITE_PROFILES[profile]()):
+        lots = list(ProcurementLot.objects.order_by('lot_number')[:contended_lots])
+        pragmas = current_pragmas(connections[DEFAULT_DB_ALIAS], ['journal_mode', 'synchronous', 'busy_timeout'])
+        connections[DEFAULT_DB_ALIAS].close()
+
+        write_queue = SerialWriteQueue(batch_size=settings.WRITE_QUEUE_BATCH_SIZE) if mode == 'queued' else None
+        barrier = threading.Barrier(writers + 1)
+        latencies, errors = [], []
+        threads = [
+            threading.Thread(target=_writer, args=(index, lots, writes, write_queue, barrier, latencies, errors))
+            for index in range(writers)
+        ]
+        levels = {name: logging.getLogger(name).level for name in _NOISY_LOGGERS}
+        for name in _NOISY_LOGGERS:
+            logging.getLogger(name).setLevel(logging.CRITICAL)
+        try:
+            for thread in threads:
+                thread.start()
+            barrier.wait()
+            started = time.perf_counter()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+        finally:
+            if write_queue is not None:
+                write_queue.stop()
+            for name, level in levels.items():
+                logging.getLogger(name).setLevel(level)
+
+        forked = BlockchainTransaction.objects.filter(lot__in=lots).values('lot_id', 'previous_hash').annotate(
+            claims=Count('id')
+        ).filter(claims__gt=1).values('lot_id').distinct().count()
+        connections[DEFAULT_DB_ALIAS].close()
+
+    error_counts = {}
+    for error in errors:
+        error_counts[error] = error_counts.get(error, 0) + 1
+    return {
+        'profile': profile,
+        'mode': mode,
+        'pragmas': pragmas,
+        'writers': writers,
+        'attempted': writers * writes,
+        'committed': len(latencies),
+        'errors': error_counts,
+        'duration_s': round(elapsed, 3),
+        'writes_per_s': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'p50_ms': round(percentile(latencies, 0.5), 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 0.95), 2) if latencies else None,
+        'forked_chains': forked,
+    }
+
+
+def run_write_benchmark(phases=None, writers=8, writes=200, contended_lots=16):
+    """Run each (profile, mode) phase on its own copy of a seeded database"""
+    if connections[DEFAULT_DB_ALIAS].vendor != 'sqlite':
+        raise ValueError("The write benchmark measures SQLite; the default database is "
+                         f"{connections[DEFAULT_DB_ALIAS].vendor}")
+
+    original_name = settings.DATABASES[DEFAULT_DB_ALIAS]['NAME']
+    directory = tempfile.mkdtemp(prefix='seedsync-writes-')
+    try:
+        template = prepare_template(directory, contended_lots)
+        return [
+            run_phase(template, directory, profile, mode, writers, writes, contended_lots)
+            for profile, mode in (phases or DEFAULT_PHASES)
+        ]
+    finally:
+        _point_default_at(original_name)
+        shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,151 @@
+"""
+JSON Rendering Benchmark
+100k-row analytics payloads through DRF's JSONRenderer and FastJSONRenderer
+
+Two payload shapes, both seeded and built in memory:
+  rows      map-marker dicts (UUID, Decimal coordinates, datetime, str, bool),
+            as EntityLocationsAPIView and FarmerRegistryAPIView return them
+  columnar  a DataFrame of forecast columns, as the advisories insights
+            return it through dataframe_to_columnar_json
+
+Each shape is timed three ways: the old path (values converted one by one
+with float()/str()/isoformat()/.item(), then JSONRenderer), and the raw
+rows or NumPy columns through JSONRenderer and through FastJSONRenderer.
+Timings cover conversion plus rendering. Nothing touches the database.
+"""
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+from rest_framework.renderers import JSONRenderer
+
+from apps.core.renderers import FastJSONRenderer, orjson
+from .report import percentile
+
+STATES = ['Gujarat', 'Rajasthan', 'Madhya Pradesh', 'Maharashtra', 'Karnataka', 'Andhra Pradesh']
+CROPS = ['groundnut', 'mustard', 'soybean', 'sunflower', 'sesame', 'castor']
+
+
+def make_rows(rows, seed=1):
+    """Map-marker rows as .values() returns them"""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+    return [
+        {
+            'id': uuid.UUID(int=rng.getrandbits(128), version=4),
+            'entity_type': 'farmer',
+            'name': f'Farmer {index}',
+            'latitude': Decimal(f'{rng.uniform(8, 32):.6f}'),
+            'longitude': Decimal(f'{rng.uniform(68, 92):.6f}'),
+            'state': rng.choice(STATES),
+            'total_land': Decimal(f'{rng.uniform(0.5, 25):.2f}'),
+            'is_verified': rng.random() < 0.6,
+            'created_at': start + timedelta(seconds=rng.randrange(0, 86400 * 365)),
+        }
+        for index in range(rows)
+    ]
+
+
+def convert_rows(rows):
+    """The per-value conversions the views did before handing rows to the renderer"""
+    return [
+        {
+            'id': str(row['id']),
+            'entity_type': row['entity_type'],
+            'name': row['name'],
+            'latitude': float(row['latitude']),
+            'longitude': float(row['longitude']),
+            'state': row['state'],
+            'total_land': float(row['total_land']),
+            'is_verified': row['is_verified'],
+            'created_at': row['created_at'].isoformat(),
+        }
+        for row in rows
+    ]
+
+
+def make_frame(rows, seed=1):
+    """Forecast-style DataFrame: categorical text, integer periods, float measures"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'crop_type': rng.choice(CROPS, rows),
+        'state': rng.choice(STATES, rows),
+        'year': rng.integers(2020, 2026, rows),
+        'month': rng.integers(1, 13, rows),
+        'demand_quintals': rng.uniform(10, 5000, rows).round(2),
+        'supply_quintals': rng.uniform(10, 5000, rows).round(2),
+        'avg_price': rng.uniform(3000, 9000, rows).round(2),
+        'demand_supply_gap': rng.normal(0, 800, rows).round(2),
+    })
+
+
+def legacy_columnar(df):
+    """dataframe_to_columnar_json as it was: every value boxed and .item()'d"""
+    result = {}
+    for column in df.columns:
+        values = df[column].astype(object).where(pd.notnull(df[column]), None).tolist()
+        result[column] = [v.item() if hasattr(v, 'item') else v for v in values]
+    return result
+
+
+def _time(build, renderer, repeats):
+    """Timings (ms) of building and rendering the payload, and the last output"""
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        body = renderer.render(build())
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings, body
+
+
+def run_render_benchmark(rows=100_000, repeats=5, seed=1):
+    """Render both payload shapes each way; returns per-path rows and a summary"""
+    # Imported here: the advisories module loads statsmodels
+    from apps.advisories.utils.demand_forecast import dataframe_to_columnar_json
+
+    records = make_rows(rows, seed)
+    frame = make_frame(rows, seed)
+    drf, fast = JSONRenderer(), FastJSONRenderer()
+    paths = [
+        ('rows', 'converted+drf', lambda: convert_rows(records), drf),
+        ('rows', 'raw+drf', lambda: records, drf),
+        ('rows', 'raw+fast', lambda: records, fast),
+        ('columnar', 'converted+drf', lambda: legacy_columnar(frame), drf),
+        ('columnar', 'numpy+drf', lambda: dataframe_to_columnar_json(frame), drf),
+        ('columnar', 'numpy+fast', lambda: dataframe_to_columnar_json(frame), fast),
+    ]
+
+    results, bodies = [], {}
+    for payload, path, build, renderer in paths:
+        timings, body = _time(build, renderer, repeats)
+        bodies[payload, path] = body
+        results.append({
+            'payload': payload,
+            'path': path,
+            'rows': rows,
+            'ms_p50': round(percentile(timings, 0.5), 1),
+            'ms_min': round(min(timings), 1),
+            'bytes': len(body),
+        })
+
+    def speedup(payload, baseline, candidate):
+        p50 = {(row['payload'], row['path']): row['ms_p50'] for row in results}
+        return round(p50[payload, baseline] / max(p50[payload, candidate], 0.1), 1)
+
+    summary = {
+        'rows': rows,
+        'orjson': orjson is not None,
+        'rows_speedup': speedup('rows', 'converted+drf', 'raw+fast'),
+        'columnar_speedup': speedup('columnar', 'converted+drf', 'numpy+fast'),
+        # Same document either way, once parsed
+        'rows_match': json.loads(bodies['rows', 'raw+fast']) == json.loads(bodies['rows', 'raw+drf']),
+        'columnar_match': (
+            json.loads(bodies['columnar', 'numpy+fast']) == json.loads(bodies['columnar', 'converted+drf'])
+        ),
+    }
+    return results, summary
@@ -0,0 +1,141 @@
+"""
+Benchmark Reports
+Per-scenario latency percentiles and query counts, stored as stable JSON
+so reports from two commits can be diffed or compared
+"""
+import json
+import subprocess
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+REPORT_VERSION = 1
+
+
+def percentile(values, fraction):
+    """Linear-interpolated percentile of values (fraction in 0..1)"""
+    values = sorted(values)
+    if not values:
+        return None
+    position = (len(values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def summarize(result):
+    """Stats for one run_scenario() result"""
+    samples = result['samples']
+    latencies = [sample['latency_ms'] for sample in samples]
+    queries = [sample['queries'] for sample in samples]
+    status_codes = {}
+    for sample in samples:
+        status_codes[str(sample['status'])] = status_codes.get(str(sample['status']), 0) + 1
+
+    return {
+        'path': result['path'],
+        'role': result['role'],
+        'requests': len(samples),
+        'errors': sum(1 for sample in samples if sample['status'] >= 400),
+        'status_codes': status_codes,
+        'p50_ms': round(percentile(latencies, 0.5), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'mean_ms': round(sum(latencies) / len(latencies), 2),
+        'max_ms': round(max(latencies), 2),
+        'db_ms_per_request': round(sum(sample['db_ms'] for sample in samples) / len(samples), 2),
+        'queries_per_request': round(sum(queries) / len(queries), 2),
+        'max_queries': max(queries),
+        'query_budget': result['query_budget'],
+        'response_bytes': samples[-1]['bytes'],
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def row_counts():
+    """Sizes of the tables the scenarios read, to tell data sets apart"""
+    from apps.bids.models import Bid
+    from apps.blockchain.models import BlockchainTransaction
+    from apps.crops.models import MandiPrice
+    from apps.farmers.models import FarmerProfile
+    from apps.fpos.models import FPOProfile
+    from apps.lots.models import ProcurementLot
+
+    models = [FarmerProfile, FPOProfile, ProcurementLot, Bid, BlockchainTransaction, MandiPrice]
+    return {model._meta.db_table: model.objects.count() for model in models}
+
+
+def build_report(results, iterations, warmup, response_cache):
+    """results: {scenario name: run_scenario() result}"""
+    return {
+        'version': REPORT_VERSION,
+        'meta': {
+            'generated_at': timezone.now().isoformat(timespec='seconds'),
+            'git_commit': _git_commit(),
+            'database': connection.vendor,
+            'iterations': iterations,
+            'warmup': warmup,
+            'response_cache': response_cache,
+            'row_counts': row_counts(),
+        },
+        'scenarios': {name: summarize(result) for name, result in sorted(results.items())},
+    }
+
+
+def dump_report(report, path):
+    with open(path, 'w') as handle:
+        json.dump(report, handle, indent=2, sort_keys=True)
+        handle.write('\n')
+
+
+def load_report(path):
+    with open(path) as handle:
+        report = json.load(handle)
+    if report.get('version') != REPORT_VERSION:
+        raise ValueError(f"{path}: unsupported report version {report.get('version')}")
+    return report
+
+
+def compare_reports(baseline, current, threshold=10.0):
+    """
+    Per-scenario changes between two reports
+    A scenario regresses when p95 grows by more than `threshold` percent or
+    it runs more queries per request than before.
+    """
+    rows = []
+    for name in sorted(set(baseline['scenarios']) | set(current['scenarios'])):
+        before = baseline['scenarios'].get(name)
+        after = current['scenarios'].get(name)
+        if before is None or after is None:
+            rows.append({'scenario': name, 'missing': 'baseline' if before is None else 'current'})
+            continue
+
+        def change(field):
+            if not before[field]:
+                return None
+            return round((after[field] - before[field]) / before[field] * 100, 1)
+
+        row = {
+            'scenario': name,
+            'p50_ms': (before['p50_ms'], after['p50_ms'], change('p50_ms')),
+            'p95_ms': (before['p95_ms'], after['p95_ms'], change('p95_ms')),
+            'p99_ms': (before['p99_ms'], after['p99_ms'], change('p99_ms')),
+            'queries_per_request': (before['queries_per_request'], after['queries_per_request']),
+        }
+        p95_change = row['p95_ms'][2]
+        row['regression'] = (
+            (p95_change is not None and p95_change > threshold)
+            or after['queries_per_request'] > before['queries_per_request']
+        )
+        rows.append(row)
+    return rows
@@ -0,0 +1,81 @@
+"""
+Route Consolidation Benchmark
+Seeded random CVRP instances solved by apps.logistics route_optimizer
+
+Each instance scatters `lots` pickups of 2-20 quintals around a depot, the
+way an FPO's member farms surround its collection centre, and offers a mixed
+fleet that needs two of its three allowed trips. Reported per instance: solve time,
+plan distance and cost against one shipment per lot, routes, utilisation.
+Nothing touches the database.
+"""
+import random
+
+from apps.logistics.services.route_optimizer import Stop, VehicleSlot, plan_routes
+from .report import percentile
+
+# (vehicle_type, capacity in quintals): 3, 7 and 15 ton trucks
+DEFAULT_FLEET = [('small_truck', 30), ('medium_truck', 70), ('large_truck', 150)]
+LOT_SIZES = [2, 3, 5, 8, 10, 12, 15, 20]
+
+
+def make_instance(seed, lots=500, radius_deg=0.5, clusters=8, depot=(17.385, 78.487)):
+    """Lots grouped in village clusters around the depot, and a fleet that covers them in two trips"""
+    rng = random.Random(seed)
+    centres = [
+        (depot[0] + rng.uniform(-radius_deg, radius_deg), depot[1] + rng.uniform(-radius_deg, radius_deg))
+        for _ in range(clusters)
+    ]
+    stops = []
+    for index in range(lots):
+        latitude, longitude = rng.choice(centres)
+        stops.append(Stop(
+            f'lot-{index}',
+            latitude + rng.gauss(0, radius_deg / 10),
+            longitude + rng.gauss(0, radius_deg / 10),
+            rng.choice(LOT_SIZES),
+        ))
+
+    # One trip of every vehicle carries half the demand; the same count of each size
+    demand = sum(stop.quantity for stop in stops)
+    per_size = max(1, round(demand / 2 / sum(capacity for _, capacity in DEFAULT_FLEET)))
+    vehicles = [
+        VehicleSlot(f'{vehicle_type}-{number}', vehicle_type, capacity)
+        for vehicle_type, capacity in DEFAULT_FLEET
+        for number in range(per_size)
+    ]
+    return depot, stops, vehicles
+
+
+def run_routing_benchmark(lots=500, instances=5, seed=1, max_trips=3):
+    """Solve `instances` seeded instances; returns per-instance rows and a summary"""
+    rows = []
+    for offset in range(instances):
+        depot, stops, vehicles = make_instance(seed + offset, lots)
+        plan = plan_routes(depot, stops, vehicles, max_trips=max_trips)
+        loads = [route['utilisation_percent'] for route in plan['routes']]
+        rows.append({
+            'seed': seed + offset,
+            'lots': lots,
+            'vehicles': len(vehicles),
+            'method': plan['method'],
+            'solve_ms': plan['solve_ms'],
+            'routes': len(plan['routes']),
+            'unserved': len(plan['unserved']),
+            'distance_km': plan['total_distance_km'],
+            'baseline_distance_km': plan['baseline']['distance_km'],
+            'cost': plan['total_cost'],
+            'baseline_cost': plan['baseline']['cost'],
+            'savings_percent': plan['savings_percent'],
+            'mean_utilisation_percent': round(sum(loads) / len(loads), 1) if loads else None,
+        })
+
+    times = [row['solve_ms'] for row in rows]
+    summary = {
+        'instances': len(rows),
+        'lots': lots,
+        'solve_ms_p50': round(percentile(times, 0.5), 1),
+        'solve_ms_max': max(times),
+        'savings_percent_mean': round(sum(row['savings_percent'] for row in rows) / len(rows), 1),
+        'unserved_total': sum(row['unserved'] for row in rows),
+    }
+    return rows, summary
@@ -0,0 +1,129 @@
+"""
+Benchmark Scenarios
+Read endpoints exercised through Django's test client as real role users
+
+Paths may reference the scenario context (see build_context), e.g.
+{crop_type} or {trace_id}. Requests carry a real JWT, so authentication
+costs the same as in production.
+"""
+import time
+from collections import namedtuple
+
+from django.db.models import Count
+from django.urls import resolve
+
+from apps.core import instrumentation
+
+Scenario = namedtuple('Scenario', ['name', 'role', 'path'])
+
+SCENARIOS = [
+    # Dashboards
+    Scenario('government.dashboard', 'government', '/api/government/dashboard/'),
+    Scenario('government.fpo_monitoring', 'government', '/api/government/fpo-monitoring/'),
+    Scenario('government.procurement_analytics', 'government', '/api/government/procurement-analytics/'),
+    Scenario('government.market_prices', 'government', '/api/government/market-prices/'),
+    Scenario('fpo.dashboard', 'fpo', '/api/fpos/dashboard/'),
+    Scenario('processor.dashboard', 'processor', '/api/processors/dashboard/'),
+    Scenario('farmer.my_stats', 'farmer', '/api/farmers/profiles/my_stats/'),
+    # Marketplace
+    Scenario('lots.marketplace', 'processor', '/api/lots/procurement/marketplace/'),
+    Scenario('lots.list_cursor', 'processor', '/api/lots/procurement/?pagination=cursor&page_size=50'),
+    Scenario('lots.my_lots', 'farmer', '/api/lots/procurement/my_lots/'),
+    # Procurement
+    Scenario('fpo.procurement', 'fpo', '/api/fpos/procurement/'),
+    Scenario('processor.procurement', 'processor', '/api/processors/procurement/'),
+    Scenario('processor.bids', 'processor', '/api/processors/bids/'),
+    # Traceability
+    Scenario('blockchain.trace', 'processor', '/api/blockchain/traceability/{trace_id}/trace/'),
+    # Prices and forecasts
+    Scenario('crops.prices', 'farmer', '/api/crops/prices/?crop_type={crop_type}'),
+    Scenario('crops.price_trend', 'farmer', '/api/crops/price-trend/?crop_type={crop_type}'),
+    Scenario('advisories.market_forecast', 'farmer', '/api/advisories/market-forecast/?role=farmer'),
+    Scenario('advisories.crop_forecast', 'farmer', '/api/advisories/crop-forecast/?crop_type={crop_type}&days=30'),
+    Scenario('advisories.all_crops_forecast', 'farmer', '/api/advisories/all-crops-forecast/?days=30&top_crops=5'),
+]
+
+
+def _busiest(model, related, **filters):
+    """Profile with the most related rows: the worst case for per-user views"""
+    return model.objects.filter(**filters).annotate(
+        benchmark_rows=Count(related)
+    ).order_by('-benchmark_rows').select_related('user').first()
+
+
+def build_context():
+    """Users per role and ids the scenario paths refer to"""
+    from apps.blockchain.models import TraceabilityRecord
+    from apps.crops.models import DailyPriceSummary
+    from apps.farmers.models import FarmerProfile
+    from apps.fpos.models import FPOProfile
+    from apps.processors.models import ProcessorProfile
+    from apps.users.models import User
+
+    farmer = _busiest(FarmerProfile, 'lots')
+    fpo = _busiest(FPOProfile, 'procured_lots')
+    processor = ProcessorProfile.objects.select_related('user').first()
+    trace = TraceabilityRecord.objects.order_by('-total_transactions').only('id').first()
+    crop = DailyPriceSummary.objects.values('crop_type').annotate(
+        rows=Count('id')
+    ).order_by('-rows').values_list('crop_type', flat=True).first()
+
+    return {
+        'users': {
+            'government': User.objects.filter(role='government', is_active=True).first(),
+            'fpo': fpo.user if fpo else None,
+            'farmer': farmer.user if farmer else None,
+            'processor': processor.user if processor else None,
+            'anonymous': None,
+        },
+        'trace_id': trace.id if trace else None,
+        'crop_type': crop or 'soybean',
+    }
+
+
+def _client(user):
+    from rest_framework.test import APIClient
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    client = APIClient()
+    if user is not None:
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+    return client
+
+
+def run_scenario(scenario, context, iterations=20, warmup=2):
+    """
+    Time `iterations` GETs of one scenario (after `warmup` untimed ones)
+    Returns {path, role, query_budget, samples}, or None when the data set
+    has nothing for the scenario (e.g. no processor users).
+    """
+    user = context['users'].get(scenario.role)
+    if scenario.role != 'anonymous' and user is None:
+        return None
+    try:
+        path = scenario.path.format(**context)
+    except KeyError:
+        return None
+    if 'None' in path:
+        return None
+
+    client = _client(user)
+    budget = instrumentation.view_budget(resolve(path.split('?')[0]).func, 'GET')
+
+    for _ in range(warmup):
+        client.get(path)
+
+    samples = []
+    for _ in range(iterations):
+        with instrumentation.QueryCounter() as counter:
+            started = time.perf_counter()
+            response = client.get(path)
+            elapsed = time.perf_counter() - started
+        samples.append({
+            'latency_ms': elapsed * 1000,
+            'queries': counter.queries,
+            'db_ms': counter.db_seconds * 1000,
+            'status': response.status_code,
+            'bytes': instrumentation.response_size(response),
+        })
+    return {'path': path, 'role': scenario.role, 'query_budget': budget, 'samples': samples}
@@ -0,0 +1,554 @@
+"""
+Synthetic Data Generator
+Bulk-inserts a realistic oilseed value chain for load tests
+
+Everything is written with bulk_create in batches, bypassing model save()
+and signals, so derived values (bid totals, hash chains, traceability
+journeys, price summaries) are filled in here. Rows are spread over the
+past year with state/crop mixes close to India's oilseed production.
+Synthetic users are recognisable by SYNTHETIC_PHONE_PREFIX.
+"""
+import datetime
+import json
+import logging
+import random
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.utils import generate_hash
+
+logger = logging.getLogger(__name__)
+
+SYNTHETIC_PHONE_PREFIX = '600'
+
+SCALES = {
+    'small': {
+        'farmers': 1000, 'fpos': 20, 'processors': 20, 'retailers': 20,
+        'lots': 10000, 'bids': 10000, 'transactions': 50000, 'mandi_days': 90,
+    },
+    'medium': {
+        'farmers': 10000, 'fpos': 200, 'processors': 100, 'retailers': 100,
+        'lots': 100000, 'bids': 100000, 'transactions': 500000, 'mandi_days': 180,
+    },
+    'large': {
+        'farmers': 100000, 'fpos': 2000, 'processors': 500, 'retailers': 500,
+        'lots': 1000000, 'bids': 1000000, 'transactions': 5000000, 'mandi_days': 365,
+    },
+}
+
+# state -> (share of farmers, crop mix, districts, (lat, lng) centre)
+STATE_PROFILES = {
+    'rajasthan': (0.22, {'mustard': 0.55, 'groundnut': 0.2, 'soybean': 0.15, 'sesame': 0.1},
+                  ['Bharatpur', 'Alwar', 'Sri Ganganagar', 'Kota', 'Bikaner', 'Jaipur'], (26.9, 75.8)),
+    'madhya_pradesh': (0.2, {'soybean': 0.65, 'mustard': 0.2, 'linseed': 0.08, 'niger': 0.07},
+                       ['Indore', 'Ujjain', 'Dewas', 'Sagar', 'Morena', 'Mandsaur'], (23.2, 77.4)),
+    'gujarat': (0.15, {'groundnut': 0.65, 'sesame': 0.15, 'mustard': 0.2},
+                ['Rajkot', 'Junagadh', 'Amreli', 'Bhavnagar', 'Banaskantha'], (22.3, 70.8)),
+    'maharashtra': (0.15, {'soybean': 0.75, 'groundnut': 0.1, 'safflower': 0.1, 'sunflower': 0.05},
+                    ['Latur', 'Amravati', 'Washim', 'Nagpur', 'Solapur', 'Akola'], (19.8, 76.3)),
+    'karnataka': (0.07, {'groundnut': 0.4, 'sunflower': 0.35, 'soybean': 0.15, 'safflower': 0.1},
+                  ['Raichur', 'Chitradurga', 'Bidar', 'Ballari'], (15.3, 76.5)),
+    'uttar_pradesh': (0.06, {'mustard': 0.8, 'groundnut': 0.1, 'sesame': 0.1},
+                      ['Agra', 'Mathura', 'Jhansi', 'Etawah'], (27.2, 78.0)),
+    'andhra_pradesh': (0.05, {'groundnut': 0.85, 'sunflower': 0.15},
+                       ['Anantapur', 'Kurnool', 'Chittoor'], (15.0, 78.0)),
+    'telangana': (0.04, {'soybean': 0.5, 'groundnut': 0.5},
+                  ['Adilabad', 'Nizamabad', 'Mahabubnagar'], (17.9, 78.6)),
+    'haryana': (0.03, {'mustard': 1.0},
+                ['Hisar', 'Bhiwani', 'Rewari'], (29.1, 76.1)),
+    'west_bengal': (0.02, {'mustard': 0.7, 'sesame': 0.3},
+                    ['Nadia', 'Murshidabad', 'Hooghly'], (23.4, 88.4)),
+    'odisha': (0.01, {'niger': 0.5, 'groundnut': 0.5},
+               ['Koraput', 'Kalahandi', 'Bargarh'], (20.3, 84.0)),
+}
+
+# Rs/quintal around which lot, bid and mandi prices are drawn (close to MSP)
+BASE_PRICES = {
+    'soybean': 4892, 'mustard': 5650, 'groundnut': 6783, 'sunflower': 7280,
+    'safflower': 5800, 'sesame': 9267, 'linseed': 6000, 'niger': 8717,
+}
+
+LOT_STATUS_WEIGHTS = {'available': 0.35, 'bidding': 0.2, 'sold': 0.25, 'delivered': 0.15, 'cancelled': 0.05}
+BID_STATUS_WEIGHTS = {'pending': 0.5, 'accepted': 0.15, 'rejected': 0.3, 'withdrawn': 0.05}
+GRADE_WEIGHTS = {'A+': 0.1, 'A': 0.4, 'B': 0.35, 'C': 0.15}
+
+# Supply chain stages in order; a lot's status decides how far it got
+JOURNEY = [
+    ('created', 'farmer'), ('procured', 'fpo'), ('quality_checked', 'fpo'), ('warehouse_in', 'fpo'),
+    ('warehouse_out', 'fpo'), ('sale_agreed', 'processor'), ('shipped', 'logistics'),
+    ('received', 'processor'), ('processed', 'processor'), ('payment_completed', 'processor'),
+]
+JOURNEY_DEPTH = {'available': 2, 'bidding': 3, 'sold': 6, 'delivered': 9, 'cancelled': 1}
+
+
+def _pick(rng, weights):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def _near(rng, centre, spread=1.5):
+    return (
+        Decimal(str(round(centre[0] + rng.uniform(-spread, spread), 6))),
+        Decimal(str(round(centre[1] + rng.uniform(-spread, spread), 6))),
+    )
+
+
+@contextmanager
+def _explicit_timestamps(*models):
+    """Let bulk_create keep the created_at/timestamp values we set (back-dating)"""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False) or getattr(field, 'auto_now', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class SyntheticDataGenerator:
+    """
+    generator = SyntheticDataGenerator(seed=42, **SCALES['small'])
+    counts = generator.run()
+    """
+
+    def __init__(self, farmers, fpos, processors, retailers, lots, bids, transactions,
+                 mandi_days=90, seed=42, batch_size=5000, progress=None):
+        self.sizes = {
+            'farmers': farmers, 'fpos': fpos, 'processors': processors, 'retailers': retailers,
+            'lots': lots, 'bids': bids, 'transactions': transactions,
+        }
+        self.mandi_days = mandi_days
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+        self.progress = progress or (lambda message: logger.info(message))
+        self.now = timezone.now()
+        self.password = make_password(None)
+        self.phone_sequence = 0
+        self.counts = {}
+
+    # ==================== Entry point ====================
+
+    def run(self):
+        from apps.users.models import User
+
+        if User.objects.filter(phone_number__startswith=SYNTHETIC_PHONE_PREFIX).exists():
+            raise ValueError("Synthetic data already present; generate into an empty database")
+
+        self._create_government_user()
+        fpos = self._create_fpos()
+        farmers = self._create_farmers(fpos)
+        processors = self._create_processors()
+        self._create_retailers()
+        self._create_lots(farmers, fpos, processors)
+        self._create_mandi_prices()
+        return self.counts
+
+    # ==================== Actors ====================
+
+    def _users(self, role, count):
+        from apps.users.models import User
+
+        users = []
+        for _ in range(count):
+            self.phone_sequence += 1
+            users.append(User(
+                phone_number=f'{SYNTHETIC_PHONE_PREFIX}{self.phone_sequence:07d}',
+                role=role,
+                password=self.password,
+                is_verified=True,
+            ))
+        User.objects.bulk_create(users, batch_size=self.batch_size)
+        self.counts['users'] = self.counts.get('users', 0) + len(users)
+        return users
+
+    def _state(self):
+        return self.rng.choices(list(STATE_PROFILES), weights=[p[0] for p in STATE_PROFILES.values()])[0]
+
+    def _create_government_user(self):
+        self._users('government', 1)
+
+    def _create_fpos(self):
+        from apps.fpos.models import FPOProfile, FPOWarehouse
+
+        rng = self.rng
+        fpos = []
+        for index, user in enumerate(self._users('fpo', self.sizes['fpos'])):
+            state = self._state()
+            _, crops, districts, centre = STATE_PROFILES[state]
+            latitude, longitude = _near(rng, centre)
+            fpos.append(FPOProfile(
+                user=user,
+                organization_name=f'Synthetic {districts[index % len(districts)]} Oilseed FPO {index + 1}',
+                registration_number=f'SYN-FPO-{index + 1:06d}',
+                registration_type=rng.choice(['fpo', 'cooperative', 'company']),
+                year_of_registration=rng.randint(2012, 2024),
+                contact_person_name=f'FPO Contact {index + 1}',
+                office_address=f'{districts[index % len(districts)]} Krishi Bhawan',
+                district=districts[index % len(districts)],
+                state=state,
+                pincode=f'{rng.randint(300000, 599999)}',
+                latitude=latitude,
+                longitude=longitude,
+                primary_crops=list(crops),
+                is_verified=True,
+            ))
+        FPOProfile.objects.bulk_create(fpos, batch_size=self.batch_size)
+
+        warehouses = [
+            FPOWarehouse(
+                fpo=fpo,
+                warehouse_name=f'{fpo.district} Godown {number + 1}',
+                warehouse_code=f'SYN-WH-{index + 1:06d}-{number + 1}',
+                warehouse_type=rng.choice(['godown', 'warehouse']),
+                address=fpo.office_address,
+                district=fpo.district,
+                state=fpo.state,
+                pincode=fpo.pincode,
+                latitude=fpo.latitude,
+                longitude=fpo.longitude,
+                capacity_quintals=Decimal(rng.choice([2000, 5000, 10000])),
+            )
+            for index, fpo in enumerate(fpos)
+            for number in range(rng.randint(1, 2))
+        ]
+        FPOWarehouse.objects.bulk_create(warehouses, batch_size=self.batch_size)
+        for fpo in fpos:
+            fpo.synthetic_warehouses = []
+        by_fpo = {fpo.id: fpo for fpo in fpos}
+        for warehouse in warehouses:
+            by_fpo[warehouse.fpo_id].synthetic_warehouses.append(warehouse)
+
+        self.counts['fpos'] = len(fpos)
+        self.counts['fpo_warehouses'] = len(warehouses)
+        self.progress(f"{len(fpos)} FPOs, {len(warehouses)} warehouses")
+        return fpos
+
+    def _create_farmers(self, fpos):
+        from apps.farmers.models import FarmerProfile
+        from apps.fpos.models import FPOMembership
+
+        rng = self.rng
+        fpos_by_state = {}
+        for fpo in fpos:
+            fpos_by_state.setdefault(fpo.state, []).append(fpo)
+
+        farmers = []
+        remaining = self.sizes['farmers']
+        while remaining:
+            count = min(remaining, self.batch_size)
+            remaining -= count
+            batch = []
+            for user in self._users('farmer', count):
+                state = self._state()
+                _, crops, districts, centre = STATE_PROFILES[state]
+                latitude, longitude = _near(rng, centre)
+                # Most farmers are members of an FPO in their state
+                local_fpos = fpos_by_state.get(state)
+                fpo = rng.choice(local_fpos) if local_fpos and rng.random() < 0.8 else None
+                batch.append(FarmerProfile(
+                    user=user,
+                    fpo=fpo,
+                    full_name=f'Farmer {user.phone_number[-7:]}',
+                    total_land_acres=Decimal(str(round(rng.lognormvariate(1.0, 0.6), 2))),
+                    farming_experience_years=rng.randint(1, 40),
+                    primary_crops=[_pick(rng, crops)],
+                    district=rng.choice(districts),
+                    state=state,
+                    latitude=latitude,
+                    longitude=longitude,
+                    kyc_status=rng.choice(['verified', 'verified', 'pending']),
+                ))
+            FarmerProfile.objects.bulk_create(batch, batch_size=self.batch_size)
+            FPOMembership.objects.bulk_create([
+                FPOMembership(
+                    farmer=farmer,
+                    fpo=farmer.fpo,
+                    membership_number=f'SYN-M-{farmer.user.phone_number[-7:]}',
+                    joined_date=(self.now - datetime.timedelta(days=rng.randint(30, 2000))).date(),
+                )
+                for farmer in batch if farmer.fpo
+            ], batch_size=self.batch_size)
+            farmers.extend(batch)
+            self.progress(f"{len(farmers)} farmers")
+
+        self.counts['farmers'] = len(farmers)
+        return farmers
+
+    def _create_processors(self):
+        from apps.processors.models import ProcessorProfile
+
+        rng = self.rng
+        processors = []
+        for index, user in enumerate(self._users('processor', self.sizes['processors'])):
+            state = self._state()
+            _, _, districts, centre = STATE_PROFILES[state]
+            latitude, longitude = _near(rng, centre)
+            processors.append(ProcessorProfile(
+                user=user,
+                company_name=f'Synthetic Oil Mills {index + 1}',
+                contact_person=f'Processor Contact {index + 1}',
+                phone=user.phone_number,
+                email=f'processor{index + 1}@synthetic.invalid',
+                address=f'Industrial Area, {districts[0]}',
+                city=districts[0],
+                state=state,
+                processing_capacity_quintals_per_day=Decimal(rng.choice([100, 250, 500, 1000])),
+                is_verified=True,
+                latitude=latitude,
+                longitude=longitude,
+            ))
+        ProcessorProfile.objects.bulk_create(processors, batch_size=self.batch_size)
+        self.counts['processors'] = len(processors)
+        return processors
+
+    def _create_retailers(self):
+        from apps.retailers.models import RetailerProfile
+
+        retailers = []
+        for index, user in enumerate(self._users('retailer', self.sizes['retailers'])):
+            state = self._state()
+            city = STATE_PROFILES[state][2][0]
+            retailers.append(RetailerProfile(
+                user=user,
+                business_name=f'Synthetic Retail {index + 1}',
+                contact_person=f'Retailer Contact {index + 1}',
+                phone=user.phone_number,
+                email=f'retailer{index + 1}@synthetic.invalid',
+                address=f'Main Market, {city}',
+                city=city,
+                state=state,
+                is_verified=True,
+            ))
+        RetailerProfile.objects.bulk_create(retailers, batch_size=self.batch_size)
+        self.counts['retailers'] = len(retailers)
+
+    # ==================== Lots, bids, ledger ====================
+
+    def _create_lots(self, farmers, fpos, processors):
+        from apps.bids.models import Bid
+        from apps.blockchain.models import BlockchainTransaction, TraceabilityRecord
+        from apps.lots.models import ProcurementLot
+
+        total = self.sizes['lots']
+        bids_per_lot = self.sizes['bids'] / total if total else 0
+        mean_depth = sum(JOURNEY_DEPTH[s] * w for s, w in LOT_STATUS_WEIGHTS.items())
+        tx_scale = self.sizes['transactions'] / total / mean_depth if total else 0
+
+        created = {'lots': 0, 'bids': 0, 'transactions': 0, 'traceability_records': 0}
+        bid_carry = tx_carry = 0.0
+        with _explicit_timestamps(ProcurementLot, Bid, BlockchainTransaction, TraceabilityRecord):
+            while created['lots'] < total:
+                count = min(total - created['lots'], self.batch_size)
+                with transaction.atomic():
+                    lots = self._lot_batch(count, farmers, fpos)
+                    bid_carry += count * bids_per_lot
+                    bids = self._bid_batch(lots, int(bid_carry), processors)
+                    bid_carry -= int(bid_carry)
+                    ProcurementLot.objects.bulk_create(lots, batch_size=self.batch_size)
+                    Bid.objects.bulk_create(bids, batch_size=self.batch_size)
+
+                    tx_carry += count * mean_depth * tx_scale
+                    ledger, journeys = self._ledger_batch(lots, int(tx_carry), tx_scale)
+                    tx_carry -= len(ledger)
+                    BlockchainTransaction.objects.bulk_create(ledger, batch_size=self.batch_size)
+                    TraceabilityRecord.objects.bulk_create(journeys, batch_size=self.batch_size)
+
+                created['lots'] += len(lots)
+                created['bids'] += len(bids)
+                created['transactions'] += len(ledger)
+                created['traceability_records'] += len(journeys)
+                self.progress(
+                    f"{created['lots']} lots, {created['bids']} bids, {created['transactions']} ledger entries"
+                )
+        self.counts.update(created)
+
+    def _lot_batch(self, count, farmers, fpos):
+        from apps.lots.models import ProcurementLot
+
+        rng = self.rng
+        plan = []
+        for _ in range(count):
+            # One in ten lots is an FPO bulk lot
+            aggregated = rng.random() < 0.1
+            if aggregated:
+                owner, fpo = None, rng.choice(fpos)
+                crop = _pick(rng, STATE_PROFILES[fpo.state][1])
+            else:
+                owner = rng.choice(farmers)
+                fpo = owner.fpo
+                crop = _pick(rng, STATE_PROFILES[owner.state][1])
+            plan.append((owner, fpo, crop, aggregated))
+
+        lot_numbers = {}
+        for crop in {crop for _, _, crop, _ in plan}:
+            needed = sum(1 for _, _, c, _ in plan if c == crop)
+            lot_numbers[crop] = iter(ProcurementLot.allocate_lot_numbers(crop, needed))
+
+        lots = []
+        for owner, fpo, crop, aggregated in plan:
+            created_at = self.now - datetime.timedelta(seconds=rng.randint(0, 365 * 86400))
+            status = _pick(rng, LOT_STATUS_WEIGHTS)
+            quantity = Decimal(rng.randint(200, 2000) if aggregated else max(2, int(rng.lognormvariate(3.0, 0.8))))
+            price = Decimal(int(BASE_PRICES[crop] * rng.uniform(0.9, 1.15)))
+            located = owner or fpo
+            warehouses = getattr(fpo, 'synthetic_warehouses', None) if fpo else None
+            lot = ProcurementLot(
+                lot_number=next(lot_numbers[crop]),
+                farmer=owner,
+                fpo=fpo,
+                managed_by_fpo=fpo is not None and not aggregated and rng.random() < 0.3,
+                listing_type='fpo_aggregated' if aggregated else 'individual',
+                warehouse=rng.choice(warehouses) if warehouses and (aggregated or rng.random() < 0.3) else None,
+                crop_type=crop,
+                harvest_date=(created_at - datetime.timedelta(days=rng.randint(1, 30))).date(),
+                quantity_quintals=quantity,
+                available_quantity_quintals=Decimal('0') if status in ('sold', 'delivered') else quantity,
+                quality_grade=_pick(rng, GRADE_WEIGHTS),
+                moisture_content=Decimal(str(round(rng.uniform(6, 12), 2))),
+                oil_content=Decimal(str(round(rng.uniform(18, 45), 2))),
+                expected_price_per_quintal=price,
+                final_price_per_quintal=price if status in ('sold', 'delivered') else None,
+                location_latitude=located.latitude,
+                location_longitude=located.longitude,
+                status=status,
+                listed_date=created_at,
+                sold_date=created_at + datetime.timedelta(days=rng.randint(1, 20)) if status in ('sold', 'delivered') else None,
+                delivered_date=created_at + datetime.timedelta(days=rng.randint(21, 40)) if status == 'delivered' else None,
+                description='Synthetic lot',
+                created_at=created_at,
+                updated_at=created_at,
+            )
+            lots.append(lot)
+        return lots
+
+    def _bid_batch(self, lots, count, processors):
+        """Processor bids on this batch's lots; fills lot.bid_count before the lots are inserted"""
+        from apps.bids.models import Bid
+
+        rng = self.rng
+        open_lots = [lot for lot in lots if lot.status != 'cancelled']
+        if not open_lots or not processors:
+            return []
+
+        bids = []
+        for _ in range(count):
+            lot = rng.choice(open_lots)
+            processor = rng.choice(processors)
+            price = (lot.expected_price_per_quintal * Decimal(str(round(rng.uniform(0.92, 1.05), 3)))).quantize(Decimal('0.01'))
+            quantity = min(lot.quantity_quintals, Decimal(rng.randint(1, max(1, int(lot.quantity_quintals)))))
+            submitted_at = lot.created_at + datetime.timedelta(hours=rng.randint(1, 240))
+            status = _pick(rng, BID_STATUS_WEIGHTS)
+            bids.append(Bid(
+                lot=lot,
+                bidder_type='processor',
+                bidder_id=processor.id,
+                bidder_name=processor.company_name,
+                bidder_user_id=processor.user_id,
+                offered_price_per_quintal=price,
+                quantity_quintals=quantity,
+                total_amount=price * quantity,
+                expected_pickup_date=(submitted_at + datetime.timedelta(days=rng.randint(3, 20))).date(),
+                status=status,
+                submitted_at=submitted_at,
+                responded_at=submitted_at + datetime.timedelta(hours=rng.randint(1, 72)) if status != 'pending' else None,
+                created_at=submitted_at,
+                updated_at=submitted_at,
+            ))
+            lot.bid_count += 1
+        return bids
+
+    def _ledger_batch(self, lots, budget, scale):
+        """Hash-chained ledger entries per lot, plus each lot's traceability journey"""
+        from apps.blockchain.models import BlockchainTransaction, TraceabilityRecord
+
+        rng = self.rng
+        ledger, journeys = [], []
+        for lot in lots:
+            if budget <= 0:
+                break
+            depth = max(1, min(budget, round(JOURNEY_DEPTH[lot.status] * scale * rng.uniform(0.8, 1.2))))
+            budget -= depth
+            previous_hash = '0' * 64
+            entries = []
+            timestamp = lot.created_at
+            actor = lot.farmer or lot.fpo
+            for step in range(depth):
+                action, role = JOURNEY[step % len(JOURNEY)]
+                timestamp = timestamp + datetime.timedelta(hours=rng.randint(1, 96))
+                data = {'lot_number': lot.lot_number, 'step': step, 'quantity_quintals': str(lot.quantity_quintals)}
+                data_hash = generate_hash(json.dumps(data, sort_keys=True))
+                tx = BlockchainTransaction(
+                    transaction_id=generate_hash(f'{lot.lot_number}{action}{step}'),
+                    lot=lot,
+                    action_type=action,
+                    actor_id=actor.id,
+                    actor_role=role,
+                    actor_name=getattr(actor, 'full_name', None) or actor.organization_name,
+                    data_hash=data_hash,
+                    previous_hash=previous_hash,
+                    transaction_data=data,
+                    timestamp=timestamp,
+                    location_latitude=lot.location_latitude,
+                    location_longitude=lot.location_longitude,
+                    created_at=timestamp,
+                    updated_at=timestamp,
+                )
+                previous_hash = data_hash
+                entries.append(tx)
+            ledger.extend(entries)
+            journeys.append(TraceabilityRecord(
+                lot=lot,
+                journey=[TraceabilityRecord.journey_entry(tx) for tx in entries],
+                total_transactions=len(entries),
+                created_at=lot.created_at,
+                updated_at=timestamp,
+            ))
+        return ledger, journeys
+
+    # ==================== Market prices ====================
+
+    def _create_mandi_prices(self):
+        from apps.crops.models import MandiPrice
+        from apps.crops.services.price_history_service import refresh_price_summaries
+
+        rng = self.rng
+        days = self.mandi_days
+        if not days:
+            return
+        today = self.now.date()
+        dates = [today - datetime.timedelta(days=offset) for offset in range(days)]
+
+        rows = []
+        for state, (_, crops, districts, _) in STATE_PROFILES.items():
+            for district in districts:
+                for crop in crops:
+                    level = BASE_PRICES[crop] * rng.uniform(0.95, 1.1)
+                    for date in reversed(dates):
+                        # Random walk so trends and OHLC summaries have shape
+                        level *= rng.uniform(0.985, 1.016)
+                        modal = Decimal(str(round(level, 2)))
+                        rows.append(MandiPrice(
+                            crop_type=crop,
+                            state=state,
+                            district=district,
+                            market_name=f'{district} APMC',
+                            date=date,
+                            min_price=(modal * Decimal('0.95')).quantize(Decimal('0.01')),
+                            max_price=(modal * Decimal('1.05')).quantize(Decimal('0.01')),
+                            modal_price=modal,
+                            arrival_quantity_quintals=Decimal(rng.randint(20, 2000)),
+                            source='manual',
+                            source_reference='synthetic',
+                        ))
+        MandiPrice.objects.bulk_create(rows, batch_size=self.batch_size, ignore_conflicts=True)
+        refresh_price_summaries(dates)
+        self.counts['mandi_prices'] = len(rows)
+        self.progress(f"{len(rows)} mandi prices over {days} days")
@@ -0,0 +1,214 @@
+"""
+Response Caching for SeedSync Platform
+Declarative per-view caching for public, read-mostly endpoints
+
+    class PriceTrendAPIView(APIView):
+        @cache_response(ttl=300, vary_on=['crop_type', 'state'], tags=['mandi_prices'])
+        def get(self, request): ...
+
+Keys are built from the view, the URL path and the chosen query params.
+Tags are versioned: every key embeds the current version of its tags, so
+invalidate_tags() bumps one counter instead of deleting keys (works the
+same on the file and Redis backends). Entries are kept for ttl + stale_ttl;
+in the stale window the old response is served while one background
+thread recomputes it through a fresh dispatch of the view.
+"""
+import copy
+import logging
+import threading
+import time
+from functools import wraps
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections, transaction
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'resp'
+STAT_EVENTS = ('hit', 'stale', 'miss')
+
+# Set on the request copy a background refresh dispatches: skip the lookup, recompute and store
+REFRESH_ATTR = '_response_cache_refresh'
+
+# Views decorated with cache_response, by name
+_registry = set()
+
+
+def _cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def _tag_key(tag):
+    return f'{KEY_PREFIX}:tag:{tag}'
+
+
+def _stat_key(view_name, event):
+    return f'{KEY_PREFIX}:stat:{view_name}:{event}'
+
+
+def _count(view_name, event):
+    cache = _cache()
+    key = _stat_key(view_name, event)
+    try:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add and incr; the next request recreates it
+        pass
+
+
+def _tag_versions(tags):
+    if not tags:
+        return []
+    cache = _cache()
+    keys = [_tag_key(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    missing = {key: 1 for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def invalidate_tags(*tags):
+    """Drop every cached response carrying any of `tags`"""
+    cache = _cache()
+    for tag in tags:
+        key = _tag_key(tag)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Never versioned, so nothing cached under it yet
+            cache.set(key, 1, timeout=None)
+    logger.debug(f"Response cache invalidated: {', '.join(tags)}")
+
+
+def invalidate_on_change(model, *tags):
+    """
+    Invalidate `tags` after a save/delete of `model` is committed
+    Tags may use the instance's primary key, e.g. 'traceability_record:{pk}'
+    """
+    from django.db.models.signals import post_save, post_delete
+
+    def _invalidate(sender, instance, **kwargs):
+        entry_tags = [tag.format(pk=instance.pk) for tag in tags]
+        transaction.on_commit(lambda: invalidate_tags(*entry_tags))
+
+    uid = f'response_cache:{model._meta.label}:{",".join(tags)}'
+    post_save.connect(_invalidate, sender=model, weak=False, dispatch_uid=f'{uid}:save')
+    post_delete.connect(_invalidate, sender=model, weak=False, dispatch_uid=f'{uid}:delete')
+
+
+def response_cache_stats():
+    """Shared hit/stale/miss counters per cached view"""
+    from django.urls import get_resolver
+
+    # Importing the URLconf imports every view, registering the cached ones
+    get_resolver().url_patterns
+    view_names = sorted(_registry)
+
+    cache = _cache()
+    counts = cache.get_many([_stat_key(name, event) for name in view_names for event in STAT_EVENTS])
+    stats = {}
+    for name in view_names:
+        row = {event: counts.get(_stat_key(name, event), 0) for event in STAT_EVENTS}
+        served = row['hit'] + row['stale']
+        total = served + row['miss']
+        row['hit_ratio'] = round(served / total, 4) if total else None
+        stats[name] = row
+    return stats
+
+
+def cache_response(ttl=300, vary_on=None, tags=(), stale_ttl=0):
+    """
+    Cache successful (200) responses of an APIView handler method
+
+    ttl: seconds a response is fresh
+    vary_on: query params that change the response; None varies on all
+    tags: invalidation tags; may use URL kwargs, e.g. 'traceability:{lot_number}',
+        or a callable taking the URL kwargs and returning the tags
+    stale_ttl: seconds past ttl a stale response is served while refreshing
+
+    Runs after DRF authentication/permissions, so only decorate handlers
+    whose response does not depend on who is asking.
+    """
+    def decorator(handler):
+        view_name = handler.__qualname__.rsplit('.', 1)[0]
+        _registry.add(view_name)
+
+        def _key(request, entry_tags):
+            params = request.query_params
+            names = sorted(params) if vary_on is None else sorted(vary_on)
+            vary = '&'.join(f'{name}={value}' for name in names for value in params.getlist(name))
+            versions = ','.join(str(version) for version in _tag_versions(entry_tags))
+            digest = md5(f'{request.path}?{vary}|{versions}'.encode()).hexdigest()
+            return f'{KEY_PREFIX}:{view_name}:{digest}'
+
+        def _store(key, response):
+            _cache().set(
+                key,
+                {'data': response.data, 'status': response.status_code, 'fresh_until': time.time() + ttl},
+                timeout=ttl + stale_ttl
+            )
+
+        def _refresh(view_func, django_request, args, kwargs, key):
+            # The URL's as_view() function builds a new view and DRF request and
+            # dispatches again (authentication, ReplicaReadMixin routing), so the
+            # thread shares nothing with the request that was served the stale entry
+            try:
+                view_func(django_request, *args, **kwargs)
+            except Exception as e:
+                logger.error(f"Response cache refresh failed for {view_name}: {str(e)}")
+            finally:
+                _cache().delete(f'{key}:refreshing')
+                close_old_connections()
+
+        @wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            if not getattr(settings, 'RESPONSE_CACHE_ENABLED', True):
+                return handler(view, request, *args, **kwargs)
+
+            entry_tags = tags(**kwargs) if callable(tags) else [tag.format(**kwargs) for tag in tags]
+            key = _key(request, entry_tags)
+            if getattr(request, REFRESH_ATTR, False):
+                response = handler(view, request, *args, **kwargs)
+                if response.status_code == 200:
+                    _store(key, response)
+                return response
+            entry = _cache().get(key)
+            match = request.resolver_match
+            if entry is not None and entry['fresh_until'] < time.time() and match is None:
+                # Called outside URL routing: no view to re-dispatch, recompute now
+                entry = None
+
+            if entry is not None:
+                if entry['fresh_until'] >= time.time():
+                    _count(view_name, 'hit')
+                    state = 'HIT'
+                else:
+                    _count(view_name, 'stale')
+                    state = 'STALE'
+                    # One refresher per key across workers
+                    if _cache().add(f'{key}:refreshing', 1, timeout=max(ttl, 30)):
+                        refresh_request = copy.copy(request._request)
+                        setattr(refresh_request, REFRESH_ATTR, True)
+                        threading.Thread(
+                            target=_refresh, args=(match.func, refresh_request, match.args, match.kwargs, key),
+                            daemon=True
+                        ).start()
+                response = Response(entry['data'], status=entry['status'])
+                response['X-Cache'] = state
+                return response
+
+            _count(view_name, 'miss')
+            response = handler(view, request, *args, **kwargs)
+            if response.status_code == 200:
+                _store(key, response)
+            response['X-Cache'] = 'MISS'
+            return response
+
+        return wrapper
+    return decorator
@@ -200,19 +200,29 @@ KYC_STATUS_CHOICES = [
 BLOCKCHAIN_CREATED = 'created'
 BLOCKCHAIN_PROCURED = 'procured'
 BLOCKCHAIN_QUALITY_CHECKED = 'quality_checked'
+BLOCKCHAIN_WAREHOUSE_IN = 'warehouse_in'
+BLOCKCHAIN_WAREHOUSE_OUT = 'warehouse_out'
+BLOCKCHAIN_SALE_AGREED = 'sale_agreed'
 BLOCKCHAIN_SHIPPED = 'shipped'
 BLOCKCHAIN_RECEIVED = 'received'
 BLOCKCHAIN_PROCESSED = 'processed'
+BLOCKCHAIN_STAGE_COMPLETED = 'stage_completed'
 BLOCKCHAIN_PACKAGED = 'packaged'
+BLOCKCHAIN_PAYMENT_COMPLETED = 'payment_completed'
 
 BLOCKCHAIN_ACTION_CHOICES = [
     (BLOCKCHAIN_CREATED, 'Lot Created'),
     (BLOCKCHAIN_PROCURED, 'Procured by FPO'),
     (BLOCKCHAIN_QUALITY_CHECKED, 'Quality Checked'),
+    (BLOCKCHAIN_WAREHOUSE_IN, 'Warehouse Stock In'),
+    (BLOCKCHAIN_WAREHOUSE_OUT, 'Warehouse Stock Out'),
+    (BLOCKCHAIN_SALE_AGREED, 'Sale Agreement'),
     (BLOCKCHAIN_SHIPPED, 'Shipped'),
     (BLOCKCHAIN_RECEIVED, 'Received by Processor'),
-    (BLOCKCHAIN_PROCESSED, 'Processed'),
-    (BLOCKCHAIN_PACKAGED, 'Packaged'),
+    (BLOCKCHAIN_PROCESSED, 'Processing Completed'),
+    (BLOCKCHAIN_STAGE_COMPLETED, 'Processing Stage Completed'),
+    (BLOCKCHAIN_PACKAGED, 'Product Packaged'),
+    (BLOCKCHAIN_PAYMENT_COMPLETED, 'Payment Completed'),
 ]
 
 # Season Types
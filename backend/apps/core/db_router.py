@@ -0,0 +1,71 @@
+"""
+Database Routing for SeedSync Platform
+Read-only analytics traffic goes to the 'replica' alias when one is configured
+
+Reads are routed only inside read_from_replica(), which ReplicaReadMixin
+enters for GET/HEAD/OPTIONS requests; everything else, and every write,
+uses 'default'. Without a 'replica' entry in DATABASES the router is a
+no-op, so the same code runs on single-database setups.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+REPLICA_ALIAS = 'replica'
+
+_reading_from_replica = ContextVar('reading_from_replica', default=False)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+@contextmanager
+def read_from_replica():
+    """Route ORM reads in this block to the replica (when configured)"""
+    token = _reading_from_replica.set(True)
+    try:
+        yield
+    finally:
+        _reading_from_replica.reset(token)
+
+
+class ReplicaReadMixin:
+    """
+    APIView mixin for read-only analytics and dashboards: safe-method
+    requests read from the replica, so they may lag the primary slightly
+    """
+    def dispatch(self, request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            with read_from_replica():
+                return super().dispatch(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
+
+
+class AnalyticsReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not _reading_from_replica.get() or not replica_configured():
+            return None
+        # Inside a transaction on the primary, read our own writes
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return REPLICA_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Explicit, or Django would save instances back to the alias they were read from
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, REPLICA_ALIAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema through replication
+        if db == REPLICA_ALIAS:
+            return False
+        return None
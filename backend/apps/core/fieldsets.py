@@ -0,0 +1,216 @@
+"""
+Sparse Fieldsets for SeedSync Platform
+?fields= and ?expand= for DRF serializers, with matching querysets
+
+    GET /api/lots/procurement/?fields=id,lot_number,status,quantity_quintals
+    GET /api/logistics/shipments/{id}/?fields=id,status,lot&expand=lot
+
+SparseFieldsetMixin (serializer) drops every field not named in ?fields=
+and nests the relations named in ?expand= from Meta.expandable_fields;
+expanded names count as requested. Dotted names select inside an
+expanded or nested serializer: ?fields=id,user.phone_number.
+
+SparseFieldsetViewMixin (viewset) then narrows the queryset to what the
+remaining fields read: .only() the columns, select_related the forward
+relations and prefetch_related the many ones, replacing the viewset's
+own joins. A field whose reads cannot be derived from its source (a
+SerializerMethodField, a model method) must be listed in
+Meta.field_sources, or the columns are left alone; joins are still
+trimmed. Nothing changes for requests without ?fields= or ?expand=.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.relations import ManyRelatedField
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def _names(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+def requested_fieldset(request):
+    """(fields, expand) asked for by the request; fields is None when not given"""
+    if request is None:
+        return None, []
+    params = getattr(request, 'query_params', request.GET)
+    fields = _names(params.get(FIELDS_PARAM)) or None
+    return fields, _names(params.get(EXPAND_PARAM))
+
+
+def _split(names):
+    """{'a': [], 'b': ['c', 'd.e']} from ['a', 'b.c', 'b.d.e']"""
+    split = {}
+    for name in names:
+        head, _, rest = name.partition('.')
+        split.setdefault(head, [])
+        if rest:
+            split[head].append(rest)
+    return split
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin for ?fields= / ?expand=
+
+    Meta.expandable_fields: {name: (serializer class or dotted path, kwargs)}
+    Meta.field_sources: {name: (source paths the field reads, ...)} for
+    fields narrow_queryset cannot work out; () when it reads no columns.
+
+    The request is taken from context at the top level; nested and
+    expanded serializers get their share through fields= / expand=.
+    """
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is None and expand is None:
+            fields, expand = requested_fieldset(self.context.get('request'))
+        self.apply_fieldset(fields, expand or [])
+
+    def apply_fieldset(self, fields, expand):
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        nested_expand = _split(expand)
+        for name, deeper in nested_expand.items():
+            if name not in expandable:
+                continue
+            serializer_class, options = expandable[name]
+            if isinstance(serializer_class, str):
+                serializer_class = import_string(serializer_class)
+            if issubclass(serializer_class, SparseFieldsetMixin):
+                options = dict(options, expand=deeper)
+            self.fields[name] = serializer_class(context=self.context, read_only=True, **options)
+
+        if fields is not None:
+            requested = set(_split(fields))
+            _prune(self, fields + [name for name in nested_expand if name not in requested])
+
+
+def _prune(serializer, names):
+    """Keep only `names` (dotted for deeper levels) of a serializer's fields"""
+    wanted = _split(names)
+    for name in list(serializer.fields):
+        if name not in wanted:
+            serializer.fields.pop(name)
+    for name, deeper in wanted.items():
+        field = serializer.fields.get(name)
+        nested = getattr(field, 'child', field)
+        if deeper and isinstance(nested, serializers.Serializer):
+            _prune(nested, deeper)
+
+
+class _Plan:
+    """Columns and relations a serializer reads; columns None means all"""
+
+    def __init__(self):
+        self.columns, self.select, self.prefetch = set(), set(), set()
+
+    def all_columns(self):
+        self.columns = None
+
+    def add_column(self, path):
+        if self.columns is not None:
+            self.columns.add(path)
+
+    def add_model(self, model, prefix):
+        for field in model._meta.concrete_fields:
+            self.add_column(prefix + field.name)
+
+
+def _walk(plan, model, source, prefix='', whole=False, nested=False):
+    """
+    Add what a dotted DRF source reads on model to plan
+    whole: a source ending on a relation reads the related row in full
+    (a field_sources entry), not just its key. nested: only join it; a
+    nested serializer adds its own columns.
+    Returns (related model, ORM prefix) when the source ends on a forward
+    relation that is joined, else None.
+    """
+    parts = source.split('.')
+    for index, part in enumerate(parts):
+        last = index == len(parts) - 1
+        if part.startswith('get_') and part.endswith('_display'):
+            part = part[4:-8]
+        if part == 'pk':
+            part = model._meta.pk.name
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            # A property or method: its reads are unknown
+            plan.all_columns()
+            return None
+        path = prefix + part
+        if not field.is_relation:
+            plan.add_column(path)
+            return None
+        if field.many_to_many or field.one_to_many:
+            plan.prefetch.add(path)
+            return None
+        if last and not (whole or nested):
+            plan.add_column(path)
+            return None
+        plan.select.add(path)
+        model, prefix = field.related_model, path + '__'
+    if not nested:
+        plan.add_model(model, prefix)
+    return model, prefix
+
+
+def fieldset_plan(serializer, model, prefix='', plan=None):
+    """What serializing an instance of model with `serializer` reads"""
+    plan = plan or _Plan()
+    plan.add_column(prefix + model._meta.pk.name)
+    hints = getattr(getattr(serializer, 'Meta', None), 'field_sources', {})
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if name in hints:
+            for source in hints[name]:
+                _walk(plan, model, source, prefix, whole=True)
+            continue
+        if field.source == '*':
+            plan.all_columns()
+            continue
+        if isinstance(field, (serializers.ListSerializer, ManyRelatedField)):
+            _walk(plan, model, field.source, prefix)
+            continue
+        if isinstance(field, serializers.ModelSerializer):
+            related = _walk(plan, model, field.source, prefix, nested=True)
+            if related is not None:
+                fieldset_plan(field, *related, plan)
+            continue
+        _walk(plan, model, field.source, prefix)
+    return plan
+
+
+class SparseFieldsetViewMixin:
+    """
+    Viewset mixin: narrows querysets to the requested fieldset
+    Applied in filter_queryset, so list, retrieve and custom actions that
+    filter their queryset get it; others may call narrow_queryset().
+    """
+
+    def filter_queryset(self, queryset):
+        return self.narrow_queryset(super().filter_queryset(queryset))
+
+    def narrow_queryset(self, queryset, serializer_class=None):
+        """queryset reduced to what the (action's) serializer will read for this request"""
+        fields, expand = requested_fieldset(self.request)
+        if (fields is None and not expand) or self.request.method not in SAFE_METHODS:
+            return queryset
+        serializer_class = serializer_class or self.get_serializer_class()
+        if not issubclass(serializer_class, SparseFieldsetMixin):
+            return queryset
+        serializer = serializer_class(context=self.get_serializer_context())
+
+        plan = fieldset_plan(serializer, queryset.model)
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if plan.select:
+            queryset = queryset.select_related(*plan.select)
+        if plan.prefetch:
+            queryset = queryset.prefetch_related(*plan.prefetch)
+        if plan.columns is not None:
+            queryset = queryset.only(*plan.columns)
+        return queryset
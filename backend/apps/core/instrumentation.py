@@ -0,0 +1,270 @@
+"""
+Request Instrumentation for SeedSync Platform
+Per-view SQL query counts, DB time, latency and response size
+
+RequestInstrumentationMiddleware records one RequestSample per request into
+an in-memory ring buffer (per process) and keeps cumulative per-view
+totals for the Prometheus export. Views can declare a query budget:
+
+    class PriceTrendAPIView(APIView):
+        query_budget = 10            # every handler of the view
+
+        @query_budget(4)             # or per handler / viewset action
+        def get(self, request): ...
+
+    class ProcurementLotViewSet(viewsets.ModelViewSet):
+        query_budget = {'list': 6}   # inherited actions, by name
+
+A request over budget is logged; with QUERY_BUDGET_STRICT (on under the
+test runner) it raises QueryBudgetExceeded so the test fails.
+"""
+import csv
+import io
+import logging
+import os
+import threading
+import time
+from collections import deque, namedtuple
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+RequestSample = namedtuple('RequestSample', [
+    'timestamp', 'view', 'method', 'path', 'status',
+    'queries', 'db_ms', 'latency_ms', 'response_bytes', 'budget',
+])
+
+SORT_KEYS = {
+    'queries': 'max_queries',
+    'latency': 'p95_latency_ms',
+    'db_time': 'avg_db_ms',
+    'size': 'max_response_bytes',
+    'count': 'requests',
+}
+
+_lock = threading.Lock()
+_buffer = deque(maxlen=getattr(settings, 'INSTRUMENTATION_BUFFER_SIZE', 5000))
+# (view, method) -> cumulative counters since process start
+_totals = {}
+_dumper = None
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A view ran more SQL queries than its declared budget"""
+
+
+def query_budget(max_queries):
+    """Declare the most SQL queries one request to this handler may run"""
+    def decorator(handler):
+        handler.query_budget = max_queries
+        return handler
+    return decorator
+
+
+def view_budget(view_func, method):
+    """Budget declared for the handler `view_func` dispatches `method` to"""
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return getattr(view_func, 'query_budget', None)
+    # ViewSets map HTTP methods to actions
+    actions = getattr(view_func, 'actions', None) or {}
+    name = actions.get(method.lower(), method.lower())
+    budget = getattr(getattr(view_class, name, None), 'query_budget', None)
+    if budget is not None:
+        return budget
+    budget = getattr(view_class, 'query_budget', None)
+    return budget.get(name) if isinstance(budget, dict) else budget
+
+
+def view_label(request, view_func):
+    """Stable name for the view serving request, e.g. 'ProcurementLotViewSet.my_lots'"""
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        match = getattr(request, 'resolver_match', None)
+        return match.view_name if match and match.view_name else getattr(view_func, '__name__', 'unknown')
+    actions = getattr(view_func, 'actions', None)
+    if actions and request.method.lower() in actions:
+        return f'{view_class.__name__}.{actions[request.method.lower()]}'
+    return view_class.__name__
+
+
+# ==================== Measuring ====================
+
+class QueryCounter:
+    """execute_wrapper counting queries and DB time on every connection"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_seconds += time.perf_counter() - started
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+
+def response_size(response):
+    if getattr(response, 'streaming', False):
+        return 0
+    return len(response.content)
+
+
+def record(sample):
+    """Add a sample to the ring buffer and the cumulative totals"""
+    with _lock:
+        _buffer.append(sample)
+        totals = _totals.setdefault((sample.view, sample.method), {
+            'requests': 0, 'queries': 0, 'db_seconds': 0.0, 'latency_seconds': 0.0,
+            'response_bytes': 0, 'over_budget': 0, 'max_latency_seconds': 0.0,
+        })
+        totals['requests'] += 1
+        totals['queries'] += sample.queries
+        totals['db_seconds'] += sample.db_ms / 1000
+        totals['latency_seconds'] += sample.latency_ms / 1000
+        totals['response_bytes'] += sample.response_bytes
+        totals['max_latency_seconds'] = max(totals['max_latency_seconds'], sample.latency_ms / 1000)
+        if sample.budget is not None and sample.queries > sample.budget:
+            totals['over_budget'] += 1
+    _ensure_dumper()
+
+
+def samples():
+    with _lock:
+        return list(_buffer)
+
+
+def capacity():
+    return _buffer.maxlen
+
+
+def reset():
+    with _lock:
+        _buffer.clear()
+        _totals.clear()
+
+
+# ==================== Reporting ====================
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+def worst_offenders(sort='queries', limit=20):
+    """Per-view stats over the buffered requests, worst first"""
+    groups = {}
+    for sample in samples():
+        groups.setdefault((sample.view, sample.method), []).append(sample)
+
+    rows = []
+    for (view, method), group in groups.items():
+        latencies = [s.latency_ms for s in group]
+        budget = group[-1].budget
+        rows.append({
+            'view': view,
+            'method': method,
+            'requests': len(group),
+            'avg_queries': round(sum(s.queries for s in group) / len(group), 1),
+            'max_queries': max(s.queries for s in group),
+            'avg_db_ms': round(sum(s.db_ms for s in group) / len(group), 2),
+            'p50_latency_ms': round(_percentile(latencies, 0.5), 2),
+            'p95_latency_ms': round(_percentile(latencies, 0.95), 2),
+            'max_response_bytes': max(s.response_bytes for s in group),
+            'query_budget': budget,
+            'over_budget': sum(1 for s in group if s.budget is not None and s.queries > s.budget),
+            'example_path': group[-1].path,
+        })
+
+    rows.sort(key=lambda row: row[SORT_KEYS.get(sort, 'max_queries')], reverse=True)
+    return rows[:limit]
+
+
+def as_csv():
+    """Buffered samples as CSV"""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(RequestSample._fields)
+    writer.writerows(samples())
+    return output.getvalue()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def as_prometheus():
+    """Cumulative per-view totals in the Prometheus text exposition format"""
+    metrics = [
+        ('requests', 'seedsync_view_requests_total', 'counter', 'Requests served'),
+        ('queries', 'seedsync_view_queries_total', 'counter', 'SQL queries run'),
+        ('db_seconds', 'seedsync_view_db_seconds_total', 'counter', 'Time spent in SQL queries'),
+        ('latency_seconds', 'seedsync_view_latency_seconds_total', 'counter', 'Time spent serving requests'),
+        ('response_bytes', 'seedsync_view_response_bytes_total', 'counter', 'Response body bytes'),
+        ('over_budget', 'seedsync_view_over_budget_total', 'counter', 'Requests over their query budget'),
+        ('max_latency_seconds', 'seedsync_view_latency_seconds_max', 'gauge', 'Slowest request'),
+    ]
+    with _lock:
+        totals = {key: dict(values) for key, values in _totals.items()}
+
+    lines = []
+    for field, name, kind, help_text in metrics:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for (view, method), values in sorted(totals.items()):
+            lines.append(f'{name}{{view="{_escape(view)}",method="{method}"}} {values[field]:g}')
+    return '\n'.join(lines) + '\n'
+
+
+def dump(directory=None):
+    """Write request_metrics.csv/.prom to `directory` and log the worst views"""
+    directory = directory or getattr(settings, 'INSTRUMENTATION_DUMP_DIR', None)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for filename, content in (('request_metrics.csv', as_csv()), ('request_metrics.prom', as_prometheus())):
+            # Write then rename, so scrapers never read a partial file
+            path = os.path.join(directory, filename)
+            with open(f'{path}.tmp', 'w', newline='') as handle:
+                handle.write(content)
+            os.replace(f'{path}.tmp', path)
+
+    for row in worst_offenders(limit=5):
+        logger.info(
+            f"{row['view']} {row['method']}: {row['requests']} requests, "
+            f"max {row['max_queries']} queries, p95 {row['p95_latency_ms']}ms"
+        )
+
+
+def _dump_loop(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            dump()
+        except Exception as e:
+            logger.error(f"Request metrics dump failed: {str(e)}")
+
+
+def _ensure_dumper():
+    global _dumper
+    interval = getattr(settings, 'INSTRUMENTATION_DUMP_INTERVAL', 0)
+    if not interval or _dumper is not None:
+        return
+    with _lock:
+        if _dumper is None:
+            _dumper = threading.Thread(target=_dump_loop, args=(interval,), daemon=True, name='request-metrics-dump')
+            _dumper.start()
@@ -0,0 +1,55 @@
+"""
+Compare two benchmark reports written by run_benchmarks
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.benchmarks import compare_reports, load_report
+
+
+def _change(value):
+    return f"{value:+.1f}%" if value is not None else 'n/a'
+
+
+def write_comparison(command, rows):
+    """Print compare_reports() rows; returns the number of regressions"""
+    regressions = 0
+    command.stdout.write(f"\n{'scenario':36} {'p50':>20} {'p95':>20} {'p99':>20} {'queries':>12}")
+    for row in rows:
+        if 'missing' in row:
+            command.stdout.write(f"{row['scenario']:36} only in {'current' if row['missing'] == 'baseline' else 'baseline'}")
+            continue
+        cells = [
+            f"{before:.0f}->{after:.0f}ms {_change(change):>7}"
+            for before, after, change in (row['p50_ms'], row['p95_ms'], row['p99_ms'])
+        ]
+        queries = f"{row['queries_per_request'][0]:g}->{row['queries_per_request'][1]:g}"
+        line = f"{row['scenario']:36} {cells[0]:>20} {cells[1]:>20} {cells[2]:>20} {queries:>12}"
+        if row['regression']:
+            regressions += 1
+            command.stdout.write(command.style.ERROR(line))
+        else:
+            command.stdout.write(line)
+    summary = f"{regressions} regression(s)"
+    command.stdout.write(command.style.ERROR(summary) if regressions else command.style.SUCCESS(summary))
+    return regressions
+
+
+class Command(BaseCommand):
+    help = "Show p50/p95/p99 and queries/request changes between two benchmark reports"
+
+    def add_arguments(self, parser):
+        parser.add_argument('baseline', help="Earlier report (e.g. from main)")
+        parser.add_argument('current', help="Report to check")
+        parser.add_argument('--threshold', type=float, default=10.0, help="p95 growth (%%) counted as a regression")
+        parser.add_argument('--fail-on-regression', action='store_true', help="Exit non-zero when anything regressed")
+
+    def handle(self, *args, **options):
+        try:
+            baseline = load_report(options['baseline'])
+            current = load_report(options['current'])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        regressions = write_comparison(self, compare_reports(baseline, current, options['threshold']))
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f"{regressions} scenario(s) regressed")
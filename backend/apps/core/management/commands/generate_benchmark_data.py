@@ -0,0 +1,45 @@
+"""
+Fill an empty database with synthetic benchmark data
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.benchmarks import SCALES, SyntheticDataGenerator
+
+
+class Command(BaseCommand):
+    help = "Bulk-generate synthetic farmers, FPOs, lots, bids, ledger entries and mandi prices for benchmarks"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(SCALES), default='small', help="Preset sizes (large: 100k farmers, 1M lots/bids, 5M ledger entries)")
+        for name in ('farmers', 'fpos', 'processors', 'retailers', 'lots', 'bids', 'transactions'):
+            parser.add_argument(f'--{name}', type=int, help=f"Override the preset number of {name}")
+        parser.add_argument('--mandi-days', type=int, help="Days of mandi prices to generate")
+        parser.add_argument('--seed', type=int, default=42, help="Random seed; the same seed gives the same data set")
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        sizes = dict(SCALES[options['scale']])
+        for name in sizes:
+            if options.get(name) is not None:
+                sizes[name] = options[name]
+        if sizes['fpos'] < 1 or sizes['farmers'] < 1:
+            raise CommandError("Need at least one FPO and one farmer")
+
+        generator = SyntheticDataGenerator(
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            progress=lambda message: self.stdout.write(f"  {message}"),
+            **sizes
+        )
+        started = time.perf_counter()
+        try:
+            counts = generator.run()
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        elapsed = time.perf_counter() - started
+        for name, count in counts.items():
+            self.stdout.write(f"{name:24} {count:>10}")
+        self.stdout.write(self.style.SUCCESS(f"Synthetic data generated in {elapsed:.1f}s"))
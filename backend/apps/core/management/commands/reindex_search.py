@@ -0,0 +1,28 @@
+"""
+Rebuild the full-text search index from the lot, product, farmer and FPO tables
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.services import SEARCH_ENTITIES, reindex
+
+
+class Command(BaseCommand):
+    help = "Rebuild SearchDocuments (after bulk imports, or renames of farmers, FPOs and processors)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--types', default='',
+            help=f"Comma-separated entity types, default all: {', '.join(SEARCH_ENTITIES)}"
+        )
+        parser.add_argument('--batch-size', type=int, help="Override SEARCH_REINDEX_BATCH_SIZE")
+
+    def handle(self, *args, **options):
+        types = [name.strip() for name in options['types'].split(',') if name.strip()]
+        unknown = [name for name in types if name not in SEARCH_ENTITIES]
+        if unknown:
+            raise CommandError(f"Unknown entity type: {', '.join(unknown)}")
+
+        counts = reindex(types or None, options['batch_size'])
+        self.stdout.write(json.dumps(counts))
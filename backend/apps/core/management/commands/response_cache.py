@@ -0,0 +1,25 @@
+"""
+Inspect and invalidate the response cache
+"""
+from django.core.management.base import BaseCommand
+
+from apps.core.cache import invalidate_tags, response_cache_stats
+
+
+class Command(BaseCommand):
+    help = "Show response cache hit/miss counters, or invalidate tags with --invalidate"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--invalidate', nargs='+', metavar='TAG', help="Tags to invalidate, e.g. mandi_prices")
+
+    def handle(self, *args, **options):
+        if options['invalidate']:
+            invalidate_tags(*options['invalidate'])
+            self.stdout.write(self.style.SUCCESS(f"Invalidated: {', '.join(options['invalidate'])}"))
+            return
+
+        for view_name, row in response_cache_stats().items():
+            ratio = f"{row['hit_ratio']:.1%}" if row['hit_ratio'] is not None else '-'
+            self.stdout.write(
+                f"{view_name:40} hit {row['hit']:>8} stale {row['stale']:>8} miss {row['miss']:>8} ratio {ratio}"
+            )
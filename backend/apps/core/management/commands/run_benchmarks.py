@@ -0,0 +1,70 @@
+"""
+Run the endpoint benchmark scenarios and write a report
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from apps.core.benchmarks import (
+    SCENARIOS, build_context, run_scenario, build_report, dump_report, load_report, compare_reports
+)
+from apps.core.management.commands.compare_benchmarks import write_comparison
+
+
+class Command(BaseCommand):
+    help = "Time dashboard, marketplace, procurement, trace and forecast endpoints (p50/p95/p99, queries/request)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20, help="Timed requests per scenario")
+        parser.add_argument('--warmup', type=int, default=2, help="Untimed requests per scenario first")
+        parser.add_argument('--scenario', action='append', default=[], help="Run scenarios whose name contains this (repeatable)")
+        parser.add_argument('--cache', action='store_true', help="Keep response caching on (off by default to time the real work)")
+        parser.add_argument('--output', help="Write the JSON report here")
+        parser.add_argument('--compare', metavar='BASELINE', help="Compare against an earlier report")
+        parser.add_argument('--threshold', type=float, default=10.0, help="p95 growth (%%) counted as a regression")
+        parser.add_argument('--list', action='store_true', help="List scenarios and exit")
+
+    def handle(self, *args, **options):
+        scenarios = [
+            scenario for scenario in SCENARIOS
+            if not options['scenario'] or any(part in scenario.name for part in options['scenario'])
+        ]
+        if options['list']:
+            for scenario in scenarios:
+                self.stdout.write(f"{scenario.name:36} {scenario.role:12} {scenario.path}")
+            return
+        if not scenarios:
+            raise CommandError("No scenario matches --scenario")
+        baseline = load_report(options['compare']) if options['compare'] else None
+
+        context = build_context()
+        results = {}
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+            RESPONSE_CACHE_ENABLED=options['cache'] and settings.RESPONSE_CACHE_ENABLED,
+            INSTRUMENTATION_ENABLED=False,
+            QUERY_BUDGET_STRICT=False,
+            DEBUG_PROPAGATE_EXCEPTIONS=False,
+        ):
+            for scenario in scenarios:
+                result = run_scenario(scenario, context, options['iterations'], options['warmup'])
+                if result is None:
+                    self.stdout.write(self.style.WARNING(f"{scenario.name:36} skipped (no {scenario.role} data)"))
+                    continue
+                results[scenario.name] = result
+
+        report = build_report(results, options['iterations'], options['warmup'], options['cache'])
+        self.stdout.write(f"{'scenario':36} {'p50':>9} {'p95':>9} {'p99':>9} {'queries':>8} {'budget':>6} {'errors':>6}")
+        for name, row in report['scenarios'].items():
+            line = (
+                f"{name:36} {row['p50_ms']:>7.1f}ms {row['p95_ms']:>7.1f}ms {row['p99_ms']:>7.1f}ms "
+                f"{row['queries_per_request']:>8} {row['query_budget'] if row['query_budget'] is not None else '-':>6} {row['errors']:>6}"
+            )
+            over_budget = row['query_budget'] is not None and row['max_queries'] > row['query_budget']
+            self.stdout.write(self.style.ERROR(line) if row['errors'] or over_budget else line)
+
+        if options['output']:
+            dump_report(report, options['output'])
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        if baseline:
+            write_comparison(self, compare_reports(baseline, report, options['threshold']))
@@ -0,0 +1,41 @@
+"""
+Benchmark JSON rendering of large analytics payloads
+"""
+import json
+
+from django.core.management.base import BaseCommand
+
+from apps.core.benchmarks import run_render_benchmark
+
+
+class Command(BaseCommand):
+    help = "Render 100k-row map and columnar payloads through JSONRenderer and FastJSONRenderer"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000, help="Rows per payload")
+        parser.add_argument('--repeats', type=int, default=5, help="Renders per path")
+        parser.add_argument('--seed', type=int, default=1, help="Seed for the synthetic payloads")
+        parser.add_argument('--output', help="Write the results as JSON here")
+
+    def handle(self, *args, **options):
+        rows, summary = run_render_benchmark(options['rows'], options['repeats'], options['seed'])
+
+        self.stdout.write(f"{'payload':>9} {'path':>14} {'p50':>10} {'min':>10} {'bytes':>11}")
+        for row in rows:
+            self.stdout.write(
+                f"{row['payload']:>9} {row['path']:>14} {row['ms_p50']:>8}ms {row['ms_min']:>8}ms {row['bytes']:>11}"
+            )
+        if not summary['orjson']:
+            self.stdout.write(self.style.WARNING("orjson is not installed: FastJSONRenderer is JSONRenderer"))
+        line = (
+            f"{summary['rows']} rows: rows x{summary['rows_speedup']}, "
+            f"columnar x{summary['columnar_speedup']} over the converted path"
+        )
+        matches = summary['rows_match'] and summary['columnar_match']
+        self.stdout.write(self.style.SUCCESS(line) if matches else self.style.ERROR(f"{line} (outputs differ)"))
+
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump({'summary': summary, 'paths': rows}, handle, indent=2, sort_keys=True)
+                handle.write('\n')
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
@@ -0,0 +1,46 @@
+"""
+Benchmark the pickup route consolidation optimiser
+"""
+import json
+
+from django.core.management.base import BaseCommand
+
+from apps.core.benchmarks import run_routing_benchmark
+
+
+class Command(BaseCommand):
+    help = "Solve seeded N-lot consolidation instances and compare against one shipment per lot"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lots', type=int, default=500, help="Pickups per instance")
+        parser.add_argument('--instances', type=int, default=5, help="Instances (seeds) to solve")
+        parser.add_argument('--seed', type=int, default=1, help="First seed")
+        parser.add_argument('--max-trips', type=int, default=3, help="Routes one vehicle may run")
+        parser.add_argument('--output', help="Write the results as JSON here")
+
+    def handle(self, *args, **options):
+        rows, summary = run_routing_benchmark(
+            options['lots'], options['instances'], options['seed'], options['max_trips']
+        )
+
+        self.stdout.write(
+            f"{'seed':>5} {'method':>8} {'solve':>9} {'routes':>7} {'unserved':>8} "
+            f"{'km':>9} {'km 1:1':>9} {'cost':>11} {'cost 1:1':>11} {'saved':>6} {'util':>6}"
+        )
+        for row in rows:
+            line = (
+                f"{row['seed']:>5} {row['method']:>8} {row['solve_ms']:>7}ms {row['routes']:>7} {row['unserved']:>8} "
+                f"{row['distance_km']:>9} {row['baseline_distance_km']:>9} {row['cost']:>11} "
+                f"{row['baseline_cost']:>11} {row['savings_percent']:>5}% {row['mean_utilisation_percent']:>5}%"
+            )
+            self.stdout.write(self.style.ERROR(line) if row['unserved'] else line)
+        self.stdout.write(
+            f"p50 solve {summary['solve_ms_p50']}ms, max {summary['solve_ms_max']}ms, "
+            f"mean cost saving {summary['savings_percent_mean']}%"
+        )
+
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump({'summary': summary, 'instances': rows}, handle, indent=2, sort_keys=True)
+                handle.write('\n')
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
@@ -0,0 +1,56 @@
+"""
+Measure SQLite write throughput with concurrent writers
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.benchmarks import DEFAULT_PHASES, WRITE_PROFILES, run_write_benchmark
+
+
+class Command(BaseCommand):
+    help = "Ledger + counter writes from N threads on a throwaway SQLite copy: stock vs tuned pragmas, direct vs queued"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8, help="Concurrent writer threads")
+        parser.add_argument('--writes', type=int, default=200, help="Writes per writer")
+        parser.add_argument('--lots', type=int, default=16, help="Lots the writers share (fewer = more contention)")
+        parser.add_argument(
+            '--phase', action='append', default=[], metavar='PROFILE:MODE',
+            help=f"Run only these phases, e.g. tuned:queued (profiles: {', '.join(WRITE_PROFILES)}; modes: direct, queued)"
+        )
+        parser.add_argument('--output', help="Write the results as JSON here")
+
+    def handle(self, *args, **options):
+        phases = []
+        for phase in options['phase']:
+            profile, _, mode = phase.partition(':')
+            if profile not in WRITE_PROFILES or mode not in ('direct', 'queued'):
+                raise CommandError(f"Unknown phase '{phase}'")
+            phases.append((profile, mode))
+
+        try:
+            results = run_write_benchmark(
+                phases or DEFAULT_PHASES, options['writers'], options['writes'], options['lots']
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f"{'phase':14} {'journal':>8} {'writes/s':>9} {'committed':>10} {'p50':>9} {'p95':>9} {'forked':>6}  errors"
+        )
+        for row in results:
+            errors = ', '.join(f"{name} x{count}" for name, count in row['errors'].items()) or '-'
+            line = (
+                f"{row['profile'] + ':' + row['mode']:14} {row['pragmas']['journal_mode']:>8} "
+                f"{row['writes_per_s']:>9} {row['committed']:>5}/{row['attempted']:<4} "
+                f"{row['p50_ms'] if row['p50_ms'] is not None else '-':>7}ms "
+                f"{row['p95_ms'] if row['p95_ms'] is not None else '-':>7}ms {row['forked_chains']:>6}  {errors}"
+            )
+            self.stdout.write(self.style.ERROR(line) if row['errors'] or row['forked_chains'] else line)
+
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump(results, handle, indent=2, sort_keys=True)
+                handle.write('\n')
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
@@ -0,0 +1,85 @@
+"""
+Custom Middleware for SeedSync Platform
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from apps.core import instrumentation
+from apps.core.services import get_role_profile
+
+logger = logging.getLogger(__name__)
+
+
+class RoleProfileMiddleware:
+    """
+    Attach request.role_profile: the user's role profile, resolved lazily
+    and at most once per request (see get_role_profile). Evaluated on first
+    use, so it sees the user set by DRF's JWT authentication as well. It is
+    a lazy proxy: test it for truthiness, or call get_role_profile(request)
+    when an actual None is needed.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.role_profile = SimpleLazyObject(lambda: get_role_profile(request))
+        return self.get_response(request)
+
+
+class RequestInstrumentationMiddleware:
+    """
+    Record SQL query count, DB time, latency and response size per request
+    (see apps.core.instrumentation) and enforce declared query budgets.
+    Place it first so queries run by other middleware are counted too.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'INSTRUMENTATION_ENABLED', True):
+            return self.get_response(request)
+
+        request._instrumented_view = None
+        started = time.perf_counter()
+        with instrumentation.QueryCounter() as counter:
+            response = self.get_response(request)
+        latency_ms = (time.perf_counter() - started) * 1000
+
+        view_func = request._instrumented_view
+        if view_func is None:
+            # Unresolved URLs (404s, static files) are not worth tracking
+            return response
+
+        sample = instrumentation.RequestSample(
+            timestamp=time.time(),
+            view=instrumentation.view_label(request, view_func),
+            method=request.method,
+            path=request.path,
+            status=response.status_code,
+            queries=counter.queries,
+            db_ms=round(counter.db_seconds * 1000, 3),
+            latency_ms=round(latency_ms, 3),
+            response_bytes=instrumentation.response_size(response),
+            budget=instrumentation.view_budget(view_func, request.method),
+        )
+        instrumentation.record(sample)
+
+        if getattr(settings, 'INSTRUMENTATION_HEADERS', False):
+            response['X-Query-Count'] = str(sample.queries)
+            response['Server-Timing'] = f'db;dur={sample.db_ms:.1f}, total;dur={sample.latency_ms:.1f}'
+
+        if sample.budget is not None and sample.queries > sample.budget:
+            message = (
+                f"{sample.view} ran {sample.queries} queries for {sample.method} {sample.path} "
+                f"(budget {sample.budget})"
+            )
+            if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                raise instrumentation.QueryBudgetExceeded(message)
+            logger.warning(f"Query budget exceeded: {message}")
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._instrumented_view = view_func
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.27 on 2026-10-19 08:59
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SequenceCounter',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('prefix', models.CharField(help_text='Number prefix, e.g. SB, BATCH, ORD', max_length=20)),
+                ('period', models.CharField(help_text='Period the sequence restarts on, e.g. 2025 or 20250115', max_length=10)),
+                ('last_value', models.BigIntegerField(default=0, help_text='Last value handed out')),
+            ],
+            options={
+                'verbose_name': 'Sequence Counter',
+                'verbose_name_plural': 'Sequence Counters',
+                'db_table': 'sequence_counters',
+                'ordering': ['prefix', 'period'],
+                'unique_together': {('prefix', 'period')},
+            },
+        ),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 4.2.27 on 2026-10-19 10:49
+
+from django.db import migrations, models
+
+# SQLite: external-content FTS5 table over search_documents(title, body),
+# maintained by triggers. Prefix indexes make 2-4 character typeahead
+# prefixes index lookups.
+SQLITE_INDEX = [
+    """CREATE VIRTUAL TABLE search_documents_fts USING fts5(
+        title, body, content='search_documents', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3 4'
+    )""",
+    """CREATE TRIGGER search_documents_fts_insert AFTER INSERT ON search_documents BEGIN
+        INSERT INTO search_documents_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+    """CREATE TRIGGER search_documents_fts_delete AFTER DELETE ON search_documents BEGIN
+        INSERT INTO search_documents_fts(search_documents_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+    END""",
+    """CREATE TRIGGER search_documents_fts_update AFTER UPDATE OF title, body ON search_documents
+    WHEN old.title IS NOT new.title OR old.body IS NOT new.body BEGIN
+        INSERT INTO search_documents_fts(search_documents_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO search_documents_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+]
+
+SQLITE_DROP = [
+    'DROP TRIGGER IF EXISTS search_documents_fts_update',
+    'DROP TRIGGER IF EXISTS search_documents_fts_delete',
+    'DROP TRIGGER IF EXISTS search_documents_fts_insert',
+    'DROP TABLE IF EXISTS search_documents_fts',
+]
+
+# Postgres: generated tsvector (title weighted above body) with a GIN index,
+# and a trigram index on title for fuzzy matches. The 'simple' configuration
+# does no stemming: names, SKUs and lot numbers are not English words.
+POSTGRES_INDEX = [
+    """ALTER TABLE search_documents ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', title), 'A') || setweight(to_tsvector('simple', body), 'B')
+    ) STORED""",
+    'CREATE INDEX search_documents_vector_idx ON search_documents USING GIN (search_vector)',
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX search_documents_title_trgm_idx ON search_documents USING GIN (title gin_trgm_ops)',
+]
+
+POSTGRES_DROP = [
+    'DROP INDEX IF EXISTS search_documents_title_trgm_idx',
+    'DROP INDEX IF EXISTS search_documents_vector_idx',
+    'ALTER TABLE search_documents DROP COLUMN IF EXISTS search_vector',
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_sequencecounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('entity_type', models.CharField(max_length=20)),
+                ('object_id', models.UUIDField()),
+                ('title', models.CharField(max_length=300)),
+                ('subtitle', models.CharField(blank=True, max_length=300)),
+                ('body', models.TextField(blank=True, help_text='Other indexed text')),
+                ('state', models.CharField(blank=True, max_length=50)),
+                ('district', models.CharField(blank=True, max_length=100)),
+                ('crop_type', models.CharField(blank=True, max_length=50)),
+                ('status', models.CharField(blank=True, max_length=30)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Search Document',
+                'verbose_name_plural': 'Search Documents',
+                'db_table': 'search_documents',
+                'unique_together': {('entity_type', 'object_id')},
+            },
+        ),
+        migrations.RunPython(
+            _run({'sqlite': SQLITE_INDEX, 'postgresql': POSTGRES_INDEX}),
+            _run({'sqlite': SQLITE_DROP, 'postgresql': POSTGRES_DROP}),
+        ),
+    ]
@@ -23,3 +23,58 @@ class TimeStampedModel(models.Model):
         """Soft delete by setting is_active to False"""
         self.is_active = False
         self.save()
+
+
+class SequenceCounter(TimeStampedModel):
+    """
+    Counter row per (prefix, period) for human-readable document numbers
+    Lot, batch, order and payment numbers are allocated from here with an
+    atomic increment instead of scanning the last issued number
+    """
+    prefix = models.CharField(max_length=20, help_text="Number prefix, e.g. SB, BATCH, ORD")
+    period = models.CharField(max_length=10, help_text="Period the sequence restarts on, e.g. 2025 or 20250115")
+    last_value = models.BigIntegerField(default=0, help_text="Last value handed out")
+
+    class Meta:
+        db_table = 'sequence_counters'
+        verbose_name = 'Sequence Counter'
+        verbose_name_plural = 'Sequence Counters'
+        unique_together = [['prefix', 'period']]
+        ordering = ['prefix', 'period']
+
+    def __str__(self):
+        return f"{self.prefix}/{self.period}: {self.last_value}"
+
+
+class SearchDocument(models.Model):
+    """
+    Indexed text of one searchable lot, product, farmer or FPO
+    Kept in step with its source row by apps.core.services.search_service.
+    The full-text index over title and body is backend specific and lives
+    outside the model (migration 0002_search_documents): an FTS5 table on
+    SQLite, a tsvector column and trigram index on Postgres. It needs an
+    integer rowid, hence no TimeStampedModel.
+    """
+    id = models.BigAutoField(primary_key=True)
+    entity_type = models.CharField(max_length=20)
+    object_id = models.UUIDField()
+    title = models.CharField(max_length=300)
+    subtitle = models.CharField(max_length=300, blank=True)
+    body = models.TextField(blank=True, help_text="Other indexed text")
+
+    # Filters
+    state = models.CharField(max_length=50, blank=True)
+    district = models.CharField(max_length=100, blank=True)
+    crop_type = models.CharField(max_length=50, blank=True)
+    status = models.CharField(max_length=30, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'search_documents'
+        verbose_name = 'Search Document'
+        verbose_name_plural = 'Search Documents'
+        unique_together = [['entity_type', 'object_id']]
+
+    def __str__(self):
+        return f"{self.entity_type}: {self.title}"
@@ -1,20 +1,55 @@
 """
 Custom Pagination for SeedSync Platform
 """
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+import json
+
+from django.db import connections
+from django.db.models import Q, QuerySet
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .exceptions import InvalidDataException
+
+# Cap for exact counts when a cheap estimate is requested on non-PostgreSQL databases
+ESTIMATE_COUNT_CAP = 10000
 
 
 class StandardPagination(PageNumberPagination):
     """
     Standard pagination with customized response format
+    Clients opt in to keyset pagination with ?pagination=cursor (or by
+    passing a cursor); see KeysetPagination.
     """
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 100
     page_query_param = 'page'
+    mode_query_param = 'pagination'
+
+    keyset = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self._wants_cursor(queryset, request):
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def _wants_cursor(self, queryset, request):
+        params = request.query_params
+        if params.get(self.mode_query_param) != 'cursor' and KeysetPagination.cursor_query_param not in params:
+            return False
+        # Keyset needs a real queryset over a model with (created_at, id)
+        if not isinstance(queryset, QuerySet):
+            return False
+        field_names = {field.name for field in queryset.model._meta.concrete_fields}
+        return {'created_at', 'id'} <= field_names
 
     def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
         return Response({
             'status': 'success',
             'data': {
@@ -29,3 +64,164 @@ class StandardPagination(PageNumberPagination):
                 'total_pages': self.page.paginator.num_pages
             }
         })
+
+
+# ==================== Keyset (seek) pagination ====================
+
+def encode_cursor(values):
+    """Opaque cursor for the ordering values of the last row on a page"""
+    raw = json.dumps([str(value) if value is not None else None for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError on a malformed cursor"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def keyset_page(queryset, ordering, cursor=None, page_size=100):
+    """
+    One page of `queryset` ordered by `ordering`, starting after `cursor`
+    
+    ordering: field names with optional '-' prefix; the last one must be
+    unique (e.g. 'id') so the order is total. Each page is a single indexed
+    range query regardless of depth, unlike OFFSET pagination.
+    
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    Works with model querysets and .values() querysets.
+    """
+    fields = [name.lstrip('-') for name in ordering]
+    queryset = queryset.order_by(*ordering)
+    
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(fields):
+            raise ValueError("Invalid cursor")
+        model_fields = queryset.model._meta
+        try:
+            values = [
+                model_fields.get_field(field).to_python(value) if value is not None else None
+                for field, value in zip(fields, values)
+            ]
+        except Exception:
+            raise ValueError("Invalid cursor")
+        
+        # (a > x) OR (a = x AND b > y) OR ... with per-field direction
+        condition = Q()
+        for index, name in enumerate(ordering):
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            step = Q(**{f'{fields[index]}__{lookup}': values[index]})
+            for previous in range(index):
+                step &= Q(**{fields[previous]: values[previous]})
+            condition |= step
+        queryset = queryset.filter(condition)
+    
+    rows = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        if isinstance(last, dict):
+            next_cursor = encode_cursor([last[field] for field in fields])
+        else:
+            next_cursor = encode_cursor([getattr(last, field) for field in fields])
+    return rows, next_cursor
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over (created_at, id), newest first
+    Same envelope as StandardPagination. Each page is one range query, so
+    deep pages cost the same as the first and no COUNT(*) runs unless asked
+    for with ?count=estimate (cheap, possibly approximate) or ?count=exact.
+    Cursors are opaque; follow meta.next / meta.next_cursor.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self._page_size(request)
+
+        try:
+            rows, self.next_cursor = keyset_page(
+                queryset,
+                self.ordering,
+                cursor=request.query_params.get(self.cursor_query_param),
+                page_size=self.page_size
+            )
+        except ValueError:
+            raise InvalidDataException("Invalid cursor")
+
+        self.count, self.count_exact = None, None
+        count_mode = request.query_params.get(self.count_query_param)
+        if count_mode == 'exact':
+            self.count, self.count_exact = queryset.count(), True
+        elif count_mode == 'estimate':
+            self.count, self.count_exact = estimate_count(queryset)
+        return rows
+
+    def _page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, StandardPagination.mode_query_param, 'cursor')
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'status': 'success',
+            'data': {
+                'results': data
+            },
+            'meta': {
+                'count': self.count,
+                'count_exact': self.count_exact,
+                'next': self.get_next_link(),
+                'previous': None,
+                'next_cursor': self.next_cursor,
+                'page_size': self.page_size,
+                'pagination': 'cursor'
+            }
+        })
+
+
+def estimate_count(queryset):
+    """
+    Row count without a full scan; returns (count, is_exact)
+    PostgreSQL: the planner's row estimate for the query. Elsewhere: an exact
+    count capped at ESTIMATE_COUNT_CAP rows.
+    """
+    queryset = queryset.order_by()
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows']), False
+
+    count = queryset[:ESTIMATE_COUNT_CAP + 1].count()
+    if count > ESTIMATE_COUNT_CAP:
+        return ESTIMATE_COUNT_CAP, False
+    return count, True
@@ -0,0 +1,65 @@
+"""
+Fast JSON Rendering for SeedSync Platform
+orjson-backed drop-in for DRF's JSONRenderer
+
+orjson serializes dicts, lists, str/int/float, UUID, datetime/date/time and
+C-contiguous NumPy arrays and scalars in native code, so views can hand it
+raw .values() rows and DataFrame columns instead of converting each value
+with float(), str() or .item() first. What it does not know goes through
+default(): Decimal becomes a float, as with DRF's encoder; everything else
+(lazy strings, timedeltas, pandas timestamps, querysets) is handed to DRF's
+JSONEncoder.
+
+Output matches JSONRenderer except that NaN/Infinity render as null (DRF
+raises on them) and datetimes keep microseconds. Without orjson installed
+the renderer is exactly JSONRenderer.
+"""
+from decimal import Decimal
+
+import numpy as np
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_encoder = encoders.JSONEncoder()
+
+
+def _default(obj):
+    """orjson's hook for types it does not serialize itself"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, np.ndarray):
+        # Strided views and object/string arrays are not taken natively
+        if obj.dtype.kind in 'biuf' and not obj.flags.c_contiguous:
+            return np.ascontiguousarray(obj)
+        return obj.tolist()
+    return _encoder.default(obj)
+
+
+def dumps(data, indent=False):
+    """bytes of data as JSON, through orjson when available"""
+    if orjson is None:
+        return JSONRenderer().render(data, renderer_context={'indent': 2 if indent else None})
+    option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    # Keep the output a strict JavaScript subset, as JSONRenderer does
+    return orjson.dumps(data, default=_default, option=option).replace(
+        b'\xe2\x80\xa8', b'\\u2028'
+    ).replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer through orjson; any requested indent gives two spaces"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        return dumps(data, indent=bool(indent))
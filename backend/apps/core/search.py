@@ -0,0 +1,27 @@
+"""
+Full-text search filter for SeedSync viewsets
+?search= answered from the search index instead of LIKE scans
+
+    class ProcurementLotViewSet(viewsets.ModelViewSet):
+        filter_backends = [FullTextSearchFilter, ...]
+        search_entity = 'lot'
+
+Every word of the search term matches as a word prefix anywhere in the
+entity's indexed text (apps.core.services.search_service). Views without
+a search_entity fall back to DRF's SearchFilter over search_fields.
+"""
+from rest_framework import filters
+
+from apps.core.services.search_service import matching_ids
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    def filter_queryset(self, request, queryset, view):
+        entity_type = getattr(view, 'search_entity', None)
+        if entity_type is None:
+            return super().filter_queryset(request, queryset, view)
+
+        ids = matching_ids(entity_type, request.query_params.get(self.search_param, ''))
+        if ids is None:
+            return queryset
+        return queryset.filter(pk__in=ids)
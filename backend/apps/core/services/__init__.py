@@ -0,0 +1,14 @@
+# Services module
+from .sequence_service import allocate_sequence, next_sequence_value, max_numeric_suffix
+from .profile_service import get_role_profile, resolve_role_profile, invalidate_role_profile
+from .sync_service import sync_changes, collection_changes
+from .export_service import ExportColumn, ExportDataset, EXPORT_FORMATS, export_blocks
+from .search_service import SEARCH_ENTITIES, search, matching_ids, reindex, index_objects
+
+__all__ = [
+    'allocate_sequence', 'next_sequence_value', 'max_numeric_suffix',
+    'get_role_profile', 'resolve_role_profile', 'invalidate_role_profile',
+    'sync_changes', 'collection_changes',
+    'ExportColumn', 'ExportDataset', 'EXPORT_FORMATS', 'export_blocks',
+    'SEARCH_ENTITIES', 'search', 'matching_ids', 'reindex', 'index_objects',
+]
@@ -0,0 +1,213 @@
+"""
+Streaming Export Service
+CSV and Parquet output of querysets of any size in constant memory
+
+A dataset is read in keyset chunks (apps.core.pagination.keyset_page):
+each chunk is one indexed range query after the last row of the previous
+one, so memory holds one chunk whatever the row count, and the cursor of
+the last chunk written is all a background job needs to resume.
+
+CSV is written a chunk at a time. Parquet writes one row group per chunk
+and needs pyarrow, which is optional; its column types come from the
+model fields, so every row group shares one schema.
+"""
+import csv
+import io
+import json
+from collections import namedtuple
+from datetime import date, datetime
+
+from django.conf import settings
+from django.db import models
+
+from apps.core.pagination import encode_cursor, keyset_page
+
+# name: column header; source: ORM path read with .values()
+ExportColumn = namedtuple('ExportColumn', ['name', 'source'])
+
+# queryset(params): filtered queryset, ValueError on a bad filter;
+# ordering: keyset ordering, the last field unique
+ExportDataset = namedtuple('ExportDataset', ['queryset', 'columns', 'ordering'])
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+def load_pyarrow():
+    """pyarrow with pyarrow.parquet loaded; ValueError when it is not installed"""
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise ValueError("Parquet export requires pyarrow. Export as CSV instead.")
+    return pyarrow
+
+
+def iter_chunks(queryset, columns, ordering, cursor=None, chunk_size=None):
+    """
+    Yield (rows, cursor) per chunk of queryset
+    rows are tuples in column order; cursor is the keyset position after
+    the chunk's last row, to pass back in to resume.
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    sources = [column.source for column in columns]
+    fields = [name.lstrip('-') for name in ordering]
+    queryset = queryset.values(*dict.fromkeys(sources + fields))
+
+    while True:
+        rows, next_cursor = keyset_page(queryset, ordering, cursor=cursor, page_size=chunk_size)
+        if not rows:
+            return
+        cursor = encode_cursor([rows[-1][field] for field in fields])
+        yield [tuple(row[source] for source in sources) for row in rows], cursor
+        if next_cursor is None:
+            return
+
+
+# ==================== CSV ====================
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
+
+
+def csv_lines(rows):
+    """Encoded CSV lines of row tuples"""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([_csv_value(value) for value in row] for row in rows)
+    return buffer.getvalue().encode()
+
+
+def csv_header(columns):
+    """Encoded CSV header line"""
+    return csv_lines([[column.name for column in columns]])
+
+
+def csv_blocks(chunks, columns):
+    """Yield (bytes, cursor): the header line, then one block per chunk"""
+    yield csv_header(columns), None
+    for rows, cursor in chunks:
+        yield csv_lines(rows), cursor
+
+
+# ==================== Parquet ====================
+
+def _model_field(model, source):
+    field = None
+    for part in source.split('__'):
+        field = model._meta.get_field(part)
+        if field.is_relation:
+            model = field.related_model
+    # A foreign key exports its key
+    while field.is_relation:
+        field = field.target_field
+    return field
+
+
+def _arrow_column(pa, field):
+    """(Arrow type, value converter or None) for a model field"""
+    if isinstance(field, models.DecimalField):
+        return pa.decimal128(field.max_digits, field.decimal_places), None
+    if isinstance(field, models.BooleanField):
+        return pa.bool_(), None
+    if isinstance(field, (models.IntegerField, models.AutoField)):
+        return pa.int64(), None
+    if isinstance(field, models.FloatField):
+        return pa.float64(), None
+    if isinstance(field, models.DateTimeField):
+        return pa.timestamp('us', tz='UTC'), None
+    if isinstance(field, models.DateField):
+        return pa.date32(), None
+    if isinstance(field, models.JSONField):
+        return pa.string(), json.dumps
+    if isinstance(field, models.UUIDField):
+        return pa.string(), str
+    return pa.string(), None
+
+
+def arrow_schema(model, columns):
+    """(pyarrow schema, per-column converters) for columns read from model"""
+    pa = load_pyarrow()
+    arrow_fields, converters = [], []
+    for column in columns:
+        arrow_type, converter = _arrow_column(pa, _model_field(model, column.source))
+        arrow_fields.append(pa.field(column.name, arrow_type))
+        converters.append(converter)
+    return pa.schema(arrow_fields), converters
+
+
+def arrow_table(rows, schema, converters):
+    """One chunk of row tuples as a pyarrow Table"""
+    pa = load_pyarrow()
+    arrays = []
+    for index, (arrow_field, converter) in enumerate(zip(schema, converters)):
+        values = [row[index] for row in rows]
+        if converter is not None:
+            values = [None if value is None else converter(value) for value in values]
+        arrays.append(pa.array(values, type=arrow_field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+class _Drain(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last drain"""
+
+    def __init__(self):
+        super().__init__()
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def parquet_blocks(chunks, model, columns):
+    """Yield (bytes, cursor): one row group per chunk, then the footer"""
+    pq = load_pyarrow().parquet
+    schema, converters = arrow_schema(model, columns)
+    sink = _Drain()
+    writer = pq.ParquetWriter(sink, schema)
+    cursor = None
+    try:
+        for rows, cursor in chunks:
+            writer.write_table(arrow_table(rows, schema, converters))
+            yield sink.drain(), cursor
+    finally:
+        writer.close()
+    yield sink.drain(), cursor
+
+
+def export_blocks(dataset, params, export_format, chunk_size=None):
+    """
+    Yield (bytes, cursor) of a whole dataset export in export_format
+    Raises ValueError for an unknown format, a bad filter or missing pyarrow
+    before anything is read.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Export format must be one of: {', '.join(EXPORT_FORMATS)}")
+    if export_format == 'parquet':
+        load_pyarrow()
+    queryset = dataset.queryset(params)
+    chunks = iter_chunks(queryset, dataset.columns, dataset.ordering, chunk_size=chunk_size)
+    if export_format == 'parquet':
+        return parquet_blocks(chunks, queryset.model, dataset.columns)
+    return csv_blocks(chunks, dataset.columns)
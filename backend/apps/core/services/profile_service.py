@@ -0,0 +1,124 @@
+"""
+Role Profile Service
+Resolve the authenticated user's role profile once per request
+"""
+import logging
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+
+from apps.core.constants import (
+    ROLE_FARMER, ROLE_FPO, ROLE_PROCESSOR, ROLE_RETAILER, ROLE_LOGISTICS
+)
+
+logger = logging.getLogger(__name__)
+
+# role -> (profile model, select_related)
+ROLE_PROFILE_MODELS = {
+    ROLE_FARMER: ('farmers.FarmerProfile', ('user', 'fpo')),
+    ROLE_FPO: ('fpos.FPOProfile', ('user',)),
+    ROLE_PROCESSOR: ('processors.ProcessorProfile', ('user',)),
+    ROLE_RETAILER: ('retailers.RetailerProfile', ('user',)),
+    ROLE_LOGISTICS: ('logistics.LogisticsPartner', ('user',)),
+}
+
+_REQUEST_CACHE_ATTR = '_role_profile_cache'
+
+
+def _version_key(user_id):
+    return f'role_profile:version:{user_id}'
+
+
+def _shared_ttl():
+    # 0 (the default) keeps profiles per-request only
+    return getattr(settings, 'ROLE_PROFILE_CACHE_TTL', 0)
+
+
+def _load_profile(user, model, select_related=('user',)):
+    """Profile of `model` for user, from the shared cache when enabled; None if missing"""
+    ttl = _shared_ttl()
+    key = None
+    if ttl:
+        version = cache.get_or_set(_version_key(user.pk), 1, timeout=None)
+        key = f'role_profile:{model._meta.label_lower}:{user.pk}:{version}'
+        profile = cache.get(key)
+        if profile is not None:
+            return profile
+
+    profile = model.objects.select_related(*select_related).filter(user=user).first()
+    if profile is not None and key:
+        cache.set(key, profile, timeout=ttl)
+    return profile
+
+
+def resolve_role_profile(user, model=None):
+    """
+    Load a user's profile without request caching
+    model: profile class to load; defaults to the one for user.role
+    Returns None when the user has no such profile.
+    """
+    if not user or not user.is_authenticated:
+        return None
+
+    role_model, select_related = ROLE_PROFILE_MODELS.get(user.role, (None, ('user',)))
+    if role_model:
+        role_model = apps.get_model(role_model)
+    if model is None:
+        model = role_model
+    if model is None:
+        return None
+    if model is not role_model:
+        select_related = ('user',)
+    return _load_profile(user, model, select_related)
+
+
+def get_role_profile(request, model=None):
+    """
+    The request user's role profile, loaded at most once per request
+
+    Without model: the profile for request.user.role, or None.
+    With model: that profile, raising model.DoesNotExist when the user has
+    none - a drop-in for model.objects.get(user=request.user).
+    """
+    # DRF requests wrap the Django request; cache on the underlying one
+    http_request = getattr(request, '_request', request)
+    user = request.user
+    per_request = getattr(http_request, _REQUEST_CACHE_ATTR, None)
+    if per_request is None or per_request.get('user_id') != user.pk:
+        per_request = {'user_id': user.pk}
+        setattr(http_request, _REQUEST_CACHE_ATTR, per_request)
+
+    label = model._meta.label_lower if model is not None else None
+    if label not in per_request:
+        per_request[label] = resolve_role_profile(user, model)
+        if model is None and per_request[label] is not None:
+            per_request[per_request[label]._meta.label_lower] = per_request[label]
+
+    profile = per_request[label]
+    if profile is None and model is not None:
+        raise model.DoesNotExist(f"{model.__name__} matching query does not exist.")
+    return profile
+
+
+def invalidate_role_profile(user_id):
+    """Make shared-cache entries for the user's profiles unreachable"""
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        pass
+
+
+def _on_profile_change(sender, instance, **kwargs):
+    user_id = instance.pk if sender is apps.get_model(settings.AUTH_USER_MODEL) else instance.user_id
+    invalidate_role_profile(user_id)
+
+
+def connect_profile_signals():
+    """Bump a user's profile version whenever the user or a role profile changes"""
+    senders = [apps.get_model(settings.AUTH_USER_MODEL)]
+    senders += [apps.get_model(label) for label, _ in ROLE_PROFILE_MODELS.values()]
+    for sender in senders:
+        post_save.connect(_on_profile_change, sender=sender, dispatch_uid=f'role_profile_save_{sender._meta.label_lower}')
+        post_delete.connect(_on_profile_change, sender=sender, dispatch_uid=f'role_profile_delete_{sender._meta.label_lower}')
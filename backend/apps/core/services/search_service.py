@@ -0,0 +1,357 @@
+"""
+Search Service
+Ranked prefix (typeahead) search across lots, processed products, farmers and FPOs
+
+Each searchable row has a SearchDocument: a title, the rest of its text
+and a few filter columns. The full-text index over those documents is the
+database's own: FTS5 on SQLite (ranked by bm25), a tsvector GIN index plus
+pg_trgm on Postgres (ranked by ts_rank and title similarity, so a typo in
+a name still finds it). Both are created by core migration 0002.
+
+Documents follow their rows through post_save/post_delete, in the same
+transaction as the write. A document also carries text of related rows
+(a lot's farmer and FPO, a product's processor); renaming those needs
+`manage.py reindex_search`. bulk_create() and .update() send no signals,
+so their callers index the rows themselves with index_objects().
+"""
+import re
+from collections import namedtuple
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_save, post_delete
+from django.utils import timezone
+
+from apps.core.constants import OILSEED_CHOICES
+
+# model: app label path; select_related: relations document() reads;
+# fields: source fields whose change re-indexes the row;
+# document(instance): SearchDocument fields, or None to keep it out of the index
+SearchEntity = namedtuple('SearchEntity', ['model', 'select_related', 'fields', 'document'])
+
+# Letters and digits only: every token is safe inside an FTS5 or tsquery expression
+_TOKEN = re.compile(r'[^\W_]+')
+MAX_QUERY_TOKENS = 8
+
+
+def _text(*values):
+    return ' '.join(str(value) for value in values if value)
+
+
+def _lot_document(lot):
+    if not lot.is_active:
+        return None
+    owner = lot.farmer or lot.fpo
+    return {
+        'title': lot.lot_number,
+        'subtitle': _text(lot.get_crop_type_display(), lot.crop_variety, f'{lot.quantity_quintals} q'),
+        'body': _text(
+            lot.crop_type, lot.get_crop_type_display(), lot.crop_variety, lot.quality_grade, lot.description,
+            lot.farmer.full_name if lot.farmer else '',
+            lot.fpo.organization_name if lot.fpo else '',
+            owner.district if owner else '', owner.state if owner else '',
+        ),
+        'state': owner.state if owner else '',
+        'district': owner.district if owner else '',
+        'crop_type': lot.crop_type,
+        'status': lot.status,
+    }
+
+
+def _product_document(product):
+    if not product.is_active:
+        return None
+    processor = product.processor
+    # 'soybean_oil' is pressed from 'soybean' lots
+    crop_type = product.product_type.rsplit('_', 1)[0]
+    return {
+        'title': f'{product.get_product_type_display()} {product.sku}',
+        'subtitle': _text(processor.company_name, product.get_processing_type_display()),
+        'body': _text(
+            product.batch_number, product.product_type, product.processing_type, product.quality_grade,
+            product.description, processor.company_name, processor.city, processor.state,
+        ),
+        'state': processor.state,
+        'district': processor.city,
+        'crop_type': crop_type if crop_type in _OILSEEDS else '',
+        'status': 'available' if product.is_available_for_sale else 'unavailable',
+    }
+
+
+def _farmer_document(farmer):
+    if not farmer.is_active:
+        return None
+    return {
+        'title': farmer.full_name,
+        'subtitle': _text(farmer.village, farmer.district),
+        'body': _text(farmer.village, farmer.tehsil, farmer.district, farmer.state, *farmer.primary_crops),
+        'state': farmer.state,
+        'district': farmer.district,
+        'crop_type': farmer.primary_crops[0] if farmer.primary_crops else '',
+        'status': farmer.kyc_status,
+    }
+
+
+def _fpo_document(fpo):
+    if not fpo.is_active:
+        return None
+    return {
+        'title': fpo.organization_name,
+        'subtitle': _text(fpo.district, fpo.state),
+        'body': _text(fpo.registration_number, fpo.village, fpo.district, fpo.state, *fpo.primary_crops),
+        'state': fpo.state,
+        'district': fpo.district,
+        'crop_type': fpo.primary_crops[0] if fpo.primary_crops else '',
+        'status': 'verified' if fpo.is_verified else 'unverified',
+    }
+
+
+SEARCH_ENTITIES = {
+    'lot': SearchEntity('lots.ProcurementLot', ('farmer', 'fpo'), (
+        'lot_number', 'crop_type', 'crop_variety', 'quantity_quintals', 'quality_grade', 'description',
+        'status', 'farmer', 'fpo', 'is_active',
+    ), _lot_document),
+    'product': SearchEntity('processors.ProcessedProduct', ('processor',), (
+        'sku', 'batch_number', 'product_type', 'processing_type', 'quality_grade', 'description',
+        'is_available_for_sale', 'processor', 'is_active',
+    ), _product_document),
+    'farmer': SearchEntity('farmers.FarmerProfile', (), (
+        'full_name', 'village', 'tehsil', 'district', 'state', 'primary_crops', 'kyc_status', 'is_active',
+    ), _farmer_document),
+    'fpo': SearchEntity('fpos.FPOProfile', (), (
+        'organization_name', 'registration_number', 'village', 'district', 'state', 'primary_crops',
+        'is_verified', 'is_active',
+    ), _fpo_document),
+}
+
+SEARCH_FILTERS = ('state', 'district', 'crop_type', 'status')
+
+_OILSEEDS = {code for code, _ in OILSEED_CHOICES}
+
+_COLUMNS = ', '.join(
+    f'd.{name}' for name in ('id', 'entity_type', 'object_id', 'title', 'subtitle') + SEARCH_FILTERS
+)
+
+
+def _document_model():
+    return apps.get_model('core', 'SearchDocument')
+
+
+# ==================== Indexing ====================
+
+def index_object(entity_type, instance):
+    """Add, refresh or drop the document of one row"""
+    SearchDocument = _document_model()
+    document = SEARCH_ENTITIES[entity_type].document(instance)
+    if document is None:
+        remove_object(entity_type, instance.pk)
+        return
+    # One UPDATE for a row already indexed; the insert only on its first save
+    updated = SearchDocument.objects.filter(entity_type=entity_type, object_id=instance.pk).update(
+        updated_at=timezone.now(), **document
+    )
+    if not updated:
+        SearchDocument.objects.create(entity_type=entity_type, object_id=instance.pk, **document)
+
+
+def index_objects(entity_type, instances):
+    """
+    index_object() for many rows of one type, for writers that bypass
+    signals (bulk_create, queryset.update). Call it in the writer's
+    transaction with the instances as written, their select_related
+    relations loaded: one read, then bulk writes.
+    """
+    SearchDocument = _document_model()
+    document = SEARCH_ENTITIES[entity_type].document
+    documents = {instance.pk: document(instance) for instance in instances}
+    if not documents:
+        return
+
+    SearchDocument.objects.filter(
+        entity_type=entity_type, object_id__in=[pk for pk, fields in documents.items() if fields is None]
+    ).delete()
+    documents = {pk: fields for pk, fields in documents.items() if fields is not None}
+    existing = dict(
+        SearchDocument.objects.filter(entity_type=entity_type, object_id__in=documents.keys())
+        .values_list('object_id', 'id')
+    )
+
+    now = timezone.now()
+    rows = [
+        SearchDocument(id=existing.get(pk), entity_type=entity_type, object_id=pk, updated_at=now, **fields)
+        for pk, fields in documents.items()
+    ]
+    updated = [row for row in rows if row.id is not None]
+    if updated:
+        SearchDocument.objects.bulk_update(updated, ['title', 'subtitle', 'body', *SEARCH_FILTERS, 'updated_at'])
+    SearchDocument.objects.bulk_create([row for row in rows if row.id is None])
+
+
+def remove_object(entity_type, object_id):
+    _document_model().objects.filter(entity_type=entity_type, object_id=object_id).delete()
+
+
+def reindex(entity_types=None, batch_size=None):
+    """
+    Rebuild the documents of entity_types (default all) from their tables
+    Returns {entity_type: documents indexed}.
+    """
+    SearchDocument = _document_model()
+    batch_size = batch_size or settings.SEARCH_REINDEX_BATCH_SIZE
+    counts = {}
+    for entity_type in entity_types or SEARCH_ENTITIES:
+        entity = SEARCH_ENTITIES[entity_type]
+        rows = apps.get_model(entity.model).objects.filter(is_active=True).select_related(*entity.select_related)
+        with transaction.atomic():
+            SearchDocument.objects.filter(entity_type=entity_type).delete()
+            batch = []
+            counts[entity_type] = 0
+            for instance in rows.iterator(chunk_size=batch_size):
+                document = entity.document(instance)
+                if document is None:
+                    continue
+                batch.append(SearchDocument(entity_type=entity_type, object_id=instance.pk, **document))
+                if len(batch) >= batch_size:
+                    SearchDocument.objects.bulk_create(batch)
+                    counts[entity_type] += len(batch)
+                    batch = []
+            SearchDocument.objects.bulk_create(batch)
+            counts[entity_type] += len(batch)
+
+    connection = connections[router.db_for_write(SearchDocument)]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            # Merge the index b-trees left by the rewrite
+            cursor.execute("INSERT INTO search_documents_fts(search_documents_fts) VALUES ('optimize')")
+        elif connection.vendor == 'postgresql':
+            cursor.execute('ANALYZE search_documents')
+    return counts
+
+
+def _on_save(entity_type, fields):
+    def handler(sender, instance, update_fields=None, raw=False, **kwargs):
+        # Fixture loads may precede the related rows; counter saves leave the document alone
+        if raw or (update_fields is not None and not fields & set(update_fields)):
+            return
+        index_object(entity_type, instance)
+    return handler
+
+
+def _on_delete(entity_type):
+    def handler(sender, instance, **kwargs):
+        remove_object(entity_type, instance.pk)
+    return handler
+
+
+def connect_search_signals():
+    """Keep every SEARCH_ENTITIES row's document in step with it"""
+    for entity_type, entity in SEARCH_ENTITIES.items():
+        model = apps.get_model(entity.model)
+        fields = set(entity.fields)
+        post_save.connect(
+            _on_save(entity_type, fields), sender=model, weak=False, dispatch_uid=f'search_save_{entity_type}'
+        )
+        post_delete.connect(
+            _on_delete(entity_type), sender=model, weak=False, dispatch_uid=f'search_delete_{entity_type}'
+        )
+
+
+# ==================== Queries ====================
+
+def query_tokens(query):
+    """Lowercased letter/digit runs of a query, at most MAX_QUERY_TOKENS"""
+    return _TOKEN.findall((query or '').lower())[:MAX_QUERY_TOKENS]
+
+
+def _match(vendor, tokens):
+    """Backend match expression: rows with every token as a word prefix"""
+    if vendor == 'postgresql':
+        return ' & '.join(f'{token}:*' for token in tokens)
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def _where(vendor, tokens, entity_types, filters, fuzzy_title=None):
+    """
+    WHERE clause and params over search_documents d
+    fuzzy_title (Postgres): also match titles similar to this text.
+    """
+    params = [_match(vendor, tokens)]
+    if vendor != 'postgresql':
+        clauses = ['search_documents_fts MATCH %s']
+    elif fuzzy_title:
+        clauses = ["(d.search_vector @@ to_tsquery('simple', %s) OR d.title %% %s)"]
+        params.append(fuzzy_title)
+    else:
+        clauses = ["d.search_vector @@ to_tsquery('simple', %s)"]
+    if entity_types:
+        clauses.append(f"d.entity_type IN ({', '.join(['%s'] * len(entity_types))})")
+        params.extend(entity_types)
+    for name in SEARCH_FILTERS:
+        if filters.get(name):
+            clauses.append(f'd.{name} = %s')
+            params.append(filters[name])
+    return ' AND '.join(clauses), params
+
+
+def _from(vendor):
+    if vendor == 'postgresql':
+        return 'search_documents d'
+    # CROSS JOIN pins the join order: the index lookup first, then documents by rowid.
+    # Left to itself SQLite may walk every document of a type and MATCH each one.
+    return 'search_documents_fts CROSS JOIN search_documents d ON d.id = search_documents_fts.rowid'
+
+
+def _validate(entity_types):
+    unknown = [entity_type for entity_type in entity_types or () if entity_type not in SEARCH_ENTITIES]
+    if unknown:
+        raise ValueError(f"Unknown entity type: {', '.join(unknown)}")
+
+
+def search(query, entity_types=None, filters=None, limit=None):
+    """
+    Best matches for a typeahead query, most relevant first
+    entity_types: subset of SEARCH_ENTITIES, default all; filters: exact
+    values of SEARCH_FILTERS. Returns a list of SearchDocuments with a
+    `score` (higher is better). Raises ValueError for an unknown type.
+    """
+    _validate(entity_types)
+    tokens = query_tokens(query)
+    if not tokens:
+        return []
+    limit = min(max(1, limit or settings.SEARCH_RESULTS_LIMIT), settings.SEARCH_MAX_RESULTS)
+
+    SearchDocument = _document_model()
+    vendor = connections[router.db_for_read(SearchDocument)].vendor
+    if vendor == 'postgresql':
+        # Full-text matches, or titles a typo away (pg_trgm similarity), scored together
+        where, params = _where(vendor, tokens, entity_types, filters or {}, fuzzy_title=query)
+        score = "ts_rank(d.search_vector, to_tsquery('simple', %s)) + similarity(d.title, %s)"
+        score_params = [_match(vendor, tokens), query]
+    else:
+        where, params = _where(vendor, tokens, entity_types, filters or {})
+        # bm25 is lower for better matches; title weighs 10x the body
+        score = '-bm25(search_documents_fts, 10.0, 1.0)'
+        score_params = []
+
+    sql = (
+        f'SELECT {_COLUMNS}, {score} AS score FROM {_from(vendor)} '
+        f'WHERE {where} ORDER BY score DESC, d.title LIMIT %s'
+    )
+    return list(SearchDocument.objects.raw(sql, score_params + params + [limit]))
+
+
+def matching_ids(entity_type, query):
+    """
+    Subquery of the ids of entity_type rows matching query, for
+    queryset.filter(pk__in=...); None when the query has no searchable text
+    """
+    _validate([entity_type])
+    tokens = query_tokens(query)
+    if not tokens:
+        return None
+    SearchDocument = _document_model()
+    vendor = connections[router.db_for_read(SearchDocument)].vendor
+    where, params = _where(vendor, tokens, [entity_type], {})
+    return RawSQL(f'SELECT d.object_id FROM {_from(vendor)} WHERE {where}', params)
@@ -0,0 +1,69 @@
+"""
+Sequence Service for SeedSync Platform
+Race-free allocation of document numbers (lots, batches, orders, payments)
+"""
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+def allocate_sequence(prefix, period, count=1, seed=None):
+    """
+    Atomically reserve `count` consecutive values for (prefix, period)
+
+    The counter row is incremented with a single UPDATE ... SET last_value =
+    last_value + count, so concurrent callers serialise on that one row and
+    never see the same value. Bulk creators pass count > 1 to pre-allocate a
+    whole block in one round trip.
+
+    seed: optional callable returning the highest value already issued. It only
+    runs when the counter row does not exist yet, so numbers issued before the
+    counter existed are never handed out again.
+
+    Returns a range of the allocated values.
+    """
+    if count < 1:
+        raise ValueError("count must be at least 1")
+
+    from apps.core.models import SequenceCounter
+
+    counter = SequenceCounter.objects.filter(prefix=prefix, period=period)
+
+    with transaction.atomic():
+        if not counter.update(last_value=F('last_value') + count, updated_at=timezone.now()):
+            initial = seed() if seed else 0
+            # ignore_conflicts: another worker may have created the row meanwhile
+            SequenceCounter.objects.bulk_create(
+                [SequenceCounter(prefix=prefix, period=period, last_value=initial)],
+                ignore_conflicts=True
+            )
+            counter.update(last_value=F('last_value') + count, updated_at=timezone.now())
+
+        # Row is locked by our UPDATE until commit, so this read is our own value
+        last_value = counter.values_list('last_value', flat=True).get()
+
+    return range(last_value - count + 1, last_value + 1)
+
+
+def next_sequence_value(prefix, period, seed=None):
+    """Reserve and return a single value for (prefix, period)"""
+    return allocate_sequence(prefix, period, count=1, seed=seed)[0]
+
+
+def max_numeric_suffix(queryset, field, prefix):
+    """
+    Highest integer found after `prefix` in `field` across queryset
+
+    Used as a one-time seed when a counter is first created for numbers that
+    were issued by the old scan-based generators.
+    """
+    highest = 0
+    for value in queryset.filter(**{f'{field}__startswith': prefix}).values_list(field, flat=True).iterator():
+        suffix = value[len(prefix):].lstrip('-')
+        if suffix.isdigit():
+            highest = max(highest, int(suffix))
+    return highest
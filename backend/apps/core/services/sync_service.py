@@ -0,0 +1,186 @@
+"""
+Delta Sync Service
+Rows changed since a client's per-collection high-water marks
+
+A mark is an opaque keyset cursor over (updated_at, id). Each collection is
+read with one range query on an (owner, updated_at) index, so a sync costs
+what changed since the mark, not the size of the user's data.
+
+Soft-deleted rows (is_active=False) come back as tombstones: their ids in
+`deleted`. Rows are only returned once they are SYNC_SETTLE_SECONDS old, so
+a write whose transaction commits a moment after its updated_at was stamped
+is not skipped by a client that already moved its mark past it.
+
+Bulk .update() calls on synced models must set updated_at themselves;
+auto_now only applies to save().
+"""
+from collections import namedtuple
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.core.constants import ROLE_FARMER, ROLE_FPO
+from apps.core.pagination import encode_cursor, keyset_page
+
+# model: app label path; fields: columns sent besides id and updated_at;
+# scope(user, profile): Q of the rows the user may sync, or None for none
+SyncCollection = namedtuple('SyncCollection', ['model', 'fields', 'scope'])
+
+SYNC_ORDERING = ('updated_at', 'id')
+
+
+def _lot_scope(user, profile):
+    if profile is not None and user.role == ROLE_FARMER:
+        return Q(farmer=profile)
+    if profile is not None and user.role == ROLE_FPO:
+        return Q(fpo=profile)
+    # Buyers follow the lots they have bid on
+    Bid = apps.get_model('bids', 'Bid')
+    return Q(id__in=Bid.objects.filter(bidder_user=user).values('lot_id'))
+
+
+def _bid_scope(user, profile):
+    # Bids on the user's own lots by id subquery: an OR across the lots join
+    # would defeat both (owner, updated_at) indexes
+    scope = Q(bidder_user=user)
+    if profile is not None and user.role in (ROLE_FARMER, ROLE_FPO):
+        ProcurementLot = apps.get_model('lots', 'ProcurementLot')
+        scope |= Q(lot_id__in=ProcurementLot.objects.filter(_lot_scope(user, profile)).values('id'))
+    return scope
+
+
+def _payment_scope(user, profile):
+    if profile is None:
+        return None
+    return Q(payer_id=profile.id) | Q(payee_id=profile.id)
+
+
+def _notification_scope(user, profile):
+    return Q(user=user)
+
+
+def _crop_plan_scope(user, profile):
+    if profile is None or user.role != ROLE_FARMER:
+        return None
+    return Q(farmer=profile)
+
+
+def _everyone(user, profile):
+    return Q()
+
+
+COLLECTIONS = {
+    'lots': SyncCollection('lots.ProcurementLot', (
+        'lot_number', 'farmer_id', 'fpo_id', 'listing_type', 'crop_type', 'crop_variety',
+        'harvest_date', 'quantity_quintals', 'available_quantity_quintals', 'quality_grade',
+        'moisture_content', 'oil_content', 'expected_price_per_quintal', 'final_price_per_quintal',
+        'status', 'listed_date', 'sold_date', 'pickup_address', 'description', 'bid_count',
+    ), _lot_scope),
+    'bids': SyncCollection('bids.Bid', (
+        'lot_id', 'bidder_type', 'bidder_name', 'bidder_user_id', 'offered_price_per_quintal',
+        'quantity_quintals', 'total_amount', 'expected_pickup_date', 'payment_terms', 'status',
+        'message', 'farmer_response', 'submitted_at', 'responded_at',
+    ), _bid_scope),
+    'payments': SyncCollection('payments.Payment', (
+        'payment_id', 'lot_id', 'bid_id', 'payer_id', 'payer_name', 'payee_id', 'payee_name',
+        'gross_amount', 'commission_amount', 'tax_amount', 'net_amount', 'payment_method',
+        'status', 'initiated_at', 'completed_at', 'expected_date',
+    ), _payment_scope),
+    'notifications': SyncCollection('notifications.Notification', (
+        'title', 'message', 'notification_type', 'is_read', 'created_at',
+    ), _notification_scope),
+    'crop_plans': SyncCollection('farmers.CropPlan', (
+        'farm_land_id', 'crop_type', 'crop_name', 'land_acres', 'sowing_date', 'maturity_days',
+        'expected_harvest_date', 'season', 'msp_price_per_quintal', 'estimated_yield_quintals',
+        'gross_revenue', 'total_input_costs', 'net_profit', 'status', 'actual_yield_quintals',
+        'notes', 'converted_lot_id',
+    ), _crop_plan_scope),
+    'crops': SyncCollection('crops.CropMaster', (
+        'crop_code', 'crop_name', 'hindi_name', 'oil_content_percentage', 'growing_season',
+        'maturity_days', 'water_requirement', 'suitable_soil_types', 'suitable_states',
+    ), _everyone),
+    'crop_varieties': SyncCollection('crops.CropVariety', (
+        'crop_id', 'variety_name', 'variety_code', 'maturity_days', 'yield_potential_quintals_per_acre',
+        'oil_content_percentage', 'season', 'suitable_regions', 'disease_resistance',
+        'seed_rate_kg_per_acre',
+    ), _everyone),
+}
+
+
+def sync_page_size(value=None):
+    """Rows per collection per request, clamped to SYNC_MAX_PAGE_SIZE"""
+    if value in (None, ''):
+        return settings.SYNC_PAGE_SIZE
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("limit must be an integer")
+    return min(max(value, 1), settings.SYNC_MAX_PAGE_SIZE)
+
+
+def collection_changes(name, user, profile, mark=None, limit=None, settled=None):
+    """
+    One page of a collection's changes after `mark`
+
+    Returns {'rows', 'deleted', 'mark', 'has_more'}. Without a mark this is
+    the initial download: active rows only, no tombstones. The returned
+    mark is the last row read (live or deleted); the caller's own mark
+    comes back unchanged when nothing changed. Raises ValueError for an
+    unknown collection or a malformed mark.
+    """
+    if name not in COLLECTIONS:
+        raise ValueError(f"Unknown collection: {name}")
+    collection = COLLECTIONS[name]
+    limit = sync_page_size(limit)
+    settled = settled or timezone.now() - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+
+    scope = collection.scope(user, profile)
+    if scope is None:
+        return {'rows': [], 'deleted': [], 'mark': mark, 'has_more': False}
+
+    queryset = apps.get_model(collection.model).objects.filter(scope, updated_at__lte=settled)
+    if not mark:
+        queryset = queryset.filter(is_active=True)
+    queryset = queryset.values('id', 'updated_at', 'is_active', *collection.fields)
+
+    page, next_mark = keyset_page(queryset, SYNC_ORDERING, cursor=mark or None, page_size=limit)
+
+    rows, deleted = [], []
+    for row in page:
+        if row.pop('is_active'):
+            rows.append(row)
+        else:
+            deleted.append(row['id'])
+    if page:
+        mark = encode_cursor([page[-1][field] for field in SYNC_ORDERING])
+    return {'rows': rows, 'deleted': deleted, 'mark': mark, 'has_more': next_mark is not None}
+
+
+def sync_changes(user, profile, marks=None, names=None, limit=None):
+    """
+    Changes for several collections in one round trip
+
+    marks: {collection: mark} from the previous response; missing or empty
+    means a first download. names: collections to read, default all.
+    Clients repeat the call with the returned marks while has_more is true.
+    """
+    marks = marks or {}
+    names = list(names or COLLECTIONS)
+    unknown = [name for name in names if name not in COLLECTIONS]
+    if unknown:
+        raise ValueError(f"Unknown collection: {', '.join(unknown)}")
+
+    now = timezone.now()
+    settled = now - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+    collections = {
+        name: collection_changes(name, user, profile, marks.get(name), limit, settled)
+        for name in names
+    }
+    return {
+        'server_time': now,
+        'collections': collections,
+        'has_more': any(changes['has_more'] for changes in collections.values()),
+    }
@@ -0,0 +1,64 @@
+"""
+SQLite Tuning for SeedSync Platform
+Applies settings.SQLITE_PRAGMAS to every new SQLite connection
+
+Single-node deployments stay on SQLite, where the default rollback journal
+lets a single writer block every reader and Python's driver gives up with
+"database is locked". WAL lets readers run alongside the writer,
+synchronous=NORMAL drops the fsync per commit (still durable across
+application crashes), and busy_timeout makes writers queue for the lock
+instead of failing.
+"""
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Settings that only the read-write connection may change
+PERSISTENT_PRAGMAS = ('journal_mode',)
+
+
+def apply_pragmas(dbapi_connection, pragmas, read_only=False):
+    """Run PRAGMA name=value for each item on a sqlite3 connection"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            if read_only and name in PERSISTENT_PRAGMAS:
+                continue
+            cursor.execute(f'PRAGMA {name}={value}')
+    finally:
+        cursor.close()
+
+
+def configure_sqlite_connection(sender, connection, **kwargs):
+    """connection_created receiver"""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', None)
+    if not pragmas:
+        return
+    read_only = 'mode=ro' in str(connection.settings_dict['NAME'])
+    try:
+        apply_pragmas(connection.connection, pragmas, read_only=read_only)
+    except Exception as e:
+        # A connection without the tuning still works, just slower under contention
+        logger.warning(f"Could not apply SQLite pragmas on '{connection.alias}': {str(e)}")
+
+
+def current_pragmas(connection, names=None):
+    """Effective values on a Django connection, e.g. for the write benchmark"""
+    names = names or list(getattr(settings, 'SQLITE_PRAGMAS', {}))
+    with connection.cursor() as cursor:
+        values = {}
+        for name in names:
+            cursor.execute(f'PRAGMA {name}')
+            row = cursor.fetchone()
+            values[name] = row[0] if row else None
+    return values
+
+
+def connect_sqlite_tuning():
+    from django.db.backends.signals import connection_created
+
+    connection_created.connect(configure_sqlite_connection, dispatch_uid='core.sqlite_tuning')
@@ -1,3 +1,549 @@
-from django.test import TestCase
+import datetime
+import re
+import threading
+import uuid
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.db import transaction
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import path
+from django.utils import timezone
+from rest_framework.permissions import AllowAny
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APITestCase
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.farmers.models import FarmerProfile
+from apps.lots.models import ProcurementLot
+from apps.lots.serializers import ProcurementLotSerializer
+from apps.lots.views import ProcurementLotViewSet
+from apps.notifications.models import Notification
+from apps.payments.models import Payment
+from apps.processors.models import ProcessingBatch
+from apps.users.models import User
+from . import instrumentation, write_queue
+from .cache import cache_response
+from .db_router import ReplicaReadMixin, _reading_from_replica
+from .fieldsets import fieldset_plan
+from .instrumentation import QueryBudgetExceeded
+from .models import SequenceCounter
+from .pagination import StandardPagination, decode_cursor, encode_cursor
+from .services import allocate_sequence, collection_changes, search
+from .services.search_service import matching_ids
+from .views import SyncAPIView
+from .write_queue import SerialWriteQueue, WritePending, enqueue_write, run_serialized
+
+
+class QueryBudgetTests(APITestCase):
+    """Budgeted views stay within their declared query counts; strict mode fails the request otherwise"""
+
+    def setUp(self):
+        user = User.objects.create_user('9000000201', 'farmer')
+        FarmerProfile.objects.create(
+            user=user, full_name='Budget Farmer', total_land_acres=Decimal('2.5'),
+            farming_experience_years=5, district='Indore', state='madhya_pradesh',
+        )
+        # A real token, so the user lookup is counted like in production
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        instrumentation.reset()
+
+    def _sample(self):
+        samples = [sample for sample in instrumentation.samples() if sample.view == 'SyncAPIView']
+        self.assertEqual(len(samples), 1)
+        return samples[0]
+
+    def test_sync_stays_within_budget(self):
+        response = self.client.get('/api/sync/')
+
+        self.assertEqual(response.status_code, 200)
+        sample = self._sample()
+        self.assertEqual(sample.budget, SyncAPIView.query_budget)
+        self.assertLessEqual(sample.queries, sample.budget)
+
+    @override_settings(QUERY_BUDGET_STRICT=True)
+    def test_strict_mode_fails_an_over_budget_request(self):
+        with mock.patch.object(SyncAPIView, 'query_budget', 1):
+            with self.assertRaisesMessage(QueryBudgetExceeded, 'SyncAPIView ran'):
+                self.client.get('/api/sync/')
+
+    @override_settings(QUERY_BUDGET_STRICT=False)
+    def test_lenient_mode_only_logs_an_over_budget_request(self):
+        with mock.patch.object(SyncAPIView, 'query_budget', 1):
+            with self.assertLogs('apps.core.middleware', level='WARNING') as logs:
+                response = self.client.get('/api/sync/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Query budget exceeded', logs.output[0])
+        self.assertGreater(self._sample().queries, 1)
+
+
+class SequenceAllocationTests(TestCase):
+    """Counter-backed document numbers: seeding, blocks and the lot/batch/payment formats"""
+
+    def test_first_allocation_creates_the_counter_from_the_seed(self):
+        seed = mock.Mock(return_value=41)
+
+        self.assertEqual(list(allocate_sequence('TST', '2026', seed=seed)), [42])
+        self.assertEqual(SequenceCounter.objects.get(prefix='TST', period='2026').last_value, 42)
+        # The seed only runs while the counter row does not exist
+        self.assertEqual(list(allocate_sequence('TST', '2026', seed=seed)), [43])
+        seed.assert_called_once_with()
+
+    def test_block_allocation_reserves_consecutive_values(self):
+        self.assertEqual(list(allocate_sequence('TST', 'block', count=3)), [1, 2, 3])
+        self.assertEqual(list(allocate_sequence('TST', 'block', count=2)), [4, 5])
+        self.assertEqual(list(allocate_sequence('TST', 'other', count=2)), [1, 2])
+        with self.assertRaises(ValueError):
+            allocate_sequence('TST', 'block', count=0)
+
+    def test_consecutive_calls_never_repeat_a_value(self):
+        values = [allocate_sequence('TST', 'calls')[0] for _ in range(20)]
+
+        self.assertEqual(values, list(range(1, 21)))
+
+    def test_lot_numbers_continue_after_existing_lots(self):
+        farmer = FarmerProfile.objects.create(
+            user=User.objects.create_user('9000000211', 'farmer'), full_name='Sequence Farmer',
+            total_land_acres=Decimal('2.5'), farming_experience_years=5, district='Indore', state='madhya_pradesh',
+        )
+        year = datetime.datetime.now().year
+        ProcurementLot.objects.create(
+            farmer=farmer, lot_number=f'SB{year}041', crop_type='soybean', quantity_quintals=Decimal('10'),
+            available_quantity_quintals=Decimal('10'), quality_grade='A',
+            expected_price_per_quintal=Decimal('4500'), harvest_date=datetime.date(2026, 10, 1),
+        )
+
+        self.assertEqual(
+            ProcurementLot.allocate_lot_numbers('soybean', 2), [f'SB{year}042', f'SB{year}043']
+        )
+        self.assertEqual(ProcurementLot.allocate_lot_numbers('mustard', 1), [f'MS{year}001'])
+
+    def test_batch_numbers_restart_daily(self):
+        today = timezone.now().strftime('%Y%m%d')
+
+        self.assertEqual(ProcessingBatch.generate_batch_number(), f'BATCH-{today}-001')
+        self.assertEqual(ProcessingBatch.generate_batch_number(), f'BATCH-{today}-002')
+
+    def test_payment_ids_carry_sequence_and_random_tail(self):
+        payments = [
+            Payment.objects.create(
+                payer_id=uuid.uuid4(), payer_name='Test Mills', payer_type='processor',
+                payee_id=uuid.uuid4(), payee_name='Sequence Farmer', gross_amount=Decimal('50.00'),
+                payment_method='bank_transfer',
+            )
+            for _ in range(2)
+        ]
+
+        year = timezone.now().year
+        pattern = re.compile(rf'PAY{year}(\d{{8}})[A-Z0-9]{{6}}')
+        sequences = [int(pattern.fullmatch(payment.payment_id).group(1)) for payment in payments]
+        self.assertEqual(sequences, [1, 2])
+
+
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class DeltaSyncTests(APITestCase):
+    """Keyset marks: first download, deltas, tombstones and paging"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('9000000221', 'farmer')
+        self.notifications = [
+            Notification.objects.create(
+                user=self.user, title=f'Notice {index}', message='Body', notification_type='general'
+            )
+            for index in range(3)
+        ]
+
+    def _changes(self, mark=None, limit=None):
+        return collection_changes('notifications', self.user, None, mark=mark, limit=limit)
+
+    def test_first_download_skips_inactive_rows(self):
+        self.notifications[2].is_active = False
+        self.notifications[2].save()
+
+        changes = self._changes()
+        self.assertEqual([row['id'] for row in changes['rows']], [n.id for n in self.notifications[:2]])
+        self.assertEqual(changes['deleted'], [])
+        self.assertFalse(changes['has_more'])
+
+    def test_has_more_pages_until_the_last_row(self):
+        pages, mark, has_more = [], None, True
+        while has_more:
+            changes = self._changes(mark=mark, limit=2)
+            pages.append([row['id'] for row in changes['rows']])
+            mark, has_more = changes['mark'], changes['has_more']
+
+        ids = [n.id for n in self.notifications]
+        self.assertEqual(pages, [ids[:2], ids[2:]])
+
+    def test_delta_after_a_mark_with_tombstones(self):
+        mark = self._changes()['mark']
+        self.assertEqual(self._changes(mark=mark), {'rows': [], 'deleted': [], 'mark': mark, 'has_more': False})
+
+        read, removed = self.notifications[0], self.notifications[1]
+        read.is_read = True
+        read.save()
+        removed.is_active = False
+        removed.save()
+
+        delta = self._changes(mark=mark)
+        self.assertEqual([(row['id'], row['is_read']) for row in delta['rows']], [(read.id, True)])
+        self.assertEqual(delta['deleted'], [removed.id])
+        self.assertNotEqual(delta['mark'], mark)
+
+    def test_bad_mark_and_limit_are_rejected(self):
+        with self.assertRaisesMessage(ValueError, 'Invalid cursor'):
+            self._changes(mark='bm90IGpzb24')
+        with self.assertRaisesMessage(ValueError, 'limit must be an integer'):
+            self._changes(limit='ten')
+
+        self.client.force_authenticate(self.user)
+        for query in ('notifications=bm90IGpzb24', 'limit=ten'):
+            response = self.client.get(f'/api/sync/?collections=notifications&{query}')
+            self.assertEqual(response.status_code, 400)
+
+
+class KeysetPaginationTests(APITestCase):
+    """Cursors round-trip, bad ones are a client error, and ties on created_at page by id"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('9000000241', 'farmer')
+        self.notifications = [
+            Notification.objects.create(
+                user=self.user, title=f'Notice {index}', message='Body', notification_type='general'
+            )
+            for index in range(7)
+        ]
+        # Every row shares one timestamp, so only the id orders them
+        Notification.objects.filter(user=self.user).update(created_at=timezone.now())
+
+    def _page(self, cursor=None):
+        query = 'pagination=cursor&page_size=3' + (f'&cursor={cursor}' if cursor else '')
+        paginator = StandardPagination()
+        request = Request(RequestFactory().get(f'/api/notifications/?{query}'))
+        rows = paginator.paginate_queryset(Notification.objects.filter(user=self.user), request)
+        return [row.id for row in rows], paginator.keyset.next_cursor
+
+    def test_cursor_round_trips(self):
+        created_at, row_id = timezone.now(), uuid.uuid4()
+        values = decode_cursor(encode_cursor([created_at, row_id, None, 'soy bean/ä']))
+        self.assertEqual(values, [str(created_at), str(row_id), None, 'soy bean/ä'])
+        self.assertNotIn('=', encode_cursor([created_at, row_id]))
+
+    def test_bad_cursor_is_a_400(self):
+        self.client.force_authenticate(self.user)
+        bad_cursors = [
+            'not-a-cursor',
+            encode_cursor(['only one value']),
+            encode_cursor(['yesterday', str(uuid.uuid4())]),
+            encode_cursor([None, None]),
+        ]
+        for cursor in bad_cursors:
+            with self.subTest(cursor=cursor):
+                response = self.client.get(f'/api/lots/procurement/?pagination=cursor&cursor={cursor}')
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.data['message'], 'Invalid cursor')
+
+    def test_tied_timestamps_page_without_gaps_or_repeats(self):
+        seen, cursor = [], None
+        while True:
+            ids, cursor = self._page(cursor)
+            seen.extend(ids)
+            if cursor is None:
+                break
+        self.assertEqual(seen, sorted((notification.id for notification in self.notifications), reverse=True))
+
+
+class SparseFieldsetTests(APITestCase):
+    """?fields= / ?expand= prune the response and the query to the same fields"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('9000000231', 'farmer')
+        self.farmer = FarmerProfile.objects.create(
+            user=self.user, full_name='Fieldset Farmer', total_land_acres=Decimal('2.5'),
+            farming_experience_years=5, district='Indore', state='madhya_pradesh',
+        )
+        self.lot = ProcurementLot.objects.create(
+            farmer=self.farmer, crop_type='soybean', quantity_quintals=Decimal('10'),
+            available_quantity_quintals=Decimal('10'), quality_grade='A',
+            expected_price_per_quintal=Decimal('4500'), harvest_date=datetime.date(2026, 10, 1),
+        )
+        self.client.force_authenticate(self.user)
+
+    def _view(self, method, query):
+        request = Request(getattr(RequestFactory(), method)(f'/api/lots/procurement/?{query}'))
+        request.user = self.user
+        return ProcurementLotViewSet(request=request, action='retrieve', format_kwarg=None, kwargs={})
+
+    def _narrowed(self, query):
+        """Serialized lot and its query count, read through the narrowed queryset"""
+        view = self._view('get', query)
+        queryset = view.narrow_queryset(ProcurementLot.objects.select_related('farmer', 'fpo'))
+        with self.assertNumQueries(1):
+            data = ProcurementLotSerializer(queryset.get(pk=self.lot.pk), context=view.get_serializer_context()).data
+        return queryset, data
+
+    def test_fields_prune_the_response(self):
+        response = self.client.get(f'/api/lots/procurement/{self.lot.id}/?fields=id,lot_number,status')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data['data']), {'id', 'lot_number', 'status'})
+
+    def test_dotted_field_selects_inside_an_expanded_relation(self):
+        response = self.client.get(
+            f'/api/lots/procurement/{self.lot.id}/?fields=id,farmer.full_name,farmer.district&expand=farmer'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data']['farmer'], {'full_name': 'Fieldset Farmer', 'district': 'Indore'})
+        self.assertEqual(set(response.data['data']), {'id', 'farmer'})
+
+    def test_plan_reads_exactly_the_serialized_columns(self):
+        queryset, data = self._narrowed('fields=id,lot_number,quantity_quintals')
+
+        self.assertEqual(set(data), {'id', 'lot_number', 'quantity_quintals'})
+        self.assertEqual(queryset.query.deferred_loading, ({'id', 'lot_number', 'quantity_quintals'}, False))
+        self.assertFalse(queryset.query.select_related)
+
+    def test_plan_joins_only_the_expanded_relation(self):
+        query = 'fields=id,farmer.full_name&expand=farmer'
+        queryset, data = self._narrowed(query)
+
+        self.assertEqual(data['farmer'], {'full_name': 'Fieldset Farmer'})
+        self.assertEqual(queryset.query.select_related, {'farmer': {}})
+        plan = fieldset_plan(
+            ProcurementLotSerializer(context=self._view('get', query).get_serializer_context()), ProcurementLot
+        )
+        self.assertEqual(plan.columns, {'id', 'farmer__id', 'farmer__full_name'})
+        self.assertEqual((plan.select, plan.prefetch), ({'farmer'}, set()))
+
+    def test_unsafe_methods_keep_the_full_queryset(self):
+        queryset = ProcurementLot.objects.select_related('farmer')
+
+        self.assertIs(self._view('patch', 'fields=id').narrow_queryset(queryset), queryset)
+        self.assertIsNot(self._view('get', 'fields=id').narrow_queryset(queryset), queryset)
+
+
+class FullTextSearchTests(APITestCase):
+    """Prefix search over the index, which follows its rows"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('9000000241', 'farmer')
+        self.farmer = FarmerProfile.objects.create(
+            user=self.user, full_name='Ramesh Patidar', total_land_acres=Decimal('2.5'),
+            farming_experience_years=5, district='Indore', state='madhya_pradesh',
+        )
+        self.soybean = self._lot('soybean', 'Bold yellow seed')
+        self.mustard = self._lot('mustard', 'Black seed')
+
+    def _lot(self, crop_type, description):
+        return ProcurementLot.objects.create(
+            farmer=self.farmer, crop_type=crop_type, description=description, quantity_quintals=Decimal('10'),
+            available_quantity_quintals=Decimal('10'), quality_grade='A',
+            expected_price_per_quintal=Decimal('4500'), harvest_date=datetime.date(2026, 10, 1),
+        )
+
+    def _lot_ids(self, query):
+        return {document.object_id for document in search(query, entity_types=['lot'])}
+
+    def test_every_word_matches_as_a_prefix(self):
+        self.assertEqual(self._lot_ids('soy'), {self.soybean.id})
+        self.assertEqual(self._lot_ids('see'), {self.soybean.id, self.mustard.id})
+        self.assertEqual(self._lot_ids('see yel'), {self.soybean.id})
+        self.assertEqual(self._lot_ids('ramesh ind'), {self.soybean.id, self.mustard.id})
+        self.assertEqual(self._lot_ids('oybean'), set())
+        self.assertEqual([document.title for document in search('ramesh', entity_types=['farmer'])], ['Ramesh Patidar'])
+
+    def test_index_follows_save_deactivation_and_delete(self):
+        self.mustard.description = 'Bold brown seed'
+        self.mustard.save()
+        self.assertEqual(self._lot_ids('brown'), {self.mustard.id})
+        self.assertEqual(self._lot_ids('black'), set())
+
+        self.mustard.is_active = False
+        self.mustard.save()
+        self.assertEqual(self._lot_ids('bold'), {self.soybean.id})
+
+        self.soybean.delete()
+        self.assertEqual(self._lot_ids('bold'), set())
+
+    def test_quotes_and_operators_are_plain_words(self):
+        for query in ('soy"bean', 'soy" OR "', 'NEAR(soy', 'soy OR', 'AND NOT soy'):
+            with self.subTest(query=query):
+                search(query)
+                list(ProcurementLot.objects.filter(pk__in=matching_ids('lot', query)))
+        # OR is a word to match, not an operator
+        self.assertEqual(self._lot_ids('soy OR mustard'), set())
+        self.assertEqual(self._lot_ids('yellow"seed'), {self.soybean.id})
+        self.assertIsNone(matching_ids('lot', '"() *'))
+
+    def test_search_filter_on_the_lot_viewset(self):
+        self.client.force_authenticate(self.user)
+
+        def listed(query):
+            response = self.client.get(f'/api/lots/procurement/?search={query}')
+            self.assertEqual(response.status_code, 200)
+            return {str(row['id']) for row in response.data['data']['results']}
+
+        self.assertEqual(listed('yell'), {str(self.soybean.id)})
+        self.assertEqual(listed('seed'), {str(self.soybean.id), str(self.mustard.id)})
+        self.assertEqual(listed('%22NEAR%28'), set())
+        # No searchable text: the filter is skipped
+        self.assertEqual(listed('%22%28*'), {str(self.soybean.id), str(self.mustard.id)})
+
+
+class _RefreshedView(ReplicaReadMixin, APIView):
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    calls = []
+
+    @cache_response(ttl=0, stale_ttl=60, vary_on=[])
+    def get(self, request):
+        self.calls.append((self, request, _reading_from_replica.get()))
+        return Response({'version': len(self.calls)})
+
+
+urlpatterns = [path('refreshed/', _RefreshedView.as_view())]
+
+
+@override_settings(
+    ROOT_URLCONF=__name__,
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'swr-tests'}},
+)
+class StaleWhileRevalidateTests(SimpleTestCase):
+    """A stale entry is refreshed by a fresh dispatch, not by reusing the live view and request"""
+
+    def setUp(self):
+        _RefreshedView.calls = []
+
+    def test_stale_entry_is_refreshed_through_a_new_dispatch(self):
+        self.assertEqual(self.client.get('/refreshed/')['X-Cache'], 'MISS')
+
+        started = []
+        spawn = threading.Thread
+
+        def record(*args, **kwargs):
+            started.append(spawn(*args, **kwargs))
+            return started[-1]
+
+        with mock.patch('apps.core.cache.threading.Thread', side_effect=record):
+            response = self.client.get('/refreshed/')
+        for thread in started:
+            thread.join(5)
+
+        self.assertEqual((response['X-Cache'], response.data), ('STALE', {'version': 1}))
+        self.assertEqual(len(started), 1)
+        (view, request, replica) = _RefreshedView.calls[-1]
+        self.assertIsNot(view, response.renderer_context['view'])
+        self.assertIsNot(request, response.renderer_context['request'])
+        self.assertIsNot(request._request, response.wsgi_request)
+        # The refresh reads from the replica like the request it stands in for
+        self.assertTrue(replica)
+        self.assertEqual(self.client.get('/refreshed/').data, {'version': 2})
+
+
+class WriteQueueTests(TransactionTestCase):
+    """Jobs commit in submission order, failures reach the caller, and callers in a transaction never wait on the writer"""
+
+    def setUp(self):
+        self.queue = SerialWriteQueue(batch_size=3)
+        self.addCleanup(self.queue.stop, 5)
+        patcher = mock.patch.object(write_queue, 'get_write_queue', return_value=self.queue)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _count(self, prefix):
+        SequenceCounter.objects.create(prefix=prefix, period='2026')
+        return prefix
+
+    def _fail(self, prefix):
+        SequenceCounter.objects.create(prefix=prefix, period='2026')
+        raise ValueError(f"{prefix} rejected")
+
+    def test_jobs_run_in_submission_order(self):
+        ran = []
+        futures = [self.queue.submit(ran.append, index) for index in range(10)]
+        for future in futures:
+            future.result(5)
+        self.assertEqual(ran, list(range(10)))
+
+    def test_failed_job_raises_in_the_caller_and_spares_its_batch(self):
+        futures = [
+            self.queue.submit(self._count, 'A'),
+            self.queue.submit(self._fail, 'B'),
+            self.queue.submit(self._count, 'C'),
+        ]
+        self.assertEqual(futures[0].result(5), 'A')
+        with self.assertRaisesMessage(ValueError, 'B rejected'):
+            futures[1].result(5)
+        self.assertEqual(futures[2].result(5), 'C')
+        self.assertEqual(list(SequenceCounter.objects.values_list('prefix', flat=True)), ['A', 'C'])
+
+    @override_settings(WRITE_QUEUE_ENABLED=True)
+    def test_run_serialized_waits_for_the_writer_outside_a_transaction(self):
+        self.assertEqual(run_serialized(lambda: threading.current_thread().name), self.queue.name)
+        with self.assertRaisesMessage(ValueError, 'B rejected'):
+            run_serialized(self._fail, 'B')
+        self.assertFalse(SequenceCounter.objects.exists())
+
+    @override_settings(WRITE_QUEUE_ENABLED=True)
+    def test_run_serialized_runs_inline_and_rolls_back_with_the_caller(self):
+        with self.assertRaisesMessage(ValueError, 'rolled back'):
+            with transaction.atomic():
+                self.assertIs(run_serialized(threading.current_thread), threading.current_thread())
+                run_serialized(self._count, 'A')
+                raise ValueError('rolled back')
+        self.assertFalse(SequenceCounter.objects.exists())
+
+    @override_settings(WRITE_QUEUE_ENABLED=True)
+    def test_enqueue_write_waits_for_the_caller_to_commit(self):
+        ran = []
+        with self.assertRaisesMessage(ValueError, 'rolled back'):
+            with transaction.atomic():
+                self.assertIsNone(enqueue_write(ran.append, 'dropped'))
+                raise ValueError('rolled back')
+        with transaction.atomic():
+            enqueue_write(ran.append, 'committed')
+            self.assertEqual(self.queue.pending, 0)
+        self.assertTrue(self.queue.flush(5))
+        self.assertEqual(ran, ['committed'])
+
+    def _block_writer(self):
+        """Occupy the writer until the returned event is set"""
+        started, release = threading.Event(), threading.Event()
+        self.addCleanup(release.set)
+        self.queue.submit(lambda: started.set() or release.wait(5))
+        self.assertTrue(started.wait(5))
+        return release
+
+    @override_settings(WRITE_QUEUE_ENABLED=True)
+    def test_timed_out_job_that_never_started_is_cancelled(self):
+        release = self._block_writer()
+
+        with self.assertRaises(TimeoutError) as raised:
+            run_serialized(self._count, 'A', timeout=0.1)
+
+        self.assertNotIsInstance(raised.exception, WritePending)
+        release.set()
+        self.assertTrue(self.queue.flush(5))
+        self.assertFalse(SequenceCounter.objects.exists())
+
+    @override_settings(WRITE_QUEUE_ENABLED=True)
+    def test_timed_out_job_that_already_started_still_commits(self):
+        started, release = threading.Event(), threading.Event()
+        self.addCleanup(release.set)
+
+        def slow_count(prefix):
+            started.set()
+            release.wait(5)
+            return self._count(prefix)
+
+        with self.assertRaises(WritePending) as raised:
+            run_serialized(slow_count, 'A', timeout=1)
+
+        self.assertTrue(started.is_set())
+        release.set()
+        self.assertEqual(raised.exception.future.result(5), 'A')
+        self.assertEqual(list(SequenceCounter.objects.values_list('prefix', flat=True)), ['A'])
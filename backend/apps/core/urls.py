@@ -0,0 +1,9 @@
+"""
+Core URLs
+"""
+from django.urls import path
+from .views import RequestMetricsAPIView
+
+urlpatterns = [
+    path('metrics/', RequestMetricsAPIView.as_view(), name='request-metrics'),
+]
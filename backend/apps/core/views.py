@@ -1,3 +1,143 @@
-from django.shortcuts import render
+"""
+Core Views for SeedSync Platform
+Operational endpoints for staff, the mobile delta sync and search
+"""
+from django.http import HttpResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.gzip import gzip_page
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 
-# Create your views here.
+from apps.core import instrumentation
+from apps.core.db_router import ReplicaReadMixin
+from apps.core.services import get_role_profile, search, sync_changes
+from apps.core.services.search_service import SEARCH_FILTERS
+from apps.core.services.sync_service import COLLECTIONS
+from apps.core.utils import response_success, response_error
+
+
+class RequestMetricsAPIView(APIView):
+    """
+    Per-view query counts and latency recorded by this server process
+    GET /api/core/metrics/?sort=queries|latency|db_time|size|count&limit=20
+    GET /api/core/metrics/?output=csv          raw buffered samples
+    GET /api/core/metrics/?output=prometheus   cumulative per-view totals
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        output = request.query_params.get('output', 'json')
+        if output == 'csv':
+            return HttpResponse(instrumentation.as_csv(), content_type='text/csv')
+        if output == 'prometheus':
+            return HttpResponse(instrumentation.as_prometheus(), content_type='text/plain; version=0.0.4')
+
+        sort = request.query_params.get('sort', 'queries')
+        if sort not in instrumentation.SORT_KEYS:
+            return Response(
+                response_error(message=f"sort must be one of: {', '.join(instrumentation.SORT_KEYS)}"),
+                status=400
+            )
+        try:
+            limit = max(1, int(request.query_params.get('limit', 20)))
+        except ValueError:
+            return Response(response_error(message="limit must be an integer"), status=400)
+
+        views = instrumentation.worst_offenders(sort=sort, limit=limit)
+        return Response(
+            response_success(
+                message="Request metrics retrieved",
+                data={
+                    'sample_count': len(instrumentation.samples()),
+                    'buffer_size': instrumentation.capacity(),
+                    'views': views,
+                }
+            )
+        )
+
+    def delete(self, request):
+        """Clear the buffer and totals, e.g. before a measurement run"""
+        instrumentation.reset()
+        return Response(response_success(message="Request metrics cleared"))
+
+
+@method_decorator(gzip_page, name='dispatch')
+class SyncAPIView(APIView):
+    """
+    Delta sync for offline-first clients
+    GET /api/sync/?collections=lots,bids&lots=<mark>&bids=<mark>&limit=500
+
+    Returns rows created or updated after each collection's mark, ids of
+    rows soft-deleted since (tombstones), and the next mark. Omit a mark
+    for the first download. Repeat with the new marks while has_more is
+    true. Gzipped when the client accepts it.
+    """
+    permission_classes = [IsAuthenticated]
+    query_budget = len(COLLECTIONS) + 2  # one query per collection, plus user and role profile
+
+    def get(self, request):
+        params = request.query_params
+        names = [name.strip() for name in params.get('collections', '').split(',') if name.strip()]
+        marks = {name: params[name] for name in COLLECTIONS if params.get(name)}
+
+        try:
+            data = sync_changes(
+                request.user,
+                get_role_profile(request),
+                marks=marks,
+                names=names or None,
+                limit=params.get('limit'),
+            )
+        except ValueError as e:
+            return Response(response_error(message=str(e)), status=400)
+
+        return Response(response_success(message="Changes retrieved", data=data))
+
+
+class SearchAPIView(ReplicaReadMixin, APIView):
+    """
+    Ranked typeahead search across lots, processed products, farmers and FPOs
+    GET /api/search/?q=soy indo&types=lot,product&state=madhya_pradesh&district=Indore&crop_type=soybean&status=approved&limit=20
+
+    Every word of q matches as a word prefix, in the title or the rest of
+    the entity's text; results are ranked by relevance. Filters are exact.
+    """
+    permission_classes = [IsAuthenticated]
+    query_budget = 2  # user, and one index query
+
+    def get(self, request):
+        params = request.query_params
+        types = [name.strip() for name in params.get('types', '').split(',') if name.strip()]
+        try:
+            limit = int(params['limit']) if params.get('limit') else None
+        except ValueError:
+            return Response(response_error(message="limit must be an integer"), status=400)
+
+        try:
+            documents = search(
+                params.get('q', ''),
+                entity_types=types or None,
+                filters={name: params.get(name) for name in SEARCH_FILTERS},
+                limit=limit,
+            )
+        except ValueError as e:
+            return Response(response_error(message=str(e)), status=400)
+
+        results = [{
+            'entity_type': document.entity_type,
+            'id': document.object_id,
+            'title': document.title,
+            'subtitle': document.subtitle,
+            'state': document.state,
+            'district': document.district,
+            'crop_type': document.crop_type,
+            'status': document.status,
+            'score': round(document.score, 4),
+        } for document in documents]
+        return Response(
+            response_success(
+                message="Search results fetched successfully",
+                data={'query': params.get('q', ''), 'count': len(results), 'results': results}
+            )
+        )
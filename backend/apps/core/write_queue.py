@@ -0,0 +1,222 @@
+"""
+Write Queue for SeedSync Platform
+Serialises ledger and counter writes through one writer thread per process
+
+SQLite allows one writer at a time. When request threads and signal handlers
+write on their own, they fight over the database lock: deferred transactions
+that read before writing fail outright with "database is locked", and two
+ledger appends for the same lot can read the same chain head. Jobs submitted
+here run one after another on a dedicated thread, and whatever is pending is
+committed together (one savepoint per job), so a burst of writes costs one
+commit instead of one per row.
+
+Disabled (settings.WRITE_QUEUE_ENABLED=False, the default on Postgres and
+under tests) every job runs inline in the caller, so call sites need no
+branching.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import Future, wait
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class WritePending(TimeoutError):
+    """
+    run_serialized() gave up waiting, but the job had already started and
+    will still commit; `future` resolves once it has
+    """
+
+    def __init__(self, future, timeout):
+        super().__init__(f"Write still running after {timeout}s")
+        self.future = future
+
+
+class SerialWriteQueue:
+    """FIFO of write jobs drained by a single daemon thread"""
+
+    def __init__(self, using=DEFAULT_DB_ALIAS, batch_size=100, name='seedsync-writer'):
+        self.using = using
+        self.batch_size = max(1, batch_size)
+        self.name = name
+        self._jobs = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args, **kwargs):
+        """Queue func(*args, **kwargs); returns a Future resolved after commit"""
+        future = Future()
+        self._ensure_started()
+        self._jobs.put((func, args, kwargs, future))
+        return future
+
+    def flush(self, timeout=None):
+        """Wait until every job submitted so far has been committed"""
+        if self._thread is None:
+            return True
+        return self.submit(lambda: None).exception(timeout=timeout) is None
+
+    def stop(self, timeout=None):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._jobs.put(_STOP)
+            thread.join(timeout)
+
+    @property
+    def pending(self):
+        return self._jobs.qsize()
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        try:
+            while True:
+                batch = [self._jobs.get()]
+                while len(batch) < self.batch_size and batch[-1] is not _STOP:
+                    try:
+                        batch.append(self._jobs.get_nowait())
+                    except queue.Empty:
+                        break
+                stopping = batch[-1] is _STOP
+                self._execute([job for job in batch if job is not _STOP])
+                if stopping:
+                    return
+        finally:
+            connections[self.using].close()
+
+    def _execute(self, batch):
+        if not batch:
+            return
+        results = []
+        try:
+            with transaction.atomic(using=self.using):
+                for func, args, kwargs, future in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with transaction.atomic(using=self.using):
+                            results.append((future, func(*args, **kwargs), None))
+                    except Exception as e:
+                        logger.error(f"Queued write {getattr(func, '__name__', func)} failed: {str(e)}")
+                        results.append((future, None, e))
+        except Exception as e:
+            # The batch commit itself failed: nothing in it was written
+            logger.error(f"Write queue commit failed for {len(batch)} job(s): {str(e)}")
+            connections[self.using].close()
+            for func, args, kwargs, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_write_queue():
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = SerialWriteQueue(batch_size=getattr(settings, 'WRITE_QUEUE_BATCH_SIZE', 100))
+    return _queue
+
+
+def write_queue_enabled():
+    return getattr(settings, 'WRITE_QUEUE_ENABLED', False)
+
+
+def _inline(func, *args, **kwargs):
+    future = Future()
+    try:
+        future.set_result(func(*args, **kwargs))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def enqueue_write(func, *args, **kwargs):
+    """
+    Fire-and-forget write, for counters and other writes that may be lost
+    with the process; ledger entries go through run_serialized()
+
+    Inside a transaction the job is queued once it commits, so the writer
+    sees the caller's rows and never waits on the caller's lock. Returns a
+    Future, or None when deferred to commit.
+    """
+    if not write_queue_enabled():
+        return _inline(func, *args, **kwargs)
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        transaction.on_commit(lambda: get_write_queue().submit(func, *args, **kwargs))
+        return None
+    return get_write_queue().submit(func, *args, **kwargs)
+
+
+def run_serialized(func, *args, timeout=30, **kwargs):
+    """
+    Run a write on the writer thread and return its result
+
+    Inside a transaction it runs inline instead: the writer would block on
+    the lock this transaction holds.
+
+    If the job has not finished within `timeout` it is cancelled, and
+    TimeoutError means it will never run. A job the writer has already
+    started cannot be cancelled: WritePending is raised and the write
+    still commits.
+    """
+    if not write_queue_enabled() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return func(*args, **kwargs)
+    future = get_write_queue().submit(func, *args, **kwargs)
+    if not wait([future], timeout=timeout).done:
+        if future.cancel():
+            raise TimeoutError(f"Write not started within {timeout}s")
+        if not future.done():
+            raise WritePending(future, timeout)
+    return future.result()
+
+
+def flush_writes(timeout=None):
+    if _queue is None:
+        return True
+    return _queue.flush(timeout)
+
+
+def _reset_after_fork():
+    # The writer thread does not survive fork(); workers start their own on first use
+    global _queue, _queue_lock
+    _queue = None
+    _queue_lock = threading.Lock()
+
+
+def _drain_at_exit():
+    if _queue is not None and _queue.pending:
+        try:
+            _queue.flush(timeout=10)
+        except Exception as e:
+            logger.warning(f"Write queue not drained at exit ({_queue.pending} pending): {str(e)}")
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+atexit.register(_drain_at_exit)
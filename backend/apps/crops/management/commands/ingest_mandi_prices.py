@@ -0,0 +1,44 @@
+"""
+Ingest a mandi price feed (eNAM/AgMarkNet) into MandiPrice
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.crops.services import ingest_mandi_prices
+from apps.crops.services.price_ingestion_service import INGEST_CHUNK_SIZE, FeedRowError, parse_feed_date
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream a CSV/JSON/JSONL price feed from a path or URL into MandiPrice. "
+        "Safe to re-run for historical backfills: unchanged rows are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', nargs='?', help="File path or http(s) URL (default: MANDI_PRICE_FEED_URL or sample feed)")
+        parser.add_argument('--format', choices=['csv', 'json', 'jsonl'], help="Feed format (guessed from the name by default)")
+        parser.add_argument('--source-name', default='enam', choices=['enam', 'agmarknet', 'manual'])
+        parser.add_argument('--date', help="Date for rows without one (YYYY-MM-DD or DD/MM/YYYY)")
+        parser.add_argument('--chunk-size', type=int, default=INGEST_CHUNK_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help="Parse and compare without writing")
+
+    def handle(self, *args, **options):
+        try:
+            default_date = parse_feed_date(options['date'], None) if options['date'] else None
+        except FeedRowError as e:
+            raise CommandError(str(e))
+
+        report = ingest_mandi_prices(
+            source=options['source'],
+            feed_format=options['format'],
+            source_name=options['source_name'],
+            default_date=default_date,
+            chunk_size=options['chunk_size'],
+            dry_run=options['dry_run'],
+        )
+
+        errors = report.pop('errors')
+        for error in errors[:20]:
+            self.stderr.write(f"record {error['record']}: {error['error']}")
+        self.stdout.write(json.dumps(report, indent=2))
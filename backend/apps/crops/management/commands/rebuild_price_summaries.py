@@ -0,0 +1,26 @@
+"""
+Rebuild daily/monthly price summaries from MandiPrice
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.crops.services import rebuild_price_summaries
+from apps.crops.services.price_ingestion_service import FeedRowError, parse_feed_date
+
+
+class Command(BaseCommand):
+    help = "Recompute DailyPriceSummary and MonthlyPriceSummary from raw mandi prices"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start_date', help="First date to rebuild (YYYY-MM-DD)")
+        parser.add_argument('--to', dest='end_date', help="Last date to rebuild (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        try:
+            start_date = parse_feed_date(options['start_date'], None) if options['start_date'] else None
+            end_date = parse_feed_date(options['end_date'], None) if options['end_date'] else None
+        except FeedRowError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(json.dumps(rebuild_price_summaries(start_date, end_date)))
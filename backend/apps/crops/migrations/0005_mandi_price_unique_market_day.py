@@ -0,0 +1,37 @@
+# Generated by Django 4.2.27 on 2026-10-19 09:16
+
+from django.db import migrations, models
+
+
+def remove_duplicate_prices(apps, schema_editor):
+    """Keep the most recently updated row for each market, crop and day"""
+    MandiPrice = apps.get_model('crops', 'MandiPrice')
+
+    seen = set()
+    duplicate_ids = []
+    for row in MandiPrice.objects.order_by('-updated_at').values(
+        'id', 'crop_type', 'state', 'district', 'market_name', 'date'
+    ).iterator():
+        key = (row['crop_type'], row['state'], row['district'], row['market_name'], row['date'])
+        if key in seen:
+            duplicate_ids.append(row['id'])
+        else:
+            seen.add(key)
+
+    for start in range(0, len(duplicate_ids), 500):
+        MandiPrice.objects.filter(id__in=duplicate_ids[start:start + 500]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crops', '0004_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_prices, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='mandiprice',
+            constraint=models.UniqueConstraint(fields=('crop_type', 'state', 'district', 'market_name', 'date'), name='unique_mandi_price_per_market_day'),
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 4.2.27 on 2026-10-19 09:19
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crops', '0005_mandi_price_unique_market_day'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyPriceSummary',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('crop_type', models.CharField(choices=[('soybean', 'Soybean (सोयाबीन)'), ('mustard', 'Mustard (सरसों)'), ('groundnut', 'Groundnut (मूंगफली)'), ('sunflower', 'Sunflower (सूरजमुखी)'), ('safflower', 'Safflower (कुसुम)'), ('sesame', 'Sesame (तिल)'), ('linseed', 'Linseed (अलसी)'), ('niger', 'Niger (रामतिल)')], max_length=50)),
+                ('state', models.CharField(choices=[('andhra_pradesh', 'Andhra Pradesh'), ('arunachal_pradesh', 'Arunachal Pradesh'), ('assam', 'Assam'), ('bihar', 'Bihar'), ('chhattisgarh', 'Chhattisgarh'), ('goa', 'Goa'), ('gujarat', 'Gujarat'), ('haryana', 'Haryana'), ('himachal_pradesh', 'Himachal Pradesh'), ('jharkhand', 'Jharkhand'), ('karnataka', 'Karnataka'), ('kerala', 'Kerala'), ('madhya_pradesh', 'Madhya Pradesh'), ('maharashtra', 'Maharashtra'), ('manipur', 'Manipur'), ('meghalaya', 'Meghalaya'), ('mizoram', 'Mizoram'), ('nagaland', 'Nagaland'), ('odisha', 'Odisha'), ('punjab', 'Punjab'), ('rajasthan', 'Rajasthan'), ('sikkim', 'Sikkim'), ('tamil_nadu', 'Tamil Nadu'), ('telangana', 'Telangana'), ('tripura', 'Tripura'), ('uttar_pradesh', 'Uttar Pradesh'), ('uttarakhand', 'Uttarakhand'), ('west_bengal', 'West Bengal'), ('andaman_nicobar', 'Andaman and Nicobar Islands'), ('chandigarh', 'Chandigarh'), ('dadra_nagar_haveli_daman_diu', 'Dadra and Nagar Haveli and Daman and Diu'), ('delhi', 'Delhi'), ('jammu_kashmir', 'Jammu and Kashmir'), ('ladakh', 'Ladakh'), ('lakshadweep', 'Lakshadweep'), ('puducherry', 'Puducherry')], max_length=50)),
+                ('district', models.CharField(max_length=100)),
+                ('date', models.DateField()),
+                ('market_count', models.IntegerField(default=0, help_text='Markets reporting that day')),
+                ('arrival_count', models.IntegerField(default=0, help_text='Markets reporting arrivals')),
+                ('low_price', models.DecimalField(decimal_places=2, help_text='Lowest min_price', max_digits=10)),
+                ('high_price', models.DecimalField(decimal_places=2, help_text='Highest max_price', max_digits=10)),
+                ('min_modal_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('max_modal_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('sum_modal_price', models.DecimalField(decimal_places=2, max_digits=16)),
+                ('sum_min_price', models.DecimalField(decimal_places=2, max_digits=16)),
+                ('sum_max_price', models.DecimalField(decimal_places=2, max_digits=16)),
+                ('sum_arrival_quintals', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+            ],
+            options={
+                'verbose_name': 'Daily Price Summary',
+                'verbose_name_plural': 'Daily Price Summaries',
+                'db_table': 'daily_price_summaries',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MonthlyPriceSummary',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('crop_type', models.CharField(choices=[('soybean', 'Soybean (सोयाबीन)'), ('mustard', 'Mustard (सरसों)'), ('groundnut', 'Groundnut (मूंगफली)'), ('sunflower', 'Sunflower (सूरजमुखी)'), ('safflower', 'Safflower (कुसुम)'), ('sesame', 'Sesame (तिल)'), ('linseed', 'Linseed (अलसी)'), ('niger', 'Niger (रामतिल)')], max_length=50)),
+                ('state', models.CharField(choices=[('andhra_pradesh', 'Andhra Pradesh'), ('arunachal_pradesh', 'Arunachal Pradesh'), ('assam', 'Assam'), ('bihar', 'Bihar'), ('chhattisgarh', 'Chhattisgarh'), ('goa', 'Goa'), ('gujarat', 'Gujarat'), ('haryana', 'Haryana'), ('himachal_pradesh', 'Himachal Pradesh'), ('jharkhand', 'Jharkhand'), ('karnataka', 'Karnataka'), ('kerala', 'Kerala'), ('madhya_pradesh', 'Madhya Pradesh'), ('maharashtra', 'Maharashtra'), ('manipur', 'Manipur'), ('meghalaya', 'Meghalaya'), ('mizoram', 'Mizoram'), ('nagaland', 'Nagaland'), ('odisha', 'Odisha'), ('punjab', 'Punjab'), ('rajasthan', 'Rajasthan'), ('sikkim', 'Sikkim'), ('tamil_nadu', 'Tamil Nadu'), ('telangana', 'Telangana'), ('tripura', 'Tripura'), ('uttar_pradesh', 'Uttar Pradesh'), ('uttarakhand', 'Uttarakhand'), ('west_bengal', 'West Bengal'), ('andaman_nicobar', 'Andaman and Nicobar Islands'), ('chandigarh', 'Chandigarh'), ('dadra_nagar_haveli_daman_diu', 'Dadra and Nagar Haveli and Daman and Diu'), ('delhi', 'Delhi'), ('jammu_kashmir', 'Jammu and Kashmir'), ('ladakh', 'Ladakh'), ('lakshadweep', 'Lakshadweep'), ('puducherry', 'Puducherry')], max_length=50)),
+                ('district', models.CharField(max_length=100)),
+                ('market_name', models.CharField(max_length=200)),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('first_date', models.DateField()),
+                ('last_date', models.DateField()),
+                ('price_days', models.IntegerField(default=0)),
+                ('open_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('high_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('low_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('close_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('sum_modal_price', models.DecimalField(decimal_places=2, max_digits=16)),
+                ('sum_arrival_quintals', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+            ],
+            options={
+                'verbose_name': 'Monthly Price Summary',
+                'verbose_name_plural': 'Monthly Price Summaries',
+                'db_table': 'monthly_price_summaries',
+                'ordering': ['-month'],
+                'indexes': [models.Index(fields=['month', 'crop_type'], name='monthly_pri_month_fec6e7_idx'), models.Index(fields=['crop_type', 'state', 'month'], name='monthly_pri_crop_ty_7fdbaf_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='monthlypricesummary',
+            constraint=models.UniqueConstraint(fields=('crop_type', 'state', 'district', 'market_name', 'month'), name='unique_monthly_price_summary'),
+        ),
+        migrations.AddIndex(
+            model_name='dailypricesummary',
+            index=models.Index(fields=['date', 'crop_type'], name='daily_price_date_d36230_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dailypricesummary',
+            index=models.Index(fields=['crop_type', 'state', 'date'], name='daily_price_crop_ty_5806ac_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailypricesummary',
+            constraint=models.UniqueConstraint(fields=('crop_type', 'state', 'district', 'date'), name='unique_daily_price_summary'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.27 on 2026-10-19 10:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crops', '0006_price_summaries'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cropmaster',
+            index=models.Index(fields=['updated_at'], name='crop_master_updated_6e97b8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cropvariety',
+            index=models.Index(fields=['updated_at'], name='crop_variet_updated_2ad702_idx'),
+        ),
+    ]
@@ -55,6 +55,9 @@ class CropMaster(TimeStampedModel):
         db_table = 'crop_master'
         verbose_name = 'Crop Master'
         verbose_name_plural = 'Crop Master Data'
+        indexes = [
+            models.Index(fields=['updated_at']),
+        ]
     
     def __str__(self):
         return f"{self.get_crop_name_display()} ({self.hindi_name})"
@@ -101,6 +104,9 @@ class CropVariety(TimeStampedModel):
         db_table = 'crop_varieties'
         verbose_name = 'Crop Variety'
         verbose_name_plural = 'Crop Varieties'
+        indexes = [
+            models.Index(fields=['updated_at']),
+        ]
     
     def __str__(self):
         return f"{self.variety_name} ({self.crop.get_crop_name_display()})"
@@ -155,11 +161,117 @@ class MandiPrice(TimeStampedModel):
             models.Index(fields=['crop_type', 'state', 'date']),
             models.Index(fields=['date']),
         ]
+        constraints = [
+            # One price row per market, crop and day; feed ingestion upserts on this
+            models.UniqueConstraint(
+                fields=['crop_type', 'state', 'district', 'market_name', 'date'],
+                name='unique_mandi_price_per_market_day'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.get_crop_type_display()} - {self.market_name} - {self.date}"
 
 
+class DailyPriceSummary(TimeStampedModel):
+    """
+    Daily mandi price rollup per crop and district (across its markets)
+    Derived from MandiPrice; keeps sums and counts so any window can be
+    re-aggregated exactly without reading raw rows
+    """
+    crop_type = models.CharField(max_length=50, choices=OILSEED_CHOICES)
+    state = models.CharField(max_length=50, choices=INDIAN_STATES)
+    district = models.CharField(max_length=100)
+    date = models.DateField()
+    
+    # Counts
+    market_count = models.IntegerField(default=0, help_text="Markets reporting that day")
+    arrival_count = models.IntegerField(default=0, help_text="Markets reporting arrivals")
+    
+    # Price Range
+    low_price = models.DecimalField(max_digits=10, decimal_places=2, help_text="Lowest min_price")
+    high_price = models.DecimalField(max_digits=10, decimal_places=2, help_text="Highest max_price")
+    min_modal_price = models.DecimalField(max_digits=10, decimal_places=2)
+    max_modal_price = models.DecimalField(max_digits=10, decimal_places=2)
+    
+    # Sums (for exact averages over any window)
+    sum_modal_price = models.DecimalField(max_digits=16, decimal_places=2)
+    sum_min_price = models.DecimalField(max_digits=16, decimal_places=2)
+    sum_max_price = models.DecimalField(max_digits=16, decimal_places=2)
+    sum_arrival_quintals = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    
+    class Meta:
+        db_table = 'daily_price_summaries'
+        verbose_name = 'Daily Price Summary'
+        verbose_name_plural = 'Daily Price Summaries'
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['crop_type', 'state', 'district', 'date'],
+                name='unique_daily_price_summary'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['date', 'crop_type']),
+            models.Index(fields=['crop_type', 'state', 'date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_crop_type_display()} - {self.district} - {self.date}"
+
+
+class MonthlyPriceSummary(TimeStampedModel):
+    """
+    Monthly OHLC price summary per crop and market
+    Open/close are the modal prices on the first/last reporting day of the month
+    """
+    crop_type = models.CharField(max_length=50, choices=OILSEED_CHOICES)
+    state = models.CharField(max_length=50, choices=INDIAN_STATES)
+    district = models.CharField(max_length=100)
+    market_name = models.CharField(max_length=200)
+    month = models.DateField(help_text="First day of the month")
+    
+    # Reporting Days
+    first_date = models.DateField()
+    last_date = models.DateField()
+    price_days = models.IntegerField(default=0)
+    
+    # OHLC
+    open_price = models.DecimalField(max_digits=10, decimal_places=2)
+    high_price = models.DecimalField(max_digits=10, decimal_places=2)
+    low_price = models.DecimalField(max_digits=10, decimal_places=2)
+    close_price = models.DecimalField(max_digits=10, decimal_places=2)
+    
+    # Sums
+    sum_modal_price = models.DecimalField(max_digits=16, decimal_places=2)
+    sum_arrival_quintals = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    
+    class Meta:
+        db_table = 'monthly_price_summaries'
+        verbose_name = 'Monthly Price Summary'
+        verbose_name_plural = 'Monthly Price Summaries'
+        ordering = ['-month']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['crop_type', 'state', 'district', 'market_name', 'month'],
+                name='unique_monthly_price_summary'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['month', 'crop_type']),
+            models.Index(fields=['crop_type', 'state', 'month']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_crop_type_display()} - {self.market_name} - {self.month:%b %Y}"
+    
+    def get_average_price(self):
+        """Average modal price over the month's reporting days"""
+        if self.price_days:
+            return self.sum_modal_price / self.price_days
+        return 0
+
+
 class MSPRecord(TimeStampedModel):
     """
     Minimum Support Price records
@@ -0,0 +1,7 @@
+# Services module
+from .price_ingestion_service import ingest_mandi_prices
+from .price_history_service import refresh_price_summaries, refresh_market_price_summaries, rebuild_price_summaries
+
+__all__ = [
+    'ingest_mandi_prices', 'refresh_price_summaries', 'refresh_market_price_summaries', 'rebuild_price_summaries',
+]
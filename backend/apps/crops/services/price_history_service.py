@@ -0,0 +1,286 @@
+"""
+Price History Service for SeedSync Platform
+Maintains daily/monthly price summaries derived from MandiPrice and answers
+window queries from them instead of scanning raw price rows
+"""
+import calendar
+import logging
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+
+from apps.core.cache import invalidate_tags
+
+logger = logging.getLogger(__name__)
+
+CENT = Decimal('0.01')
+
+# Aggregates over DailyPriceSummary rows; finish_stats() turns them into averages
+SUMMARY_AGGREGATES = {
+    'price_count': Sum('market_count'),
+    'arrival_count': Sum('arrival_count'),
+    'low_price': Min('low_price'),
+    'high_price': Max('high_price'),
+    'min_modal_price': Min('min_modal_price'),
+    'max_modal_price': Max('max_modal_price'),
+    'sum_modal_price': Sum('sum_modal_price'),
+    'sum_min_price': Sum('sum_min_price'),
+    'sum_max_price': Sum('sum_max_price'),
+    'sum_arrival_quintals': Sum('sum_arrival_quintals'),
+}
+
+
+def _cents(value):
+    return Decimal(value or 0).quantize(CENT)
+
+
+def _month_start(date):
+    return date.replace(day=1)
+
+
+def _month_end(date):
+    return date.replace(day=calendar.monthrange(date.year, date.month)[1])
+
+
+# ==================== Refresh ====================
+
+def _refresh_days(dates, scope=None):
+    """scope: exact crop_type/state/district filters limiting the refresh to those groups"""
+    from apps.crops.models import MandiPrice, DailyPriceSummary
+
+    scope = scope or {}
+    groups = MandiPrice.objects.filter(date__in=dates, is_active=True, **scope).values(
+        'crop_type', 'state', 'district', 'date'
+    ).annotate(
+        market_count=Count('id'),
+        arrival_count=Count('arrival_quantity_quintals'),
+        low=Min('min_price'),
+        high=Max('max_price'),
+        min_modal=Min('modal_price'),
+        max_modal=Max('modal_price'),
+        sum_modal=Sum('modal_price'),
+        sum_min=Sum('min_price'),
+        sum_max=Sum('max_price'),
+        sum_arrival=Sum('arrival_quantity_quintals'),
+    ).order_by()
+
+    summaries = [
+        DailyPriceSummary(
+            crop_type=group['crop_type'],
+            state=group['state'],
+            district=group['district'],
+            date=group['date'],
+            market_count=group['market_count'],
+            arrival_count=group['arrival_count'],
+            low_price=_cents(group['low']),
+            high_price=_cents(group['high']),
+            min_modal_price=_cents(group['min_modal']),
+            max_modal_price=_cents(group['max_modal']),
+            sum_modal_price=_cents(group['sum_modal']),
+            sum_min_price=_cents(group['sum_min']),
+            sum_max_price=_cents(group['sum_max']),
+            sum_arrival_quintals=_cents(group['sum_arrival']),
+        )
+        for group in groups
+    ]
+
+    with transaction.atomic():
+        DailyPriceSummary.objects.filter(date__in=dates, **scope).delete()
+        DailyPriceSummary.objects.bulk_create(summaries, batch_size=1000)
+    return len(summaries)
+
+
+def _refresh_month(month, scope=None):
+    """scope: exact crop_type/state/district/market_name filters limiting the refresh"""
+    from apps.crops.models import MandiPrice, MonthlyPriceSummary
+
+    scope = scope or {}
+    key_fields = ('crop_type', 'state', 'district', 'market_name')
+    prices = MandiPrice.objects.filter(date__range=(month, _month_end(month)), is_active=True, **scope)
+
+    groups = list(prices.values(*key_fields).annotate(
+        first_date=Min('date'),
+        last_date=Max('date'),
+        price_days=Count('id'),
+        low=Min('min_price'),
+        high=Max('max_price'),
+        sum_modal=Sum('modal_price'),
+        sum_arrival=Sum('arrival_quantity_quintals'),
+    ).order_by())
+
+    # Open/close: modal price on each market's first and last reporting day
+    edge_dates = {group['first_date'] for group in groups} | {group['last_date'] for group in groups}
+    modal_on = {
+        row[:-1]: row[-1]
+        for row in prices.filter(date__in=edge_dates).values_list(*key_fields, 'date', 'modal_price')
+    }
+
+    summaries = []
+    for group in groups:
+        key = tuple(group[field] for field in key_fields)
+        summaries.append(MonthlyPriceSummary(
+            **dict(zip(key_fields, key)),
+            month=month,
+            first_date=group['first_date'],
+            last_date=group['last_date'],
+            price_days=group['price_days'],
+            open_price=modal_on[key + (group['first_date'],)],
+            high_price=_cents(group['high']),
+            low_price=_cents(group['low']),
+            close_price=modal_on[key + (group['last_date'],)],
+            sum_modal_price=_cents(group['sum_modal']),
+            sum_arrival_quintals=_cents(group['sum_arrival']),
+        ))
+
+    with transaction.atomic():
+        MonthlyPriceSummary.objects.filter(month=month, **scope).delete()
+        MonthlyPriceSummary.objects.bulk_create(summaries, batch_size=1000)
+    return len(summaries)
+
+
+def refresh_price_summaries(dates):
+    """
+    Recompute daily summaries for `dates` and monthly summaries for their months
+    Call after MandiPrice rows for those dates were written.
+    """
+    dates = sorted(set(dates))
+    if not dates:
+        return {'days': 0, 'months': 0, 'daily_rows': 0, 'monthly_rows': 0}
+
+    daily_rows = 0
+    for start in range(0, len(dates), 500):
+        daily_rows += _refresh_days(dates[start:start + 500])
+
+    months = sorted({_month_start(date) for date in dates})
+    monthly_rows = sum(_refresh_month(month) for month in months)
+
+    # Bulk price writes send no signals; drop cached price responses here
+    invalidate_tags('mandi_prices')
+
+    logger.info(f"Price summaries refreshed for {len(dates)} days / {len(months)} months")
+    return {'days': len(dates), 'months': len(months), 'daily_rows': daily_rows, 'monthly_rows': monthly_rows}
+
+
+def refresh_market_price_summaries(keys):
+    """
+    Recompute only the summaries that a few MandiPrice rows feed
+    keys: (crop_type, state, district, market_name, date) of each row; pass
+    both the old and new key of an edited row. Each key refreshes one daily
+    and one monthly group instead of whole days and months.
+    """
+    days = {key[:3] + (key[4],) for key in keys}
+    months = {key[:4] + (_month_start(key[4]),) for key in keys}
+    for crop_type, state, district, date in days:
+        _refresh_days([date], {'crop_type': crop_type, 'state': state, 'district': district})
+    for crop_type, state, district, market_name, month in months:
+        _refresh_month(month, {
+            'crop_type': crop_type, 'state': state, 'district': district, 'market_name': market_name
+        })
+    invalidate_tags('mandi_prices')
+
+
+def rebuild_price_summaries(start_date=None, end_date=None):
+    """Recompute summaries for every date with prices in the (optional) range"""
+    from apps.crops.models import MandiPrice, DailyPriceSummary, MonthlyPriceSummary
+
+    prices = MandiPrice.objects.all()
+    daily = DailyPriceSummary.objects.all()
+    monthly = MonthlyPriceSummary.objects.all()
+    if start_date:
+        prices = prices.filter(date__gte=start_date)
+        daily = daily.filter(date__gte=start_date)
+        monthly = monthly.filter(month__gte=_month_start(start_date))
+    if end_date:
+        prices = prices.filter(date__lte=end_date)
+        daily = daily.filter(date__lte=end_date)
+        monthly = monthly.filter(month__lte=end_date)
+
+    # Dates that only have stale summaries left are refreshed (emptied) too
+    dates = set(prices.values_list('date', flat=True).distinct())
+    dates |= set(daily.values_list('date', flat=True).distinct())
+    dates |= set(monthly.values_list('month', flat=True).distinct())
+    return refresh_price_summaries(dates)
+
+
+# ==================== Queries ====================
+
+def daily_summaries(start_date, end_date=None, crop_type=None, state=None, district=None, district_exact=True):
+    """DailyPriceSummary rows for a window, filtered like the raw price endpoints"""
+    from apps.crops.models import DailyPriceSummary
+
+    summaries = DailyPriceSummary.objects.filter(date__gte=start_date)
+    if end_date:
+        summaries = summaries.filter(date__lte=end_date)
+    if crop_type:
+        summaries = summaries.filter(crop_type=crop_type)
+    if state:
+        summaries = summaries.filter(state=state)
+    if district:
+        summaries = summaries.filter(**{'district' if district_exact else 'district__icontains': district})
+    return summaries
+
+
+def price_rows(start_date, crop_type=None, state=None, district=None, district_exact=True):
+    """Raw MandiPrice rows for a window, filtered like daily_summaries()"""
+    from apps.crops.models import MandiPrice
+
+    prices = MandiPrice.objects.filter(date__gte=start_date, is_active=True)
+    if crop_type:
+        prices = prices.filter(crop_type=crop_type)
+    if state:
+        prices = prices.filter(state=state)
+    if district:
+        prices = prices.filter(**{'district' if district_exact else 'district__icontains': district})
+    return prices
+
+
+def finish_stats(row):
+    """Turn SUMMARY_AGGREGATES sums into float averages/ranges"""
+    count = row.get('price_count') or 0
+    arrivals = row.get('arrival_count') or 0
+
+    def _average(total, n):
+        return float(total) / n if n and total is not None else 0
+
+    return {
+        'price_count': count,
+        'average_modal_price': _average(row.get('sum_modal_price'), count),
+        'average_min_price': _average(row.get('sum_min_price'), count),
+        'average_max_price': _average(row.get('sum_max_price'), count),
+        'average_arrival_quintals': _average(row.get('sum_arrival_quintals'), arrivals),
+        'lowest_price': float(row.get('low_price') or 0),
+        'highest_price': float(row.get('high_price') or 0),
+        'min_modal_price': float(row.get('min_modal_price') or 0),
+        'max_modal_price': float(row.get('max_modal_price') or 0),
+    }
+
+
+def window_stats(summaries):
+    """Aggregate stats for a window of daily summaries (one query)"""
+    return finish_stats(summaries.aggregate(**SUMMARY_AGGREGATES))
+
+
+def grouped_stats(summaries, *fields):
+    """Stats grouped by `fields` (e.g. 'date', 'crop_type'), ordered by them"""
+    rows = summaries.values(*fields).annotate(**SUMMARY_AGGREGATES).order_by(*fields)
+    return [
+        {**{field: row[field] for field in fields}, **finish_stats(row)}
+        for row in rows
+    ]
+
+
+def active_market_counts(start_date, crop_type=None, state=None):
+    """Distinct markets per crop with a price on or after start_date"""
+    from apps.crops.models import MonthlyPriceSummary
+
+    summaries = MonthlyPriceSummary.objects.filter(month__gte=_month_start(start_date), last_date__gte=start_date)
+    if crop_type:
+        summaries = summaries.filter(crop_type=crop_type)
+    if state:
+        summaries = summaries.filter(state=state)
+
+    counts = {}
+    for crop, _ in summaries.values_list('crop_type', 'market_name').order_by().distinct():
+        counts[crop] = counts.get(crop, 0) + 1
+    return counts
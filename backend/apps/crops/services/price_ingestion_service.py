@@ -0,0 +1,337 @@
+"""
+Mandi Price Ingestion Service for SeedSync Platform
+Streams eNAM/AgMarkNet price feeds into MandiPrice with batched upserts
+"""
+import codecs
+import csv
+import datetime
+import io
+import json
+import logging
+import os
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction
+
+from apps.core.constants import INDIAN_STATES, OILSEED_CHOICES
+
+
+logger = logging.getLogger(__name__)
+
+INGEST_CHUNK_SIZE = 2000
+
+# Local stand-in for the HTTP feed (used when MANDI_PRICE_FEED_URL is unset)
+SAMPLE_FEED_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'sample_enam_prices.csv')
+
+UNIQUE_FIELDS = ['crop_type', 'state', 'district', 'market_name', 'date']
+UPDATE_FIELDS = [
+    'min_price', 'max_price', 'modal_price', 'arrival_quantity_quintals',
+    'source', 'source_reference', 'updated_at'
+]
+VALUE_FIELDS = ['min_price', 'max_price', 'modal_price', 'arrival_quantity_quintals', 'source', 'source_reference']
+
+# Feed column names → MandiPrice fields (eNAM, AgMarkNet / data.gov.in)
+COLUMN_ALIASES = {
+    'crop_type': 'crop_type', 'commodity': 'crop_type', 'crop': 'crop_type',
+    'state': 'state', 'state_name': 'state',
+    'district': 'district', 'district_name': 'district',
+    'market_name': 'market_name', 'market': 'market_name', 'apmc': 'market_name', 'mandi': 'market_name',
+    'date': 'date', 'arrival_date': 'date', 'price_date': 'date',
+    'min_price': 'min_price', 'min_x0020_price': 'min_price',
+    'max_price': 'max_price', 'max_x0020_price': 'max_price',
+    'modal_price': 'modal_price', 'modal_x0020_price': 'modal_price',
+    'arrival_quintals': 'arrival_quantity_quintals', 'arrivals': 'arrival_quantity_quintals',
+    'arrival_quantity_quintals': 'arrival_quantity_quintals', 'commodity_arrivals': 'arrival_quantity_quintals',
+    'source_reference': 'source_reference', 'reference': 'source_reference',
+}
+
+# Commodity names used by the feeds → oilseed codes
+COMMODITY_ALIASES = {
+    'soyabean': 'soybean', 'soya bean': 'soybean',
+    'rapeseed-mustard': 'mustard', 'rapeseed & mustard': 'mustard', 'mustard seed': 'mustard', 'sarson': 'mustard',
+    'groundnut pods (raw)': 'groundnut', 'groundnut seed': 'groundnut',
+    'sunflower seed': 'sunflower',
+    'safflower (kardi seed)': 'safflower',
+    'sesamum(sesame,gingelly,til)': 'sesame', 'sesamum': 'sesame', 'til': 'sesame', 'gingelly': 'sesame',
+    'linseed (alsi)': 'linseed', 'alsi': 'linseed',
+    'niger seed': 'niger', 'niger seed (ramtil)': 'niger', 'ramtil': 'niger',
+}
+
+DATE_FORMATS = ['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d-%b-%Y', '%d %b %Y']
+
+
+def _build_lookup(choices, aliases=None):
+    lookup = {}
+    for value, label in choices:
+        lookup[value] = value
+        lookup[value.replace('_', ' ')] = value
+        lookup[label.split('(')[0].strip().lower()] = value
+    lookup.update(aliases or {})
+    return lookup
+
+
+CROP_LOOKUP = _build_lookup(OILSEED_CHOICES, COMMODITY_ALIASES)
+STATE_LOOKUP = _build_lookup(INDIAN_STATES, {'orissa': 'odisha', 'pondicherry': 'puducherry', 'nct of delhi': 'delhi'})
+
+
+class FeedRowError(ValueError):
+    """A feed row that cannot be turned into a MandiPrice"""
+
+
+# ==================== Feed readers ====================
+
+def open_feed(source=None, feed_format=None):
+    """
+    Open a price feed as a binary stream
+    source: local path, http(s) URL, or a file-like object (uploads).
+    Defaults to MANDI_PRICE_FEED_URL, falling back to the bundled sample feed.
+    Returns (stream, format).
+    """
+    source = source or getattr(settings, 'MANDI_PRICE_FEED_URL', '') or SAMPLE_FEED_PATH
+
+    if hasattr(source, 'read'):
+        name = getattr(source, 'name', '') or ''
+        return source, feed_format or _guess_format(name)
+
+    if source.startswith(('http://', 'https://')):
+        import requests
+
+        response = requests.get(source, stream=True, timeout=60)
+        response.raise_for_status()
+        response.raw.decode_content = True
+        content_type = response.headers.get('Content-Type', '')
+        guessed = 'json' if 'json' in content_type else _guess_format(source.split('?')[0])
+        return response.raw, feed_format or guessed
+
+    return open(source, 'rb'), feed_format or _guess_format(source)
+
+
+def _guess_format(name):
+    name = name.lower()
+    if name.endswith('.jsonl') or name.endswith('.ndjson'):
+        return 'jsonl'
+    if name.endswith('.json'):
+        return 'json'
+    return 'csv'
+
+
+def iter_feed_records(stream, feed_format):
+    """Yield raw record dicts from a feed stream without loading CSV/JSONL whole"""
+    if feed_format == 'csv':
+        yield from csv.DictReader(codecs.iterdecode(stream, 'utf-8-sig'))
+    elif feed_format == 'jsonl':
+        for line in io.TextIOWrapper(stream, encoding='utf-8-sig'):
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+    elif feed_format == 'json':
+        # Plain JSON has no streaming parser in the stdlib; the document is
+        # loaded once. data.gov.in wraps rows in {"records": [...]}.
+        payload = json.load(io.TextIOWrapper(stream, encoding='utf-8-sig'))
+        if isinstance(payload, dict):
+            payload = payload.get('records') or payload.get('data') or []
+        yield from payload
+    else:
+        raise ValueError(f"Unsupported feed format: {feed_format}")
+
+
+# ==================== Row normalisation ====================
+
+def _decimal(value, field, required=True):
+    if value in (None, ''):
+        if required:
+            raise FeedRowError(f"{field} is required")
+        return None
+    try:
+        number = Decimal(str(value).replace(',', '').strip())
+    except InvalidOperation:
+        raise FeedRowError(f"{field} is not a number: {value}")
+    if number < 0:
+        raise FeedRowError(f"{field} cannot be negative")
+    return number.quantize(Decimal('0.01'))
+
+
+def parse_feed_date(value, default_date):
+    if value in (None, ''):
+        if default_date:
+            return default_date
+        raise FeedRowError("date is required")
+    if isinstance(value, datetime.date):
+        return value
+    value = str(value).strip()[:11]
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    raise FeedRowError(f"Unrecognised date: {value}")
+
+
+def normalise_record(record, source, default_date=None):
+    """Map one raw feed record to MandiPrice field values"""
+    row = {}
+    for column, value in record.items():
+        field = COLUMN_ALIASES.get(str(column).strip().lower().replace(' ', '_'))
+        if field and field not in row:
+            row[field] = value.strip() if isinstance(value, str) else value
+
+    crop_type = CROP_LOOKUP.get(str(row.get('crop_type') or '').strip().lower())
+    if not crop_type:
+        raise FeedRowError(f"Unsupported commodity: {row.get('crop_type')}")
+
+    state = STATE_LOOKUP.get(str(row.get('state') or '').strip().lower())
+    if not state:
+        raise FeedRowError(f"Unknown state: {row.get('state')}")
+
+    district = str(row.get('district') or '').strip()[:100]
+    market_name = str(row.get('market_name') or '').strip()[:200]
+    if not district or not market_name:
+        raise FeedRowError("district and market_name are required")
+
+    values = {
+        'crop_type': crop_type,
+        'state': state,
+        'district': district,
+        'market_name': market_name,
+        'date': parse_feed_date(row.get('date'), default_date),
+        'min_price': _decimal(row.get('min_price'), 'min_price'),
+        'max_price': _decimal(row.get('max_price'), 'max_price'),
+        'modal_price': _decimal(row.get('modal_price'), 'modal_price'),
+        'arrival_quantity_quintals': _decimal(row.get('arrival_quantity_quintals'), 'arrival_quintals', required=False),
+        'source': source,
+        'source_reference': str(row.get('source_reference') or '')[:200],
+    }
+    if values['min_price'] > values['max_price']:
+        raise FeedRowError("min_price is greater than max_price")
+    return values
+
+
+# ==================== Ingestion ====================
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _upsert_chunk(rows, dry_run):
+    """
+    Write one deduplicated chunk; returns (inserted, updated, unchanged, dates written)
+    Existing rows are read with one query so unchanged rows (replays) are
+    skipped and the rest are written with one upsert statement.
+    """
+    from apps.crops.models import MandiPrice
+
+    existing = {}
+    for values in MandiPrice.objects.filter(
+        date__in={row['date'] for row in rows.values()},
+        market_name__in={row['market_name'] for row in rows.values()},
+        crop_type__in={row['crop_type'] for row in rows.values()},
+    ).values(*UNIQUE_FIELDS, *VALUE_FIELDS):
+        existing[tuple(values[field] for field in UNIQUE_FIELDS)] = values
+
+    inserted = updated = unchanged = 0
+    to_write = []
+    written_dates = set()
+    for key, row in rows.items():
+        current = existing.get(key)
+        if current is None:
+            inserted += 1
+        elif all(current[field] == row[field] for field in VALUE_FIELDS):
+            unchanged += 1
+            continue
+        else:
+            updated += 1
+        to_write.append(MandiPrice(**row))
+        written_dates.add(row['date'])
+
+    if to_write and not dry_run:
+        with transaction.atomic():
+            MandiPrice.objects.bulk_create(
+                to_write,
+                update_conflicts=True,
+                unique_fields=UNIQUE_FIELDS,
+                update_fields=UPDATE_FIELDS,
+            )
+    return inserted, updated, unchanged, written_dates
+
+
+def ingest_mandi_prices(source=None, feed_format=None, source_name='enam', default_date=None,
+                        chunk_size=INGEST_CHUNK_SIZE, dry_run=False, max_errors=100):
+    """
+    Stream a mandi price feed into MandiPrice
+
+    Records are parsed and normalised one at a time, deduplicated on
+    (crop_type, state, district, market_name, date) within each chunk (last
+    record wins) and upserted per chunk. Re-running the same feed is
+    idempotent: matching rows are counted as unchanged and not rewritten.
+
+    Price summaries are refreshed for the days that changed.
+
+    Returns a report dict with inserted/updated/unchanged/rejected counts,
+    the first `max_errors` rejections and throughput.
+    """
+    started = time.perf_counter()
+    stream, feed_format = open_feed(source, feed_format)
+
+    report = {
+        'format': feed_format,
+        'dry_run': dry_run,
+        'total_records': 0,
+        'inserted': 0,
+        'updated': 0,
+        'unchanged': 0,
+        'duplicates': 0,
+        'rejected': 0,
+        'errors': [],
+    }
+
+    written_dates = set()
+    try:
+        records = enumerate(iter_feed_records(stream, feed_format), start=1)
+        for chunk in _chunks(records, chunk_size):
+            rows = {}
+            for record_number, record in chunk:
+                try:
+                    row = normalise_record(record, source_name, default_date)
+                except (FeedRowError, AttributeError) as e:
+                    report['rejected'] += 1
+                    if len(report['errors']) < max_errors:
+                        report['errors'].append({'record': record_number, 'error': str(e)})
+                    continue
+
+                key = tuple(row[field] for field in UNIQUE_FIELDS)
+                if key in rows:
+                    report['duplicates'] += 1
+                rows[key] = row
+
+            report['total_records'] += len(chunk)
+            if rows:
+                inserted, updated, unchanged, dates = _upsert_chunk(rows, dry_run)
+                written_dates |= dates
+                report['inserted'] += inserted
+                report['updated'] += updated
+                report['unchanged'] += unchanged
+    finally:
+        stream.close()
+
+    # Daily/monthly summaries only for the days that actually changed
+    if written_dates and not dry_run:
+        from .price_history_service import refresh_price_summaries
+        report['summaries'] = refresh_price_summaries(written_dates)
+
+    duration = time.perf_counter() - started
+    report['duration_seconds'] = round(duration, 3)
+    report['records_per_second'] = round(report['total_records'] / duration, 1) if duration else None
+    logger.info(
+        f"Mandi price ingest ({source_name}): {report['inserted']} inserted, {report['updated']} updated, "
+        f"{report['unchanged']} unchanged, {report['rejected']} rejected in {report['duration_seconds']}s"
+    )
+    return report
@@ -0,0 +1,49 @@
+"""
+Crops Signals
+Keep price summaries and cached price responses in step with saved rows
+"""
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from apps.core.cache import invalidate_on_change
+from .models import CropMaster, CropVariety, MandiPrice, MSPRecord
+
+
+invalidate_on_change(MandiPrice, 'mandi_prices')
+invalidate_on_change(MSPRecord, 'msp_records')
+invalidate_on_change(CropMaster, 'crops')
+invalidate_on_change(CropVariety, 'crops')
+
+
+SUMMARY_KEY_FIELDS = ('crop_type', 'state', 'district', 'market_name', 'date')
+
+
+def _summary_key(price):
+    return tuple(getattr(price, field) for field in SUMMARY_KEY_FIELDS)
+
+
+@receiver(pre_save, sender=MandiPrice)
+def remember_price_summary_key(sender, instance, raw=False, **kwargs):
+    """Keep the key the row had before this save, so its old groups are recomputed too"""
+    if raw or instance._state.adding:
+        return
+    instance._previous_summary_key = MandiPrice.objects.filter(pk=instance.pk).values_list(
+        *SUMMARY_KEY_FIELDS
+    ).first()
+
+
+@receiver(post_save, sender=MandiPrice)
+@receiver(post_delete, sender=MandiPrice)
+def refresh_price_summary_for_market(sender, instance, **kwargs):
+    """
+    Recompute the summaries of the saved/deleted price's market and day
+    Bulk ingestion refreshes summaries itself and does not send signals.
+    """
+    from .services import refresh_market_price_summaries
+    
+    keys = {_summary_key(instance)}
+    previous = getattr(instance, '_previous_summary_key', None)
+    if previous:
+        keys.add(previous)
+    transaction.on_commit(lambda: refresh_market_price_summaries(keys))
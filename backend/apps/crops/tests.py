@@ -1,3 +1,190 @@
-from django.test import TestCase
+import datetime
+import io
+from decimal import Decimal
 
-# Create your tests here.
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APITestCase
+
+from .models import DailyPriceSummary, MandiPrice, MonthlyPriceSummary
+from .services import rebuild_price_summaries
+from .services.price_ingestion_service import ingest_mandi_prices
+
+FEED_HEADER = 'Commodity,State_Name,District_Name,Market,Arrival_Date,Min_x0020_Price,Max Price,Modal_Price,Arrivals\n'
+
+
+def _feed(*rows):
+    return io.BytesIO((FEED_HEADER + ''.join(f'{row}\n' for row in rows)).encode('utf-8'))
+
+
+class PriceIngestionTests(TestCase):
+    """Feed aliases map onto MandiPrice fields, replays update rows in place, and unknown names are reported"""
+
+    FEED = [
+        'Soyabean,Madhya Pradesh,Indore,Indore APMC,15/10/2026,4400,4700,4550,120',
+        'Rapeseed-Mustard,Rajasthan,Jaipur,Jaipur (Grain),15/10/2026,5500,5900,5700,',
+        'Groundnut Pods (Raw),Orissa,Cuttack,Cuttack,15/10/2026,6000,6400,6200,35',
+        # Same market and day as the first row: the later record wins
+        'soybean,madhya_pradesh,Indore,Indore APMC,15/10/2026,4400,4750,4600,125',
+        'Wheat,Madhya Pradesh,Indore,Indore APMC,15/10/2026,2200,2400,2300,500',
+        'Sunflower Seed,Atlantis,Nowhere,Port Mandi,15/10/2026,6000,6100,6050,10',
+    ]
+
+    def _prices(self):
+        return {
+            (price.crop_type, price.state, price.market_name): price.modal_price
+            for price in MandiPrice.objects.all()
+        }
+
+    def test_aliases_are_normalised_and_duplicates_collapse(self):
+        report = ingest_mandi_prices(_feed(*self.FEED), source_name='enam')
+
+        self.assertEqual(
+            (report['total_records'], report['inserted'], report['duplicates'], report['rejected']), (6, 3, 1, 2)
+        )
+        self.assertEqual(self._prices(), {
+            ('soybean', 'madhya_pradesh', 'Indore APMC'): Decimal('4600.00'),
+            ('mustard', 'rajasthan', 'Jaipur (Grain)'): Decimal('5700.00'),
+            ('groundnut', 'odisha', 'Cuttack'): Decimal('6200.00'),
+        })
+        mustard = MandiPrice.objects.get(crop_type='mustard')
+        self.assertEqual(mustard.date, datetime.date(2026, 10, 15))
+        self.assertIsNone(mustard.arrival_quantity_quintals)
+
+    def test_unknown_commodities_and_states_are_reported(self):
+        report = ingest_mandi_prices(_feed(*self.FEED), source_name='enam')
+
+        self.assertEqual(report['errors'], [
+            {'record': 5, 'error': 'Unsupported commodity: Wheat'},
+            {'record': 6, 'error': 'Unknown state: Atlantis'},
+        ])
+
+    def test_a_second_ingest_updates_rows_instead_of_duplicating_them(self):
+        ingest_mandi_prices(_feed(*self.FEED), source_name='enam')
+
+        report = ingest_mandi_prices(_feed(
+            'Soyabean,Madhya Pradesh,Indore,Indore APMC,15/10/2026,4400,4750,4600,125',
+            'Rapeseed-Mustard,Rajasthan,Jaipur,Jaipur (Grain),15/10/2026,5550,5950,5800,40',
+            'Groundnut Pods (Raw),Orissa,Cuttack,Cuttack,15/10/2026,6000,6400,6200,35',
+        ), source_name='enam')
+
+        self.assertEqual((report['inserted'], report['updated'], report['unchanged']), (0, 1, 2))
+        self.assertEqual(MandiPrice.objects.count(), 3)
+        mustard = MandiPrice.objects.get(crop_type='mustard')
+        self.assertEqual((mustard.modal_price, mustard.arrival_quantity_quintals), (Decimal('5800.00'), Decimal('40.00')))
+
+    def test_chunk_boundaries_do_not_duplicate_rows(self):
+        report = ingest_mandi_prices(_feed(*self.FEED), source_name='enam', chunk_size=2)
+
+        # The repeat of the first row lands in a later chunk and updates it
+        self.assertEqual((report['inserted'], report['updated'], report['duplicates']), (3, 1, 0))
+        self.assertEqual(MandiPrice.objects.count(), 3)
+        self.assertEqual(MandiPrice.objects.get(crop_type='soybean').modal_price, Decimal('4600.00'))
+
+
+class PriceSummarySignalTests(TestCase):
+    """Saving, moving or deleting one price leaves the summaries as a full rebuild would"""
+
+    def setUp(self):
+        for market, date, modal in [
+            ('Indore APMC', datetime.date(2026, 9, 30), '4500'),
+            ('Indore APMC', datetime.date(2026, 10, 1), '4550'),
+            ('Mhow', datetime.date(2026, 10, 1), '4480'),
+        ]:
+            self._save(MandiPrice(
+                crop_type='soybean', state='madhya_pradesh', district='Indore', market_name=market, date=date,
+                min_price=Decimal('4300'), max_price=Decimal('4800'), modal_price=Decimal(modal),
+                arrival_quantity_quintals=Decimal('100'),
+            ))
+
+    def _save(self, price):
+        with self.captureOnCommitCallbacks(execute=True):
+            price.save()
+        return price
+
+    def _summaries(self):
+        def rows(model):
+            fields = [field.attname for field in model._meta.concrete_fields
+                      if field.attname not in ('id', 'created_at', 'updated_at')]
+            return sorted(model.objects.values_list(*fields))
+        return rows(DailyPriceSummary), rows(MonthlyPriceSummary)
+
+    def assertMatchesRebuild(self):
+        incremental = self._summaries()
+        rebuild_price_summaries()
+        self.assertEqual(incremental, self._summaries())
+        return incremental
+
+    def test_summaries_follow_a_price_as_it_is_added_moved_and_deleted(self):
+        daily, monthly = self.assertMatchesRebuild()
+        self.assertEqual((len(daily), len(monthly)), (2, 3))
+
+        price = self._save(MandiPrice(
+            crop_type='soybean', state='madhya_pradesh', district='Indore', market_name='Mhow',
+            date=datetime.date(2026, 10, 2), min_price=Decimal('4350'), max_price=Decimal('4900'),
+            modal_price=Decimal('4700'),
+        ))
+        self.assertMatchesRebuild()
+
+        price.modal_price = Decimal('4650')
+        self._save(price)
+        self.assertMatchesRebuild()
+
+        # Into another district and month: both the old and new groups change
+        price.district, price.date = 'Dewas', datetime.date(2026, 9, 15)
+        self._save(price)
+        daily, monthly = self.assertMatchesRebuild()
+        self.assertEqual((len(daily), len(monthly)), (3, 4))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            price.delete()
+        daily, monthly = self.assertMatchesRebuild()
+        self.assertEqual((len(daily), len(monthly)), (2, 3))
+
+
+class MandiPricesWithAggregatesViewTests(APITestCase):
+    """Malformed paging parameters are a 400, not a server error"""
+
+    def test_non_integer_paging_parameters_are_a_400(self):
+        for query in ['page_size=ten', 'page_size=0', 'days=week']:
+            with self.subTest(query=query):
+                response = self.client.get(f'/api/crops/prices/?{query}')
+                self.assertEqual(response.status_code, 400)
+
+    def test_valid_page_size_is_accepted(self):
+        self.assertEqual(self.client.get('/api/crops/prices/?page_size=5').status_code, 200)
+
+
+class MandiPriceDeduplicationMigrationTests(TransactionTestCase):
+    """0005 keeps the most recently updated row of each market day before adding the unique constraint"""
+
+    before = [('crops', '0004_initial')]
+    after = [('crops', '0005_mandi_price_unique_market_day')]
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_duplicates_are_removed_keeping_the_latest(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        OldMandiPrice = executor.loader.project_state(self.before).apps.get_model('crops', 'MandiPrice')
+
+        market_day = dict(
+            crop_type='soybean', state='madhya_pradesh', district='Indore', market_name='Indore APMC',
+            date=datetime.date(2026, 10, 15), min_price=Decimal('4400'), max_price=Decimal('4700'),
+        )
+        stale = OldMandiPrice.objects.create(modal_price=Decimal('4500'), **market_day)
+        latest = OldMandiPrice.objects.create(modal_price=Decimal('4550'), **market_day)
+        OldMandiPrice.objects.filter(pk=stale.pk).update(updated_at=latest.updated_at - datetime.timedelta(hours=1))
+        other_day = OldMandiPrice.objects.create(modal_price=Decimal('4600'), **{
+            **market_day, 'date': datetime.date(2026, 10, 16)
+        })
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+
+        self.assertEqual(
+            sorted(MandiPrice.objects.values_list('pk', flat=True)), sorted([latest.pk, other_day.pk])
+        )
@@ -8,12 +8,15 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Avg, Max, Min
 from django.db.models.functions import TruncMonth
 from django.utils import timezone
 from datetime import timedelta
 from apps.core.utils import response_success, response_error
-from .models import CropMaster, CropVariety, MandiPrice, MSPRecord, CropVarietyRequest
+from apps.core.cache import cache_response
+from apps.core.instrumentation import query_budget
+from apps.core.pagination import keyset_page
+from .models import CropMaster, CropVariety, MandiPrice, MSPRecord, CropVarietyRequest, MonthlyPriceSummary
+from .services.price_history_service import daily_summaries, grouped_stats, price_rows, window_stats
 from .serializers import (
     CropMasterSerializer, 
     CropVarietySerializer, 
@@ -114,6 +117,7 @@ class CropMasterListAPIView(APIView):
     """
     permission_classes = [AllowAny]
     
+    @cache_response(ttl=3600, vary_on=[], tags=['crops'])
     def get(self, request):
         crops = CropMaster.objects.filter(is_active=True)
         
@@ -151,6 +155,7 @@ class CropVarietiesByCodeAPIView(APIView):
     """
     permission_classes = [AllowAny]
     
+    @cache_response(ttl=3600, vary_on=[], tags=['crops'])
     def get(self, request, crop_code):
         print(f"🔍 Looking for crop with code: {crop_code}")
         try:
@@ -201,29 +206,38 @@ class CropVarietiesByCodeAPIView(APIView):
 class MandiPricesWithAggregatesAPIView(APIView):
     """
     Get mandi prices with filtering and aggregates
-    Includes average, min, max calculations
+    Prices are keyset-paginated (cursor/page_size); aggregates cover the
+    whole window and come from the daily price summaries.
     """
     permission_classes = [AllowAny]
     
+    @query_budget(4)
+    @cache_response(ttl=300, stale_ttl=600, vary_on=['crop_type', 'state', 'district', 'days', 'cursor', 'page_size'], tags=['mandi_prices'])
     def get(self, request):
         crop_type = request.query_params.get('crop_type')
         state = request.query_params.get('state')
         district = request.query_params.get('district')
-        days = int(request.query_params.get('days', 7))
-        
-        filters = {
-            'date__gte': timezone.now().date() - timedelta(days=days),
-            'is_active': True
-        }
+        cursor = request.query_params.get('cursor')
+        try:
+            days = int(request.query_params.get('days', 7))
+            page_size = int(request.query_params.get('page_size', 100))
+        except ValueError:
+            return Response(response_error(message="days and page_size must be integers"), status=400)
+        if page_size < 1:
+            return Response(response_error(message="page_size must be at least 1"), status=400)
+        page_size = min(page_size, 500)
         
-        if crop_type:
-            filters['crop_type'] = crop_type
-        if state:
-            filters['state'] = state
-        if district:
-            filters['district__icontains'] = district
+        start_date = timezone.now().date() - timedelta(days=days)
         
-        prices = MandiPrice.objects.filter(**filters).order_by('-date', 'market_name')
+        try:
+            prices, next_cursor = keyset_page(
+                price_rows(start_date, crop_type=crop_type, state=state, district=district, district_exact=False),
+                ('-date', 'market_name', 'id'),
+                cursor=cursor,
+                page_size=page_size
+            )
+        except ValueError as e:
+            return Response(response_error(message=str(e)), status=400)
         
         price_data = []
         for price in prices:
@@ -244,22 +258,21 @@ class MandiPricesWithAggregatesAPIView(APIView):
             })
         
         # Calculate aggregates
-        aggregates = MandiPrice.objects.filter(**filters).aggregate(
-            avg_price=Avg('modal_price'),
-            min_price=Min('min_price'),
-            max_price=Max('max_price')
-        )
+        aggregates = window_stats(daily_summaries(
+            start_date, crop_type=crop_type, state=state, district=district, district_exact=False
+        ))
         
         return Response(
             response_success(
                 message="Mandi prices fetched successfully",
                 data={
                     'prices': price_data,
-                    'total': len(price_data),
+                    'total': aggregates['price_count'],
+                    'next_cursor': next_cursor,
                     'aggregates': {
-                        'average_price': float(aggregates['avg_price']) if aggregates['avg_price'] else 0,
-                        'lowest_price': float(aggregates['min_price']) if aggregates['min_price'] else 0,
-                        'highest_price': float(aggregates['max_price']) if aggregates['max_price'] else 0
+                        'average_price': aggregates['average_modal_price'],
+                        'lowest_price': aggregates['lowest_price'],
+                        'highest_price': aggregates['highest_price']
                     },
                     'filters': {
                         'crop_type': crop_type,
@@ -278,6 +291,7 @@ class MSPRecordsDetailAPIView(APIView):
     """
     permission_classes = [AllowAny]
     
+    @cache_response(ttl=3600, vary_on=['crop_type', 'year', 'season'], tags=['msp_records'])
     def get(self, request):
         crop_type = request.query_params.get('crop_type')
         year = request.query_params.get('year')
@@ -324,12 +338,17 @@ class MSPRecordsDetailAPIView(APIView):
 class PriceTrendAPIView(APIView):
     """
     Get price trends for a crop over time with monthly aggregates
+    Served from the daily price summaries; pass market for that market's
+    monthly open/high/low/close.
     """
     permission_classes = [AllowAny]
     
+    @query_budget(5)
+    @cache_response(ttl=900, stale_ttl=1800, vary_on=['crop_type', 'state', 'market', 'months'], tags=['mandi_prices', 'msp_records'])
     def get(self, request):
         crop_type = request.query_params.get('crop_type')
         state = request.query_params.get('state')
+        market = request.query_params.get('market')
         months = int(request.query_params.get('months', 6))
         
         if not crop_type:
@@ -340,34 +359,20 @@ class PriceTrendAPIView(APIView):
         
         start_date = timezone.now().date() - timedelta(days=30*months)
         
-        filters = {
-            'crop_type': crop_type,
-            'date__gte': start_date,
-            'is_active': True
-        }
-        
-        if state:
-            filters['state'] = state
-        
         # Group by month and calculate averages
-        monthly_prices = MandiPrice.objects.filter(**filters).annotate(
+        summaries = daily_summaries(start_date, crop_type=crop_type, state=state).annotate(
             month=TruncMonth('date')
-        ).values('month').annotate(
-            avg_price=Avg('modal_price'),
-            min_price=Min('min_price'),
-            max_price=Max('max_price'),
-            total_arrival=Avg('arrival_quantity_quintals')
-        ).order_by('month')
+        )
         
         trend_data = []
-        for item in monthly_prices:
+        for item in grouped_stats(summaries, 'month'):
             trend_data.append({
                 'month': item['month'].strftime('%B %Y'),
                 'date': item['month'].isoformat(),
-                'average_price': float(item['avg_price']) if item['avg_price'] else 0,
-                'min_price': float(item['min_price']) if item['min_price'] else 0,
-                'max_price': float(item['max_price']) if item['max_price'] else 0,
-                'avg_arrival_quintals': float(item['total_arrival']) if item['total_arrival'] else 0
+                'average_price': item['average_modal_price'],
+                'min_price': item['lowest_price'],
+                'max_price': item['highest_price'],
+                'avg_arrival_quintals': item['average_arrival_quintals']
             })
         
         # Get MSP for comparison
@@ -378,17 +383,44 @@ class PriceTrendAPIView(APIView):
             is_active=True
         ).first()
         
+        data = {
+            'crop_type': crop_type,
+            'trend': trend_data,
+            'msp': float(msp.msp_per_quintal) if msp else None,
+            'period_months': months,
+            'start_date': start_date.isoformat(),
+            'end_date': timezone.now().date().isoformat()
+        }
+        
+        if market:
+            candles = MonthlyPriceSummary.objects.filter(
+                crop_type=crop_type,
+                market_name=market,
+                month__gte=start_date.replace(day=1)
+            )
+            if state:
+                candles = candles.filter(state=state)
+            
+            data['market'] = market
+            data['ohlc'] = [
+                {
+                    'month': candle.month.strftime('%B %Y'),
+                    'date': candle.month.isoformat(),
+                    'district': candle.district,
+                    'open': float(candle.open_price),
+                    'high': float(candle.high_price),
+                    'low': float(candle.low_price),
+                    'close': float(candle.close_price),
+                    'average_price': float(candle.get_average_price()),
+                    'price_days': candle.price_days
+                }
+                for candle in candles.order_by('month', 'district')
+            ]
+        
         return Response(
             response_success(
                 message="Price trend fetched successfully",
-                data={
-                    'crop_type': crop_type,
-                    'trend': trend_data,
-                    'msp': float(msp.msp_per_quintal) if msp else None,
-                    'period_months': months,
-                    'start_date': start_date.isoformat(),
-                    'end_date': timezone.now().date().isoformat()
-                }
+                data=data
             )
         )
 
@@ -397,78 +429,55 @@ class FetcheNAMPricesAPIView(APIView):
     """
     Fetch latest prices from eNAM API and update database
     Admin/authenticated endpoint for data refresh
+    
+    Reads the configured feed (MANDI_PRICE_FEED_URL, or the bundled sample
+    feed as a local stand-in) or an uploaded CSV/JSON/JSONL `file`, and
+    upserts it in batches. Optional: `source` (enam/agmarknet/manual),
+    `date` (YYYY-MM-DD, for rows without one), `dry_run`.
     """
     permission_classes = [IsAuthenticated]
     
     def post(self, request):
-        # Mock eNAM API integration for demonstration
-        # In production: integrate with actual eNAM/AgMarkNet API
-        
-        mock_prices = [
-            {
-                'crop_type': 'soybean',
-                'state': 'Madhya Pradesh',
-                'district': 'Indore',
-                'market_name': 'Indore APMC',
-                'min_price': 4200,
-                'max_price': 4600,
-                'modal_price': 4400,
-                'arrival_quintals': 15000
-            },
-            {
-                'crop_type': 'mustard',
-                'state': 'Rajasthan',
-                'district': 'Jaipur',
-                'market_name': 'Jaipur Mandi',
-                'min_price': 5100,
-                'max_price': 5500,
-                'modal_price': 5300,
-                'arrival_quintals': 8000
-            },
-            {
-                'crop_type': 'groundnut',
-                'state': 'Gujarat',
-                'district': 'Rajkot',
-                'market_name': 'Rajkot APMC',
-                'min_price': 5500,
-                'max_price': 6000,
-                'modal_price': 5750,
-                'arrival_quintals': 12000
-            }
-        ]
-        
-        today = timezone.now().date()
-        created_count = 0
-        updated_count = 0
-        
-        for price_data in mock_prices:
-            obj, created = MandiPrice.objects.update_or_create(
-                crop_type=price_data['crop_type'],
-                state=price_data['state'],
-                district=price_data['district'],
-                market_name=price_data['market_name'],
-                date=today,
-                defaults={
-                    'min_price': price_data['min_price'],
-                    'max_price': price_data['max_price'],
-                    'modal_price': price_data['modal_price'],
-                    'arrival_quantity_quintals': price_data['arrival_quintals'],
-                    'source': 'enam'
-                }
+        from .services import ingest_mandi_prices
+        from .services.price_ingestion_service import FeedRowError, parse_feed_date
+        
+        source_name = request.data.get('source', 'enam')
+        if source_name not in ('enam', 'agmarknet', 'manual'):
+            return Response(
+                response_error(message="source must be one of enam, agmarknet, manual"),
+                status=400
+            )
+        
+        try:
+            default_date = parse_feed_date(request.data.get('date'), timezone.now().date())
+        except FeedRowError as e:
+            return Response(response_error(message=str(e)), status=400)
+        
+        dry_run = str(request.data.get('dry_run', 'false')).lower() in ('true', '1', 'yes')
+        
+        try:
+            report = ingest_mandi_prices(
+                source=request.FILES.get('file'),
+                feed_format=request.data.get('format'),
+                source_name=source_name,
+                default_date=default_date,
+                dry_run=dry_run
+            )
+        except Exception as e:
+            return Response(
+                response_error(message=f"Failed to sync price data: {str(e)}"),
+                status=400
             )
-            if created:
-                created_count += 1
-            else:
-                updated_count += 1
         
         return Response(
             response_success(
                 message=f"Successfully synced price data from eNAM",
                 data={
-                    'records_created': created_count,
-                    'records_updated': updated_count,
-                    'total_processed': created_count + updated_count,
-                    'date': today.isoformat()
+                    'records_created': report['inserted'],
+                    'records_updated': report['updated'],
+                    'total_processed': report['inserted'] + report['updated'] + report['unchanged'],
+                    'date': default_date.isoformat(),
+                    **report
                 }
             )
         )
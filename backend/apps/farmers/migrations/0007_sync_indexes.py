@@ -0,0 +1,17 @@
+# Generated by Django 4.2.27 on 2026-10-19 10:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmers', '0006_alter_farmerprofile_pincode'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cropplan',
+            index=models.Index(fields=['farmer', 'updated_at'], name='crop_plans_farmer__3a08fa_idx'),
+        ),
+    ]
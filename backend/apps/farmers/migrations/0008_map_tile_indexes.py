@@ -0,0 +1,17 @@
+# Generated by Django 4.2.27 on 2026-10-19 10:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmers', '0007_sync_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='farmerprofile',
+            index=models.Index(fields=['latitude', 'longitude'], name='farmer_prof_latitud_4c32b6_idx'),
+        ),
+    ]
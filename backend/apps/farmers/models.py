@@ -147,6 +147,10 @@ class FarmerProfile(TimeStampedModel):
         verbose_name = 'Farmer Profile'
         verbose_name_plural = 'Farmer Profiles'
         ordering = ['-created_at']
+        indexes = [
+            # Map tile bounding boxes
+            models.Index(fields=['latitude', 'longitude']),
+        ]
     
     def __str__(self):
         return f"{self.full_name} - {self.district}, {self.state}"
@@ -544,6 +548,7 @@ class CropPlan(TimeStampedModel):
             models.Index(fields=['farmer', 'status']),
             models.Index(fields=['sowing_date']),
             models.Index(fields=['crop_type', 'season']),
+            models.Index(fields=['farmer', 'updated_at']),
         ]
     
     def __str__(self):
@@ -2,12 +2,13 @@
 Serializers for Farmers App
 """
 from rest_framework import serializers
+from apps.core.fieldsets import SparseFieldsetMixin
 from .models import FarmerProfile, FarmLand, CropPlanning, CropPlan
 from apps.users.serializers import UserSerializer
 
 
-class FarmerProfileSerializer(serializers.ModelSerializer):
-    """Serializer for farmer profile"""
+class FarmerProfileSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Serializer for farmer profile; supports ?fields= and ?expand=fpo"""
     user = UserSerializer(read_only=True)
     fpo_name = serializers.CharField(source='get_fpo_name', read_only=True)
     state_display = serializers.CharField(source='get_state_display', read_only=True)
@@ -21,6 +22,13 @@ class FarmerProfileSerializer(serializers.ModelSerializer):
             'id', 'user', 'total_lots_created', 'total_quantity_sold_quintals',
             'total_earnings', 'kyc_status', 'created_at', 'updated_at'
         ]
+        expandable_fields = {
+            'fpo': ('apps.fpos.serializers.FPOProfileSerializer', {}),
+        }
+        field_sources = {
+            'fpo_name': ('fpo.organization_name',),
+            'fpo_membership': (),  # queries memberships itself
+        }
     
     def get_fpo_membership(self, obj):
         """Get FPO membership details if farmer is a member"""
@@ -152,8 +160,8 @@ class CropPlanningCreateSerializer(serializers.ModelSerializer):
         exclude = ['farmer']
 
 
-class CropPlanSerializer(serializers.ModelSerializer):
-    """Serializer for simplified Crop Plan"""
+class CropPlanSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Serializer for simplified Crop Plan; supports ?fields="""
     farmer_name = serializers.CharField(source='farmer.full_name', read_only=True)
     farm_land_name = serializers.CharField(source='farm_land.land_name', read_only=True)
     crop_type_display = serializers.CharField(source='get_crop_type_display', read_only=True)
@@ -184,6 +192,10 @@ class CropPlanSerializer(serializers.ModelSerializer):
             'total_input_costs', 'net_profit', 'profit_per_acre', 'roi_percentage',
             'converted_lot', 'conversion_date', 'created_at', 'updated_at'
         ]
+        field_sources = {
+            'days_until_harvest': ('expected_harvest_date',),
+            'progress_percentage': ('sowing_date', 'expected_harvest_date'),
+        }
 
 
 class CropPlanCreateSerializer(serializers.ModelSerializer):
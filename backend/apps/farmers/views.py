@@ -17,7 +17,11 @@ from .serializers import (
     CropPlanCreateSerializer, CropPlanUpdateSerializer
 )
 from apps.core.permissions import IsFarmer, IsOwner
+from apps.core.fieldsets import SparseFieldsetViewMixin
 from apps.core.utils import response_success, response_error, calculate_distance
+from apps.core.services import get_role_profile
+from apps.core.pagination import keyset_page
+from apps.core.instrumentation import query_budget
 from apps.fpos.models import FPOProfile
 from apps.crops.models import MandiPrice, MSPRecord
 from apps.core.constants import OILSEED_CHOICES
@@ -27,7 +31,7 @@ from math import radians, sin, cos, sqrt, atan2
 import requests
 
 
-class FarmerProfileViewSet(viewsets.ModelViewSet):
+class FarmerProfileViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     """
     ViewSet for farmer profiles
     """
@@ -81,7 +85,7 @@ class FarmerProfileViewSet(viewsets.ModelViewSet):
     def my_profile(self, request):
         """Get current user's farmer profile"""
         try:
-            profile = FarmerProfile.objects.select_related('user', 'fpo').get(user=request.user)
+            profile = get_role_profile(request, FarmerProfile)
             serializer = self.get_serializer(profile)
             return Response(
                 response_success(
@@ -136,7 +140,7 @@ class FarmerProfileViewSet(viewsets.ModelViewSet):
     def my_stats(self, request):
         """Get current user's farmer statistics"""
         try:
-            profile = FarmerProfile.objects.select_related('user', 'fpo').get(user=request.user)
+            profile = get_role_profile(request, FarmerProfile)
             
             # Calculate additional stats
             from apps.lots.models import ProcurementLot
@@ -190,8 +194,9 @@ class FarmLandViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         # Farmers see only their own farm lands
-        if hasattr(self.request.user, 'farmer_profile'):
-            return self.queryset.filter(farmer=self.request.user.farmer_profile)
+        farmer = get_role_profile(self.request)
+        if isinstance(farmer, FarmerProfile):
+            return self.queryset.filter(farmer=farmer)
         return self.queryset.none()
     
     def create(self, request, *args, **kwargs):
@@ -227,8 +232,9 @@ class CropPlanningViewSet(viewsets.ModelViewSet):
         queryset = super().get_queryset()
         
         # Farmers see only their own crop plans
-        if hasattr(self.request.user, 'farmer_profile'):
-            queryset = queryset.filter(farmer=self.request.user.farmer_profile)
+        farmer = get_role_profile(self.request)
+        if isinstance(farmer, FarmerProfile):
+            queryset = queryset.filter(farmer=farmer)
         
         # Filter by season
         season = self.request.query_params.get('season')
@@ -408,15 +414,19 @@ class NearbyFPOAPIView(generics.GenericAPIView):
 class MarketPricesAPIView(generics.GenericAPIView):
     """
     Get current market prices for oilseeds
-    Fetches from MandiPrice database and eNAM API
+    Fetches from MandiPrice database and eNAM API; keyset-paginated with
+    cursor/page_size
     """
     permission_classes = [IsAuthenticated]
     
+    @query_budget(4)
     def get(self, request):
         crop_type = request.query_params.get('crop_type')
         state = request.query_params.get('state')
         district = request.query_params.get('district')
         days = int(request.query_params.get('days', 7))  # Last 7 days by default
+        cursor = request.query_params.get('cursor')
+        page_size = min(int(request.query_params.get('page_size', 100)), 500)
         
         filters = {
             'date__gte': timezone.now().date() - timedelta(days=days)
@@ -430,7 +440,15 @@ class MarketPricesAPIView(generics.GenericAPIView):
             filters['district'] = district
         
         # Get mandi prices
-        prices = MandiPrice.objects.filter(**filters).order_by('-date', 'market_name')
+        try:
+            prices, next_cursor = keyset_page(
+                MandiPrice.objects.filter(**filters),
+                ('-date', 'market_name', 'id'),
+                cursor=cursor,
+                page_size=page_size
+            )
+        except ValueError as e:
+            return Response(response_error(message=str(e)), status=status.HTTP_400_BAD_REQUEST)
         
         price_data = []
         for price in prices:
@@ -462,7 +480,8 @@ class MarketPricesAPIView(generics.GenericAPIView):
                 data={
                     'prices': price_data,
                     'msp': msp_data,
-                    'total_records': len(price_data)
+                    'total_records': len(price_data),
+                    'next_cursor': next_cursor
                 }
             )
         )
@@ -679,7 +698,7 @@ class FarmerJoinRequestsAPIView(APIView):
         ))
 
 
-class CropPlanViewSet(viewsets.ModelViewSet):
+class CropPlanViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     """
     ViewSet for simplified Crop Plans with financial data
     """
@@ -694,9 +713,8 @@ class CropPlanViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Filter to only show current farmer's plans"""
-        user = self.request.user
         try:
-            farmer_profile = FarmerProfile.objects.get(user=user)
+            farmer_profile = get_role_profile(self.request, FarmerProfile)
             queryset = CropPlan.objects.filter(farmer=farmer_profile).select_related(
                 'farmer', 'farm_land', 'converted_lot'
             )
@@ -723,7 +741,7 @@ class CropPlanViewSet(viewsets.ModelViewSet):
     def create(self, request, *args, **kwargs):
         """Create a new crop plan"""
         try:
-            farmer_profile = FarmerProfile.objects.get(user=request.user)
+            farmer_profile = get_role_profile(request, FarmerProfile)
         except FarmerProfile.DoesNotExist:
             return Response(
                 response_error(message="Farmer profile not found"),
@@ -857,7 +875,7 @@ class CropPlanViewSet(viewsets.ModelViewSet):
         GET /api/farmers/crop-plans/statistics/
         """
         try:
-            farmer_profile = FarmerProfile.objects.get(user=request.user)
+            farmer_profile = get_role_profile(request, FarmerProfile)
             from django.db import models as django_models
             plans = CropPlan.objects.filter(farmer=farmer_profile)
             
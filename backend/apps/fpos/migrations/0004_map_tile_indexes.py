@@ -0,0 +1,17 @@
+# Generated by Django 4.2.27 on 2026-10-19 10:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fpos', '0003_add_fpo_join_request'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='fpoprofile',
+            index=models.Index(fields=['latitude', 'longitude'], name='fpo_profile_latitud_af5c8f_idx'),
+        ),
+    ]
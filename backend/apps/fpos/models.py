@@ -179,6 +179,10 @@ class FPOProfile(TimeStampedModel):
         verbose_name = 'FPO Profile'
         verbose_name_plural = 'FPO Profiles'
         ordering = ['-created_at']
+        indexes = [
+            # Map tile bounding boxes
+            models.Index(fields=['latitude', 'longitude']),
+        ]
     
     def __str__(self):
         return f"{self.organization_name} - {self.district}, {self.state}"
@@ -1,3 +1,125 @@
-from django.test import TestCase
+import datetime
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.db import transaction
+from rest_framework.test import APITestCase
+
+from apps.blockchain.models import BlockchainTransaction
+from apps.core.constants import BLOCKCHAIN_CREATED, BLOCKCHAIN_WAREHOUSE_OUT
+from apps.farmers.models import FarmerProfile
+from apps.lots.models import ProcurementLot
+from apps.users.models import User
+from apps.warehouses.models import StockMovement
+from .models import FPOProfile, FPOWarehouse
+
+
+class AggregatedLotTests(APITestCase):
+    """Aggregation claims every parent lot or none, moves stock out per warehouse, and records each lot once"""
+
+    URL = '/api/fpos/create-aggregated-lot/'
+
+    def setUp(self):
+        user = User.objects.create_user('9000000901', 'fpo')
+        self.fpo = FPOProfile.objects.create(
+            user=user, organization_name='Malwa Growers FPO', registration_number='FPO-AGG-0001',
+            registration_type='fpo', year_of_registration=2019, contact_person_name='Asha Patel',
+            office_address='Main Road', district='Indore', state='madhya_pradesh', pincode='452001',
+        )
+        self.warehouses = [
+            FPOWarehouse.objects.create(
+                fpo=self.fpo, warehouse_name=f'Godown {code}', warehouse_code=f'WH-AGG-{code}',
+                warehouse_type='godown', address='Mandi Road', district='Indore', state='madhya_pradesh',
+                pincode='452001', capacity_quintals=Decimal('1000'), current_stock_quintals=Decimal('200'),
+            )
+            for code in ('A', 'B')
+        ]
+        farmer = FarmerProfile.objects.create(
+            user=User.objects.create_user('9000000902', 'farmer'), full_name='Member Farmer',
+            total_land_acres=Decimal('2.5'), farming_experience_years=5, district='Indore', state='madhya_pradesh',
+        )
+        # Two lots in the first godown, one in the second
+        self.lots = [
+            ProcurementLot.objects.create(
+                farmer=farmer, fpo=self.fpo, managed_by_fpo=True, warehouse=warehouse,
+                crop_type='soybean', quantity_quintals=Decimal(quantity),
+                available_quantity_quintals=Decimal(quantity), quality_grade='A',
+                expected_price_per_quintal=Decimal('4500'), harvest_date=datetime.date(2026, 10, 1),
+            )
+            for warehouse, quantity in [
+                (self.warehouses[0], '10'), (self.warehouses[0], '15'), (self.warehouses[1], '20'),
+            ]
+        ]
+        self.client.force_authenticate(user)
+
+    def _aggregate(self):
+        return self.client.post(self.URL, {
+            'parent_lot_ids': [str(lot.id) for lot in self.lots],
+            'crop_type': 'soybean', 'quality_grade': 'A', 'expected_price_per_quintal': '4600',
+        }, format='json')
+
+    def _stock(self):
+        return [
+            FPOWarehouse.objects.get(pk=warehouse.pk).current_stock_quintals for warehouse in self.warehouses
+        ]
+
+    def test_a_lot_claimed_in_the_meantime_is_a_409_and_writes_nothing(self):
+        atomic = transaction.atomic
+        ledger_entries = BlockchainTransaction.objects.count()
+
+        def sell_one_lot_first(*args, **kwargs):
+            # Another request takes a lot after validation but before the claim
+            if not sold:
+                sold.append(ProcurementLot.objects.filter(pk=self.lots[1].pk).update(status='sold'))
+            return atomic(*args, **kwargs)
+
+        sold = []
+        with mock.patch('django.db.transaction.atomic', side_effect=sell_one_lot_first):
+            response = self._aggregate()
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(
+            list(ProcurementLot.objects.filter(pk__in=[lot.pk for lot in self.lots])
+                 .order_by('quantity_quintals').values_list('status', flat=True)),
+            ['available', 'sold', 'available'],
+        )
+        self.assertFalse(ProcurementLot.objects.filter(listing_type='fpo_aggregated').exists())
+        self.assertFalse(StockMovement.objects.exists())
+        self.assertEqual(self._stock(), [Decimal('200'), Decimal('200')])
+        self.assertEqual(BlockchainTransaction.objects.count(), ledger_entries)
+
+    def test_stock_moves_out_of_each_source_warehouse(self):
+        response = self._aggregate()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['data']['quantity_quintals'], 45.0)
+        self.assertEqual(response.data['data']['source_warehouses_count'], 2)
+        self.assertEqual(self._stock(), [Decimal('175'), Decimal('180')])
+        movements = StockMovement.objects.filter(movement_type='out')
+        self.assertEqual(
+            sorted((movement.lot_id, movement.warehouse_id, movement.quantity) for movement in movements),
+            sorted((lot.id, lot.warehouse_id, lot.available_quantity_quintals) for lot in self.lots),
+        )
+        self.assertFalse(
+            ProcurementLot.objects.filter(pk__in=[lot.pk for lot in self.lots]).exclude(status='aggregated').exists()
+        )
+
+    def test_one_ledger_batch_with_one_entry_per_lot(self):
+        with mock.patch.object(
+            BlockchainTransaction, 'bulk_record', side_effect=BlockchainTransaction.bulk_record
+        ) as bulk_record:
+            response = self._aggregate()
+
+        self.assertEqual(response.status_code, 201)
+        bulk_record.assert_called_once()
+        aggregated = ProcurementLot.objects.get(pk=response.data['data']['id'])
+        for lot in self.lots:
+            self.assertEqual(
+                list(BlockchainTransaction.objects.filter(lot=lot).values_list('action_type', flat=True)
+                     .exclude(action_type=BLOCKCHAIN_CREATED)),
+                [BLOCKCHAIN_WAREHOUSE_OUT],
+            )
+        self.assertEqual(
+            list(BlockchainTransaction.objects.filter(lot=aggregated).values_list('action_type', flat=True)),
+            [BLOCKCHAIN_CREATED],
+        )
@@ -16,6 +16,7 @@ from .views import (
     FPOAssignWarehouseAPIView,
     FPOWarehouseInventoryAPIView,
     FPOCreateFarmerLotAPIView,
+    FPOImportLotsAPIView,
     FPOPaymentAPIView
 )
 
@@ -46,6 +47,9 @@ urlpatterns = [
     # Create lot on behalf of farmer
     path('create-farmer-lot/', FPOCreateFarmerLotAPIView.as_view(), name='fpo-create-farmer-lot'),
     
+    # Bulk import lots from CSV/Excel
+    path('import-lots/', FPOImportLotsAPIView.as_view(), name='fpo-import-lots'),
+    
     # Remove member
     path('members/<uuid:membership_id>/remove/', FPORemoveMemberAPIView.as_view(), name='fpo-remove-member'),
     
@@ -7,6 +7,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
+from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from django.db.models import Sum, Count, Avg, Q
 from django.utils import timezone
@@ -14,12 +15,16 @@ from datetime import timedelta
 from django_filters.rest_framework import DjangoFilterBackend
 
 from apps.core.utils import response_success, response_error, generate_otp
+from apps.core.services import get_role_profile, index_objects
+from apps.core.db_router import ReplicaReadMixin
 from apps.core.permissions import IsFPO
+from apps.core.constants import BLOCKCHAIN_CREATED, BLOCKCHAIN_WAREHOUSE_OUT
 from .models import FPOProfile, FPOMembership, FPOWarehouse
 from .serializers import FPOProfileSerializer, FPOMembershipSerializer, FPOWarehouseSerializer
 from apps.lots.models import ProcurementLot
 from apps.farmers.models import FarmerProfile
 from apps.bids.models import Bid
+from apps.notifications.signals import push_lot_updates
 from apps.users.models import User, UserProfile, OTPVerification
 from datetime import date
 
@@ -33,7 +38,7 @@ class FPOProfileAPIView(APIView):
     def get(self, request):
         """Get FPO profile"""
         try:
-            fpo = FPOProfile.objects.get(user=request.user)
+            fpo = get_role_profile(request, FPOProfile)
             serializer = FPOProfileSerializer(fpo)
             return Response(
                 response_success(
@@ -81,7 +86,7 @@ class FPOProfileAPIView(APIView):
     def patch(self, request):
         """Update FPO profile"""
         try:
-            fpo = FPOProfile.objects.get(user=request.user)
+            fpo = get_role_profile(request, FPOProfile)
             serializer = FPOProfileSerializer(fpo, data=request.data, partial=True)
             if serializer.is_valid():
                 serializer.save()
@@ -102,7 +107,7 @@ class FPOProfileAPIView(APIView):
             )
 
 
-class FPODashboardAPIView(APIView):
+class FPODashboardAPIView(ReplicaReadMixin, APIView):
     """
     FPO Dashboard with key metrics and analytics
     """
@@ -110,7 +115,7 @@ class FPODashboardAPIView(APIView):
     
     def get(self, request):
         try:
-            fpo = FPOProfile.objects.get(user=request.user)
+            fpo = get_role_profile(request, FPOProfile)
         except FPOProfile.DoesNotExist:
             return Response(
                 response_error(message="FPO profile not found"),
@@ -221,7 +226,7 @@ class FPOMembersAPIView(APIView):
     def get(self, request):
         """Get all FPO members"""
         try:
-            fpo = FPOProfile.objects.get(user=request.user)
+            fpo = get_role_profile(request, FPOProfile)
         except FPOProfile.DoesNotExist:
             return Response(
                 response_error(message="FPO profile not found"),
@@ -273,7 +278,7 @@ class FPOMembersAPIView(APIView):
     def post(self, request):
         """Add new member to FPO"""
         try:
-            fpo = FPOProfile.objects.get(user=request.user)
+            fpo = get_role_profile(request, FPOProfile)
         except FPOProfile.DoesNotExist:
             return Response(
                 response_error(message="FPO profile not found"),
@@ -355,7 +360,7 @@ class FPOProcurementAPIView(APIView):
     def get(self, request):
         """Browse available lots for procurement"""
         try:
-            fpo = FPOProfile.objects.get(user=request.user)
+            fpo = get_role_profile(request, FPOProfile)
         except FPOProfile.DoesNotExist:
             return Response(
                 response_error(message="FPO profile not found"),
@@ -463,7 +468,7 @@ class FPOWarehousesAPIView(APIView):
     def get(self, request):
         """Get all FPO warehouses"""
         try:
-            fpo = FPOProfile.objects.get(user=request.user)
+            fpo = get_role_profile(request, FPOProfile)
         except FPOProfile.DoesNotExist:
             return Response(
                 response_error(message="FPO profile not found"),
@@ -483,7 +488,7 @@ class FPOWarehousesAPIView(APIView):
     def post(self, request):
         """Create new warehouse"""
         try:
-            fpo = FPOProfile.objects.get(user=request.user)
+            fpo = get_role_profile(request, FPOProfile)
         except FPOProfile.DoesNotExist:
             return Response(
                 response_error(message="FPO profile not found"),
@@ -524,7 +529,7 @@ class FPOWarehousesAPIView(APIView):
     def put(self, request):
         """Update warehouse"""
         try:
-            fpo = FPOProfile.objects.get(user=request.user)
+            fpo = get_role_profile(request, FPOProfile)
         except FPOProfile.DoesNotExist:
             return Response(
                 response_error(message="FPO profile not found"),
@@ -576,7 +581,7 @@ class FPOWarehousesAPIView(APIView):
     def delete(self, request):
         """Delete warehouse (soft delete)"""
         try:
-            fpo = FPOProfile.objects.get(user=request.user)
+            fpo = get_role_profile(request, FPOProfile)
         except FPOProfile.DoesNotExist:
             return Response(
                 response_error(message="FPO profile not found"),
@@ -630,7 +635,7 @@ class FPOAssignWarehouseAPIView(APIView):
         from django.db import transaction
         
         try:
-            fpo = FPOProfile.objects.get(user=request.user)
+            fpo = get_role_profile(request, FPOProfile)
         except FPOProfile.DoesNotExist:
             return Response(
                 response_error(message="FPO profile not found"),
@@ -756,7 +761,7 @@ class FPOWarehouseInventoryAPIView(APIView):
         from apps.warehouses.models import StockMovement
         
         try:
-            fpo = FPOProfile.objects.get(user=request.user)
+            fpo = get_role_profile(request, FPOProfile)
         except FPOProfile.DoesNotExist:
             return Response(
                 response_error(message="FPO profile not found"),
@@ -896,7 +901,7 @@ class FPOBidsAPIView(APIView):
     def get(self, request):
         """Get all bids on FPO lots"""
         try:
-            fpo = FPOProfile.objects.get(user=request.user)
+            fpo = get_role_profile(request, FPOProfile)
         except FPOProfile.DoesNotExist:
             return Response(
                 response_error(message="FPO profile not found"),
@@ -965,7 +970,7 @@ class FPOBidsAPIView(APIView):
     def patch(self, request, bid_id=None):
         """Accept or reject a bid"""
         try:
-            fpo = FPOProfile.objects.get(user=request.user)
+            fpo = get_role_profile(request, FPOProfile)
         except FPOProfile.DoesNotExist:
             return Response(
                 response_error(message="FPO profile not found"),
@@ -1028,7 +1033,7 @@ class FPOCreateFarmerAPIView(APIView):
     def post(self, request):
         """Create a new farmer account and add to FPO membership"""
         try:
-            fpo = FPOProfile.objects.get(user=request.user)
+            fpo = get_role_profile(request, FPOProfile)
         except FPOProfile.DoesNotExist:
             return Response(
                 response_error(message="FPO profile not found"),
@@ -1183,11 +1188,9 @@ class FPORemoveMemberAPIView(APIView):
 
     def delete(self, request, membership_id):
         try:
-            user = request.user
-            
             # Get FPO profile
             try:
-                fpo = FPOProfile.objects.get(user=user)
+                fpo = get_role_profile(request, FPOProfile)
             except FPOProfile.DoesNotExist:
                 return Response(
                     response_error(message="FPO profile not found"),
@@ -1383,6 +1386,60 @@ class FPOCreateFarmerLotAPIView(APIView):
             )
 
 
+class FPOImportLotsAPIView(APIView):
+    """
+    Bulk import member lots from a CSV or Excel (.xlsx) file
+    Rows are validated individually; valid rows are created in chunks and
+    invalid rows are returned with their errors. Pass dry_run=true to only
+    validate the file.
+    
+    Columns: farmer_phone_number or farmer_id, crop_type, quantity_quintals,
+    expected_price_per_quintal, harvest_date, and optionally crop_variety,
+    crop_master_code, crop_variety_code, quality_grade, moisture_content,
+    oil_content, description, warehouse_code
+    """
+    permission_classes = [IsAuthenticated, IsFPO]
+    parser_classes = (MultiPartParser, FormParser)
+    
+    def post(self, request):
+        from apps.lots.services import import_fpo_lots
+        
+        try:
+            fpo = get_role_profile(request, FPOProfile)
+        except FPOProfile.DoesNotExist:
+            return Response(
+                response_error(message="FPO profile not found"),
+                status=404
+            )
+        
+        uploaded_file = request.FILES.get('file')
+        if not uploaded_file:
+            return Response(
+                response_error(message="file is required (.csv or .xlsx)"),
+                status=400
+            )
+        
+        dry_run = str(request.data.get('dry_run', 'false')).lower() in ('true', '1', 'yes')
+        
+        try:
+            report = import_fpo_lots(fpo, uploaded_file, request.user, dry_run=dry_run)
+        except ValueError as e:
+            return Response(
+                response_error(message=str(e)),
+                status=400
+            )
+        
+        if dry_run:
+            message = f"Validated {report['total_rows']} rows: {report['valid_rows']} valid, {report['failed']} with errors"
+        else:
+            message = f"Imported {report['created']} of {report['total_rows']} lots"
+        
+        return Response(
+            response_success(message=message, data=report),
+            status=201 if report['created'] else 200
+        )
+
+
 class FPOCreateAggregatedLotAPIView(APIView):
     """
     Create FPO aggregated bulk lot by merging member lots
@@ -1392,12 +1449,13 @@ class FPOCreateAggregatedLotAPIView(APIView):
     
     def post(self, request):
         """Create aggregated bulk lot from member lots with warehouse management"""
-        from django.utils import timezone
-        from apps.warehouses.models import Inventory, StockMovement
         from django.db import transaction
+        from django.db.models import F
+        from apps.warehouses.models import StockMovement
+        from apps.blockchain.models import BlockchainTransaction
         
         try:
-            fpo = FPOProfile.objects.get(user=request.user)
+            fpo = get_role_profile(request, FPOProfile)
         except FPOProfile.DoesNotExist:
             return Response(
                 response_error(message="FPO profile not found"),
@@ -1438,34 +1496,33 @@ class FPOCreateAggregatedLotAPIView(APIView):
             )
         
         # Get parent lots (must be from FPO members and managed by this FPO)
-        parent_lots = ProcurementLot.objects.filter(
+        # Evaluated once; everything below works on this list
+        parent_lots = list(ProcurementLot.objects.filter(
             id__in=parent_lot_ids,
             fpo=fpo,
             managed_by_fpo=True,
             is_active=True,
             status='available'
-        ).select_related('warehouse').prefetch_related('source_warehouses')
+        ).select_related('warehouse', 'farmer', 'fpo'))
         
-        if parent_lots.count() != len(parent_lot_ids):
+        if len(parent_lots) != len(set(map(str, parent_lot_ids))):
             # Debug: Find which lots are missing/invalid
-            found_ids = list(parent_lots.values_list('id', flat=True))
-            missing_ids = [str(lot_id) for lot_id in parent_lot_ids if lot_id not in found_ids]
+            found_ids = {lot.id for lot in parent_lots}
             
             # Check what's wrong with missing lots
-            all_lots = ProcurementLot.objects.filter(id__in=parent_lot_ids)
+            all_lots = ProcurementLot.objects.filter(id__in=parent_lot_ids).exclude(id__in=found_ids)
             invalid_reasons = []
             for lot in all_lots:
-                if lot.id not in found_ids:
-                    reasons = []
-                    if lot.fpo != fpo:
-                        reasons.append(f"belongs to different FPO")
-                    if not lot.managed_by_fpo:
-                        reasons.append(f"not managed by FPO (managed_by_fpo={lot.managed_by_fpo})")
-                    if not lot.is_active:
-                        reasons.append(f"not active")
-                    if lot.status != 'available':
-                        reasons.append(f"status is '{lot.status}' not 'available'")
-                    invalid_reasons.append(f"Lot {lot.lot_number}: {', '.join(reasons)}")
+                reasons = []
+                if lot.fpo_id != fpo.id:
+                    reasons.append(f"belongs to different FPO")
+                if not lot.managed_by_fpo:
+                    reasons.append(f"not managed by FPO (managed_by_fpo={lot.managed_by_fpo})")
+                if not lot.is_active:
+                    reasons.append(f"not active")
+                if lot.status != 'available':
+                    reasons.append(f"status is '{lot.status}' not 'available'")
+                invalid_reasons.append(f"Lot {lot.lot_number}: {', '.join(reasons)}")
             
             error_detail = ". ".join(invalid_reasons) if invalid_reasons else "Unknown reason"
             return Response(
@@ -1483,7 +1540,7 @@ class FPOCreateAggregatedLotAPIView(APIView):
             )
         
         # VALIDATION: All parent lots MUST have warehouses assigned
-        lots_without_warehouse = [lot for lot in parent_lots if not lot.warehouse]
+        lots_without_warehouse = [lot for lot in parent_lots if not lot.warehouse_id]
         if lots_without_warehouse:
             lot_numbers = ', '.join([lot.lot_number for lot in lots_without_warehouse])
             return Response(
@@ -1494,24 +1551,50 @@ class FPOCreateAggregatedLotAPIView(APIView):
                 status=400
             )
         
-        # No need to get target warehouse - aggregated lots are marketplace listings, not stored
-        
-        # Calculate total quantity
-        total_quantity = sum(lot.available_quantity_quintals for lot in parent_lots)
-        
-        # No warehouse capacity check needed - aggregated lots are marketplace listings, not stored
-        
-        # Collect source warehouses (multi-warehouse aggregation)
-        source_warehouses = set()
+        # Calculate total quantity and per-warehouse stock deltas in one pass
+        total_quantity = 0
+        warehouse_deltas = {}
         for lot in parent_lots:
-            if lot.warehouse:
-                source_warehouses.add(lot.warehouse)
+            total_quantity += lot.available_quantity_quintals
+            warehouse_deltas[lot.warehouse_id] = (
+                warehouse_deltas.get(lot.warehouse_id, 0) + lot.available_quantity_quintals
+            )
         
-        # No need for first_farmer reference - FPO owns the aggregated lot
+        # No warehouse capacity check needed - aggregated lots are marketplace listings, not stored
         
         # Use database transaction for atomicity
         try:
             with transaction.atomic():
+                # Claim the parent lots; a concurrent aggregation of the same
+                # lots leaves fewer rows to update and is rejected
+                claimed_at = timezone.now()
+                claimed = ProcurementLot.objects.filter(
+                    id__in=[lot.id for lot in parent_lots],
+                    status='available'
+                ).update(status='aggregated', updated_at=claimed_at)
+                if claimed != len(parent_lots):
+                    transaction.set_rollback(True)
+                    return Response(
+                        response_error(message="Some parent lots were aggregated or sold in the meantime. Please refresh and try again."),
+                        status=409
+                    )
+                
+                # .update() sends no post_save: refresh the parents' search documents
+                # and push their new status to lot watchers and marketplace browsers
+                for lot in parent_lots:
+                    lot.status = 'aggregated'
+                    lot.updated_at = claimed_at
+                index_objects('lot', parent_lots)
+                push_lot_updates(parent_lots)
+                
+                # Lock all source warehouses once, in a stable order
+                source_warehouses = list(
+                    FPOWarehouse.objects.select_for_update()
+                    .filter(id__in=warehouse_deltas.keys())
+                    .order_by('id')
+                )
+                warehouses_by_id = {warehouse.id: warehouse for warehouse in source_warehouses}
+                
                 # Create aggregated lot (FPO-owned marketplace listing)
                 aggregated_lot = ProcurementLot.objects.create(
                     farmer=None,  # FPO-owned lot, not individual farmer
@@ -1523,42 +1606,45 @@ class FPOCreateAggregatedLotAPIView(APIView):
                     quantity_quintals=total_quantity,
                     available_quantity_quintals=total_quantity,
                     expected_price_per_quintal=expected_price_per_quintal,
-                    harvest_date=parent_lots.first().harvest_date,
-                    description=description or f"FPO Aggregated Bulk Lot from {parent_lots.count()} member lots",
+                    harvest_date=parent_lots[0].harvest_date,
+                    description=description or f"FPO Aggregated Bulk Lot from {len(parent_lots)} member lots",
                     status='available',  # Available in marketplace
                     warehouse=None  # Marketplace listing, not warehouse storage
                 )
                 
-                # Link parent lots
-                aggregated_lot.parent_lots.set(parent_lots)
+                # Link parent lots and source warehouses (multi-warehouse tracking)
+                aggregated_lot.parent_lots.add(*parent_lots)
+                aggregated_lot.source_warehouses.add(*source_warehouses)
                 
-                # Link source warehouses (multi-warehouse tracking)
-                if source_warehouses:
-                    aggregated_lot.source_warehouses.set(source_warehouses)
+                # Stock OUT from source warehouses: one INSERT for all movements
+                remarks = f'Aggregated into bulk lot {aggregated_lot.lot_number}'
+                StockMovement.objects.bulk_create([
+                    StockMovement(
+                        warehouse_id=lot.warehouse_id,
+                        lot=lot,
+                        movement_type='out',
+                        quantity=lot.available_quantity_quintals,
+                        remarks=remarks
+                    )
+                    for lot in parent_lots
+                ])
                 
-                # Process stock movements from source warehouses
-                for lot in parent_lots:
-                    if lot.warehouse:
-                        # Create stock movement OUT from source warehouse
-                        StockMovement.objects.create(
-                            warehouse=lot.warehouse,
-                            lot=lot,
-                            movement_type='out',
-                            quantity=lot.available_quantity_quintals,
-                            movement_date=timezone.now().date(),
-                            remarks=f'Aggregated into bulk lot {aggregated_lot.lot_number}'
-                        )
-                        
-                        # Update source warehouse stock
-                        lot.warehouse.current_stock_quintals -= lot.available_quantity_quintals
-                        lot.warehouse.save(update_fields=['current_stock_quintals'])
+                # One UPDATE per warehouse with the summed delta
+                for warehouse_id, quantity in warehouse_deltas.items():
+                    FPOWarehouse.objects.filter(id=warehouse_id).update(
+                        current_stock_quintals=F('current_stock_quintals') - quantity,
+                        updated_at=timezone.now()
+                    )
                 
                 # Note: No stock IN to target warehouse - aggregated lot is a marketplace listing
                 # Stock has been deducted from source warehouses above and is now allocated to this listing
                 # When sold, stock will be shipped directly from available FPO stock
                 
-                # Update parent lots status to 'aggregated'
-                parent_lots.update(status='aggregated')
+                # Ledger: warehouse_out per parent lot plus the aggregated lot's
+                # creation, appended as one batch
+                BlockchainTransaction.bulk_record(
+                    self._ledger_entries(fpo, aggregated_lot, parent_lots, warehouses_by_id, warehouse_deltas, remarks)
+                )
                 
                 return Response(
                     response_success(
@@ -1570,7 +1656,7 @@ class FPOCreateAggregatedLotAPIView(APIView):
                             'quantity_quintals': float(aggregated_lot.quantity_quintals),
                             'quality_grade': aggregated_lot.quality_grade,
                             'expected_price_per_quintal': float(aggregated_lot.expected_price_per_quintal),
-                            'parent_lots_count': parent_lots.count(),
+                            'parent_lots_count': len(parent_lots),
                             'listing_type': aggregated_lot.listing_type,
                             'warehouse_id': None,  # Marketplace listing, not stored
                             'warehouse_name': None,  # Marketplace listing, not stored
@@ -1586,6 +1672,70 @@ class FPOCreateAggregatedLotAPIView(APIView):
                 response_error(message=f"Failed to create aggregated lot: {str(e)}"),
                 status=500
             )
+    
+    @staticmethod
+    def _ledger_entries(fpo, aggregated_lot, parent_lots, warehouses_by_id, warehouse_deltas, remarks):
+        """Unsaved ledger entries for one aggregation"""
+        from apps.blockchain.models import BlockchainTransaction
+        
+        now = timezone.now()
+        actor = fpo.user
+        
+        entries = []
+        for lot in parent_lots:
+            warehouse = warehouses_by_id[lot.warehouse_id]
+            entries.append(BlockchainTransaction(
+                lot=lot,
+                action_type=BLOCKCHAIN_WAREHOUSE_OUT,
+                actor_id=actor.id,
+                actor_role=actor.role,
+                actor_name=fpo.organization_name,
+                transaction_data={
+                    'event': 'warehouse_movement',
+                    'movement_type': 'out',
+                    'warehouse': {
+                        'id': str(warehouse.id),
+                        'name': warehouse.warehouse_name,
+                        'location': {
+                            'district': warehouse.district,
+                            'state': warehouse.state
+                        }
+                    },
+                    'quantity_quintals': float(lot.available_quantity_quintals),
+                    'aggregated_into': aggregated_lot.lot_number,
+                    'remarks': remarks,
+                    'timestamp': now.isoformat()
+                },
+                location_latitude=warehouse.latitude,
+                location_longitude=warehouse.longitude
+            ))
+        
+        entries.append(BlockchainTransaction(
+            lot=aggregated_lot,
+            action_type=BLOCKCHAIN_CREATED,
+            actor_id=actor.id,
+            actor_role=actor.role,
+            actor_name=fpo.organization_name,
+            transaction_data={
+                'event': 'lot_aggregated',
+                'lot_number': aggregated_lot.lot_number,
+                'crop_type': aggregated_lot.crop_type,
+                'quantity_quintals': float(aggregated_lot.quantity_quintals),
+                'parent_lots': [lot.lot_number for lot in parent_lots],
+                'source_warehouses': [
+                    {
+                        'id': str(warehouse_id),
+                        'name': warehouses_by_id[warehouse_id].warehouse_name,
+                        'quantity_quintals': float(quantity)
+                    }
+                    for warehouse_id, quantity in warehouse_deltas.items()
+                ],
+                'timestamp': now.isoformat()
+            },
+            location_latitude=aggregated_lot.location_latitude,
+            location_longitude=aggregated_lot.location_longitude
+        ))
+        return entries
 
 
 class FPOPaymentAPIView(APIView):
@@ -1602,7 +1752,7 @@ class FPOPaymentAPIView(APIView):
         from decimal import Decimal
         
         try:
-            fpo = FPOProfile.objects.get(user=request.user)
+            fpo = get_role_profile(request, FPOProfile)
             farmer_id = request.data.get('farmer_id')
             amount = Decimal(str(request.data.get('amount', 0)))
             lot_id = request.data.get('lot_id')  # Optional
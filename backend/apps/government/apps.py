@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class GovernmentConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.government'
+
+    def ready(self):
+        import apps.government.signals
@@ -0,0 +1,29 @@
+"""
+Run queued export jobs and resume those whose worker stopped
+"""
+import json
+
+from django.core.management.base import BaseCommand
+
+from apps.government.services import run_export_job, runnable_jobs
+
+
+class Command(BaseCommand):
+    help = "Run pending export jobs and resume running ones past EXPORT_JOB_STALE_SECONDS without a checkpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--job', help="Run only this job id")
+        parser.add_argument('--retry-failed', action='store_true', help="Also resume failed jobs")
+
+    def handle(self, *args, **options):
+        if options['job']:
+            job_ids = [options['job']]
+        else:
+            job_ids = list(runnable_jobs(options['retry_failed']).values_list('id', flat=True))
+
+        results = []
+        for job_id in job_ids:
+            job = run_export_job(job_id, retry_failed=options['retry_failed'])
+            if job is not None:
+                results.append({'id': str(job.id), 'status': job.status, 'rows_written': job.rows_written})
+        self.stdout.write(json.dumps({'jobs': results}))
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.27 on 2026-10-19 10:43
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('dataset', models.CharField(max_length=50)),
+                ('export_format', models.CharField(choices=[('csv', 'CSV'), ('parquet', 'Parquet')], default='csv', max_length=10)),
+                ('filters', models.JSONField(default=dict, help_text='Query parameters of the JSON endpoint')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('cursor', models.TextField(blank=True, help_text='Keyset cursor after the last exported row')),
+                ('rows_written', models.BigIntegerField(default=0)),
+                ('bytes_written', models.BigIntegerField(default=0, help_text='CSV: file length at the checkpoint')),
+                ('parts_written', models.IntegerField(default=0, help_text='Parquet: row group files at the checkpoint')),
+                ('file_path', models.CharField(blank=True, max_length=500)),
+                ('error', models.TextField(blank=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('heartbeat_at', models.DateTimeField(blank=True, help_text='Last checkpoint of a running job', null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='export_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Export Job',
+                'verbose_name_plural': 'Export Jobs',
+                'db_table': 'export_jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['requested_by', 'created_at'], name='export_jobs_request_39ac29_idx'), models.Index(fields=['status', 'heartbeat_at'], name='export_jobs_status_7163e1_idx')],
+            },
+        ),
+    ]
@@ -7,3 +7,54 @@ from apps.core.constants import OILSEED_CHOICES, INDIAN_STATES
 # Note: For hackathon, we don't need persistent models for government stats
 # Stats will be calculated on-the-fly from existing data
 # This keeps the system simple and focused on functionality
+# ExportJob only tracks long-running exports of that data
+
+
+class ExportJob(TimeStampedModel):
+    """
+    Background CSV/Parquet export of a government dataset
+    Written a chunk at a time; cursor and the counters record the last
+    chunk safely on disk, so an interrupted job resumes from there.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    FORMAT_CHOICES = [('csv', 'CSV'), ('parquet', 'Parquet')]
+
+    requested_by = models.ForeignKey('users.User', on_delete=models.CASCADE, related_name='export_jobs')
+    dataset = models.CharField(max_length=50)
+    export_format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='csv')
+    filters = models.JSONField(default=dict, help_text="Query parameters of the JSON endpoint")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+
+    # Checkpoint after the last chunk written
+    cursor = models.TextField(blank=True, help_text="Keyset cursor after the last exported row")
+    rows_written = models.BigIntegerField(default=0)
+    bytes_written = models.BigIntegerField(default=0, help_text="CSV: file length at the checkpoint")
+    parts_written = models.IntegerField(default=0, help_text="Parquet: row group files at the checkpoint")
+
+    file_path = models.CharField(max_length=500, blank=True)
+    error = models.TextField(blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True, help_text="Last checkpoint of a running job")
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'export_jobs'
+        verbose_name = 'Export Job'
+        verbose_name_plural = 'Export Jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['requested_by', 'created_at']),
+            models.Index(fields=['status', 'heartbeat_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.dataset}.{self.export_format} ({self.status})"
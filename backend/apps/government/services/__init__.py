@@ -0,0 +1,13 @@
+# Services module
+from .map_tile_service import MAP_ENTITIES, MAP_TILE_TAG, entity_tile, tile_bounds, tile_tags, position_tags
+from .export_datasets import (
+    EXPORT_DATASETS, farmer_registry_queryset, procurement_lot_queryset, shipment_queryset, mandi_price_queryset
+)
+from .export_jobs import create_export_job, run_export_job, runnable_jobs, export_path
+
+__all__ = [
+    'MAP_ENTITIES', 'MAP_TILE_TAG', 'entity_tile', 'tile_bounds', 'tile_tags', 'position_tags',
+    'EXPORT_DATASETS', 'farmer_registry_queryset', 'procurement_lot_queryset', 'shipment_queryset',
+    'mandi_price_queryset',
+    'create_export_job', 'run_export_job', 'runnable_jobs', 'export_path',
+]
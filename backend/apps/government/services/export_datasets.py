@@ -0,0 +1,104 @@
+"""
+Government Export Datasets
+Registries and analytics behind the streaming exports and export jobs
+
+Each dataset's queryset applies the same filters as its JSON endpoint,
+from the same query parameters, without the endpoint's row cap:
+
+    farmer_registry   FarmerRegistryAPIView       state, district, kyc_status, crop_type
+    procurement_lots  ProcurementAnalyticsAPIView crop_type, state, days (30)
+    shipments         SupplyChainTrackingAPIView  status, crop_type
+    mandi_prices      /api/crops/prices/          crop_type, state, district, days (7)
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+
+from apps.core.services.export_service import ExportColumn, ExportDataset
+from apps.crops.services.price_history_service import price_rows
+from apps.farmers.models import FarmerProfile
+from apps.lots.models import ProcurementLot
+from apps.logistics.models import Shipment
+
+
+def _days(params, default):
+    try:
+        return int(params.get('days', default))
+    except (TypeError, ValueError):
+        raise ValueError("days must be an integer")
+
+
+def farmer_registry_queryset(params):
+    """Active farmers filtered like the farmer registry"""
+    filters = {'is_active': True}
+    if params.get('state'):
+        filters['state'] = params['state']
+    if params.get('district'):
+        filters['district__icontains'] = params['district']
+    if params.get('kyc_status'):
+        filters['kyc_status'] = params['kyc_status']
+
+    farmers = FarmerProfile.objects.filter(**filters)
+    if params.get('crop_type'):
+        farmers = farmers.filter(primary_crops__contains=[params['crop_type']])
+    return farmers
+
+
+def procurement_lot_queryset(params):
+    """Active lots created in the last `days`, filtered like procurement analytics"""
+    filters = {'is_active': True, 'created_at__gte': timezone.now() - timedelta(days=_days(params, 30))}
+    if params.get('crop_type'):
+        filters['crop_type'] = params['crop_type']
+    if params.get('state'):
+        filters['farmer__state'] = params['state']
+    return ProcurementLot.objects.filter(**filters)
+
+
+def shipment_queryset(params):
+    """Active shipments filtered like supply chain tracking"""
+    filters = {'is_active': True}
+    if params.get('status'):
+        filters['status'] = params['status']
+    if params.get('crop_type'):
+        filters['lot__crop_type'] = params['crop_type']
+    return Shipment.objects.filter(**filters)
+
+
+def mandi_price_queryset(params):
+    """Mandi prices of the last `days`, filtered like the mandi prices endpoint"""
+    return price_rows(
+        timezone.now().date() - timedelta(days=_days(params, 7)),
+        crop_type=params.get('crop_type'),
+        state=params.get('state'),
+        district=params.get('district'),
+        district_exact=False,
+    )
+
+
+def _columns(*sources):
+    """ExportColumns named after their source, 'user__phone_number' as 'user_phone_number'"""
+    return tuple(ExportColumn(source.replace('__', '_'), source) for source in sources)
+
+
+EXPORT_DATASETS = {
+    'farmer_registry': ExportDataset(farmer_registry_queryset, _columns(
+        'id', 'full_name', 'user__phone_number', 'village', 'district', 'state', 'total_land_acres',
+        'primary_crops', 'kyc_status', 'fpo__organization_name', 'farming_experience_years',
+        'total_lots_created', 'total_earnings', 'latitude', 'longitude', 'created_at',
+    ), ('id',)),
+    'procurement_lots': ExportDataset(procurement_lot_queryset, _columns(
+        'id', 'lot_number', 'crop_type', 'crop_variety', 'quantity_quintals', 'quality_grade',
+        'expected_price_per_quintal', 'final_price_per_quintal', 'status', 'listing_type',
+        'farmer_id', 'farmer__state', 'farmer__district', 'fpo_id', 'created_at', 'sold_date',
+    ), ('id',)),
+    'shipments': ExportDataset(shipment_queryset, _columns(
+        'id', 'lot_id', 'lot__lot_number', 'lot__crop_type', 'lot__quantity_quintals', 'status',
+        'logistics_partner__company_name', 'vehicle__vehicle_number', 'pickup_address',
+        'delivery_address', 'actual_pickup_date', 'actual_delivery_date', 'scheduled_delivery_date',
+        'current_location_latitude', 'current_location_longitude', 'last_ping_at',
+    ), ('id',)),
+    'mandi_prices': ExportDataset(mandi_price_queryset, _columns(
+        'id', 'date', 'crop_type', 'state', 'district', 'market_name', 'min_price', 'max_price',
+        'modal_price', 'arrival_quantity_quintals', 'source',
+    ), ('date', 'id')),
+}
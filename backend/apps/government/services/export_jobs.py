@@ -0,0 +1,201 @@
+"""
+Export Job Service
+Resumable background exports of the government datasets
+
+A job writes its file under EXPORT_ROOT a chunk at a time and checkpoints
+after every chunk: the keyset cursor, the rows written, and the CSV file
+length or the number of Parquet part files. A job whose worker died
+(running, but no checkpoint for EXPORT_JOB_STALE_SECONDS) or that failed is
+resumed from its checkpoint: whatever was written past it is discarded.
+
+Parquet cannot be appended to once closed, so a Parquet job writes each
+chunk as its own part file and merges the parts, one row group at a time,
+when the last chunk is in.
+
+Jobs run in a thread of the web process when EXPORT_JOBS_IN_PROCESS is set,
+and `manage.py run_export_jobs` (cron or a worker) picks up the rest.
+"""
+import logging
+import os
+import shutil
+import threading
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.core.services.export_service import (
+    EXPORT_FORMATS, arrow_schema, arrow_table, csv_header, csv_lines, iter_chunks, load_pyarrow
+)
+from apps.government.models import ExportJob
+from .export_datasets import EXPORT_DATASETS
+
+logger = logging.getLogger(__name__)
+
+
+def _dataset(name):
+    if name not in EXPORT_DATASETS:
+        raise ValueError(f"dataset must be one of: {', '.join(EXPORT_DATASETS)}")
+    return EXPORT_DATASETS[name]
+
+
+def create_export_job(user, dataset, export_format='csv', filters=None):
+    """
+    Queue an export of `dataset` with the JSON endpoint's `filters`
+    Raises ValueError for an unknown dataset or format, a bad filter, or a
+    Parquet export without pyarrow.
+    """
+    filters = {key: str(value) for key, value in (filters or {}).items()}
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Export format must be one of: {', '.join(EXPORT_FORMATS)}")
+    if export_format == 'parquet':
+        load_pyarrow()
+    # Fail bad filters now rather than in the background
+    _dataset(dataset).queryset(filters)
+
+    job = ExportJob.objects.create(
+        requested_by=user, dataset=dataset, export_format=export_format, filters=filters
+    )
+    if settings.EXPORT_JOBS_IN_PROCESS:
+        transaction.on_commit(lambda: start_export_job(job.id))
+    return job
+
+
+def start_export_job(job_id):
+    """Run a job in a daemon thread of this process"""
+    def _run():
+        try:
+            run_export_job(job_id)
+        finally:
+            close_old_connections()
+
+    threading.Thread(target=_run, name=f'export-job-{job_id}', daemon=True).start()
+
+
+def _runnable(retry_failed=False):
+    stale = timezone.now() - timedelta(seconds=settings.EXPORT_JOB_STALE_SECONDS)
+    runnable = Q(status=ExportJob.STATUS_PENDING) | Q(status=ExportJob.STATUS_RUNNING, heartbeat_at__lt=stale)
+    if retry_failed:
+        runnable |= Q(status=ExportJob.STATUS_FAILED)
+    return runnable
+
+
+def runnable_jobs(retry_failed=False):
+    """Pending jobs and running ones whose worker stopped checkpointing, oldest first"""
+    return ExportJob.objects.filter(_runnable(retry_failed)).order_by('created_at')
+
+
+def _claim(job_id, retry_failed=False):
+    """Mark the job running for this worker; None if another worker has it or it is done"""
+    now = timezone.now()
+    claimed = ExportJob.objects.filter(_runnable(retry_failed), pk=job_id).update(
+        status=ExportJob.STATUS_RUNNING, heartbeat_at=now, error='', updated_at=now
+    )
+    if not claimed:
+        return None
+    job = ExportJob.objects.get(pk=job_id)
+    if job.started_at is None:
+        job.started_at = now
+        job.save(update_fields=['started_at'])
+    return job
+
+
+def export_path(job):
+    """Final file of a job"""
+    return Path(settings.EXPORT_ROOT) / f'{job.dataset}-{job.id}.{job.export_format}'
+
+
+def _checkpoint(job, cursor, rows, **counters):
+    job.cursor = cursor
+    job.rows_written += rows
+    for name, value in counters.items():
+        setattr(job, name, value)
+    job.heartbeat_at = timezone.now()
+    job.save(update_fields=['cursor', 'rows_written', 'heartbeat_at', 'updated_at', *counters])
+
+
+def _write_csv(job, dataset, queryset, path):
+    if job.bytes_written and not path.exists():
+        # File lost since the checkpoint: start over
+        job.cursor, job.rows_written, job.bytes_written = '', 0, 0
+    with open(path, 'r+b' if path.exists() else 'wb') as handle:
+        # Drop anything written after the last checkpoint
+        handle.truncate(job.bytes_written)
+        handle.seek(job.bytes_written)
+
+        def write(data, cursor, rows):
+            handle.write(data)
+            handle.flush()
+            os.fsync(handle.fileno())
+            _checkpoint(job, cursor, rows, bytes_written=handle.tell())
+
+        if not job.bytes_written:
+            write(csv_header(dataset.columns), '', 0)
+        for rows, cursor in iter_chunks(queryset, dataset.columns, dataset.ordering, job.cursor or None):
+            write(csv_lines(rows), cursor, len(rows))
+
+
+def _part_files(parts):
+    """{index: path} of the part files in a Parquet job's parts directory, ignoring anything else"""
+    return {int(part.stem): part for part in parts.glob('[0-9]*.parquet') if part.stem.isdigit()}
+
+
+def _write_parquet(job, dataset, queryset, path):
+    pq = load_pyarrow().parquet
+    parts = Path(f'{path}.parts')
+    parts.mkdir(exist_ok=True)
+    for index, part in _part_files(parts).items():
+        # Parts past the checkpoint were written by a worker that died
+        if index >= job.parts_written:
+            part.unlink()
+    if set(_part_files(parts)) != set(range(job.parts_written)):
+        job.cursor, job.rows_written, job.parts_written = '', 0, 0
+        for part in _part_files(parts).values():
+            part.unlink()
+
+    schema, converters = arrow_schema(queryset.model, dataset.columns)
+    for rows, cursor in iter_chunks(queryset, dataset.columns, dataset.ordering, job.cursor or None):
+        pq.write_table(arrow_table(rows, schema, converters), parts / f'{job.parts_written:06d}.parquet')
+        _checkpoint(job, cursor, len(rows), parts_written=job.parts_written + 1)
+
+    # One part in memory at a time
+    with pq.ParquetWriter(path, schema) as writer:
+        for index in range(job.parts_written):
+            writer.write_table(pq.read_table(parts / f'{index:06d}.parquet', schema=schema))
+    shutil.rmtree(parts)
+
+
+def run_export_job(job_id, retry_failed=False):
+    """
+    Run or resume one job to completion in this thread
+    Returns the job, or None when it is not runnable (done, or another
+    worker holds it).
+    """
+    job = _claim(job_id, retry_failed)
+    if job is None:
+        return None
+
+    path = export_path(job)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        dataset = _dataset(job.dataset)
+        queryset = dataset.queryset(job.filters)
+        if job.export_format == 'parquet':
+            _write_parquet(job, dataset, queryset, path)
+        else:
+            _write_csv(job, dataset, queryset, path)
+    except Exception as e:
+        logger.exception(f"Export job {job.id} failed")
+        job.status, job.error = ExportJob.STATUS_FAILED, str(e)
+        job.save(update_fields=['status', 'error', 'updated_at'])
+        return job
+
+    job.status = ExportJob.STATUS_COMPLETED
+    job.file_path = str(path)
+    job.completed_at = timezone.now()
+    job.save(update_fields=['status', 'file_path', 'completed_at', 'updated_at'])
+    logger.info(f"Export job {job.id}: {job.rows_written} {job.dataset} rows written to {path}")
+    return job
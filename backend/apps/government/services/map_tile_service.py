@@ -0,0 +1,183 @@
+"""
+Entity Map Tile Service
+Clustered FPO, processor and farmer markers per Web Mercator (slippy map) tile
+
+A tile z/x/y is split into a MAP_TILE_GRID x MAP_TILE_GRID grid. Each
+entity table is grouped by grid cell in SQL, one bounding-box query on the
+(latitude, longitude) index per table, so a tile costs one pass over the
+entities inside it and the payload is at most grid² clusters whatever the
+number of farmers. From MAP_TILE_POINT_ZOOM on, a tile with at most
+MAP_TILE_MAX_POINTS entities returns the individual markers instead.
+
+Cells are equal in degrees within a tile; a cluster sits at the mean
+position of its entities, not at the cell centre.
+
+Cached tiles are tagged with their ancestor at MAP_TILE_TAG_ZOOM (or
+themselves, above it). A moved marker invalidates the tags of its old and
+new positions only, so the rest of the map stays cached.
+"""
+import math
+from collections import namedtuple
+
+from django.apps import apps
+from django.conf import settings
+from django.db.models import Avg, Count, F, FloatField, Value
+from django.db.models.functions import Cast, Floor
+
+# Prefix of the tiles' response cache tags; see tile_tags() and apps.government.signals
+MAP_TILE_TAG = 'entity_map'
+
+# Web Mercator stops here; tile y=0 starts at this latitude
+MAX_LATITUDE = 85.0511287798
+
+# model: app label path; name: the field shown as the marker label
+MapEntity = namedtuple('MapEntity', ['model', 'name'])
+
+MAP_ENTITIES = {
+    'fpo': MapEntity('fpos.FPOProfile', 'organization_name'),
+    'processor': MapEntity('processors.ProcessorProfile', 'company_name'),
+    'farmer': MapEntity('farmers.FarmerProfile', 'full_name'),
+}
+
+
+def tile_bounds(z, x, y):
+    """(west, south, east, north) in degrees of tile z/x/y; ValueError if it does not exist"""
+    if not 0 <= z <= settings.MAP_TILE_MAX_ZOOM:
+        raise ValueError(f"Zoom must be between 0 and {settings.MAP_TILE_MAX_ZOOM}")
+    n = 2 ** z
+    if not (0 <= x < n and 0 <= y < n):
+        raise ValueError(f"Tile {z}/{x}/{y} does not exist")
+
+    def latitude(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return x / n * 360 - 180, latitude(y + 1), (x + 1) / n * 360 - 180, latitude(y)
+
+
+def _tile_of(latitude, longitude, z):
+    """x, y of the zoom z tile holding a position"""
+    n = 2 ** z
+    latitude = math.radians(max(-MAX_LATITUDE, min(MAX_LATITUDE, float(latitude))))
+    x = int((float(longitude) + 180) / 360 * n)
+    y = int((1 - math.asinh(math.tan(latitude)) / math.pi) / 2 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_tags(z, x, y):
+    """Cache tag of tile z/x/y: its ancestor at MAP_TILE_TAG_ZOOM, or itself above that zoom"""
+    tag_zoom = min(z, settings.MAP_TILE_TAG_ZOOM)
+    shift = z - tag_zoom
+    return [f'{MAP_TILE_TAG}:{tag_zoom}/{x >> shift}/{y >> shift}']
+
+
+def position_tags(latitude, longitude):
+    """Tags of every cached tile that can show a marker at this position"""
+    tags = []
+    for z in range(settings.MAP_TILE_TAG_ZOOM + 1):
+        x, y = _tile_of(latitude, longitude, z)
+        tags.append(f'{MAP_TILE_TAG}:{z}/{x}/{y}')
+    return tags
+
+
+def _in_tile(queryset, bounds):
+    """Entities with coordinates inside bounds; (0, 0) is an unset location"""
+    west, south, east, north = bounds
+    # Half-open boxes, so an entity on a tile edge lands in exactly one tile
+    queryset = queryset.filter(
+        latitude__gte=south, latitude__lt=north,
+        longitude__gte=west, longitude__lt=east,
+    )
+    if south <= 0 < north and west <= 0 < east:
+        queryset = queryset.exclude(latitude=0, longitude=0)
+    return queryset
+
+
+def _cells(queryset, bounds, grid):
+    """(row, col), count, mean latitude, mean longitude per occupied cell of one entity table"""
+    west, south, east, north = bounds
+    latitude = Cast('latitude', FloatField())
+    longitude = Cast('longitude', FloatField())
+    rows = queryset.values(
+        row=Floor((latitude - south) / ((north - south) / grid)),
+        col=Floor((longitude - west) / ((east - west) / grid)),
+    ).annotate(
+        # COUNT(*) rather than of a column keeps the query on the (latitude, longitude) index
+        count=Count('*'), lat=Avg(latitude), lng=Avg(longitude),
+    ).order_by()
+    for row in rows:
+        # Float rounding can put an entity just below the north/east edge one cell out
+        cell = min(int(row['row']), grid - 1), min(int(row['col']), grid - 1)
+        yield cell, row['count'], row['lat'], row['lng']
+
+
+def _clusters(querysets, bounds, grid):
+    """Per-type cell counts merged into one cluster per occupied cell"""
+    merged = {}
+    for entity_type, queryset in querysets.items():
+        for cell, count, lat, lng in _cells(queryset, bounds, grid):
+            cluster = merged.setdefault(cell, {
+                'latitude': 0.0, 'longitude': 0.0, 'count': 0,
+                'counts': dict.fromkeys(MAP_ENTITIES, 0),
+            })
+            cluster['count'] += count
+            cluster['counts'][entity_type] += count
+            # Sums for now; divided by the count below
+            cluster['latitude'] += lat * count
+            cluster['longitude'] += lng * count
+
+    clusters = []
+    for (row, col), cluster in sorted(merged.items()):
+        cluster['latitude'] = round(cluster['latitude'] / cluster['count'], 6)
+        cluster['longitude'] = round(cluster['longitude'] / cluster['count'], 6)
+        cluster['cell'] = [row, col]
+        clusters.append(cluster)
+    return clusters
+
+
+def _points(querysets):
+    """Individual markers of every queryset"""
+    points = []
+    for entity_type, queryset in querysets.items():
+        points.extend(queryset.values(
+            'id', 'latitude', 'longitude',
+            entity_type=Value(entity_type), name=F(MAP_ENTITIES[entity_type].name),
+        ).order_by())
+    return points
+
+
+def entity_tile(z, x, y, types=None):
+    """
+    Markers of tile z/x/y
+    types: entity types to include, default all. Returns {'tile', 'summary',
+    'clusters', 'points'}: clusters below MAP_TILE_POINT_ZOOM (or when the
+    tile holds too many entities), else points. Raises ValueError for a
+    tile outside the zoom range or an unknown type.
+    """
+    bounds = tile_bounds(z, x, y)
+    types = list(types or MAP_ENTITIES)
+    unknown = [entity_type for entity_type in types if entity_type not in MAP_ENTITIES]
+    if unknown:
+        raise ValueError(f"Unknown entity type: {', '.join(unknown)}")
+
+    querysets = {
+        entity_type: _in_tile(apps.get_model(MAP_ENTITIES[entity_type].model).objects.all(), bounds)
+        for entity_type in types
+    }
+    clusters = _clusters(querysets, bounds, settings.MAP_TILE_GRID)
+    summary = dict.fromkeys(types, 0)
+    for cluster in clusters:
+        for entity_type in types:
+            summary[entity_type] += cluster['counts'][entity_type]
+    total = sum(summary.values())
+
+    points = []
+    if z >= settings.MAP_TILE_POINT_ZOOM and total <= settings.MAP_TILE_MAX_POINTS:
+        points, clusters = _points(querysets), []
+
+    west, south, east, north = bounds
+    return {
+        'tile': {'z': z, 'x': x, 'y': y, 'bounds': [west, south, east, north]},
+        'summary': dict(summary, total=total),
+        'clusters': clusters,
+        'points': points,
+    }
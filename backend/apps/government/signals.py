@@ -0,0 +1,61 @@
+"""
+Government Signals
+Drop cached entity map tiles when a marker moves, appears, disappears or is renamed
+"""
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from apps.core.cache import invalidate_tags
+from .services.map_tile_service import MAP_ENTITIES, position_tags
+
+
+def _marker(instance, name_field):
+    """What the map shows of a profile; None when it has no location"""
+    if instance.latitude is None or instance.longitude is None:
+        return None
+    return instance.latitude, instance.longitude, getattr(instance, name_field)
+
+
+def _invalidate(*markers):
+    """Drop the cached tiles showing any of these markers, once the write commits"""
+    tags = sorted({tag for marker in markers if marker is not None for tag in position_tags(*marker[:2])})
+    transaction.on_commit(lambda: invalidate_tags(*tags))
+
+
+def _connect(entity_type, entity):
+    model = apps.get_model(entity.model)
+    fields = {'latitude', 'longitude', entity.name}
+    uid = f'entity_map:{entity_type}'
+
+    def remember_marker(sender, instance, update_fields=None, **kwargs):
+        # Saves of stats and other fields leave the map alone: compare with the stored row
+        instance._map_marker_changed = False
+        instance._map_marker_previous = None
+        if update_fields is not None and not fields & set(update_fields):
+            return
+        old = None
+        if not instance._state.adding:
+            stored = sender.objects.filter(pk=instance.pk).values_list('latitude', 'longitude', entity.name).first()
+            if stored is not None and None not in stored[:2]:
+                old = stored
+        instance._map_marker_changed = old != _marker(instance, entity.name)
+        instance._map_marker_previous = old
+
+    def marker_saved(sender, instance, **kwargs):
+        if getattr(instance, '_map_marker_changed', False):
+            # Both the tiles it left and the ones it moved into
+            _invalidate(instance._map_marker_previous, _marker(instance, entity.name))
+
+    def marker_deleted(sender, instance, **kwargs):
+        marker = _marker(instance, entity.name)
+        if marker is not None:
+            _invalidate(marker)
+
+    pre_save.connect(remember_marker, sender=model, weak=False, dispatch_uid=f'{uid}:pre_save')
+    post_save.connect(marker_saved, sender=model, weak=False, dispatch_uid=f'{uid}:save')
+    post_delete.connect(marker_deleted, sender=model, weak=False, dispatch_uid=f'{uid}:delete')
+
+
+for _entity_type, _entity in MAP_ENTITIES.items():
+    _connect(_entity_type, _entity)
@@ -1,3 +1,132 @@
-from django.test import TestCase
+import csv
+import shutil
+import tempfile
+import unittest
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase
+
+from apps.farmers.models import FarmerProfile
+from apps.users.models import User
+from .models import ExportJob
+from .services import export_jobs, position_tags
+from .services.export_jobs import create_export_job, export_path, run_export_job
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+
+class ExportJobResumeTests(TestCase):
+    """A job that dies between writing a chunk and checkpointing it resumes without duplicate rows"""
+
+    def setUp(self):
+        self.export_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.export_root, ignore_errors=True)
+        settings = override_settings(EXPORT_ROOT=self.export_root, EXPORT_CHUNK_SIZE=2, EXPORT_JOBS_IN_PROCESS=False)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.user = User.objects.create_user('9000000601', 'government')
+        self.farmer_ids = {
+            str(FarmerProfile.objects.create(
+                user=User.objects.create_user(f'90000006{index + 10:02d}', 'farmer'), full_name=f'Export Farmer {index}',
+                total_land_acres=Decimal('2.5'), farming_experience_years=5, district='Indore', state='madhya_pradesh',
+            ).id)
+            for index in range(7)
+        }
+
+    def _run_until_checkpoint(self, job, failing_call):
+        """Run the job, making checkpoint number `failing_call` die after its chunk is on disk"""
+        checkpoint = export_jobs._checkpoint
+        calls = []
+
+        def dying_checkpoint(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == failing_call:
+                raise RuntimeError("worker died")
+            return checkpoint(*args, **kwargs)
+
+        with mock.patch.object(export_jobs, '_checkpoint', side_effect=dying_checkpoint):
+            job = run_export_job(job.id)
+        self.assertEqual(job.status, ExportJob.STATUS_FAILED)
+        return job
+
+    def test_csv_job_resumes_from_its_checkpoint(self):
+        job = create_export_job(self.user, 'farmer_registry', 'csv')
+        # Checkpoint 1 is the header; 2 and 3 cover chunks of two rows
+        job = self._run_until_checkpoint(job, failing_call=4)
+        self.assertEqual(job.rows_written, 4)
+
+        job = run_export_job(job.id, retry_failed=True)
+
+        self.assertEqual(job.status, ExportJob.STATUS_COMPLETED)
+        with open(export_path(job), newline='', encoding='utf-8') as handle:
+            ids = [row['id'] for row in csv.DictReader(handle)]
+        self.assertEqual(len(ids), len(self.farmer_ids))
+        self.assertEqual(set(ids), self.farmer_ids)
+        self.assertEqual(job.rows_written, len(self.farmer_ids))
+
+    @unittest.skipIf(pq is None, "pyarrow is not installed")
+    def test_parquet_job_resumes_and_ignores_stray_files(self):
+        job = create_export_job(self.user, 'farmer_registry', 'parquet')
+        job = self._run_until_checkpoint(job, failing_call=2)
+        self.assertEqual((job.rows_written, job.parts_written), (2, 1))
+        parts = export_path(job).with_name(f'{export_path(job).name}.parts')
+        self.assertTrue((parts / '000001.parquet').exists())
+        (parts / '.DS_Store').write_bytes(b'')
+        (parts / '000002.parquet.tmp').write_bytes(b'half a part')
+
+        job = run_export_job(job.id, retry_failed=True)
+
+        self.assertEqual(job.status, ExportJob.STATUS_COMPLETED)
+        ids = [str(value) for value in pq.read_table(export_path(job)).column('id').to_pylist()]
+        self.assertEqual(len(ids), len(self.farmer_ids))
+        self.assertEqual(set(ids), self.farmer_ids)
+        self.assertFalse(parts.exists())
+
+
+@override_settings(
+    MAP_TILE_MAX_ZOOM=18, MAP_TILE_TAG_ZOOM=6,
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'map-tile-tests'}},
+)
+class EntityMapTileTests(APITestCase):
+    """Moving a marker drops the tiles it left and entered; tiles that do not exist are a 400"""
+
+    def setUp(self):
+        self.farmer = FarmerProfile.objects.create(
+            user=User.objects.create_user('9000000701', 'farmer'), full_name='Map Farmer',
+            total_land_acres=Decimal('2.5'), farming_experience_years=5, district='Indore', state='madhya_pradesh',
+            latitude=Decimal('22.719600'), longitude=Decimal('75.857700'),
+        )
+
+    def _invalidated(self, **changes):
+        for field, value in changes.items():
+            setattr(self.farmer, field, value)
+        with mock.patch('apps.government.signals.invalidate_tags') as invalidate:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.farmer.save()
+        return {tag for call in invalidate.call_args_list for tag in call.args}
+
+    def test_moving_an_entity_invalidates_its_old_and_new_tiles(self):
+        old_tags = set(position_tags(Decimal('22.719600'), Decimal('75.857700')))
+        new_tags = set(position_tags(Decimal('28.613900'), Decimal('77.209000')))
+        self.assertTrue(old_tags - new_tags and new_tags - old_tags)
+
+        tags = self._invalidated(latitude=Decimal('28.613900'), longitude=Decimal('77.209000'))
+
+        self.assertEqual(tags, old_tags | new_tags)
+
+    def test_saves_that_leave_the_marker_alone_invalidate_nothing(self):
+        self.assertEqual(self._invalidated(farming_experience_years=6), set())
+
+    def test_tiles_outside_the_pyramid_are_a_400(self):
+        self.client.force_authenticate(User.objects.create_user('9000000702', 'government'))
+        self.assertEqual(self.client.get('/api/government/entity-map/2/1/1/').status_code, 200)
+        for z, x, y in [(19, 0, 0), (2, 4, 0), (2, 0, 4), (0, 1, 0)]:
+            with self.subTest(tile=f'{z}/{x}/{y}'):
+                response = self.client.get(f'/api/government/entity-map/{z}/{x}/{y}/')
+                self.assertEqual(response.status_code, 400)
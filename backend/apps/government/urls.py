@@ -14,6 +14,11 @@ from .views import (
     ProcurementAnalyticsAPIView,
     MarketPricesAnalyticsAPIView,
     EntityLocationsAPIView,
+    EntityMapTileAPIView,
+    DatasetExportAPIView,
+    ExportJobListCreateAPIView,
+    ExportJobDetailAPIView,
+    ExportJobDownloadAPIView,
 )
 
 app_name = 'government'
@@ -23,6 +28,7 @@ urlpatterns = [
     path('dashboard/', NationalDashboardAPIView.as_view(), name='national-dashboard'),
     path('heatmap/', StateHeatmapAPIView.as_view(), name='state-heatmap'),
     path('entity-locations/', EntityLocationsAPIView.as_view(), name='entity-locations'),
+    path('entity-map/<int:z>/<int:x>/<int:y>/', EntityMapTileAPIView.as_view(), name='entity-map-tile'),
     
     # Monitoring & Analytics
     path('fpo-monitoring/', FPOMonitoringAPIView.as_view(), name='fpo-monitoring'),
@@ -35,6 +41,12 @@ urlpatterns = [
     path('procurement-analytics/', ProcurementAnalyticsAPIView.as_view(), name='procurement-analytics'),
     path('market-prices/', MarketPricesAnalyticsAPIView.as_view(), name='market-prices'),
     
+    # CSV/Parquet Exports
+    path('exports/<str:dataset>/', DatasetExportAPIView.as_view(), name='dataset-export'),
+    path('export-jobs/', ExportJobListCreateAPIView.as_view(), name='export-jobs'),
+    path('export-jobs/<uuid:job_id>/', ExportJobDetailAPIView.as_view(), name='export-job-detail'),
+    path('export-jobs/<uuid:job_id>/download/', ExportJobDownloadAPIView.as_view(), name='export-job-download'),
+    
     # Approvals
     path('approval-queue/', ApprovalQueueAPIView.as_view(), name='approval-queue'),
     path('approve/<uuid:user_id>/', ApproveRegistrationAPIView.as_view(), name='approve-registration'),
@@ -2,14 +2,19 @@
 Enhanced Government Dashboard Views
 National analytics, monitoring, approvals
 """
+from asgiref.sync import sync_to_async
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Sum, Count, Avg, Q, F
+from django.db.models import Sum, Count, Avg, Q, F, Value
+from django.http import FileResponse, StreamingHttpResponse
 from django.utils import timezone
 from datetime import timedelta
 from apps.core.utils import response_success, response_error
 from apps.core.permissions import IsGovernment
+from apps.core.db_router import ReplicaReadMixin, read_from_replica
+from apps.core.cache import cache_response
+from apps.core.services.export_service import EXPORT_FORMATS, export_blocks
 from apps.farmers.models import FarmerProfile
 from apps.fpos.models import FPOProfile, FPOMembership
 from apps.lots.models import ProcurementLot
@@ -18,6 +23,8 @@ from apps.payments.models import Payment
 from apps.users.models import User
 from apps.processors.models import ProcessorProfile
 from apps.retailers.models import RetailerProfile
+from .models import ExportJob
+from .services import EXPORT_DATASETS, create_export_job, entity_tile, export_path, tile_tags
 
 # Import extended views
 from .views_extended import (
@@ -30,7 +37,7 @@ from .views_extended import (
 )
 
 
-class NationalDashboardAPIView(APIView):
+class NationalDashboardAPIView(ReplicaReadMixin, APIView):
     """
     National dashboard with key metrics for government officials
     Shows overall platform statistics and trends
@@ -156,7 +163,7 @@ class NationalDashboardAPIView(APIView):
         )
 
 
-class StateHeatmapAPIView(APIView):
+class StateHeatmapAPIView(ReplicaReadMixin, APIView):
     """
     State-wise production heatmap data
     Returns GeoJSON format for map visualization
@@ -203,7 +210,7 @@ class StateHeatmapAPIView(APIView):
         )
 
 
-class FPOMonitoringAPIView(APIView):
+class FPOMonitoringAPIView(ReplicaReadMixin, APIView):
     """
     FPO monitoring and health scoring
     Shows FPO performance metrics
@@ -455,10 +462,22 @@ class RejectRegistrationAPIView(APIView):
         )
 
 
-class EntityLocationsAPIView(APIView):
+def _located(manager):
+    """Profiles with map coordinates (0, 0 is an unset location)"""
+    return manager.filter(
+        latitude__isnull=False,
+        longitude__isnull=False
+    ).exclude(
+        latitude=0,
+        longitude=0
+    )
+
+
+class EntityLocationsAPIView(ReplicaReadMixin, APIView):
     """
     Get all entity locations (FPOs, Processors, Farmers) with lat/long coordinates
     Returns color-coded markers for map visualization
+    Every marker in one response; large maps should use EntityMapTileAPIView
     """
     permission_classes = [IsAuthenticated, IsGovernment]
     
@@ -468,95 +487,30 @@ class EntityLocationsAPIView(APIView):
         Returns: List of locations with entity_type, name, coordinates, and metadata
         """
         try:
-            locations = []
-            
-            # Fetch FPO locations (all FPOs with coordinates)
-            try:
-                fpo_profiles = FPOProfile.objects.filter(
-                    latitude__isnull=False,
-                    longitude__isnull=False
-                ).exclude(
-                    latitude=0,
-                    longitude=0
-                ).select_related('user')
-                
-                for fpo in fpo_profiles:
-                    locations.append({
-                        'id': str(fpo.id),
-                        'entity_type': 'fpo',
-                        'name': fpo.organization_name,
-                        'latitude': float(fpo.latitude),
-                        'longitude': float(fpo.longitude),
-                        'city': fpo.city or '',
-                        'state': fpo.state or '',
-                        'district': fpo.district or '',
-                        'is_verified': fpo.is_verified if hasattr(fpo, 'is_verified') else False,
-                        'total_members': fpo.total_members if hasattr(fpo, 'total_members') else 0,
-                        'contact_person': fpo.contact_person_name if hasattr(fpo, 'contact_person_name') else '',
-                        'phone': fpo.contact_person_phone if hasattr(fpo, 'contact_person_phone') else '',
-                    })
-            except Exception as e:
-                print(f"Error fetching FPO locations: {str(e)}")
-            
-            # Fetch Processor locations (all processors with coordinates)
-            try:
-                processor_profiles = ProcessorProfile.objects.filter(
-                    latitude__isnull=False,
-                    longitude__isnull=False
-                ).exclude(
-                    latitude=0,
-                    longitude=0
-                ).select_related('user')
-                
-                for processor in processor_profiles:
-                    locations.append({
-                        'id': str(processor.id),
-                        'entity_type': 'processor',
-                        'name': processor.company_name,
-                        'latitude': float(processor.latitude),
-                        'longitude': float(processor.longitude),
-                        'city': processor.city or '',
-                        'state': processor.state or '',
-                        'is_verified': processor.is_verified,
-                        'processing_capacity': float(processor.processing_capacity_quintals_per_day) if processor.processing_capacity_quintals_per_day else None,
-                        'contact_person': processor.contact_person or '',
-                        'phone': processor.phone or '',
-                    })
-            except Exception as e:
-                print(f"Error fetching Processor locations: {str(e)}")
-            
-            # Fetch Farmer locations (all farmers with coordinates)
-            try:
-                farmer_profiles = FarmerProfile.objects.filter(
-                    latitude__isnull=False,
-                    longitude__isnull=False
-                ).exclude(
-                    latitude=0,
-                    longitude=0
-                ).select_related('user')
-                
-                for farmer in farmer_profiles:
-                    locations.append({
-                        'id': str(farmer.id),
-                        'entity_type': 'farmer',
-                        'name': farmer.user.full_name or farmer.user.phone_number,
-                        'latitude': float(farmer.latitude),
-                        'longitude': float(farmer.longitude),
-                        'village': farmer.village or '',
-                        'district': farmer.district or '',
-                        'state': farmer.state or '',
-                        'total_land': float(farmer.total_land_acres) if farmer.total_land_acres else None,
-                        'kyc_status': farmer.kyc_status or 'pending',
-                    })
-            except Exception as e:
-                print(f"Error fetching Farmer locations: {str(e)}")
+            # Rows go to the renderer as read: Decimal coordinates and UUID ids
+            # are serialized there, not converted value by value here
+            fpos = list(_located(FPOProfile.objects).values(
+                'id', 'latitude', 'longitude', 'district', 'state', 'is_verified', 'total_members',
+                entity_type=Value('fpo'), name=F('organization_name'), city=Value(''),
+                contact_person=F('contact_person_name'), phone=F('user__phone_number'),
+            ))
+            processors = list(_located(ProcessorProfile.objects).values(
+                'id', 'latitude', 'longitude', 'city', 'state', 'is_verified', 'contact_person', 'phone',
+                entity_type=Value('processor'), name=F('company_name'),
+                processing_capacity=F('processing_capacity_quintals_per_day'),
+            ))
+            farmers = list(_located(FarmerProfile.objects).values(
+                'id', 'latitude', 'longitude', 'village', 'district', 'state', 'kyc_status',
+                entity_type=Value('farmer'), name=F('full_name'), total_land=F('total_land_acres'),
+            ))
+            locations = fpos + processors + farmers
             
             # Summary statistics
             summary = {
                 'total_locations': len(locations),
-                'fpo_count': len([l for l in locations if l['entity_type'] == 'fpo']),
-                'processor_count': len([l for l in locations if l['entity_type'] == 'processor']),
-                'farmer_count': len([l for l in locations if l['entity_type'] == 'farmer']),
+                'fpo_count': len(fpos),
+                'processor_count': len(processors),
+                'farmer_count': len(farmers),
             }
             
             return Response(
@@ -573,3 +527,193 @@ class EntityLocationsAPIView(APIView):
                 response_error(message=f"Error fetching entity locations: {str(e)}"),
                 status=500
             )
+
+
+class EntityMapTileAPIView(ReplicaReadMixin, APIView):
+    """
+    Clustered entity markers for one map tile
+    GET /api/government/entity-map/{z}/{x}/{y}/?types=fpo,processor,farmer
+    Grid clusters with counts per entity type at low zoom, individual
+    markers from MAP_TILE_POINT_ZOOM on. Tiles are cached until a profile
+    inside their MAP_TILE_TAG_ZOOM ancestor moves, appears or goes.
+    """
+    permission_classes = [IsAuthenticated, IsGovernment]
+    
+    @cache_response(ttl=600, stale_ttl=3600, vary_on=['types'], tags=tile_tags)
+    def get(self, request, z, x, y):
+        types = [name.strip() for name in request.query_params.get('types', '').split(',') if name.strip()]
+        try:
+            tile = entity_tile(z, x, y, types or None)
+        except ValueError as e:
+            return Response(response_error(message=str(e)), status=400)
+        
+        return Response(
+            response_success(
+                message="Map tile fetched successfully",
+                data=tile
+            )
+        )
+
+
+def _next_export_block(blocks):
+    """Next non-empty block of an export, or None once it is done"""
+    # The response is read after the view returns, outside ReplicaReadMixin
+    with read_from_replica():
+        for data, _cursor in blocks:
+            if data:
+                return data
+    return None
+
+
+def _sync_export(blocks):
+    while True:
+        data = _next_export_block(blocks)
+        if data is None:
+            return
+        yield data
+
+
+async def _async_export(blocks):
+    # Each chunk is read in the sync thread, so the event loop never waits on the database
+    next_block = sync_to_async(_next_export_block)
+    while True:
+        data = await next_block(blocks)
+        if data is None:
+            return
+        yield data
+
+
+class DatasetExportAPIView(APIView):
+    """
+    Full export of a registry or analytics dataset
+    GET /api/government/exports/{dataset}/?output=csv|parquet&<filters>
+    Datasets: farmer_registry, procurement_lots, shipments, mandi_prices,
+    with the filters of their JSON endpoints but no row cap. Streams in
+    keyset chunks from the replica; Parquet needs pyarrow.
+    """
+    permission_classes = [IsAuthenticated, IsGovernment]
+    
+    def get(self, request, dataset):
+        if dataset not in EXPORT_DATASETS:
+            return Response(
+                response_error(message=f"dataset must be one of: {', '.join(EXPORT_DATASETS)}"),
+                status=404
+            )
+        export_format = request.query_params.get('output', 'csv')
+        try:
+            blocks = export_blocks(EXPORT_DATASETS[dataset], request.query_params, export_format)
+        except ValueError as e:
+            return Response(response_error(message=str(e)), status=400)
+        
+        # ASGIRequest carries the ASGI scope; stream natively there, from a thread under WSGI
+        stream = _async_export if hasattr(request, 'scope') else _sync_export
+        filename = f"{dataset}_{timezone.now().strftime('%Y%m%d_%H%M')}.{export_format}"
+        response = StreamingHttpResponse(stream(blocks), content_type=EXPORT_FORMATS[export_format])
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response['X-Accel-Buffering'] = 'no'  # nginx: pass chunks through as they are written
+        return response
+
+
+def _export_job_data(request, job):
+    data = {
+        'id': str(job.id),
+        'dataset': job.dataset,
+        'format': job.export_format,
+        'filters': job.filters,
+        'status': job.status,
+        'rows_written': job.rows_written,
+        'error': job.error,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'completed_at': job.completed_at,
+        'download_url': None,
+    }
+    if job.status == ExportJob.STATUS_COMPLETED:
+        data['download_url'] = request.build_absolute_uri(f'/api/government/export-jobs/{job.id}/download/')
+    return data
+
+
+class ExportJobListCreateAPIView(APIView):
+    """
+    Background exports, resumable if the worker stops
+    GET /api/government/export-jobs/ - your export jobs
+    POST /api/government/export-jobs/ {"dataset", "format", "filters"} - queue one
+    """
+    permission_classes = [IsAuthenticated, IsGovernment]
+    
+    def get(self, request):
+        jobs = ExportJob.objects.filter(requested_by=request.user)[:50]
+        return Response(
+            response_success(
+                message="Export jobs fetched successfully",
+                data=[_export_job_data(request, job) for job in jobs]
+            )
+        )
+    
+    def post(self, request):
+        filters = request.data.get('filters') or {}
+        if not isinstance(filters, dict):
+            return Response(response_error(message="filters must be an object"), status=400)
+        try:
+            job = create_export_job(
+                request.user,
+                request.data.get('dataset'),
+                request.data.get('format', 'csv'),
+                filters,
+            )
+        except ValueError as e:
+            return Response(response_error(message=str(e)), status=400)
+        
+        return Response(
+            response_success(
+                message="Export job queued",
+                data=_export_job_data(request, job)
+            ),
+            status=202
+        )
+
+
+class ExportJobDetailAPIView(APIView):
+    """
+    Progress of one of your export jobs
+    GET /api/government/export-jobs/{job_id}/
+    """
+    permission_classes = [IsAuthenticated, IsGovernment]
+    
+    def get(self, request, job_id):
+        job = ExportJob.objects.filter(pk=job_id, requested_by=request.user).first()
+        if job is None:
+            return Response(response_error(message="Export job not found"), status=404)
+        
+        return Response(
+            response_success(
+                message="Export job fetched successfully",
+                data=_export_job_data(request, job)
+            )
+        )
+
+
+class ExportJobDownloadAPIView(APIView):
+    """
+    File of a completed export job
+    GET /api/government/export-jobs/{job_id}/download/
+    """
+    permission_classes = [IsAuthenticated, IsGovernment]
+    
+    def get(self, request, job_id):
+        job = ExportJob.objects.filter(pk=job_id, requested_by=request.user).first()
+        if job is None:
+            return Response(response_error(message="Export job not found"), status=404)
+        if job.status != ExportJob.STATUS_COMPLETED:
+            return Response(response_error(message=f"Export job is {job.status}"), status=409)
+        path = export_path(job)
+        if not path.exists():
+            return Response(response_error(message="Export file is no longer available"), status=410)
+        
+        created = job.created_at.strftime('%Y%m%d_%H%M')
+        return FileResponse(
+            open(path, 'rb'),
+            as_attachment=True,
+            filename=f'{job.dataset}_{created}.{job.export_format}',
+            content_type=EXPORT_FORMATS[job.export_format],
+        )
@@ -2,6 +2,7 @@
 Extended Government Dashboard Views
 Additional analytics and monitoring endpoints
 """
+from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
@@ -9,63 +10,39 @@ from django.db.models import Sum, Count, Avg, Q, F, Min, Max
 from django.utils import timezone
 from datetime import timedelta
 from apps.core.utils import response_success, response_error
-from apps.farmers.models import FarmerProfile
+from apps.core.db_router import ReplicaReadMixin
 from apps.fpos.models import FPOProfile
-from apps.lots.models import ProcurementLot
 from apps.bids.models import Bid
 from apps.payments.models import Payment
 from apps.processors.models import ProcessorProfile, ProcessingBatch
 from apps.retailers.models import RetailerProfile
 from apps.logistics.models import Shipment
-from apps.crops.models import MandiPrice, MSPRecord
+from apps.logistics.services import load_tracks
+from apps.logistics.services.telemetry_service import POINT_FORMAT
+from apps.crops.models import MSPRecord
+from apps.crops.services.price_history_service import (
+    active_market_counts, daily_summaries, grouped_stats, window_stats
+)
+from .services import farmer_registry_queryset, procurement_lot_queryset, shipment_queryset
 
 
-class FarmerRegistryAPIView(APIView):
+class FarmerRegistryAPIView(ReplicaReadMixin, APIView):
     """
     Comprehensive farmer registry with filtering and map data
     """
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        # Filters
-        state = request.query_params.get('state')
-        district = request.query_params.get('district')
-        kyc_status = request.query_params.get('kyc_status')
-        crop_type = request.query_params.get('crop_type')
+        # Filters (state, district, kyc_status, crop_type), shared with the export
+        farmers = farmer_registry_queryset(request.query_params)
         
-        filters = {'is_active': True}
-        if state:
-            filters['state'] = state
-        if district:
-            filters['district__icontains'] = district
-        if kyc_status:
-            filters['kyc_status'] = kyc_status
-        
-        farmers = FarmerProfile.objects.filter(**filters).select_related('user', 'fpo')
-        
-        # Additional crop filter
-        if crop_type:
-            farmers = farmers.filter(primary_crops__contains=[crop_type])
-        
-        farmer_data = []
-        for farmer in farmers[:200]:  # Limit for performance
-            farmer_data.append({
-                'id': str(farmer.id),
-                'full_name': farmer.full_name,
-                'phone_number': farmer.user.phone_number,
-                'district': farmer.district,
-                'state': farmer.state,
-                'total_land_acres': float(farmer.total_land_acres),
-                'primary_crops': farmer.primary_crops,
-                'kyc_status': farmer.kyc_status,
-                'fpo_name': farmer.fpo.organization_name if farmer.fpo else None,
-                'farming_experience_years': farmer.farming_experience_years,
-                'total_lots_created': farmer.total_lots_created,
-                'total_earnings': float(farmer.total_earnings),
-                'latitude': float(farmer.latitude) if farmer.latitude else None,
-                'longitude': float(farmer.longitude) if farmer.longitude else None,
-                'created_at': farmer.created_at.isoformat()
-            })
+        # Limit for performance; the renderer serializes Decimals, UUIDs and datetimes
+        farmer_data = list(farmers.values(
+            'id', 'full_name', 'district', 'state', 'total_land_acres', 'primary_crops',
+            'kyc_status', 'farming_experience_years', 'total_lots_created', 'total_earnings',
+            'latitude', 'longitude', 'created_at',
+            phone_number=F('user__phone_number'), fpo_name=F('fpo__organization_name'),
+        )[:200])
         
         # Summary statistics
         total_farmers = farmers.count()
@@ -87,7 +64,7 @@ class FarmerRegistryAPIView(APIView):
         )
 
 
-class ProcessorMonitoringAPIView(APIView):
+class ProcessorMonitoringAPIView(ReplicaReadMixin, APIView):
     """
     Processor monitoring with production and efficiency metrics
     """
@@ -160,7 +137,7 @@ class ProcessorMonitoringAPIView(APIView):
         )
 
 
-class RetailerAnalyticsAPIView(APIView):
+class RetailerAnalyticsAPIView(ReplicaReadMixin, APIView):
     """
     Retailer analytics and performance tracking
     """
@@ -218,92 +195,92 @@ class RetailerAnalyticsAPIView(APIView):
         )
 
 
-class SupplyChainTrackingAPIView(APIView):
+class SupplyChainTrackingAPIView(ReplicaReadMixin, APIView):
     """
     End-to-end supply chain tracking and logistics monitoring
+    ?include_tracks=true adds each shipment's downsampled GPS track
     """
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        status_filter = request.query_params.get('status')
-        crop_type = request.query_params.get('crop_type')
-        
-        # Get shipments
-        filters = {'is_active': True}
-        if status_filter:
-            filters['status'] = status_filter
-        if crop_type:
-            filters['lot__crop_type'] = crop_type
-        
-        shipments = Shipment.objects.filter(**filters).select_related(
-            'lot', 'logistics_partner', 'pickup_location', 'delivery_location'
-        )[:100]
+        include_tracks = request.query_params.get('include_tracks', '').lower() in ('1', 'true')
+        
+        # Get shipments (status, crop_type filters shared with the export)
+        shipments = list(shipment_queryset(request.query_params).select_related(
+            'lot', 'logistics_partner', 'vehicle'
+        )[:100])
+        
+        # Every track in one query, each thinned to a map-sized polyline
+        tracks = {}
+        if include_tracks and shipments:
+            try:
+                max_points = min(int(request.query_params.get('track_points', 200)), 1000)
+            except ValueError:
+                return Response(
+                    response_error(message="track_points must be an integer"),
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            tracks = load_tracks([shipment.id for shipment in shipments], max(max_points, 2))
         
         shipment_data = []
         for shipment in shipments:
-            shipment_data.append({
+            entry = {
                 'id': str(shipment.id),
-                'tracking_number': shipment.tracking_number,
                 'lot_id': str(shipment.lot.id),
+                'lot_number': shipment.lot.lot_number,
                 'crop_type': shipment.lot.crop_type,
-                'quantity_quintals': float(shipment.quantity_quintals),
+                'quantity_quintals': float(shipment.lot.quantity_quintals),
                 'status': shipment.status,
                 'logistics_partner': shipment.logistics_partner.company_name if shipment.logistics_partner else None,
-                'pickup_location': {
-                    'name': shipment.pickup_location.warehouse_name if shipment.pickup_location else None,
-                    'district': shipment.pickup_location.district if shipment.pickup_location else None,
-                    'state': shipment.pickup_location.state if shipment.pickup_location else None
-                },
-                'delivery_location': {
-                    'name': shipment.delivery_location.warehouse_name if shipment.delivery_location else None,
-                    'district': shipment.delivery_location.district if shipment.delivery_location else None,
-                    'state': shipment.delivery_location.state if shipment.delivery_location else None
-                },
-                'pickup_date': shipment.pickup_date.isoformat() if shipment.pickup_date else None,
-                'delivery_date': shipment.delivery_date.isoformat() if shipment.delivery_date else None,
-                'estimated_delivery': shipment.estimated_delivery.isoformat() if shipment.estimated_delivery else None,
-                'current_latitude': float(shipment.current_latitude) if shipment.current_latitude else None,
-                'current_longitude': float(shipment.current_longitude) if shipment.current_longitude else None
-            })
+                'vehicle_number': shipment.vehicle.vehicle_number if shipment.vehicle else None,
+                'pickup_address': shipment.pickup_address,
+                'delivery_address': shipment.delivery_address,
+                'pickup_date': shipment.actual_pickup_date.isoformat() if shipment.actual_pickup_date else None,
+                'delivery_date': shipment.actual_delivery_date.isoformat() if shipment.actual_delivery_date else None,
+                'estimated_delivery': shipment.scheduled_delivery_date.isoformat() if shipment.scheduled_delivery_date else None,
+                'current_latitude': float(shipment.current_location_latitude) if shipment.current_location_latitude is not None else None,
+                'current_longitude': float(shipment.current_location_longitude) if shipment.current_location_longitude is not None else None,
+                'last_ping_at': shipment.last_ping_at.isoformat() if shipment.last_ping_at else None
+            }
+            if include_tracks:
+                entry['track'] = tracks.get(shipment.id, [])
+            shipment_data.append(entry)
         
         # Statistics
         total_shipments = Shipment.objects.count()
         status_breakdown = Shipment.objects.values('status').annotate(count=Count('id'))
         
+        data = {
+            'shipments': shipment_data,
+            'total_shipments': total_shipments,
+            'displayed_count': len(shipment_data),
+            'status_breakdown': list(status_breakdown)
+        }
+        if include_tracks:
+            data['track_point_format'] = POINT_FORMAT
+        
         return Response(
             response_success(
                 message="Supply chain tracking data fetched successfully",
-                data={
-                    'shipments': shipment_data,
-                    'total_shipments': total_shipments,
-                    'displayed_count': len(shipment_data),
-                    'status_breakdown': list(status_breakdown)
-                }
+                data=data
             )
         )
 
 
-class ProcurementAnalyticsAPIView(APIView):
+class ProcurementAnalyticsAPIView(ReplicaReadMixin, APIView):
     """
     Detailed procurement analytics with trends and insights
     """
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        crop_type = request.query_params.get('crop_type')
-        state = request.query_params.get('state')
+        # crop_type, state and days filters, shared with the export
+        try:
+            lots = procurement_lot_queryset(request.query_params)
+        except ValueError as e:
+            return Response(response_error(message=str(e)), status=status.HTTP_400_BAD_REQUEST)
         days = int(request.query_params.get('days', 30))
         
-        start_date = timezone.now() - timedelta(days=days)
-        
-        filters = {'is_active': True, 'created_at__gte': start_date}
-        if crop_type:
-            filters['crop_type'] = crop_type
-        if state:
-            filters['farmer__state'] = state
-        
-        lots = ProcurementLot.objects.filter(**filters)
-        
         # Overall statistics
         total_lots = lots.count()
         total_quantity = lots.aggregate(total=Sum('quantity_quintals'))['total'] or 0
@@ -351,9 +328,10 @@ class ProcurementAnalyticsAPIView(APIView):
         )
 
 
-class MarketPricesAnalyticsAPIView(APIView):
+class MarketPricesAnalyticsAPIView(ReplicaReadMixin, APIView):
     """
     Market prices analytics with MSP comparison and trends
+    Computed from the daily/monthly price summaries, not raw prices
     """
     permission_classes = [IsAuthenticated]
     
@@ -364,30 +342,24 @@ class MarketPricesAnalyticsAPIView(APIView):
         
         start_date = timezone.now().date() - timedelta(days=days)
         
-        filters = {'date__gte': start_date}
-        if crop_type:
-            filters['crop_type'] = crop_type
-        if state:
-            filters['state'] = state
-        
-        prices = MandiPrice.objects.filter(**filters)
+        summaries = daily_summaries(start_date, crop_type=crop_type, state=state)
         
         # Calculate statistics
-        price_stats = prices.aggregate(
-            avg_modal=Avg('modal_price'),
-            min_modal=Min('modal_price'),
-            max_modal=Max('modal_price'),
-            avg_min=Avg('min_price'),
-            avg_max=Avg('max_price')
-        )
+        price_stats = window_stats(summaries)
         
         # Crop-wise prices
-        crop_prices = prices.values('crop_type').annotate(
-            avg_modal_price=Avg('modal_price'),
-            min_price=Min('modal_price'),
-            max_price=Max('modal_price'),
-            market_count=Count('market_name', distinct=True)
-        ).order_by('-avg_modal_price')
+        market_counts = active_market_counts(start_date, crop_type=crop_type, state=state)
+        crop_prices = [
+            {
+                'crop_type': row['crop_type'],
+                'avg_modal_price': row['average_modal_price'],
+                'min_price': row['min_modal_price'],
+                'max_price': row['max_modal_price'],
+                'market_count': market_counts.get(row['crop_type'], 0)
+            }
+            for row in grouped_stats(summaries, 'crop_type')
+        ]
+        crop_prices.sort(key=lambda row: row['avg_modal_price'], reverse=True)
         
         # Get MSP records
         msp_records = MSPRecord.objects.filter(is_active=True)
@@ -398,36 +370,37 @@ class MarketPricesAnalyticsAPIView(APIView):
         for msp in msp_records:
             msp_data.append({
                 'crop_type': msp.crop_type,
-                'crop_name': msp.crop_name,
-                'msp_price_per_quintal': float(msp.msp_price_per_quintal),
+                'crop_name': msp.get_crop_type_display(),
+                'msp_price_per_quintal': float(msp.msp_per_quintal),
                 'year': msp.year,
                 'season': msp.season
             })
         
         # Price trends (daily average)
-        from django.db.models.functions import TruncDate
-        price_trends = prices.annotate(
-            date=TruncDate('date')
-        ).values('date').annotate(
-            avg_price=Avg('modal_price'),
-            min_price=Min('modal_price'),
-            max_price=Max('modal_price')
-        ).order_by('date')
+        price_trends = [
+            {
+                'date': row['date'],
+                'avg_price': row['average_modal_price'],
+                'min_price': row['min_modal_price'],
+                'max_price': row['max_modal_price']
+            }
+            for row in grouped_stats(summaries, 'date')
+        ]
         
         return Response(
             response_success(
                 message="Market prices analytics fetched successfully",
                 data={
                     'statistics': {
-                        'average_modal_price': float(price_stats['avg_modal'] or 0),
-                        'min_price': float(price_stats['min_modal'] or 0),
-                        'max_price': float(price_stats['max_modal'] or 0),
-                        'price_range': float((price_stats['max_modal'] or 0) - (price_stats['min_modal'] or 0)),
+                        'average_modal_price': price_stats['average_modal_price'],
+                        'min_price': price_stats['min_modal_price'],
+                        'max_price': price_stats['max_modal_price'],
+                        'price_range': price_stats['max_modal_price'] - price_stats['min_modal_price'],
                         'days_covered': days
                     },
-                    'crop_wise_prices': list(crop_prices),
+                    'crop_wise_prices': crop_prices,
                     'msp_records': msp_data,
-                    'price_trends': list(price_trends)
+                    'price_trends': price_trends
                 }
             )
         )
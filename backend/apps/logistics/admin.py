@@ -1,7 +1,8 @@
 """Logistics Admin"""
 from django.contrib import admin
-from .models import LogisticsPartner, Vehicle, Shipment
+from .models import LogisticsPartner, Vehicle, Shipment, ShipmentTrackChunk
 
 admin.site.register(LogisticsPartner)
 admin.site.register(Vehicle)
 admin.site.register(Shipment)
+admin.site.register(ShipmentTrackChunk)
@@ -0,0 +1,21 @@
+"""
+Downsample shipment GPS tracks older than the raw retention window
+"""
+import json
+
+from django.core.management.base import BaseCommand
+
+from apps.logistics.services import compact_tracks
+
+
+class Command(BaseCommand):
+    help = "Replace raw ShipmentTrackChunk rows past TELEMETRY_RAW_RETENTION_HOURS with simplified ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-hours', type=int, help="Override TELEMETRY_RAW_RETENTION_HOURS")
+        parser.add_argument('--bucket-seconds', type=int, help="Override TELEMETRY_BUCKET_SECONDS")
+        parser.add_argument('--tolerance-meters', type=float, help="Override TELEMETRY_SIMPLIFY_METERS")
+
+    def handle(self, *args, **options):
+        stats = compact_tracks(options['older_than_hours'], options['bucket_seconds'], options['tolerance_meters'])
+        self.stdout.write(json.dumps(stats))
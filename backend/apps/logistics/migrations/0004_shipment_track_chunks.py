@@ -0,0 +1,43 @@
+# Generated by Django 4.2.27 on 2026-10-19 10:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logistics', '0003_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shipment',
+            name='last_ping_at',
+            field=models.DateTimeField(blank=True, help_text='Time of the latest GPS ping', null=True),
+        ),
+        migrations.CreateModel(
+            name='ShipmentTrackChunk',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('resolution', models.CharField(choices=[('raw', 'Raw'), ('simplified', 'Simplified')], default='raw', max_length=20)),
+                ('started_at', models.DateTimeField(help_text='Time of the earliest point')),
+                ('ended_at', models.DateTimeField(help_text='Time of the latest point')),
+                ('point_count', models.PositiveIntegerField(default=0)),
+                ('points', models.JSONField(default=list, help_text='[[epoch_seconds, lat, lng, speed_kmh], ...]')),
+                ('shipment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='track_chunks', to='logistics.shipment')),
+                ('vehicle', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='track_chunks', to='logistics.vehicle')),
+            ],
+            options={
+                'verbose_name': 'Shipment Track Chunk',
+                'verbose_name_plural': 'Shipment Track Chunks',
+                'db_table': 'shipment_track_chunks',
+                'ordering': ['shipment', 'started_at'],
+                'indexes': [models.Index(fields=['shipment', 'started_at'], name='track_chunk_shipment_idx'), models.Index(fields=['resolution', 'ended_at'], name='track_chunk_compact_idx')],
+            },
+        ),
+    ]
@@ -140,6 +140,7 @@ class Shipment(TimeStampedModel):
     delivery_address = models.TextField(blank=True)
     current_location_latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     current_location_longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    last_ping_at = models.DateTimeField(null=True, blank=True, help_text="Time of the latest GPS ping")
     
     # Pricing
     quoted_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, help_text="Quoted freight charges")
@@ -163,3 +164,41 @@ class Shipment(TimeStampedModel):
     
     def __str__(self):
         return f"Shipment #{self.id} - {self.lot.lot_number} ({self.get_status_display()})"
+
+
+class ShipmentTrackChunk(TimeStampedModel):
+    """
+    Array-backed segment of a shipment's GPS track
+
+    Pings are appended to the shipment's open raw chunk as compact
+    [epoch_seconds, latitude, longitude, speed_kmh] rows, so a batch of pings
+    costs one row write instead of one row per ping. compact_shipment_tracks
+    later replaces old raw chunks with downsampled ones.
+    """
+    RESOLUTION_RAW = 'raw'
+    RESOLUTION_SIMPLIFIED = 'simplified'
+    RESOLUTION_CHOICES = [
+        (RESOLUTION_RAW, 'Raw'),
+        (RESOLUTION_SIMPLIFIED, 'Simplified'),
+    ]
+
+    shipment = models.ForeignKey(Shipment, on_delete=models.CASCADE, related_name='track_chunks')
+    vehicle = models.ForeignKey(Vehicle, on_delete=models.SET_NULL, null=True, blank=True, related_name='track_chunks')
+    resolution = models.CharField(max_length=20, choices=RESOLUTION_CHOICES, default=RESOLUTION_RAW)
+    started_at = models.DateTimeField(help_text="Time of the earliest point")
+    ended_at = models.DateTimeField(help_text="Time of the latest point")
+    point_count = models.PositiveIntegerField(default=0)
+    points = models.JSONField(default=list, help_text="[[epoch_seconds, lat, lng, speed_kmh], ...]")
+
+    class Meta:
+        db_table = 'shipment_track_chunks'
+        verbose_name = 'Shipment Track Chunk'
+        verbose_name_plural = 'Shipment Track Chunks'
+        ordering = ['shipment', 'started_at']
+        indexes = [
+            models.Index(fields=['shipment', 'started_at'], name='track_chunk_shipment_idx'),
+            models.Index(fields=['resolution', 'ended_at'], name='track_chunk_compact_idx'),
+        ]
+
+    def __str__(self):
+        return f"Track of shipment {self.shipment_id} from {self.started_at} ({self.point_count} points)"
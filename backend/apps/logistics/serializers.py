@@ -1,5 +1,6 @@
 """Logistics Serializers"""
 from rest_framework import serializers
+from apps.core.fieldsets import SparseFieldsetMixin
 from .models import LogisticsPartner, Vehicle, Shipment
 from apps.users.serializers import UserSerializer
 
@@ -105,12 +106,12 @@ class LogisticsPartnerUpdateSerializer(serializers.ModelSerializer):
         ]
 
 
-class ShipmentSerializer(serializers.ModelSerializer):
-    """Serializer for shipment tracking"""
+class ShipmentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Serializer for shipment tracking; supports ?fields= and ?expand=lot,vehicle,logistics_partner"""
     logistics_partner_name = serializers.CharField(source='logistics_partner.company_name', read_only=True)
     logistics_partner_phone = serializers.CharField(source='logistics_partner.phone', read_only=True)
     lot_number = serializers.CharField(source='lot.lot_number', read_only=True)
-    lot_crop_type = serializers.CharField(source='lot.crop_type_display', read_only=True)
+    lot_crop_type = serializers.CharField(source='lot.get_crop_type_display', read_only=True)
     lot_quantity = serializers.DecimalField(source='lot.quantity_quintals', max_digits=10, decimal_places=2, read_only=True)
     vehicle_number = serializers.CharField(source='vehicle.vehicle_number', read_only=True, allow_null=True)
     vehicle_type = serializers.CharField(source='vehicle.vehicle_type', read_only=True, allow_null=True)
@@ -121,8 +122,13 @@ class ShipmentSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = [
             'id', 'logistics_partner', 'actual_pickup_date', 'actual_delivery_date',
-            'created_at', 'updated_at'
+            'last_ping_at', 'created_at', 'updated_at'
         ]
+        expandable_fields = {
+            'lot': ('apps.lots.serializers.ProcurementLotSerializer', {}),
+            'vehicle': (VehicleSerializer, {}),
+            'logistics_partner': (LogisticsPartnerSerializer, {}),
+        }
 
 
 class ShipmentCreateSerializer(serializers.ModelSerializer):
@@ -0,0 +1,8 @@
+# Services module
+from .telemetry_service import ingest_telemetry, compact_tracks, load_tracks, downsample_track
+from .route_optimizer import plan_routes, plan_lot_pickups, pending_pickup_lots
+
+__all__ = [
+    'ingest_telemetry', 'compact_tracks', 'load_tracks', 'downsample_track',
+    'plan_routes', 'plan_lot_pickups', 'pending_pickup_lots',
+]
@@ -0,0 +1,488 @@
+"""
+Route Optimizer for SeedSync Platform
+Consolidates many small lot pickups into a few multi-stop truck routes
+
+A capacitated vehicle routing problem (CVRP) over a mixed fleet:
+    1. construction  - Clarke-Wright savings and a polar sweep; the shorter
+                       plan is kept
+    2. local search  - 2-opt inside each route, then relocation of single
+                       stops between routes; every candidate move of a step
+                       is priced at once with NumPy
+    3. fleet         - heaviest route first onto the smallest vehicle that
+                       carries it, spreading trips; routes no free vehicle
+                       carries are cut to fit. Steps 1-3 run once per
+                       vehicle size as the route capacity; the plan serving
+                       the most stops at the lowest cost is kept
+
+Routes start and end at the depot (FPO collection centre or plant). Distances
+are km. Without a supplied matrix they are haversine distances times
+ROAD_FACTOR, the estimate calculate_road_distance() falls back to. Route
+cost comes from calculate_logistics_cost(), as for single-lot quotes.
+"""
+import time
+import uuid
+from collections import namedtuple
+
+import numpy as np
+from django.db.models import Q
+
+from apps.core.constants import LOT_SOLD
+from apps.core.utils import calculate_logistics_cost, select_optimal_vehicle
+from apps.lots.models import ProcurementLot
+from apps.logistics.models import Shipment, Vehicle
+
+Stop = namedtuple('Stop', ['id', 'latitude', 'longitude', 'quantity'])
+VehicleSlot = namedtuple('VehicleSlot', ['id', 'vehicle_type', 'capacity'])
+
+ROAD_FACTOR = 1.25
+EARTH_RADIUS_KM = 6371.0
+MAX_LOCAL_SEARCH_PASSES = 10
+IMPROVEMENT_EPSILON = 1e-6
+MAX_PLAN_LOTS = 2000
+
+
+def distance_matrix(coordinates):
+    """Road-distance estimates (km) between [(lat, lng), ...]"""
+    radians = np.radians(np.asarray(coordinates, dtype=float))
+    lat, lng = radians[:, :1], radians[:, 1:]
+    a = np.sin((lat - lat.T) / 2) ** 2 + np.cos(lat) * np.cos(lat.T) * np.sin((lng - lng.T) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1))) * ROAD_FACTOR
+
+
+def route_length(matrix, route):
+    """Depot -> stops -> depot distance; stops are matrix indices (depot is 0)"""
+    path = np.array([0, *route, 0])
+    return float(matrix[path[:-1], path[1:]].sum())
+
+
+def plan_length(matrix, routes):
+    return sum(route_length(matrix, route) for route in routes)
+
+
+# ---- construction ----
+
+def savings_routes(matrix, demand, capacity, customers):
+    """Clarke-Wright parallel savings: merge route ends in order of s(i, j) = d(0,i) + d(0,j) - d(i,j)"""
+    customers = np.asarray(customers)
+    if len(customers) < 2:
+        return [[int(customer)] for customer in customers]
+    left, right = np.triu_indices(len(customers), k=1)
+    left, right = customers[left], customers[right]
+    savings = matrix[0, left] + matrix[0, right] - matrix[left, right]
+    # Zero-saving merges cost nothing and free a truck (stops at the depot, all-zero matrices)
+    mergeable = savings >= 0
+    order = np.argsort(-savings[mergeable], kind='stable')
+    pairs = zip(left[mergeable][order].tolist(), right[mergeable][order].tolist())
+
+    route_of = {int(customer): int(customer) for customer in customers}
+    routes = {int(customer): [int(customer)] for customer in customers}
+    loads = {int(customer): float(demand[customer]) for customer in customers}
+    for a, b in pairs:
+        first, second = route_of[a], route_of[b]
+        if first == second or loads[first] + loads[second] > capacity:
+            continue
+        head, tail = routes[first], routes[second]
+        if head[-1] == a and tail[0] == b:
+            merged = head + tail
+        elif head[0] == a and tail[-1] == b:
+            merged = tail + head
+        elif head[-1] == a and tail[-1] == b:
+            merged = head + tail[::-1]
+        elif head[0] == a and tail[0] == b:
+            merged = head[::-1] + tail
+        else:
+            continue  # an interior stop cannot take a new neighbour
+        routes[first] = merged
+        loads[first] += loads.pop(second)
+        for customer in routes.pop(second):
+            route_of[customer] = first
+    return list(routes.values())
+
+
+def _nearest_neighbour_order(matrix, route):
+    remaining, ordered, current = set(route), [], 0
+    while remaining:
+        candidates = np.fromiter(remaining, dtype=int)
+        current = int(candidates[np.argmin(matrix[current, candidates])])
+        ordered.append(current)
+        remaining.discard(current)
+    return ordered
+
+
+def sweep_routes(matrix, demand, capacity, customers, coordinates):
+    """Polar sweep around the depot, cutting a route whenever the next stop would overflow it"""
+    customers = np.asarray(customers)
+    if len(customers) == 0:
+        return []
+    points = np.asarray(coordinates, dtype=float)
+    angles = np.arctan2(points[customers, 0] - points[0, 0], points[customers, 1] - points[0, 1])
+    order = np.argsort(angles)
+    # Start after the widest angular gap so no natural cluster is cut in two
+    gaps = np.diff(np.concatenate([angles[order], angles[order][:1] + 2 * np.pi]))
+    order = np.roll(order, -(int(np.argmax(gaps)) + 1))
+
+    routes, route, load = [], [], 0.0
+    for customer in customers[order].tolist():
+        if route and load + demand[customer] > capacity:
+            routes.append(_nearest_neighbour_order(matrix, route))
+            route, load = [], 0.0
+        route.append(customer)
+        load += demand[customer]
+    if route:
+        routes.append(_nearest_neighbour_order(matrix, route))
+    return routes
+
+
+# ---- local search ----
+
+def two_opt(matrix, route):
+    """Best-improvement 2-opt until no reversal shortens the route"""
+    path = np.array([0, *route, 0])
+    while len(path) > 4:
+        starts, ends = path[:-1], path[1:]
+        current = matrix[starts, ends]
+        # delta[i, j]: replace edges (i, i+1), (j, j+1) by (i, j), (i+1, j+1)
+        delta = matrix[starts[:, None], starts[None, :]] + matrix[ends[:, None], ends[None, :]] \
+            - current[:, None] - current[None, :]
+        delta = np.triu(delta, k=2)
+        i, j = np.unravel_index(np.argmin(delta), delta.shape)
+        if delta[i, j] >= -IMPROVEMENT_EPSILON:
+            break
+        path[i + 1:j + 1] = path[i + 1:j + 1][::-1].copy()
+    return path[1:-1].tolist()
+
+
+def relocate(matrix, demand, capacity, routes):
+    """
+    Move single stops to the cheapest insertion point on another route
+    Each step prices every (stop, edge) pair in one array and applies the
+    best improving moves on disjoint route pairs; returns True when anything moved
+    """
+    improved = False
+    for _ in range(len(demand)):
+        if len(routes) < 2:
+            break
+        edge_from, edge_to, edge_route, stop_route = [], [], [], []
+        for index, route in enumerate(routes):
+            path = [0, *route, 0]
+            edge_from.extend(path[:-1])
+            edge_to.extend(path[1:])
+            edge_route.extend([index] * (len(path) - 1))
+            stop_route.extend([index] * len(route))
+        edge_from, edge_to = np.array(edge_from), np.array(edge_to)
+        edge_route, stop_route = np.array(edge_route), np.array(stop_route)
+        loads = np.bincount(stop_route, weights=demand[np.concatenate(routes)], minlength=len(routes))
+
+        # A stop's neighbours are the ends of the edges into and out of it
+        stops = edge_to[edge_to != 0]
+        previous = edge_from[edge_to != 0]
+        following = edge_to[edge_from != 0]
+        gain = matrix[previous, stops] + matrix[stops, following] - matrix[previous, following]
+
+        insertion = matrix[edge_from[:, None], stops[None, :]] + matrix[stops[None, :], edge_to[:, None]] \
+            - matrix[edge_from, edge_to][:, None]
+        blocked = (edge_route[:, None] == stop_route[None, :]) \
+            | (loads[edge_route][:, None] + demand[stops][None, :] > capacity)
+        change = np.where(blocked, np.inf, insertion - gain[None, :])
+
+        # Best move per stop; apply the improving ones that touch disjoint routes, best first
+        best_edge = np.argmin(change, axis=0)
+        best_change = change[best_edge, np.arange(len(stops))]
+        moves = [
+            (int(stops[stop]), int(stop_route[stop]), int(edge_route[best_edge[stop]]), int(best_edge[stop]))
+            for stop in np.argsort(best_change) if best_change[stop] < -IMPROVEMENT_EPSILON
+        ]
+        if not moves:
+            break
+        touched, emptied = set(), []
+        first_edge = {int(route): int(np.argmax(edge_route == route)) for route in set(edge_route.tolist())}
+        for customer, source, target, edge in moves:
+            if source in touched or target in touched:
+                continue
+            touched.update((source, target))
+            # Edges of a route are contiguous; the k-th one leads into the route's k-th stop
+            routes[target].insert(edge - first_edge[target], customer)
+            routes[source].remove(customer)
+            if not routes[source]:
+                emptied.append(source)
+        for index in sorted(emptied, reverse=True):
+            routes.pop(index)
+        improved = True
+    return improved
+
+
+def improve(matrix, demand, capacity, routes):
+    routes = [two_opt(matrix, route) for route in routes]
+    for _ in range(MAX_LOCAL_SEARCH_PASSES):
+        if not relocate(matrix, demand, capacity, routes):
+            break
+        routes = [two_opt(matrix, route) for route in routes]
+    return routes
+
+
+# ---- fleet assignment ----
+
+def assign_vehicles(matrix, demand, routes, vehicles, max_trips):
+    """
+    [(route, vehicle, trip)] and the stops left out
+
+    Heaviest route first onto the smallest vehicle that carries it,
+    preferring vehicles with fewer trips so far. A route too heavy for every
+    vehicle still free is cut, in route order, into pieces the largest free
+    one carries; pieces are re-optimised and queued like any other route.
+    """
+    fleet = sorted(vehicles, key=lambda vehicle: vehicle.capacity)
+    trips = {vehicle.id: 0 for vehicle in fleet}
+    queue = [list(route) for route in routes]
+    assignments, left_out = [], []
+    while queue:
+        queue.sort(key=lambda route: demand[route].sum())
+        route = queue.pop()
+        load = demand[route].sum()
+        available = [vehicle for vehicle in fleet if trips[vehicle.id] < max_trips]
+        if not available:
+            left_out.extend(route)
+            continue
+        fitting = [vehicle for vehicle in available if vehicle.capacity >= load]
+        if fitting:
+            vehicle = min(fitting, key=lambda vehicle: trips[vehicle.id])
+            trips[vehicle.id] += 1
+            assignments.append((route, vehicle, trips[vehicle.id]))
+            continue
+
+        largest = available[-1].capacity
+        piece, piece_load = [], 0.0
+        for customer in route:
+            if demand[customer] > largest:
+                left_out.append(customer)
+                continue
+            if piece and piece_load + demand[customer] > largest:
+                queue.append(two_opt(matrix, piece))
+                piece, piece_load = [], 0.0
+            piece.append(customer)
+            piece_load += demand[customer]
+        if piece:
+            queue.append(two_opt(matrix, piece))
+    return assignments, left_out
+
+
+def _cost(distance_km, vehicle_type, quantity):
+    return calculate_logistics_cost(round(distance_km, 2), vehicle_type, quantity)
+
+
+def _solve(matrix, demand, capacity, customers, coordinates):
+    """Best of savings and sweep after local search, as (method, routes); ties go to fewer routes"""
+    candidates = {
+        'savings': savings_routes(matrix, demand, capacity, customers),
+        'sweep': sweep_routes(matrix, demand, capacity, customers, coordinates),
+    }
+    candidates = {name: improve(matrix, demand, capacity, routes) for name, routes in candidates.items()}
+    method = min(candidates, key=lambda name: (plan_length(matrix, candidates[name]), len(candidates[name])))
+    return method, candidates[method]
+
+
+def _route_plan(matrix, demand, routes, vehicles, max_trips):
+    assignments, left_out = assign_vehicles(matrix, demand, routes, vehicles, max_trips)
+    planned = []
+    for route, vehicle, trip in assignments:
+        path = [0, *route, 0]
+        legs = matrix[path[:-1], path[1:]]
+        distance = float(legs.sum())
+        load = float(demand[route].sum())
+        planned.append({
+            'vehicle': vehicle,
+            'trip': trip,
+            'route': route,
+            'legs': legs,
+            'load': load,
+            'distance': distance,
+            'cost': _cost(distance, vehicle.vehicle_type, load),
+        })
+    return planned, left_out
+
+
+def plan_routes(depot, stops, vehicles, matrix=None, max_trips=3):
+    """
+    Consolidated pickup plan
+
+    depot: (lat, lng); stops: [Stop]; vehicles: [VehicleSlot]
+    matrix: optional (len(stops) + 1)^2 distances in km, depot first
+    max_trips: routes one vehicle may run back to back
+
+    Routes are built once per distinct vehicle capacity; the plan serving the
+    most stops, then costing least, wins. Returns the routes, unserved stops,
+    totals and the one-lot-per-shipment baseline under the same cost model.
+    """
+    started = time.perf_counter()
+    if not vehicles:
+        raise ValueError("No vehicles available")
+    coordinates = [depot] + [(float(stop.latitude), float(stop.longitude)) for stop in stops]
+    if matrix is None:
+        matrix = distance_matrix(coordinates)
+    else:
+        shape_error = f"distance_matrix must be a {len(stops) + 1}x{len(stops) + 1} non-negative matrix, depot first"
+        try:
+            matrix = np.asarray(matrix, dtype=float)
+        except (TypeError, ValueError):
+            raise ValueError(shape_error)
+        if matrix.shape != (len(stops) + 1, len(stops) + 1) or not (matrix >= 0).all():
+            raise ValueError(shape_error)
+
+    demand = np.array([0.0] + [float(stop.quantity) for stop in stops])
+    fleet = [vehicle._replace(capacity=float(vehicle.capacity)) for vehicle in vehicles]
+    largest = max(vehicle.capacity for vehicle in fleet)
+    customers = [index for index in range(1, len(stops) + 1) if 0 < demand[index] <= largest]
+
+    best = None
+    for capacity in sorted({vehicle.capacity for vehicle in fleet}):
+        served = [customer for customer in customers if demand[customer] <= capacity]
+        method, routes = _solve(matrix, demand, capacity, served, coordinates)
+        planned, left_out = _route_plan(matrix, demand, routes, fleet, max_trips)
+        unserved = len(customers) - len(served) + len(left_out)
+        total_cost = sum(route['cost']['total_logistics_cost'] for route in planned)
+        if best is None or (unserved, total_cost) < (best[0], best[1]):
+            best = (unserved, total_cost, capacity, method, planned, set(served) - set(left_out))
+    _, total_cost, capacity, method, planned, served = best
+
+    reasons = {}
+    for index, stop in enumerate(stops, start=1):
+        if index in served:
+            continue
+        if demand[index] <= 0:
+            reasons[index] = "No quantity"
+        elif demand[index] > largest:
+            reasons[index] = "Exceeds the largest vehicle's capacity"
+        else:
+            reasons[index] = f"No vehicle left within {max_trips} trips"
+
+    baseline_distance = float(2 * matrix[0, list(served)].sum()) if served else 0.0
+    baseline_cost = sum(
+        _cost(2 * matrix[0, customer], select_optimal_vehicle(demand[customer]), demand[customer])['total_logistics_cost']
+        for customer in served
+    )
+    planned.sort(key=lambda route: (str(route['vehicle'].id), route['trip']))
+    return {
+        'method': method,
+        'route_capacity_quintals': capacity,
+        'routes': [
+            {
+                'vehicle_id': route['vehicle'].id,
+                'vehicle_type': route['vehicle'].vehicle_type,
+                'capacity_quintals': route['vehicle'].capacity,
+                'trip': route['trip'],
+                'stops': [
+                    {
+                        'id': stops[customer - 1].id,
+                        'quantity_quintals': float(demand[customer]),
+                        'leg_km': round(float(leg), 2),
+                    }
+                    for customer, leg in zip(route['route'], route['legs'])
+                ],
+                'return_leg_km': round(float(route['legs'][-1]), 2),
+                'load_quintals': round(route['load'], 2),
+                'utilisation_percent': round(100 * route['load'] / route['vehicle'].capacity, 1),
+                'distance_km': round(route['distance'], 2),
+                'cost': route['cost'],
+            }
+            for route in planned
+        ],
+        'unserved': [{'id': stops[index - 1].id, 'reason': reason} for index, reason in reasons.items()],
+        'stops_planned': len(served),
+        'vehicles_used': len({route['vehicle'].id for route in planned}),
+        'total_distance_km': round(sum(route['distance'] for route in planned), 2),
+        'total_cost': round(total_cost, 2),
+        'baseline': {
+            'shipments': len(served),
+            'distance_km': round(baseline_distance, 2),
+            'cost': round(baseline_cost, 2),
+        },
+        'savings_percent': round(100 * (1 - total_cost / baseline_cost), 1) if baseline_cost else 0.0,
+        'solve_ms': round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+# ---- lots and vehicles ----
+
+def pending_pickup_lots(fpo=None):
+    """Sold lots with a location and no live or completed shipment"""
+    shipped = Shipment.objects.exclude(status__in=['cancelled', 'rejected']).values('lot_id')
+    lots = ProcurementLot.objects.filter(
+        status=LOT_SOLD, is_active=True,
+        location_latitude__isnull=False, location_longitude__isnull=False,
+    ).exclude(id__in=shipped)
+    if fpo is not None:
+        lots = lots.filter(Q(fpo=fpo) | Q(farmer__fpo=fpo))
+    return lots
+
+
+def plan_lot_pickups(partner, lot_ids=None, fpo=None, depot=None, vehicle_ids=None, matrix=None, max_trips=3):
+    """
+    plan_routes() over real lots and the partner's available vehicles
+
+    Lots are lot_ids (in that order, which a supplied matrix must follow) or
+    an FPO cluster's pending pickups. The depot defaults to the FPO's location.
+    Raises ValueError for anything the caller must fix.
+    """
+    if lot_ids:
+        if not isinstance(lot_ids, (list, tuple)):
+            raise ValueError("lot_ids must be a list of lot UUIDs")
+        if len(lot_ids) > MAX_PLAN_LOTS:
+            raise ValueError(f"At most {MAX_PLAN_LOTS} lots per plan")
+        try:
+            lot_ids = [uuid.UUID(str(lot_id)) for lot_id in lot_ids]
+        except ValueError:
+            raise ValueError("lot_ids must be lot UUIDs")
+        if len(set(lot_ids)) != len(lot_ids):
+            raise ValueError("lot_ids contains duplicates")
+        found = ProcurementLot.objects.in_bulk(lot_ids)
+        missing = [str(lot_id) for lot_id in lot_ids if lot_id not in found]
+        if missing:
+            raise ValueError(f"Lots not found: {', '.join(missing[:10])}")
+        lots = [found[lot_id] for lot_id in lot_ids]
+        unlocated = [lot.lot_number for lot in lots if lot.location_latitude is None or lot.location_longitude is None]
+        if unlocated:
+            raise ValueError(f"Lots without a location: {', '.join(unlocated[:10])}")
+    elif fpo is not None:
+        if matrix is not None:
+            raise ValueError("distance_matrix needs lot_ids to fix the stop order")
+        lots = list(pending_pickup_lots(fpo).order_by('lot_number')[:MAX_PLAN_LOTS])
+    else:
+        raise ValueError("lot_ids or fpo_id is required")
+    if not lots:
+        raise ValueError("No lots awaiting pickup")
+
+    if depot is None:
+        if fpo is None or fpo.latitude is None or fpo.longitude is None:
+            raise ValueError("depot (latitude, longitude) is required")
+        depot = (float(fpo.latitude), float(fpo.longitude))
+
+    vehicles = Vehicle.objects.filter(logistics_partner=partner, is_active=True, is_available=True)
+    if vehicle_ids:
+        try:
+            if not isinstance(vehicle_ids, (list, tuple)):
+                raise ValueError
+            vehicle_ids = [uuid.UUID(str(vehicle_id)) for vehicle_id in vehicle_ids]
+        except ValueError:
+            raise ValueError("vehicle_ids must be a list of vehicle UUIDs")
+        vehicles = vehicles.filter(id__in=vehicle_ids)
+    vehicles = list(vehicles.order_by('vehicle_number'))
+    if not vehicles:
+        raise ValueError("No available vehicles")
+
+    plan = plan_routes(
+        depot,
+        [Stop(lot.id, lot.location_latitude, lot.location_longitude, lot.quantity_quintals) for lot in lots],
+        [VehicleSlot(vehicle.id, vehicle.vehicle_type, vehicle.capacity_quintals) for vehicle in vehicles],
+        matrix, max_trips,
+    )
+
+    numbers = {lot.id: lot.lot_number for lot in lots}
+    plates = {vehicle.id: vehicle.vehicle_number for vehicle in vehicles}
+    plan['depot'] = {'latitude': depot[0], 'longitude': depot[1]}
+    for route in plan['routes']:
+        route['vehicle_number'] = plates[route['vehicle_id']]
+        for stop in route['stops']:
+            stop['lot_number'] = numbers[stop['id']]
+    for stop in plan['unserved']:
+        stop['lot_number'] = numbers[stop['id']]
+    return plan
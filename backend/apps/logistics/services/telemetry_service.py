@@ -0,0 +1,422 @@
+"""
+Telemetry Service for SeedSync Platform
+Batched GPS ping ingestion and downsampled shipment tracks
+
+Vehicles upload pings in batches. Each shipment's pings are appended to its
+open ShipmentTrackChunk (one JSON array per chunk), and every shipment in the
+request moves to its latest ping with one UPDATE. Chunks older than
+TELEMETRY_RAW_RETENTION_HOURS are compacted: thinned to one point per time
+bucket, then simplified with Douglas-Peucker.
+
+A point is [epoch_seconds, latitude, longitude, speed_kmh or None].
+"""
+import datetime
+import logging
+import math
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, DateTimeField, DecimalField, F, Q, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.core.write_queue import run_serialized
+from apps.logistics.models import Shipment, ShipmentTrackChunk, Vehicle
+
+logger = logging.getLogger(__name__)
+
+POINT_FORMAT = ['timestamp', 'latitude', 'longitude', 'speed_kmh']
+
+# Pinging vehicles attach to their shipment in these states
+ACTIVE_SHIPMENT_STATUSES = ('accepted', 'in_transit')
+# Explicit shipment_id uploads (e.g. buffered pings sent after delivery) are refused only for these
+CLOSED_SHIPMENT_STATUSES = ('cancelled', 'rejected')
+
+MAX_CLOCK_SKEW_SECONDS = 300
+MAX_REPORTED_ERRORS = 100
+EARTH_RADIUS_M = 6371008.8
+
+
+# ---- parsing ----
+
+def _parse_timestamp(value):
+    """Epoch seconds (or milliseconds) or an ISO 8601 string -> epoch seconds"""
+    if isinstance(value, bool):
+        raise ValueError("Invalid timestamp")
+    if isinstance(value, (int, float)):
+        return int(value / 1000 if value > 1e11 else value)
+    if isinstance(value, str):
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise ValueError(f"Invalid timestamp: {value}")
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed, datetime.timezone.utc)
+        return int(parsed.timestamp())
+    raise ValueError("Invalid timestamp")
+
+
+def parse_ping(raw):
+    """[t, lat, lng, speed?] or {"t", "lat", "lng", "speed"} -> point"""
+    if isinstance(raw, dict):
+        values = (
+            raw.get('t', raw.get('timestamp')),
+            raw.get('lat', raw.get('latitude')),
+            raw.get('lng', raw.get('longitude')),
+            raw.get('speed'),
+        )
+    elif isinstance(raw, (list, tuple)) and 3 <= len(raw) <= 4:
+        values = tuple(raw) + (None,) * (4 - len(raw))
+    else:
+        raise ValueError("A ping is [timestamp, lat, lng, speed] or an object with t, lat, lng")
+
+    timestamp = _parse_timestamp(values[0])
+    try:
+        latitude, longitude = float(values[1]), float(values[2])
+        speed = round(float(values[3]), 1) if values[3] is not None else None
+    except (TypeError, ValueError):
+        raise ValueError("lat, lng and speed must be numbers")
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError("Coordinates out of range")
+    return [timestamp, round(latitude, 6), round(longitude, 6), speed]
+
+
+def parse_pings(raw_pings, now=None):
+    """
+    Validate a batch; returns (points sorted by time, errors)
+    Repeated timestamps keep the last ping; pings from the future are refused
+    """
+    if not isinstance(raw_pings, list):
+        raise ValueError("pings must be a list")
+    latest = (now or timezone.now()).timestamp() + MAX_CLOCK_SKEW_SECONDS
+    points, errors = {}, []
+    for index, raw in enumerate(raw_pings):
+        try:
+            point = parse_ping(raw)
+            if point[0] > latest:
+                raise ValueError("Timestamp is in the future")
+        except ValueError as e:
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({'ping': index, 'error': str(e)})
+            continue
+        points[point[0]] = point
+    return [points[timestamp] for timestamp in sorted(points)], errors
+
+
+# ---- downsampling ----
+
+def _to_meters(points):
+    """Equirectangular projection around the track's mean latitude"""
+    scale = math.cos(math.radians(sum(point[1] for point in points) / len(points)))
+    return [
+        (math.radians(point[2]) * EARTH_RADIUS_M * scale, math.radians(point[1]) * EARTH_RADIUS_M)
+        for point in points
+    ]
+
+
+def douglas_peucker(points, tolerance_m):
+    """Drop points closer than tolerance_m to the line through their neighbours"""
+    if len(points) < 3 or tolerance_m <= 0:
+        return list(points)
+    xy = _to_meters(points)
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        ax, ay = xy[start]
+        dx, dy = xy[end][0] - ax, xy[end][1] - ay
+        length_sq = dx * dx + dy * dy
+        farthest, distance = None, tolerance_m
+        for index in range(start + 1, end):
+            px, py = xy[index]
+            if length_sq:
+                along = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length_sq))
+                px, py = px - (ax + along * dx), py - (ay + along * dy)
+            else:
+                px, py = px - ax, py - ay
+            offset = math.hypot(px, py)
+            if offset > distance:
+                farthest, distance = index, offset
+        if farthest is not None:
+            keep[farthest] = True
+            stack.append((start, farthest))
+            stack.append((farthest, end))
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+def bucket_points(points, seconds):
+    """First point, then the last point of every `seconds`-wide time bucket"""
+    if len(points) < 3 or seconds <= 0:
+        return list(points)
+    thinned = [points[0]]
+    for point in points[1:]:
+        if point[0] // seconds == thinned[-1][0] // seconds and len(thinned) > 1:
+            thinned[-1] = point
+        else:
+            thinned.append(point)
+    return thinned
+
+
+def downsample_track(points, bucket_seconds=None, tolerance_m=None):
+    """Storage downsampling: time buckets, then Douglas-Peucker"""
+    if bucket_seconds is None:
+        bucket_seconds = settings.TELEMETRY_BUCKET_SECONDS
+    if tolerance_m is None:
+        tolerance_m = settings.TELEMETRY_SIMPLIFY_METERS
+    return douglas_peucker(bucket_points(points, bucket_seconds), tolerance_m)
+
+
+def fit_track(points, max_points):
+    """Display downsampling: widen the tolerance until the track fits max_points"""
+    if len(points) <= max_points:
+        return points
+    # Time buckets first keep Douglas-Peucker's passes cheap on a day of raw pings
+    span = points[-1][0] - points[0][0]
+    if len(points) > max_points * 4 and span > 0:
+        points = bucket_points(points, max(1, span // (max_points * 4)))
+    tolerance = settings.TELEMETRY_SIMPLIFY_METERS or 1.0
+    for _ in range(8):
+        points = douglas_peucker(points, tolerance)
+        if len(points) <= max_points:
+            return points
+        tolerance *= 2
+    step = math.ceil(len(points) / max_points)
+    return points[::step][:max_points - 1] + [points[-1]]
+
+
+# ---- ingestion ----
+
+def _point_time(point):
+    return datetime.datetime.fromtimestamp(point[0], tz=datetime.timezone.utc)
+
+
+def _new_chunk(shipment_id, vehicle_id, points, resolution=ShipmentTrackChunk.RESOLUTION_RAW):
+    return ShipmentTrackChunk(
+        shipment_id=shipment_id, vehicle_id=vehicle_id, resolution=resolution,
+        started_at=_point_time(points[0]), ended_at=_point_time(points[-1]),
+        point_count=len(points), points=points,
+    )
+
+
+def _resolve_shipments(partner, batches):
+    """Map every batch to (shipment_id, vehicle_id) with two queries; returns (targets, errors)"""
+    vehicle_ids, vehicle_numbers, shipment_ids = set(), set(), set()
+    for batch in batches:
+        if batch.get('vehicle_id'):
+            vehicle_ids.add(str(batch['vehicle_id']))
+        if batch.get('vehicle_number'):
+            vehicle_numbers.add(str(batch['vehicle_number']))
+        if batch.get('shipment_id'):
+            shipment_ids.add(str(batch['shipment_id']))
+
+    vehicles = {}
+    if vehicle_ids or vehicle_numbers:
+        for vehicle_id, number in Vehicle.objects.filter(logistics_partner=partner).filter(
+            Q(id__in=vehicle_ids) | Q(vehicle_number__in=vehicle_numbers)
+        ).values_list('id', 'vehicle_number'):
+            vehicles[str(vehicle_id)] = vehicles[number] = vehicle_id
+
+    explicit, active = {}, {}
+    for shipment_id, vehicle_id, shipment_status in Shipment.objects.filter(logistics_partner=partner).filter(
+        Q(id__in=shipment_ids) | Q(vehicle_id__in=set(vehicles.values()), status__in=ACTIVE_SHIPMENT_STATUSES)
+    ).order_by('created_at').values_list('id', 'vehicle_id', 'status'):
+        if str(shipment_id) in shipment_ids:
+            explicit[str(shipment_id)] = (shipment_id, vehicle_id, shipment_status)
+        if vehicle_id and shipment_status in ACTIVE_SHIPMENT_STATUSES:
+            active[vehicle_id] = shipment_id  # newest wins
+
+    targets, errors = [], []
+    for index, batch in enumerate(batches):
+        key = batch.get('vehicle_id') or batch.get('vehicle_number')
+        vehicle_id = vehicles.get(str(key)) if key else None
+        if key and vehicle_id is None:
+            errors.append({'batch': index, 'error': f"Vehicle {key} not found"})
+            targets.append(None)
+        elif batch.get('shipment_id'):
+            shipment = explicit.get(str(batch['shipment_id']))
+            if shipment is None or shipment[2] in CLOSED_SHIPMENT_STATUSES:
+                errors.append({'batch': index, 'error': f"Shipment {batch['shipment_id']} not found or closed"})
+                targets.append(None)
+            else:
+                targets.append((shipment[0], vehicle_id or shipment[1]))
+        elif vehicle_id is None:
+            errors.append({'batch': index, 'error': "vehicle_id, vehicle_number or shipment_id is required"})
+            targets.append(None)
+        elif vehicle_id not in active:
+            errors.append({'batch': index, 'error': f"Vehicle {key} has no accepted or in-transit shipment"})
+            targets.append(None)
+        else:
+            targets.append((active[vehicle_id], vehicle_id))
+    return targets, errors
+
+
+def append_points(groups):
+    """
+    Append {shipment_id: (vehicle_id, points)} to the open chunks and move the shipments
+
+    Runs on the serial writer, so concurrent batches for one shipment never
+    overwrite each other's chunk.
+    """
+    limit = settings.TELEMETRY_CHUNK_POINTS
+    now = timezone.now()
+    with transaction.atomic():
+        open_chunks = {}
+        for chunk in ShipmentTrackChunk.objects.filter(
+            shipment_id__in=groups, resolution=ShipmentTrackChunk.RESOLUTION_RAW, point_count__lt=limit
+        ).order_by('started_at'):
+            open_chunks[chunk.shipment_id] = chunk
+
+        changed, created = [], []
+        for shipment_id, (vehicle_id, points) in groups.items():
+            chunk = open_chunks.get(shipment_id)
+            if chunk is not None:
+                room = limit - chunk.point_count
+                merged = {point[0]: point for point in chunk.points + points[:room]}
+                chunk.points = [merged[timestamp] for timestamp in sorted(merged)]
+                chunk.point_count = len(chunk.points)
+                chunk.started_at = _point_time(chunk.points[0])
+                chunk.ended_at = _point_time(chunk.points[-1])
+                chunk.updated_at = now
+                changed.append(chunk)
+                points = points[room:]
+            for start in range(0, len(points), limit):
+                created.append(_new_chunk(shipment_id, vehicle_id, points[start:start + limit]))
+
+        if changed:
+            ShipmentTrackChunk.objects.bulk_update(
+                changed, ['points', 'point_count', 'started_at', 'ended_at', 'updated_at']
+            )
+        if created:
+            ShipmentTrackChunk.objects.bulk_create(created)
+
+        # One UPDATE moves every shipment, and only forwards in time (late uploads keep the current fix)
+        latitude, longitude, pinged = [], [], []
+        for shipment_id, (vehicle_id, points) in groups.items():
+            last = points[-1] if points else None
+            if last is None:
+                continue
+            when = _point_time(last)
+            newer = Q(pk=shipment_id) & (Q(last_ping_at__isnull=True) | Q(last_ping_at__lt=when))
+            latitude.append(When(newer, then=Value(Decimal(str(last[1])))))
+            longitude.append(When(newer, then=Value(Decimal(str(last[2])))))
+            pinged.append(When(newer, then=Value(when)))
+        decimal = DecimalField(max_digits=9, decimal_places=6)
+        Shipment.objects.filter(pk__in=groups).update(
+            current_location_latitude=Case(*latitude, default=F('current_location_latitude'), output_field=decimal),
+            current_location_longitude=Case(*longitude, default=F('current_location_longitude'), output_field=decimal),
+            last_ping_at=Case(*pinged, default=F('last_ping_at'), output_field=DateTimeField()),
+        )
+
+
+def ingest_telemetry(partner, batches):
+    """
+    Store batches of pings for a logistics partner's vehicles
+
+    batches: [{"vehicle_id" | "vehicle_number" | "shipment_id", "pings": [...]}]
+    A batch without shipment_id goes to the vehicle's accepted or in-transit
+    shipment. Bad pings and batches are reported, not fatal; ValueError is
+    raised only when the request as a whole is malformed.
+    """
+    if not isinstance(batches, list) or not batches or not all(isinstance(batch, dict) for batch in batches):
+        raise ValueError("Send a batch object or a non-empty list of batches")
+    total = sum(len(batch.get('pings') or []) for batch in batches)
+    if total > settings.TELEMETRY_MAX_BATCH_PINGS:
+        raise ValueError(f"At most {settings.TELEMETRY_MAX_BATCH_PINGS} pings per request")
+
+    targets, errors = _resolve_shipments(partner, batches)
+    groups = {}
+    now = timezone.now()
+    for index, (batch, target) in enumerate(zip(batches, targets)):
+        if target is None:
+            continue
+        try:
+            points, ping_errors = parse_pings(batch.get('pings') or [], now)
+        except ValueError as e:
+            errors.append({'batch': index, 'error': str(e)})
+            continue
+        errors.extend({'batch': index, **error} for error in ping_errors[:MAX_REPORTED_ERRORS])
+        if not points:
+            continue
+        shipment_id, vehicle_id = target
+        if shipment_id in groups:
+            merged = {point[0]: point for point in groups[shipment_id][1] + points}
+            points = [merged[timestamp] for timestamp in sorted(merged)]
+        groups[shipment_id] = (vehicle_id, points)
+
+    if groups:
+        run_serialized(append_points, groups)
+
+    return {
+        'accepted': sum(len(points) for _, points in groups.values()),
+        'shipments': [
+            {'shipment_id': str(shipment_id), 'accepted': len(points), 'last_ping_at': _point_time(points[-1])}
+            for shipment_id, (_, points) in groups.items()
+        ],
+        'rejected': errors[:MAX_REPORTED_ERRORS],
+    }
+
+
+# ---- compaction ----
+
+def _compact_shipment(shipment_id, cutoff, bucket_seconds, tolerance_m):
+    with transaction.atomic():
+        chunks = list(ShipmentTrackChunk.objects.filter(
+            shipment_id=shipment_id, resolution=ShipmentTrackChunk.RESOLUTION_RAW, ended_at__lt=cutoff
+        ).order_by('started_at'))
+        if not chunks:
+            return 0, 0
+        merged = {point[0]: point for chunk in chunks for point in chunk.points}
+        points = downsample_track([merged[timestamp] for timestamp in sorted(merged)], bucket_seconds, tolerance_m)
+        vehicle_id = chunks[-1].vehicle_id
+
+        ShipmentTrackChunk.objects.filter(pk__in=[chunk.pk for chunk in chunks]).delete()
+        limit = settings.TELEMETRY_CHUNK_POINTS
+        ShipmentTrackChunk.objects.bulk_create([
+            _new_chunk(shipment_id, vehicle_id, points[start:start + limit], ShipmentTrackChunk.RESOLUTION_SIMPLIFIED)
+            for start in range(0, len(points), limit)
+        ])
+        return len(merged), len(points)
+
+
+def compact_tracks(older_than_hours=None, bucket_seconds=None, tolerance_m=None):
+    """Replace raw chunks that ended before the retention window with downsampled ones"""
+    if older_than_hours is None:
+        older_than_hours = settings.TELEMETRY_RAW_RETENTION_HOURS
+    cutoff = timezone.now() - datetime.timedelta(hours=older_than_hours)
+    shipment_ids = list(ShipmentTrackChunk.objects.filter(
+        resolution=ShipmentTrackChunk.RESOLUTION_RAW, ended_at__lt=cutoff
+    ).order_by().values_list('shipment_id', flat=True).distinct())
+
+    stats = {'shipments': 0, 'points_before': 0, 'points_after': 0}
+    for shipment_id in shipment_ids:
+        before, after = run_serialized(_compact_shipment, shipment_id, cutoff, bucket_seconds, tolerance_m)
+        stats['shipments'] += 1
+        stats['points_before'] += before
+        stats['points_after'] += after
+    logger.info(f"Compacted tracks: {stats}")
+    return stats
+
+
+# ---- reading ----
+
+def load_tracks(shipment_ids, max_points=None, since=None):
+    """
+    {shipment_id: points} for several shipments with one query
+    since (epoch seconds) returns only newer points, for incremental refresh
+    """
+    if max_points is None:
+        max_points = settings.TELEMETRY_TRACK_MAX_POINTS
+    tracks = {shipment_id: [] for shipment_id in shipment_ids}
+    chunks = ShipmentTrackChunk.objects.filter(shipment_id__in=shipment_ids)
+    if since is not None:
+        chunks = chunks.filter(ended_at__gt=datetime.datetime.fromtimestamp(since, tz=datetime.timezone.utc))
+    for shipment_id, points in chunks.order_by('started_at').values_list('shipment_id', 'points'):
+        tracks[shipment_id].extend(points)
+
+    for shipment_id, points in tracks.items():
+        if since is not None:
+            points = [point for point in points if point[0] > since]
+        points.sort(key=lambda point: point[0])
+        tracks[shipment_id] = fit_track(points, max_points)
+    return tracks
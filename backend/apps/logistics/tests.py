@@ -1,3 +1,277 @@
-from django.test import TestCase
+import datetime
+from decimal import Decimal
 
-# Create your tests here.
+import math
+import time
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APITestCase
+
+from apps.farmers.models import FarmerProfile
+from apps.lots.models import ProcurementLot
+from apps.users.models import User
+from .models import LogisticsPartner, Shipment, ShipmentTrackChunk, Vehicle
+from .services import ingest_telemetry, load_tracks
+from .services.route_optimizer import Stop, VehicleSlot, plan_routes
+from .services.telemetry_service import EARTH_RADIUS_M, append_points, bucket_points, douglas_peucker
+
+DEPOT = (22.7196, 75.8577)
+
+
+class RouteOptimizerTests(SimpleTestCase):
+    """Routes respect vehicle capacity and consolidate stops even when merging saves no distance"""
+
+    def _stops(self, quantities, spread=0.05):
+        return [
+            Stop(index, DEPOT[0] + spread * np.cos(index), DEPOT[1] + spread * np.sin(index), quantity)
+            for index, quantity in enumerate(quantities)
+        ]
+
+    def test_routes_never_exceed_their_vehicle(self):
+        stops = self._stops([30, 45, 20, 60, 15, 35, 50, 25, 40, 10, 55, 120])
+        vehicles = [VehicleSlot('small', 'small_truck', 30), VehicleSlot('large', 'large_truck', 100)]
+
+        plan = plan_routes(DEPOT, stops, vehicles, max_trips=5)
+
+        for route in plan['routes']:
+            self.assertLessEqual(route['load_quintals'], route['capacity_quintals'])
+            self.assertEqual(route['load_quintals'], sum(stop['quantity_quintals'] for stop in route['stops']))
+        self.assertEqual(plan['unserved'], [{'id': 11, 'reason': "Exceeds the largest vehicle's capacity"}])
+        served = [stop['id'] for route in plan['routes'] for stop in route['stops']]
+        self.assertCountEqual(served, range(11))
+
+    def test_stops_at_the_depot_share_one_truck(self):
+        stops = [Stop(index, *DEPOT, 10) for index in range(5)]
+
+        plan = plan_routes(DEPOT, stops, [VehicleSlot('truck', 'large_truck', 100)], max_trips=3)
+
+        self.assertEqual([len(route['stops']) for route in plan['routes']], [5])
+        self.assertEqual(plan['unserved'], [])
+
+    def test_all_zero_distance_matrix_still_consolidates(self):
+        stops = self._stops([10] * 5)
+
+        plan = plan_routes(
+            DEPOT, stops, [VehicleSlot('truck', 'large_truck', 100)], matrix=np.zeros((6, 6)), max_trips=3
+        )
+
+        self.assertEqual([len(route['stops']) for route in plan['routes']], [5])
+        self.assertEqual(plan['stops_planned'], 5)
+
+    def test_bad_distance_matrix_is_rejected(self):
+        with self.assertRaisesMessage(ValueError, 'distance_matrix must be a 3x3'):
+            plan_routes(DEPOT, self._stops([10, 10]), [VehicleSlot('truck', 'large_truck', 100)], matrix=np.zeros((2, 2)))
+
+
+class RoutePlanViewTests(APITestCase):
+    """Bad input is a 400 naming the field at fault; a valid body returns a plan within vehicle capacity"""
+
+    def setUp(self):
+        user = User.objects.create_user('9000000501', 'logistics')
+        partner = LogisticsPartner.objects.create(user=user, company_name='Route Movers')
+        self.vehicle = Vehicle.objects.create(
+            logistics_partner=partner, vehicle_number='MP09AB1234', vehicle_type='small_truck',
+            capacity_quintals=Decimal('30'),
+        )
+        farmer = FarmerProfile.objects.create(
+            user=User.objects.create_user('9000000502', 'farmer'), full_name='Route Farmer',
+            total_land_acres=Decimal('2.5'), farming_experience_years=5, district='Indore', state='madhya_pradesh',
+        )
+        self.lots = [
+            ProcurementLot.objects.create(
+                farmer=farmer, crop_type='soybean', quantity_quintals=Decimal(quantity),
+                available_quantity_quintals=Decimal(quantity), quality_grade='A',
+                expected_price_per_quintal=Decimal('4500'), harvest_date=datetime.date(2026, 10, 1),
+                location_latitude=Decimal('22.75') + index / Decimal('100'), location_longitude=Decimal('75.85'),
+            )
+            for index, quantity in enumerate(['10', '12', '15', '40'])
+        ]
+        self.client.force_authenticate(user)
+
+    def _plan(self, **body):
+        body.setdefault('lot_ids', [str(lot.id) for lot in self.lots])
+        body.setdefault('depot', {'latitude': 22.7196, 'longitude': 75.8577})
+        return self.client.post('/api/logistics/route-plans/', body, format='json')
+
+    def test_plan_respects_vehicle_capacity(self):
+        response = self._plan(max_trips=3)
+
+        self.assertEqual(response.status_code, 200)
+        plan = response.data['data']
+        for route in plan['routes']:
+            self.assertLessEqual(route['load_quintals'], 30)
+            self.assertEqual(route['vehicle_number'], 'MP09AB1234')
+        self.assertEqual(plan['stops_planned'], 3)
+        self.assertEqual([stop['lot_number'] for stop in plan['unserved']], [self.lots[3].lot_number])
+
+    def test_bad_input_names_the_field_at_fault(self):
+        cases = [
+            ({'depot': {'latitude': 'north'}}, 'depot needs numeric latitude and longitude'),
+            ({'depot': [22.7, 75.8]}, 'depot needs numeric latitude and longitude'),
+            ({'max_trips': 'many'}, 'max_trips must be an integer between 1 and 10'),
+            ({'lot_ids': 42}, 'lot_ids must be a list of lot UUIDs'),
+            ({'lot_ids': ['not-a-uuid']}, 'lot_ids must be lot UUIDs'),
+            ({'vehicle_ids': 'MP09AB1234'}, 'vehicle_ids must be a list of vehicle UUIDs'),
+            ({'distance_matrix': [[0, 1], [1]]}, 'distance_matrix must be a 5x5 non-negative matrix'),
+            ({'distance_matrix': {'depot': 0}}, 'distance_matrix must be a 5x5 non-negative matrix'),
+        ]
+        for body, message in cases:
+            with self.subTest(body=body):
+                response = self._plan(**body)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(message, response.data['message'])
+
+    def test_unknown_fpo_is_not_found(self):
+        response = self._plan(lot_ids=None, fpo_id='not-a-uuid')
+        self.assertEqual(response.status_code, 404)
+
+
+class VehicleCreateTests(APITestCase):
+    """Vehicles are added to the caller's own partner profile; callers without one are turned away"""
+
+    def _add_vehicle(self, user):
+        self.client.force_authenticate(user)
+        return self.client.post('/api/logistics/vehicles/', {
+            'vehicle_number': 'MP09CD5678', 'vehicle_type': 'small_truck', 'capacity_quintals': '30',
+        }, format='json')
+
+    def test_vehicle_belongs_to_the_callers_profile(self):
+        user = User.objects.create_user('9000000511', 'logistics')
+        partner = LogisticsPartner.objects.create(user=user, company_name='Own Fleet')
+
+        response = self._add_vehicle(user)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Vehicle.objects.get(vehicle_number='MP09CD5678').logistics_partner, partner)
+
+    def test_user_without_a_profile_is_turned_away(self):
+        response = self._add_vehicle(User.objects.create_user('9000000512', 'logistics'))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['message'], 'Logistics partner profile required')
+        self.assertFalse(Vehicle.objects.exists())
+
+
+class TrackDownsamplingTests(SimpleTestCase):
+    """Douglas-Peucker keeps exactly the points off the line by more than the tolerance; buckets keep their last point"""
+
+    def _north(self, meters):
+        return math.degrees(meters / EARTH_RADIUS_M)
+
+    def _line(self, offsets):
+        # Points 100 m apart along the equator, each pushed north by its offset in metres
+        return [
+            [index, self._north(offset), math.degrees(100 * index / EARTH_RADIUS_M), None]
+            for index, offset in enumerate(offsets)
+        ]
+
+    def test_points_within_the_tolerance_are_dropped(self):
+        points = self._line([0, 4, 9.5, -9.5, 0])
+        self.assertEqual(douglas_peucker(points, 10), [points[0], points[-1]])
+
+    def test_points_beyond_the_tolerance_are_kept(self):
+        points = self._line([0, 4, 10.5, 3, -12, 0])
+        self.assertEqual([point[0] for point in douglas_peucker(points, 10)], [0, 2, 4, 5])
+
+    def test_zero_tolerance_and_short_tracks_are_unchanged(self):
+        points = self._line([0, 1, 2, 3])
+        self.assertEqual(douglas_peucker(points, 0), points)
+        self.assertEqual(douglas_peucker(points[:2], 10), points[:2])
+
+    def test_buckets_keep_the_first_point_and_each_bucket_last(self):
+        times = [0, 10, 29, 30, 31, 59, 60, 95]
+        thinned = bucket_points([[t, 0.0, 0.0, None] for t in times], 30)
+        # 30 and 60 open new buckets; 29 and 59 are the last of theirs
+        self.assertEqual([point[0] for point in thinned], [0, 29, 59, 60, 95])
+
+    def test_bucketing_leaves_short_tracks_and_zero_width_alone(self):
+        points = [[t, 0.0, 0.0, None] for t in (0, 1, 2, 3)]
+        self.assertEqual(bucket_points(points[:2], 30), points[:2])
+        self.assertEqual(bucket_points(points, 0), points)
+
+
+@override_settings(TELEMETRY_CHUNK_POINTS=4)
+class TelemetryAppendTests(TestCase):
+    """Late and repeated pings merge into time order, overflow opens a chunk, and the fix only moves forwards"""
+
+    def setUp(self):
+        self.partner = LogisticsPartner.objects.create(
+            user=User.objects.create_user('9000000801', 'logistics'), company_name='Ping Movers'
+        )
+        self.vehicle = Vehicle.objects.create(
+            logistics_partner=self.partner, vehicle_number='MP09PG0001', vehicle_type='small_truck',
+            capacity_quintals=Decimal('30'),
+        )
+        farmer = FarmerProfile.objects.create(
+            user=User.objects.create_user('9000000802', 'farmer'), full_name='Ping Farmer',
+            total_land_acres=Decimal('2.5'), farming_experience_years=5, district='Indore', state='madhya_pradesh',
+        )
+        lot = ProcurementLot.objects.create(
+            farmer=farmer, crop_type='soybean', quantity_quintals=Decimal('10'),
+            available_quantity_quintals=Decimal('10'), quality_grade='A',
+            expected_price_per_quintal=Decimal('4500'), harvest_date=datetime.date(2026, 10, 1),
+        )
+        self.shipment = Shipment.objects.create(
+            logistics_partner=self.partner, lot=lot, vehicle=self.vehicle, status='in_transit'
+        )
+        self.start = int(time.time()) - 3600
+
+    def _point(self, offset, latitude=22.7):
+        return [self.start + offset, latitude, 75.8, 40.0]
+
+    def _append(self, *points):
+        append_points({self.shipment.id: (self.vehicle.id, list(points))})
+
+    def _chunks(self):
+        return list(
+            ShipmentTrackChunk.objects.filter(shipment=self.shipment).order_by('started_at')
+            .values_list('point_count', 'points')
+        )
+
+    def test_late_and_repeated_pings_merge_into_the_open_chunk(self):
+        self._append(self._point(10), self._point(30))
+        self._append(self._point(0), self._point(30, latitude=22.8))
+
+        (count, points), = self._chunks()
+        self.assertEqual(count, 3)
+        self.assertEqual(points, [self._point(0), self._point(10), self._point(30, latitude=22.8)])
+
+    def test_a_full_chunk_spills_into_a_new_one(self):
+        self._append(self._point(0), self._point(10), self._point(20))
+        self._append(self._point(30), self._point(40), self._point(50))
+
+        self.assertEqual([count for count, _ in self._chunks()], [4, 2])
+        track = load_tracks([self.shipment.id], max_points=100)[self.shipment.id]
+        self.assertEqual([point[0] - self.start for point in track], [0, 10, 20, 30, 40, 50])
+
+    def test_a_late_upload_does_not_move_the_shipment_back(self):
+        self._append(self._point(60, latitude=22.9))
+        self._append(self._point(0, latitude=22.1))
+
+        self.shipment.refresh_from_db()
+        self.assertEqual(self.shipment.current_location_latitude, Decimal('22.900000'))
+        self.assertEqual(int(self.shipment.last_ping_at.timestamp()), self.start + 60)
+
+    def test_one_update_moves_each_shipment_to_its_own_fix(self):
+        other = Shipment.objects.create(
+            logistics_partner=self.partner, lot=self.shipment.lot, vehicle=self.vehicle, status='in_transit'
+        )
+        self._append(self._point(60, latitude=22.9))
+        append_points({
+            self.shipment.id: (self.vehicle.id, [self._point(0, latitude=22.1)]),
+            other.id: (self.vehicle.id, [self._point(10, latitude=23.1), self._point(20, latitude=23.2)]),
+        })
+
+        fixes = dict(Shipment.objects.values_list('id', 'current_location_latitude'))
+        self.assertEqual(fixes, {self.shipment.id: Decimal('22.900000'), other.id: Decimal('23.200000')})
+
+    def test_one_batch_is_sorted_and_deduplicated_before_it_is_stored(self):
+        result = ingest_telemetry(self.partner, [{
+            'vehicle_number': 'MP09PG0001',
+            'pings': [self._point(20), self._point(0), self._point(20, latitude=22.8), self._point(10)],
+        }])
+
+        self.assertEqual(result['accepted'], 3)
+        (count, points), = self._chunks()
+        self.assertEqual(points, [self._point(0), self._point(10), self._point(20, latitude=22.8)])
@@ -1,7 +1,7 @@
 """Logistics URLs - Consolidated"""
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import LogisticsPartnerViewSet, VehicleViewSet, ShipmentViewSet
+from .views import LogisticsPartnerViewSet, VehicleViewSet, ShipmentViewSet, TelemetryIngestAPIView, RoutePlanAPIView
 
 app_name = 'logistics'
 
@@ -11,5 +11,7 @@ router.register('vehicles', VehicleViewSet, basename='vehicle')
 router.register('shipments', ShipmentViewSet, basename='shipment')
 
 urlpatterns = [
+    path('telemetry/', TelemetryIngestAPIView.as_view(), name='telemetry-ingest'),
+    path('route-plans/', RoutePlanAPIView.as_view(), name='route-plans'),
     path('', include(router.urls)),
 ]
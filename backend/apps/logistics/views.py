@@ -1,8 +1,12 @@
 """Logistics Views"""
+import uuid
+
 from rest_framework import viewsets, status, generics
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+from django.conf import settings
 from django.shortcuts import get_object_or_404
 
 from .models import LogisticsPartner, Vehicle, Shipment
@@ -11,8 +15,12 @@ from .serializers import (
     LogisticsPartnerUpdateSerializer, VehicleSerializer,
     VehicleCreateSerializer, ShipmentSerializer, ShipmentCreateSerializer
 )
+from apps.core.fieldsets import SparseFieldsetViewMixin
 from apps.core.utils import response_success, response_error
-from apps.core.permissions import IsOwner
+from apps.core.services import get_role_profile
+from apps.core.permissions import IsOwner, IsLogistics
+from .services import ingest_telemetry, load_tracks, plan_lot_pickups
+from .services.telemetry_service import POINT_FORMAT
 
 
 class LogisticsPartnerViewSet(viewsets.ModelViewSet):
@@ -132,7 +140,7 @@ class LogisticsPartnerViewSet(viewsets.ModelViewSet):
     def my_stats(self, request):
         """Get current user's logistics partner statistics"""
         try:
-            partner = LogisticsPartner.objects.select_related('user').get(user=request.user)
+            partner = get_role_profile(request, LogisticsPartner)
             
             stats_data = {
                 'total_vehicles': partner.vehicles.filter(is_active=True).count(),
@@ -176,8 +184,9 @@ class VehicleViewSet(viewsets.ModelViewSet):
         queryset = super().get_queryset()
         
         # Logistics partners see only their own vehicles
-        if hasattr(self.request.user, 'logistics_profile'):
-            queryset = queryset.filter(logistics_partner=self.request.user.logistics_profile)
+        partner = get_role_profile(self.request)
+        if isinstance(partner, LogisticsPartner):
+            queryset = queryset.filter(logistics_partner=partner)
         
         # Filter by vehicle type
         vehicle_type = self.request.query_params.get('vehicle_type')
@@ -188,7 +197,9 @@ class VehicleViewSet(viewsets.ModelViewSet):
     
     def create(self, request, *args, **kwargs):
         # Check if user has logistics profile
-        if not hasattr(request.user, 'logistics_profile'):
+        try:
+            partner = get_role_profile(request, LogisticsPartner)
+        except LogisticsPartner.DoesNotExist:
             return Response(
                 response_error(message="Logistics partner profile required"),
                 status=status.HTTP_400_BAD_REQUEST
@@ -196,7 +207,7 @@ class VehicleViewSet(viewsets.ModelViewSet):
         
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
-            serializer.save(logistics_partner=request.user.logistics_profile)
+            serializer.save(logistics_partner=partner)
             return Response(
                 response_success(
                     message="Vehicle added successfully",
@@ -210,7 +221,7 @@ class VehicleViewSet(viewsets.ModelViewSet):
         )
 
 
-class ShipmentViewSet(viewsets.ModelViewSet):
+class ShipmentViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     """
     ViewSet for shipments
     """
@@ -228,8 +239,9 @@ class ShipmentViewSet(viewsets.ModelViewSet):
         queryset = super().get_queryset()
         
         # Logistics partners see only their own shipments
-        if hasattr(self.request.user, 'logistics_profile'):
-            queryset = queryset.filter(logistics_partner=self.request.user.logistics_profile)
+        partner = get_role_profile(self.request)
+        if isinstance(partner, LogisticsPartner):
+            queryset = queryset.filter(logistics_partner=partner)
         
         # Filter by status
         status_filter = self.request.query_params.get('status')
@@ -245,7 +257,9 @@ class ShipmentViewSet(viewsets.ModelViewSet):
     
     def create(self, request, *args, **kwargs):
         # Check if user has logistics profile
-        if not hasattr(request.user, 'logistics_profile'):
+        try:
+            partner = get_role_profile(request, LogisticsPartner)
+        except LogisticsPartner.DoesNotExist:
             return Response(
                 response_error(message="Logistics partner profile required"),
                 status=status.HTTP_400_BAD_REQUEST
@@ -253,7 +267,7 @@ class ShipmentViewSet(viewsets.ModelViewSet):
         
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
-            serializer.save(logistics_partner=request.user.logistics_profile)
+            serializer.save(logistics_partner=partner)
             return Response(
                 response_success(
                     message="Shipment created successfully",
@@ -309,3 +323,149 @@ class ShipmentViewSet(viewsets.ModelViewSet):
                 data=ShipmentSerializer(shipment).data
             )
         )
+    
+    @action(detail=True, methods=['get'])
+    def track(self, request, pk=None):
+        """GPS track, downsampled to ?max_points; ?since=<epoch seconds> for new points only"""
+        shipment = self.get_object()
+        try:
+            max_points = min(int(request.query_params.get('max_points', settings.TELEMETRY_TRACK_MAX_POINTS)), 5000)
+            since = int(request.query_params['since']) if request.query_params.get('since') else None
+        except ValueError:
+            return Response(
+                response_error(message="max_points and since must be integers"),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response(
+            response_success(
+                message="Shipment track fetched successfully",
+                data={
+                    'shipment_id': str(shipment.id),
+                    'status': shipment.status,
+                    'current_latitude': shipment.current_location_latitude,
+                    'current_longitude': shipment.current_location_longitude,
+                    'last_ping_at': shipment.last_ping_at,
+                    'point_format': POINT_FORMAT,
+                    'points': load_tracks([shipment.id], max(max_points, 2), since)[shipment.id],
+                }
+            )
+        )
+
+
+class TelemetryIngestAPIView(APIView):
+    """
+    Batched GPS pings from logistics vehicles
+    POST /api/logistics/telemetry/
+
+    Body: {"vehicle_number": "...", "pings": [[t, lat, lng, speed], ...]}
+    or {"batches": [...]} with one such object per vehicle or shipment
+    """
+    permission_classes = [IsAuthenticated, IsLogistics]
+    
+    def post(self, request):
+        partner = get_role_profile(request)
+        if not isinstance(partner, LogisticsPartner):
+            return Response(
+                response_error(message="Logistics partner profile required"),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        batches = request.data.get('batches', [request.data]) if isinstance(request.data, dict) else request.data
+        try:
+            result = ingest_telemetry(partner, batches)
+        except ValueError as e:
+            return Response(
+                response_error(message=str(e)),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if not result['accepted']:
+            return Response(
+                response_error(message="No pings were accepted", errors={'rejected': result['rejected']}),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(
+            response_success(
+                message=f"{result['accepted']} pings recorded",
+                data=result
+            )
+        )
+
+
+class RoutePlanAPIView(APIView):
+    """
+    Consolidate lot pickups into multi-stop routes over the partner's vehicles
+    POST /api/logistics/route-plans/
+
+    Body: {"lot_ids": [...]} or {"fpo_id": "..."} (the FPO's sold lots awaiting
+    pickup), plus optional "depot": {"latitude", "longitude"} (defaults to the
+    FPO), "vehicle_ids", "distance_matrix" (km, depot first, then lot_ids in
+    order) and "max_trips". Returns the plan; nothing is saved.
+    """
+    permission_classes = [IsAuthenticated, IsLogistics]
+    
+    def post(self, request):
+        from apps.fpos.models import FPOProfile
+        
+        partner = get_role_profile(request)
+        if not isinstance(partner, LogisticsPartner):
+            return Response(
+                response_error(message="Logistics partner profile required"),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        fpo = None
+        if request.data.get('fpo_id'):
+            try:
+                fpo = FPOProfile.objects.filter(id=uuid.UUID(str(request.data['fpo_id']))).first()
+            except ValueError:
+                fpo = None
+            if fpo is None:
+                return Response(
+                    response_error(message="FPO not found"),
+                    status=status.HTTP_404_NOT_FOUND
+                )
+        
+        depot = request.data.get('depot')
+        if depot is not None:
+            try:
+                depot = (float(depot['latitude']), float(depot['longitude']))
+            except (KeyError, TypeError, ValueError):
+                return Response(
+                    response_error(message="depot needs numeric latitude and longitude"),
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
+        try:
+            max_trips = int(request.data.get('max_trips', 3))
+        except (TypeError, ValueError):
+            max_trips = None
+        if max_trips is None or not 1 <= max_trips <= 10:
+            return Response(
+                response_error(message="max_trips must be an integer between 1 and 10"),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            plan = plan_lot_pickups(
+                partner,
+                lot_ids=request.data.get('lot_ids'),
+                fpo=fpo,
+                depot=depot,
+                vehicle_ids=request.data.get('vehicle_ids'),
+                matrix=request.data.get('distance_matrix'),
+                max_trips=max_trips,
+            )
+        except ValueError as e:
+            return Response(
+                response_error(message=str(e)),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response(
+            response_success(
+                message=f"{len(plan['routes'])} routes planned for {plan['stops_planned']} lots",
+                data=plan
+            )
+        )
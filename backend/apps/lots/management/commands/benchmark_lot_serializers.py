@@ -0,0 +1,113 @@
+"""
+Compare listing serialization cost: ProcurementLotSerializer vs ProcurementLotListSerializer
+"""
+import datetime
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from apps.farmers.models import FarmerProfile
+from apps.fpos.models import FPOWarehouse
+from apps.lots.models import ProcurementLot, LotImage, LotStatusHistory
+from apps.lots.serializers import ProcurementLotSerializer, ProcurementLotListSerializer
+
+
+class Command(BaseCommand):
+    help = "Benchmark full vs compact lot list serialization (µs/row) on synthetic lots, rolled back afterwards"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lots', type=int, default=10000, help="Synthetic lots to create")
+        parser.add_argument('--repeat', type=int, default=3, help="Runs per serializer; the best is reported")
+
+    def handle(self, *args, **options):
+        farmers = list(FarmerProfile.objects.select_related('fpo')[:50])
+        warehouses = list(FPOWarehouse.objects.select_related('fpo')[:10])
+        if not farmers or not warehouses:
+            raise CommandError("Needs at least one farmer profile and one FPO warehouse (run seed_data.py first)")
+
+        with transaction.atomic():
+            lot_ids = self._create_lots(options['lots'], farmers, warehouses)
+            queryset = ProcurementLot.objects.filter(id__in=lot_ids).order_by('-created_at')
+
+            full = self._measure(options['repeat'], len(lot_ids), lambda: ProcurementLotSerializer(
+                queryset.select_related('farmer', 'farmer__user', 'fpo', 'warehouse')
+                .prefetch_related('images', 'status_history'),
+                many=True
+            ).data)
+            compact = self._measure(options['repeat'], len(lot_ids), lambda: ProcurementLotListSerializer(
+                ProcurementLotListSerializer.project(queryset),
+                many=True
+            ).data)
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{len(lot_ids)} lots")
+        for name, (us_per_row, queries) in (('ProcurementLotSerializer', full), ('ProcurementLotListSerializer', compact)):
+            self.stdout.write(f"{name:30} {us_per_row:10.1f} µs/row {queries:6} queries")
+        self.stdout.write(self.style.SUCCESS(f"Speed-up: {full[0] / compact[0]:.1f}x"))
+
+    def _measure(self, repeat, rows, serialize):
+        # Counted with a wrapper: connection.queries is capped at 9000 entries
+        queries = []
+
+        def count(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        best = None
+        for _ in range(repeat):
+            queries.clear()
+            with connection.execute_wrapper(count):
+                started = time.perf_counter()
+                serialize()
+                elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best / rows * 1e6, len(queries)
+
+    def _create_lots(self, count, farmers, warehouses):
+        """Individual lots with an image and status history; every 10th is FPO-aggregated"""
+        rng = random.Random(42)
+        lot_numbers = iter(ProcurementLot.allocate_lot_numbers('soybean', count))
+        lots = []
+        for index in range(count):
+            farmer = farmers[index % len(farmers)]
+            warehouse = warehouses[index % len(warehouses)]
+            aggregated = index % 10 == 0
+            quantity = Decimal(rng.randint(5, 200))
+            lots.append(ProcurementLot(
+                lot_number=next(lot_numbers),
+                farmer=None if aggregated else farmer,
+                fpo=warehouse.fpo if aggregated else farmer.fpo,
+                listing_type='fpo_aggregated' if aggregated else 'individual',
+                warehouse=warehouse,
+                crop_type='soybean',
+                harvest_date=datetime.date.today() - datetime.timedelta(days=rng.randint(1, 90)),
+                quantity_quintals=quantity,
+                available_quantity_quintals=quantity,
+                quality_grade=rng.choice(['A+', 'A', 'B', 'C']),
+                expected_price_per_quintal=Decimal(rng.randint(4000, 5500)),
+                status='available',
+                description='Synthetic benchmark lot',
+            ))
+        ProcurementLot.objects.bulk_create(lots, batch_size=1000)
+
+        LotImage.objects.bulk_create(
+            [LotImage(lot=lot, image=f'lot_images/{lot.lot_number}.jpg', is_primary=True) for lot in lots],
+            batch_size=1000
+        )
+        LotStatusHistory.objects.bulk_create([
+            LotStatusHistory(lot=lot, old_status=old, new_status=new)
+            for lot in lots
+            for old, new in (('', 'draft'), ('draft', 'available'), ('available', 'available'))
+        ], batch_size=1000)
+
+        through = ProcurementLot.source_warehouses.through
+        through.objects.bulk_create([
+            through(procurementlot_id=lot.id, fpowarehouse_id=warehouse.id)
+            for lot in lots if lot.listing_type == 'fpo_aggregated'
+            for warehouse in warehouses[:3]
+        ], batch_size=1000)
+        return [lot.id for lot in lots]
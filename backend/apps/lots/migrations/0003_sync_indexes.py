@@ -0,0 +1,21 @@
+# Generated by Django 4.2.27 on 2026-10-19 10:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lots', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='procurementlot',
+            index=models.Index(fields=['farmer', 'updated_at'], name='procurement_farmer__d0881f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='procurementlot',
+            index=models.Index(fields=['fpo', 'updated_at'], name='procurement_fpo_id_7e8ffa_idx'),
+        ),
+    ]
@@ -221,6 +221,9 @@ class ProcurementLot(TimeStampedModel):
             models.Index(fields=['status', 'crop_type']),
             models.Index(fields=['farmer', 'status']),
             models.Index(fields=['listed_date']),
+            # Delta sync (/api/sync/) reads each owner's rows by updated_at
+            models.Index(fields=['farmer', 'updated_at']),
+            models.Index(fields=['fpo', 'updated_at']),
         ]
     
     def __str__(self):
@@ -248,44 +251,53 @@ class ProcurementLot(TimeStampedModel):
         
         super().save(*args, **kwargs)
     
+    CROP_CODES = {
+        'soybean': 'SB',
+        'mustard': 'MS',
+        'groundnut': 'GN',
+        'sunflower': 'SF',
+        'safflower': 'SA',
+        'sesame': 'SE',
+        'linseed': 'LS',
+        'niger': 'NG',
+    }
+    
     def generate_lot_number(self):
         """Generate unique lot number: SB2025001"""
-        crop_codes = {
-            'soybean': 'SB',
-            'mustard': 'MS',
-            'groundnut': 'GN',
-            'sunflower': 'SF',
-            'safflower': 'SA',
-            'sesame': 'SE',
-            'linseed': 'LS',
-            'niger': 'NG',
-        }
-        
-        crop_code = crop_codes.get(self.crop_type, 'XX')
-        year = datetime.datetime.now().year
-        
-        # Get last lot number for this crop this year
-        last_lot = ProcurementLot.objects.filter(
-            lot_number__startswith=f"{crop_code}{year}"
-        ).order_by('-lot_number').first()
+        return self.allocate_lot_numbers(self.crop_type, 1)[0]
+    
+    @classmethod
+    def allocate_lot_numbers(cls, crop_type, count):
+        """
+        Reserve `count` lot numbers for a crop in one atomic counter update
+        Sequence keeps growing past 999 (SB20251000) instead of wrapping
+        """
+        from apps.core.services import allocate_sequence, max_numeric_suffix
         
-        if last_lot:
-            last_seq = int(last_lot.lot_number[-3:])
-            new_seq = last_seq + 1
-        else:
-            new_seq = 1
+        crop_code = cls.CROP_CODES.get(crop_type, 'XX')
+        year = str(datetime.datetime.now().year)
+        prefix = f"{crop_code}{year}"
         
-        return f"{crop_code}{year}{new_seq:03d}"
+        sequence = allocate_sequence(
+            crop_code, year, count,
+            seed=lambda: max_numeric_suffix(cls.objects.all(), 'lot_number', prefix)
+        )
+        return [f"{prefix}{seq:03d}" for seq in sequence]
     
     def increment_view_count(self):
-        """Increment view counter"""
-        self.view_count += 1
-        self.save(update_fields=['view_count'])
+        """Increment view counter (queued F() update, so concurrent views are not lost)"""
+        self._increment_counter('view_count')
     
     def increment_bid_count(self):
         """Increment bid counter"""
-        self.bid_count += 1
-        self.save(update_fields=['bid_count'])
+        self._increment_counter('bid_count')
+    
+    def _increment_counter(self, field):
+        from django.db.models import F
+        from apps.core.write_queue import enqueue_write
+        
+        setattr(self, field, getattr(self, field) + 1)
+        enqueue_write(ProcurementLot.objects.filter(pk=self.pk).update, **{field: F(field) + 1})
 
 
 class LotImage(TimeStampedModel):
@@ -1,7 +1,11 @@
 """
 Lots Serializers for SeedSync Platform
 """
+from decimal import Decimal
+from django.core.files.storage import default_storage
 from rest_framework import serializers
+from apps.core.constants import OILSEED_CHOICES, QUALITY_GRADE_CHOICES
+from apps.core.fieldsets import SparseFieldsetMixin, requested_fieldset
 from .models import ProcurementLot, LotImage, LotStatusHistory
 
 
@@ -23,8 +27,8 @@ class LotStatusHistorySerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class ProcurementLotSerializer(serializers.ModelSerializer):
-    """Procurement lot serializer"""
+class ProcurementLotSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Procurement lot serializer; supports ?fields= and ?expand=farmer,fpo,warehouse"""
     images = LotImageSerializer(many=True, read_only=True)
     status_history = LotStatusHistorySerializer(many=True, read_only=True)
     
@@ -49,6 +53,16 @@ class ProcurementLotSerializer(serializers.ModelSerializer):
         model = ProcurementLot
         exclude = ['source_warehouses', 'parent_lots']  # Exclude M2M fields, use SerializerMethodFields instead
         read_only_fields = ['id', 'lot_number', 'created_at', 'updated_at', 'blockchain_hash']
+        expandable_fields = {
+            'farmer': ('apps.farmers.serializers.FarmerProfileSerializer', {}),
+            'fpo': ('apps.fpos.serializers.FPOProfileSerializer', {}),
+            'warehouse': ('apps.fpos.serializers.FPOWarehouseSerializer', {}),
+        }
+        field_sources = {
+            'farmer_name': ('listing_type', 'farmer.user.profile', 'farmer.user.phone_number', 'fpo.organization_name'),
+            'source_warehouse_ids': ('listing_type', 'source_warehouses'),
+            'source_warehouse_names': ('listing_type', 'source_warehouses'),
+        }
     
     def get_farmer_name(self, obj):
         """
@@ -72,6 +86,172 @@ class ProcurementLotSerializer(serializers.ModelSerializer):
         return []
 
 
+class ProcurementLotListRowsSerializer(serializers.ListSerializer):
+    """Loads images and source warehouses for a whole page of lot rows at once"""
+    
+    def to_representation(self, data):
+        rows = list(data)
+        lot_ids = [row['id'] for row in rows]
+        fields, _ = requested_fieldset(self.context.get('request'))
+        
+        images = {}
+        if fields is None or 'images' in fields:
+            for image in LotImage.objects.filter(lot_id__in=lot_ids).values('id', 'lot_id', 'image', 'caption', 'is_primary'):
+                images.setdefault(image['lot_id'], []).append(image)
+        
+        # One query for every aggregated lot's source warehouses on the page
+        sources = {}
+        aggregated = [row['id'] for row in rows if row.get('listing_type') == 'fpo_aggregated']
+        if fields is not None and not {'source_warehouse_ids', 'source_warehouse_names'} & set(fields):
+            aggregated = []
+        if aggregated:
+            through = ProcurementLot.source_warehouses.through.objects.filter(
+                procurementlot_id__in=aggregated
+            ).order_by('-fpowarehouse__created_at')
+            for lot_id, warehouse_id, name in through.values_list(
+                'procurementlot_id', 'fpowarehouse_id', 'fpowarehouse__warehouse_name'
+            ):
+                sources.setdefault(lot_id, []).append((warehouse_id, name))
+        
+        for row in rows:
+            row['_images'] = images.get(row['id'], [])
+            row['_source_warehouses'] = sources.get(row['id'], [])
+        return [self.child.to_representation(row) for row in rows]
+
+
+class ProcurementLotListSerializer(serializers.BaseSerializer):
+    """
+    Compact lot representation for listings
+    Same keys as ProcurementLotSerializer without status_history, and images
+    reduced to id/image/caption/is_primary. Serializes rows from project()
+    (a .values() queryset) instead of model instances.
+    """
+    # Model fields copied through the full serializer's field formatting
+    MODEL_FIELDS = [
+        'id', 'created_at', 'updated_at', 'is_active', 'lot_number', 'managed_by_fpo', 'listing_type',
+        'crop_type', 'crop_master_code', 'crop_variety', 'crop_variety_code', 'harvest_date',
+        'quantity_quintals', 'available_quantity_quintals', 'quality_grade', 'moisture_content',
+        'oil_content', 'expected_price_per_quintal', 'final_price_per_quintal', 'location_latitude',
+        'location_longitude', 'pickup_address', 'status', 'listed_date', 'sold_date', 'delivered_date',
+        'description', 'storage_conditions', 'organic_certified', 'qr_code_url', 'blockchain_tx_id',
+        'view_count', 'bid_count',
+    ]
+    RELATED_FIELDS = [
+        'farmer_id', 'fpo_id', 'warehouse_id',
+        'fpo__organization_name',
+        'farmer__user__phone_number', 'farmer__user__profile__full_name',
+        'warehouse__warehouse_name', 'warehouse__warehouse_code', 'warehouse__district',
+    ]
+    
+    # Row columns behind the keys that are not model fields, for ?fields=
+    DERIVED_SOURCES = {
+        'farmer_name': [
+            'listing_type', 'farmer_id', 'fpo__organization_name',
+            'farmer__user__profile__full_name', 'farmer__user__phone_number',
+        ],
+        'fpo_name': ['fpo__organization_name'],
+        'crop_type_display': ['crop_type'],
+        'quality_grade_display': ['quality_grade'],
+        'status_display': ['status'],
+        'warehouse_id': ['warehouse_id'],
+        'warehouse_name': ['warehouse__warehouse_name'],
+        'warehouse_code': ['warehouse__warehouse_code'],
+        'warehouse_district': ['warehouse__district'],
+        'source_warehouse_ids': ['listing_type'],
+        'source_warehouse_names': ['listing_type'],
+        'farmer': ['farmer_id'],
+        'fpo': ['fpo_id'],
+        'warehouse': ['warehouse_id'],
+    }
+    
+    class Meta:
+        list_serializer_class = ProcurementLotListRowsSerializer
+    
+    @classmethod
+    def project(cls, queryset, fields=None):
+        """
+        Narrow a lot queryset to the columns a listing row needs
+        fields: the ?fields= keys, to select only what they are built from
+        """
+        if fields is None:
+            return queryset.prefetch_related(None).values(*cls.MODEL_FIELDS, *cls.RELATED_FIELDS)
+        columns = ['id'] + [name for name in cls.MODEL_FIELDS if name in fields]
+        for name in fields:
+            columns += cls.DERIVED_SOURCES.get(name, [])
+        return queryset.prefetch_related(None).values(*dict.fromkeys(columns))
+    
+    @classmethod
+    def _formatters(cls):
+        # Built once; the field objects are stateless for to_representation
+        if not hasattr(cls, '_field_formatters'):
+            fields = ProcurementLotSerializer().fields
+            cls._field_formatters = [(name, fields[name].to_representation) for name in cls.MODEL_FIELDS]
+            cls._choices = {
+                name: dict(ProcurementLot._meta.get_field(name).flatchoices)
+                for name in ('crop_type', 'quality_grade', 'status')
+            }
+        return cls._field_formatters, cls._choices
+    
+    def to_representation(self, row):
+        formatters, choices = self._formatters()
+        data = {
+            name: (None if row[name] is None else format(row[name]))
+            for name, format in formatters if name in row
+        }
+        # A ?fields= projection carries only the columns its keys need
+        row = _Row(row)
+        
+        # Same rule as ProcurementLotSerializer.get_farmer_name
+        if row['listing_type'] == 'fpo_aggregated' and row['farmer_id'] is None:
+            farmer_name = row['fpo__organization_name'] or 'FPO'
+        elif row['farmer_id']:
+            farmer_name = row['farmer__user__profile__full_name'] or row['farmer__user__phone_number']
+        else:
+            farmer_name = 'Unknown'
+        
+        request = self.context.get('request')
+        images = []
+        for image in row.get('_images', []):
+            url = default_storage.url(image['image']) if image['image'] else None
+            images.append({
+                'id': str(image['id']),
+                'image': request.build_absolute_uri(url) if request and url else url,
+                'caption': image['caption'],
+                'is_primary': image['is_primary'],
+            })
+        
+        sources = row.get('_source_warehouses', [])
+        data.update({
+            'images': images,
+            'farmer_name': farmer_name,
+            'fpo_name': row['fpo__organization_name'],
+            'crop_type_display': choices['crop_type'].get(row['crop_type'], row['crop_type']),
+            'quality_grade_display': choices['quality_grade'].get(row['quality_grade'], row['quality_grade']),
+            'status_display': choices['status'].get(row['status'], row['status']),
+            'warehouse_id': str(row['warehouse_id']) if row['warehouse_id'] else None,
+            'warehouse_name': row['warehouse__warehouse_name'],
+            'warehouse_code': row['warehouse__warehouse_code'],
+            'warehouse_district': row['warehouse__district'],
+            'source_warehouse_ids': [str(warehouse_id) for warehouse_id, _ in sources],
+            'source_warehouse_names': [name for _, name in sources],
+            'farmer': row['farmer_id'],
+            'fpo': row['fpo_id'],
+            'warehouse': row['warehouse_id'],
+        })
+        
+        fields, _ = requested_fieldset(request)
+        if fields is not None:
+            data = {name: value for name, value in data.items() if name in fields}
+        return data
+
+
+class _Row(dict):
+    """A projected row; columns left out of a ?fields= projection read as None"""
+    
+    def __missing__(self, key):
+        return None
+
+
 class ProcurementLotCreateSerializer(serializers.ModelSerializer):
     """Procurement lot create serializer"""
     uploaded_images = serializers.ListField(
@@ -136,3 +316,29 @@ class ProcurementLotCreateSerializer(serializers.ModelSerializer):
         # FPO will assign warehouse later via assign-warehouse endpoint
         
         return lot
+
+
+class LotImportRowSerializer(serializers.Serializer):
+    """
+    One row of an FPO bulk lot import (CSV/XLSX)
+    Plain Serializer: validates values only, lots are written in bulk
+    """
+    farmer_phone_number = serializers.CharField(required=False)
+    farmer_id = serializers.UUIDField(required=False)
+    crop_type = serializers.ChoiceField(choices=OILSEED_CHOICES)
+    crop_variety = serializers.CharField(required=False, max_length=100, default='')
+    crop_master_code = serializers.CharField(required=False, max_length=50, default='')
+    crop_variety_code = serializers.CharField(required=False, max_length=50, default='')
+    quantity_quintals = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0.01'))
+    expected_price_per_quintal = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0.01'))
+    harvest_date = serializers.DateField(input_formats=['%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y'])
+    quality_grade = serializers.ChoiceField(choices=QUALITY_GRADE_CHOICES, required=False, allow_null=True, default=None)
+    moisture_content = serializers.DecimalField(max_digits=5, decimal_places=2, required=False, allow_null=True, default=None)
+    oil_content = serializers.DecimalField(max_digits=5, decimal_places=2, required=False, allow_null=True, default=None)
+    description = serializers.CharField(required=False, default='')
+    warehouse_code = serializers.CharField(required=False, max_length=50)
+    
+    def validate(self, attrs):
+        if not attrs.get('farmer_phone_number') and not attrs.get('farmer_id'):
+            raise serializers.ValidationError('Either farmer_phone_number or farmer_id is required')
+        return attrs
@@ -0,0 +1,4 @@
+# Services module
+from .lot_import_service import import_fpo_lots, iter_upload_rows
+
+__all__ = ['import_fpo_lots', 'iter_upload_rows']
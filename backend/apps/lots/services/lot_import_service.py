@@ -0,0 +1,352 @@
+"""
+Lot Import Service for SeedSync Platform
+Bulk onboarding of member harvest data from CSV/XLSX uploads
+"""
+import codecs
+import csv
+import datetime
+import logging
+import time
+
+from django.db import transaction
+from django.db.models import F
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+from apps.core.constants import BLOCKCHAIN_CREATED
+from apps.core.services import index_objects
+from apps.core.utils import format_phone_number
+
+
+logger = logging.getLogger(__name__)
+
+IMPORT_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+
+
+def _normalise_header(value):
+    return str(value or '').strip().lower().replace(' ', '_')
+
+
+def _clean_value(value):
+    """Drop empty cells so optional serializer fields fall back to defaults"""
+    if value is None:
+        return None
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+def iter_upload_rows(uploaded_file):
+    """
+    Stream (row_number, row_dict) from a CSV or XLSX upload
+    Rows are read one at a time; the file is never loaded whole
+    """
+    name = (uploaded_file.name or '').lower()
+
+    if name.endswith('.xlsx'):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ValueError("Excel import requires openpyxl. Upload a CSV file instead.")
+
+        workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
+        rows = workbook.active.iter_rows(values_only=True)
+    elif name.endswith('.csv'):
+        rows = csv.reader(codecs.iterdecode(uploaded_file, 'utf-8-sig'))
+    else:
+        raise ValueError("Unsupported file type. Upload a .csv or .xlsx file.")
+
+    header = next(rows, None)
+    if not header:
+        raise ValueError("The uploaded file is empty")
+    header = [_normalise_header(column) for column in header]
+
+    # Row 1 is the header, so data rows start at 2 (matches spreadsheet numbering)
+    for row_number, values in enumerate(rows, start=2):
+        row = {
+            column: _clean_value(value)
+            for column, value in zip(header, values)
+            if column and _clean_value(value) is not None
+        }
+        if row:
+            yield row_number, row
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class _ImportContext:
+    """FPO lookups loaded once per import instead of once per row"""
+
+    def __init__(self, fpo):
+        from apps.fpos.models import FPOMembership, FPOWarehouse
+
+        self.fpo = fpo
+        self.members_by_id = {}
+        self.members_by_phone = {}
+        memberships = FPOMembership.objects.filter(
+            fpo=fpo, is_active=True
+        ).select_related('farmer__user')
+        for membership in memberships:
+            farmer = membership.farmer
+            self.members_by_id[farmer.id] = farmer
+            self.members_by_phone[farmer.user.phone_number] = farmer
+
+        self.warehouses = {
+            warehouse.warehouse_code: warehouse
+            for warehouse in FPOWarehouse.objects.filter(fpo=fpo, is_active=True)
+        }
+        # Capacity still free per warehouse, reserved as rows are accepted.
+        # Only a first check: _write_chunk re-checks against the row it updates.
+        self.free_capacity = {
+            warehouse.id: warehouse.get_available_capacity()
+            for warehouse in self.warehouses.values()
+        }
+
+    def refresh_capacity(self, warehouse_ids):
+        """Re-read free capacity, e.g. after a failed chunk released its reservations"""
+        from apps.fpos.models import FPOWarehouse
+
+        for warehouse in FPOWarehouse.objects.filter(id__in=warehouse_ids):
+            self.free_capacity[warehouse.id] = warehouse.get_available_capacity()
+
+    def resolve_farmer(self, data):
+        if data.get('farmer_id'):
+            return self.members_by_id.get(data['farmer_id'])
+        try:
+            phone = format_phone_number(data['farmer_phone_number'])
+        except ValidationError:
+            return None
+        return self.members_by_phone.get(phone)
+
+
+def _validate_chunk(rows, context, errors):
+    """Return accepted (row_number, data, farmer, warehouse) tuples for a chunk"""
+    from apps.lots.serializers import LotImportRowSerializer
+
+    accepted = []
+    for row_number, row in rows:
+        serializer = LotImportRowSerializer(data=row)
+        if not serializer.is_valid():
+            errors.append({'row': row_number, 'errors': serializer.errors})
+            continue
+        data = serializer.validated_data
+
+        farmer = context.resolve_farmer(data)
+        if not farmer:
+            errors.append({'row': row_number, 'errors': {'farmer': ['Farmer is not an active member of your FPO']}})
+            continue
+
+        warehouse = None
+        if data.get('warehouse_code'):
+            warehouse = context.warehouses.get(data['warehouse_code'])
+            if not warehouse:
+                errors.append({'row': row_number, 'errors': {'warehouse_code': ['Warehouse not found or not owned by your FPO']}})
+                continue
+            if data['quantity_quintals'] > context.free_capacity[warehouse.id]:
+                errors.append({'row': row_number, 'errors': {'warehouse_code': [
+                    f"Insufficient capacity in {warehouse.warehouse_name}. "
+                    f"Available: {context.free_capacity[warehouse.id]} quintals"
+                ]}})
+                continue
+            context.free_capacity[warehouse.id] -= data['quantity_quintals']
+
+        accepted.append((row_number, data, farmer, warehouse))
+    return accepted
+
+
+def _ledger_entry(lot, farmer, imported_by):
+    """lot_created ledger entry, same payload as the post_save signal"""
+    from apps.blockchain.models import BlockchainTransaction
+
+    return BlockchainTransaction(
+        lot=lot,
+        action_type=BLOCKCHAIN_CREATED,
+        actor_id=farmer.user.id,
+        actor_role=farmer.user.role,
+        actor_name=farmer.user.get_full_name(),
+        transaction_data={
+            'event': 'lot_created',
+            'lot_number': lot.lot_number,
+            'farmer_details': {
+                'name': farmer.user.get_full_name(),
+                'phone': farmer.user.phone_number,
+                'location': {
+                    'village': farmer.village,
+                    'district': farmer.district,
+                    'state': farmer.state
+                }
+            },
+            'crop_details': {
+                'crop_type': lot.crop_type,
+                'crop_variety': lot.crop_variety,
+                'quantity_quintals': float(lot.quantity_quintals),
+                'harvest_date': lot.harvest_date.isoformat(),
+                'expected_price': float(lot.expected_price_per_quintal)
+            },
+            'quality_parameters': {
+                'quality_grade': lot.quality_grade,
+                'moisture_content': float(lot.moisture_content) if lot.moisture_content else None,
+                'oil_content': float(lot.oil_content) if lot.oil_content else None
+            },
+            'source': 'bulk_import',
+            'imported_by': str(imported_by.id),
+            'timestamp': timezone.now().isoformat()
+        },
+        location_latitude=lot.location_latitude,
+        location_longitude=lot.location_longitude
+    )
+
+
+def _write_chunk(accepted, context, imported_by):
+    """Create lots, inventory, stock movements and ledger entries for one chunk"""
+    from apps.lots.models import ProcurementLot
+    from apps.warehouses.models import Inventory, StockMovement
+    from apps.fpos.models import FPOWarehouse
+    from apps.blockchain.models import BlockchainTransaction
+
+    rows_per_crop = {}
+    for _, data, _, _ in accepted:
+        rows_per_crop[data['crop_type']] = rows_per_crop.get(data['crop_type'], 0) + 1
+
+    stock_in = {}
+    for _, data, _, warehouse in accepted:
+        if warehouse:
+            stock_in[warehouse] = stock_in.get(warehouse, 0) + data['quantity_quintals']
+
+    with transaction.atomic():
+        # Conditional bump: a concurrent import or intake since validation fails the chunk
+        # instead of overfilling the warehouse
+        for warehouse, quantity in stock_in.items():
+            if not FPOWarehouse.objects.filter(
+                id=warehouse.id, current_stock_quintals__lte=F('capacity_quintals') - quantity
+            ).update(
+                current_stock_quintals=F('current_stock_quintals') + quantity,
+                updated_at=timezone.now()
+            ):
+                raise ValueError(f"Insufficient capacity in {warehouse.warehouse_name}")
+
+        # One counter update per crop for the whole chunk
+        lot_numbers = {
+            crop_type: iter(ProcurementLot.allocate_lot_numbers(crop_type, count))
+            for crop_type, count in rows_per_crop.items()
+        }
+
+        lots = []
+        for _, data, farmer, warehouse in accepted:
+            lots.append(ProcurementLot(
+                lot_number=next(lot_numbers[data['crop_type']]),
+                farmer=farmer,
+                fpo=context.fpo,
+                managed_by_fpo=True,
+                listing_type='fpo_managed',
+                warehouse=warehouse,
+                crop_type=data['crop_type'],
+                crop_variety=data['crop_variety'],
+                crop_master_code=data['crop_master_code'],
+                crop_variety_code=data['crop_variety_code'],
+                harvest_date=data['harvest_date'],
+                quantity_quintals=data['quantity_quintals'],
+                available_quantity_quintals=data['quantity_quintals'],
+                quality_grade=data['quality_grade'],
+                moisture_content=data['moisture_content'],
+                oil_content=data['oil_content'],
+                expected_price_per_quintal=data['expected_price_per_quintal'],
+                # Same fallback as ProcurementLot.save()
+                location_latitude=farmer.latitude,
+                location_longitude=farmer.longitude,
+                description=data['description'],
+                status='available',
+            ))
+        ProcurementLot.objects.bulk_create(lots)
+        # bulk_create sends no post_save; farmer and fpo are already on each lot
+        index_objects('lot', lots)
+
+        stored = [(lot, farmer, warehouse) for lot, (_, _, farmer, warehouse) in zip(lots, accepted) if warehouse]
+        if stored:
+            Inventory.objects.bulk_create([
+                Inventory(warehouse=warehouse, lot=lot, quantity=lot.quantity_quintals)
+                for lot, _, warehouse in stored
+            ])
+            StockMovement.objects.bulk_create([
+                StockMovement(
+                    warehouse=warehouse,
+                    lot=lot,
+                    movement_type='in',
+                    quantity=lot.quantity_quintals,
+                    remarks=f'Received from: {farmer.full_name} - Lot: {lot.lot_number}'
+                )
+                for lot, farmer, warehouse in stored
+            ])
+
+        BlockchainTransaction.bulk_record(
+            _ledger_entry(lot, farmer, imported_by)
+            for lot, (_, _, farmer, _) in zip(lots, accepted)
+        )
+
+    return lots
+
+
+def import_fpo_lots(fpo, uploaded_file, imported_by, dry_run=False, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Validate and import a CSV/XLSX of member lots for an FPO
+
+    Rows are streamed and processed in chunks. Each chunk allocates its lot
+    numbers in one block and is written in its own transaction, so a bad chunk
+    never rolls back earlier ones. Invalid rows are skipped and reported.
+
+    Returns a report dict with counts, throughput and per-row errors.
+    """
+    started = time.perf_counter()
+    context = _ImportContext(fpo)
+    errors = []
+    total_rows = created = 0
+    lot_numbers = []
+
+    for chunk in _chunks(iter_upload_rows(uploaded_file), chunk_size):
+        total_rows += len(chunk)
+        accepted = _validate_chunk(chunk, context, errors)
+        if not accepted or dry_run:
+            created += 0 if dry_run else len(accepted)
+            continue
+
+        try:
+            lots = _write_chunk(accepted, context, imported_by)
+        except Exception as e:
+            logger.error(f"Lot import chunk failed for FPO {fpo.id}: {str(e)}")
+            errors.extend(
+                {'row': row_number, 'errors': {'non_field_errors': [f'Import failed: {str(e)}']}}
+                for row_number, _, _, _ in accepted
+            )
+            # Nothing was stored: give the chunk's reservations back
+            context.refresh_capacity({warehouse.id for _, _, _, warehouse in accepted if warehouse})
+            continue
+
+        created += len(lots)
+        lot_numbers.extend(lot.lot_number for lot in lots)
+
+    duration = time.perf_counter() - started
+    return {
+        'dry_run': dry_run,
+        'total_rows': total_rows,
+        'created': created,
+        'valid_rows': total_rows - len(errors),
+        'failed': len(errors),
+        'lot_numbers': lot_numbers,
+        'errors': errors[:MAX_REPORTED_ERRORS],
+        'errors_truncated': len(errors) > MAX_REPORTED_ERRORS,
+        'duration_seconds': round(duration, 3),
+        'rows_per_second': round(total_rows / duration, 1) if duration else None,
+    }
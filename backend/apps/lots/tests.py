@@ -1,3 +1,121 @@
+import datetime
+from decimal import Decimal
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
 
-# Create your tests here.
+from apps.farmers.models import FarmerProfile
+from apps.fpos.models import FPOProfile, FPOMembership, FPOWarehouse
+from apps.users.models import User
+from apps.warehouses.models import Inventory
+from .models import ProcurementLot
+from .services import import_fpo_lots
+from .services import lot_import_service
+
+HEADER = 'farmer_phone_number,crop_type,quantity_quintals,expected_price_per_quintal,harvest_date,warehouse_code'
+
+
+class LotImportTests(TestCase):
+    """Bulk lot import: row validation, warehouse capacity and chunk failures"""
+
+    def setUp(self):
+        self.fpo_user = User.objects.create_user('9000000401', 'fpo')
+        self.fpo = FPOProfile.objects.create(
+            user=self.fpo_user, organization_name='Import FPO', registration_number='REG-IMPORT',
+            registration_type='fpo', year_of_registration=2015, contact_person_name='Contact',
+            office_address='Main Road', district='Indore', state='madhya_pradesh', pincode='452001',
+        )
+        self.warehouse = FPOWarehouse.objects.create(
+            fpo=self.fpo, warehouse_name='Godown 1', warehouse_code='WH-IMPORT', warehouse_type='godown',
+            address='Main Road', district='Indore', state='madhya_pradesh', pincode='452001',
+            capacity_quintals=Decimal('100'),
+        )
+        self.phones = []
+        for index in range(2):
+            user = User.objects.create_user(f'90000004{index + 10}', 'farmer')
+            farmer = FarmerProfile.objects.create(
+                user=user, full_name=f'Member {index}', total_land_acres=Decimal('2.5'),
+                farming_experience_years=5, district='Indore', state='madhya_pradesh',
+            )
+            FPOMembership.objects.create(
+                farmer=farmer, fpo=self.fpo, membership_number=str(index), joined_date=datetime.date(2024, 1, 1)
+            )
+            self.phones.append(user.phone_number)
+
+    def _upload(self, *rows):
+        return SimpleUploadedFile('lots.csv', '\n'.join((HEADER,) + rows).encode())
+
+    def _row(self, quantity, warehouse_code='WH-IMPORT', phone=None, crop_type='soybean'):
+        return f'{phone or self.phones[0]},{crop_type},{quantity},4500,2026-10-01,{warehouse_code}'
+
+    def _stock(self):
+        self.warehouse.refresh_from_db()
+        return self.warehouse.current_stock_quintals
+
+    def test_valid_rows_create_lots_and_stock(self):
+        report = import_fpo_lots(self.fpo, self._upload(
+            self._row(10), self._row(5, phone=self.phones[1]), self._row(3, warehouse_code=''),
+        ), self.fpo_user)
+
+        self.assertEqual((report['created'], report['failed']), (3, 0))
+        self.assertEqual(ProcurementLot.objects.filter(lot_number__in=report['lot_numbers']).count(), 3)
+        self.assertEqual(self._stock(), Decimal('15'))
+        self.assertEqual(Inventory.objects.filter(warehouse=self.warehouse).count(), 2)
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        report = import_fpo_lots(self.fpo, self._upload(
+            self._row(10),
+            self._row(10, crop_type='rice'),
+            self._row(10, phone='9999999999'),
+            self._row(10, warehouse_code='NOPE'),
+        ), self.fpo_user)
+
+        self.assertEqual(report['created'], 1)
+        self.assertEqual([error['row'] for error in report['errors']], [3, 4, 5])
+        self.assertIn('crop_type', report['errors'][0]['errors'])
+
+    def test_rows_over_capacity_are_rejected(self):
+        report = import_fpo_lots(self.fpo, self._upload(self._row(60), self._row(60), self._row(40)), self.fpo_user)
+
+        self.assertEqual(report['created'], 2)
+        self.assertEqual(report['errors'][0]['row'], 3)
+        self.assertIn('Insufficient capacity', report['errors'][0]['errors']['warehouse_code'][0])
+        self.assertEqual(self._stock(), Decimal('100'))
+
+    def test_failed_chunk_releases_its_capacity(self):
+        write_chunk = lot_import_service._write_chunk
+        calls = []
+
+        def fail_first_chunk(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError('disk full')
+            return write_chunk(*args, **kwargs)
+
+        with mock.patch.object(lot_import_service, '_write_chunk', side_effect=fail_first_chunk):
+            report = import_fpo_lots(
+                self.fpo, self._upload(self._row(80), self._row(90)), self.fpo_user, chunk_size=1
+            )
+
+        self.assertEqual(report['created'], 1)
+        self.assertEqual(report['errors'][0]['row'], 2)
+        self.assertIn('disk full', report['errors'][0]['errors']['non_field_errors'][0])
+        self.assertEqual(self._stock(), Decimal('90'))
+
+    def test_intake_after_validation_fails_the_chunk(self):
+        validate_chunk = lot_import_service._validate_chunk
+
+        def validate_then_fill(*args, **kwargs):
+            accepted = validate_chunk(*args, **kwargs)
+            # A manual intake lands between validation and the write
+            FPOWarehouse.objects.filter(id=self.warehouse.id).update(current_stock_quintals=Decimal('50'))
+            return accepted
+
+        with mock.patch.object(lot_import_service, '_validate_chunk', side_effect=validate_then_fill):
+            report = import_fpo_lots(self.fpo, self._upload(self._row(60)), self.fpo_user)
+
+        self.assertEqual(report['created'], 0)
+        self.assertIn('Insufficient capacity', report['errors'][0]['errors']['non_field_errors'][0])
+        self.assertEqual(self._stock(), Decimal('50'))
+        self.assertFalse(ProcurementLot.objects.exists())
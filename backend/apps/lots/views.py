@@ -6,25 +6,33 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
+from apps.core.fieldsets import SparseFieldsetViewMixin, requested_fieldset
 from apps.core.permissions import IsFarmer, IsFPO
+from apps.core.search import FullTextSearchFilter
+from apps.core.services import get_role_profile
 from .models import ProcurementLot, LotImage, LotStatusHistory
-from .serializers import ProcurementLotSerializer, ProcurementLotCreateSerializer, LotImageSerializer
+from .serializers import (
+    ProcurementLotSerializer, ProcurementLotListSerializer, ProcurementLotCreateSerializer, LotImageSerializer
+)
 
 
-class ProcurementLotViewSet(viewsets.ModelViewSet):
-    """Procurement lot viewset"""
+class ProcurementLotViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
+    """Procurement lot viewset; ?fields= and ?expand= trim responses and queries"""
     queryset = ProcurementLot.objects.filter(is_active=True).select_related('farmer', 'fpo').prefetch_related('images', 'status_history')
     serializer_class = ProcurementLotSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, filters.OrderingFilter]
     filterset_fields = ['crop_type', 'status', 'quality_grade', 'farmer', 'fpo']
-    search_fields = ['lot_number', 'description']
+    search_entity = 'lot'  # ?search= over lot number, crop, description, farmer and FPO
     ordering_fields = ['created_at', 'quantity_quintals', 'expected_price_per_quintal']
     ordering = ['-created_at']
+    # Listings use the compact serializer: count, page, images, warehouses
+    query_budget = {'list': 6, 'marketplace': 6, 'my_lots': 6}
     
     def retrieve(self, request, *args, **kwargs):
         """Get single lot with status history and related data"""
         instance = self.get_object()
+        instance.increment_view_count()
         serializer = self.get_serializer(instance)
         return Response({
             'status': 'success',
@@ -35,8 +43,38 @@ class ProcurementLotViewSet(viewsets.ModelViewSet):
     def get_serializer_class(self):
         if self.action == 'create':
             return ProcurementLotCreateSerializer
+        if self.action in ('list', 'marketplace', 'my_lots'):
+            return ProcurementLotListSerializer
         return ProcurementLotSerializer
     
+    def list(self, request, *args, **kwargs):
+        """List lots in the compact listing representation"""
+        return self._list_response(self.filter_queryset(self.get_queryset()))
+    
+    def _list_response(self, queryset):
+        """Paginated compact rows built from a .values() projection of queryset"""
+        fields, expand = requested_fieldset(self.request)
+        if expand:
+            # Nested relations need model instances: the full serializer over a narrowed queryset
+            queryset = self.narrow_queryset(queryset, ProcurementLotSerializer)
+            page = self.paginate_queryset(queryset)
+            serializer = ProcurementLotSerializer(
+                page if page is not None else queryset, many=True, context=self.get_serializer_context()
+            )
+            if page is not None:
+                return self.get_paginated_response(serializer.data)
+            return Response(serializer.data)
+        
+        rows = ProcurementLotListSerializer.project(queryset, fields)
+        
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        
+        serializer = self.get_serializer(rows, many=True)
+        return Response(serializer.data)
+    
     def get_permissions(self):
         if self.action == 'create':
             return [IsFarmer()]
@@ -44,12 +82,10 @@ class ProcurementLotViewSet(viewsets.ModelViewSet):
     
     def perform_create(self, serializer):
         """Auto-assign farmer from logged-in user"""
-        user = self.request.user
-        
         # Get farmer profile from user
         try:
             from apps.farmers.models import FarmerProfile
-            farmer_profile = FarmerProfile.objects.get(user=user)
+            farmer_profile = get_role_profile(self.request, FarmerProfile)
             serializer.save(farmer=farmer_profile)
         except FarmerProfile.DoesNotExist:
             from rest_framework.exceptions import ValidationError
@@ -97,20 +133,15 @@ class ProcurementLotViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def my_lots(self, request):
         """Get current user's lots"""
-        if hasattr(request.user, 'farmer_profile'):
-            queryset = self.get_queryset().filter(farmer=request.user.farmer_profile)
-        elif hasattr(request.user, 'fpo_profile'):
-            queryset = self.get_queryset().filter(fpo=request.user.fpo_profile)
+        profile = get_role_profile(request)
+        if profile and request.user.role == 'farmer':
+            queryset = self.get_queryset().filter(farmer=profile)
+        elif profile and request.user.role == 'fpo':
+            queryset = self.get_queryset().filter(fpo=profile)
         else:
             queryset = self.get_queryset().none()
         
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self._list_response(queryset)
     
     @action(detail=True, methods=['post'])
     def upload_image(self, request, pk=None):
@@ -140,7 +171,7 @@ class ProcurementLotViewSet(viewsets.ModelViewSet):
         queryset = self.get_queryset().filter(
             status='available',
             listing_type__in=['individual', 'fpo_aggregated']
-        ).select_related('farmer', 'farmer__user', 'fpo')
+        )
         
         # Apply filters
         crop_type = request.query_params.get('crop_type')
@@ -154,10 +185,4 @@ class ProcurementLotViewSet(viewsets.ModelViewSet):
         if listing_type:
             queryset = queryset.filter(listing_type=listing_type)
         
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self._list_response(queryset)
@@ -3,9 +3,9 @@ from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from django.db.models import Q
 
 from apps.core.utils import response_success, response_error
+from apps.core.services import matching_ids
 from .models import Listing, Order, Review
 from .serializers import ListingSerializer, OrderSerializer, ReviewSerializer
 from apps.processors.models import ProcessedProduct
@@ -60,14 +60,10 @@ class MarketplaceProductsAPIView(APIView):
         if processor_id:
             products = products.filter(processor_id=processor_id)
         
-        # Search by product name or SKU
-        search = request.query_params.get('search')
-        if search:
-            products = products.filter(
-                Q(sku__icontains=search) |
-                Q(batch_number__icontains=search) |
-                Q(processor__company_name__icontains=search)
-            )
+        # Search by product, SKU, batch or processor (word prefixes, from the search index)
+        search_ids = matching_ids('product', request.query_params.get('search'))
+        if search_ids is not None:
+            products = products.filter(id__in=search_ids)
         
         # Price range
         min_price = request.query_params.get('min_price')
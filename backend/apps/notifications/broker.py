@@ -0,0 +1,269 @@
+"""
+Push Broker for SeedSync Platform
+Publish/subscribe fan-out of live deltas to SSE and WebSocket clients
+
+Channels:
+    user:<user_id>   bids, acceptances and notifications for one user
+    lot:<lot_id>     status, quantity and bid count changes of one lot
+    marketplace      listing changes for every marketplace browser
+
+InProcessBroker delivers to subscribers in this process only, so it fits a
+single ASGI worker. RedisBroker (settings.PUSH_BROKER_BACKEND, default when
+REDIS_URL is set) relays every publish through Redis pub/sub so clients
+connected to any worker receive it. Both keep the last few events per
+channel, so a reconnecting client can resume from its Last-Event-ID.
+"""
+import asyncio
+import json
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+MARKETPLACE_CHANNEL = 'marketplace'
+
+# Replay buffers kept for at most this many channels (least recently used dropped)
+MAX_REPLAY_CHANNELS = 10000
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+def lot_channel(lot_id):
+    return f'lot:{lot_id}'
+
+
+def encode_event(event):
+    return json.dumps(event, cls=DjangoJSONEncoder, separators=(',', ':'))
+
+
+class Subscription:
+    """
+    One client's view of a set of channels
+
+    Created from a request thread (sync iteration) or inside the event loop
+    (async iteration). Events are delivered from any thread; a client too
+    slow to drain its queue gets a single 'resync' event and should refetch.
+    """
+
+    def __init__(self, broker, channels, maxsize):
+        self.broker = broker
+        self.channels = set(channels)
+        self.overflowed = False
+        try:
+            self.loop = asyncio.get_running_loop()
+            self._queue = asyncio.Queue(maxsize)
+        except RuntimeError:
+            self.loop = None
+            self._queue = queue.Queue(maxsize)
+
+    def deliver(self, event):
+        if self.loop is not None:
+            try:
+                self.loop.call_soon_threadsafe(self._put, event)
+            except RuntimeError:
+                # Loop already closed: the client is gone and close() is on its way
+                pass
+        else:
+            self._put(event)
+
+    def _put(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except (asyncio.QueueFull, queue.Full):
+            self.overflowed = True
+
+    def _resync_event(self):
+        self.overflowed = False
+        return {'id': None, 'type': 'resync', 'channel': None, 'data': {}}
+
+    def get(self, timeout=None):
+        """Next event, or None after `timeout` seconds (sync subscribers)"""
+        if self.overflowed:
+            return self._resync_event()
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    async def aget(self, timeout=None):
+        """Next event, or None after `timeout` seconds (async subscribers)"""
+        if self.overflowed:
+            return self._resync_event()
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def add_channels(self, channels):
+        self.broker.attach(self, channels)
+
+    def remove_channels(self, channels):
+        self.broker.detach(self, channels)
+
+    def close(self):
+        self.broker.detach(self, set(self.channels))
+
+
+class InProcessBroker:
+    """Fan-out to subscribers of this process"""
+
+    def __init__(self):
+        self._subscribers = {}
+        self._replay = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_id = 0
+
+    # ---- publishing ----
+
+    def next_event_id(self):
+        # Microseconds since the epoch, kept strictly increasing per process
+        with self._lock:
+            self._last_id = max(int(time.time() * 1_000_000), self._last_id + 1)
+            return self._last_id
+
+    def make_event(self, channel, event_type, data):
+        return {'id': self.next_event_id(), 'type': event_type, 'channel': channel, 'data': data}
+
+    def publish(self, channel, event_type, data):
+        event = self.make_event(channel, event_type, data)
+        self.deliver(event)
+        return event
+
+    def deliver(self, event):
+        """Record `event` for replay and hand it to the channel's subscribers"""
+        channel = event['channel']
+        with self._lock:
+            buffer = self._replay.get(channel)
+            if buffer is None:
+                buffer = self._replay[channel] = deque(maxlen=settings.PUSH_REPLAY_SIZE)
+                if len(self._replay) > MAX_REPLAY_CHANNELS:
+                    self._replay.popitem(last=False)
+            else:
+                self._replay.move_to_end(channel)
+            buffer.append(event)
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+    # ---- subscribing ----
+
+    def subscribe(self, channels, last_event_id=None):
+        """Subscription to `channels`, pre-loaded with events after last_event_id"""
+        subscription = Subscription(self, (), settings.PUSH_QUEUE_SIZE)
+        self.attach(subscription, channels)
+        if last_event_id is not None:
+            for event in self.replay(channels, last_event_id):
+                subscription.deliver(event)
+        return subscription
+
+    def attach(self, subscription, channels):
+        with self._lock:
+            for channel in channels:
+                self._subscribers.setdefault(channel, set()).add(subscription)
+                subscription.channels.add(channel)
+
+    def detach(self, subscription, channels):
+        with self._lock:
+            for channel in channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+                subscription.channels.discard(channel)
+
+    def replay(self, channels, last_event_id):
+        with self._lock:
+            events = [
+                event
+                for channel in channels
+                for event in self._replay.get(channel, ())
+                if event['id'] > last_event_id
+            ]
+        return sorted(events, key=lambda event: event['id'])
+
+    def subscriber_count(self):
+        with self._lock:
+            return len({subscription for subscribers in self._subscribers.values() for subscription in subscribers})
+
+
+class RedisBroker(InProcessBroker):
+    """
+    Relays publishes through Redis pub/sub (settings.REDIS_URL)
+    Every worker listens on one pattern subscription and fans incoming
+    events out to its own subscribers.
+    """
+    prefix = 'seedsync:push:'
+
+    def __init__(self):
+        super().__init__()
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured("RedisBroker needs the 'redis' package")
+        self._client = redis.Redis.from_url(settings.REDIS_URL)
+        self._listener = None
+
+    def publish(self, channel, event_type, data):
+        event = self.make_event(channel, event_type, data)
+        self._ensure_listening()
+        self._client.publish(f'{self.prefix}{channel}', encode_event(event))
+        return event
+
+    def subscribe(self, channels, last_event_id=None):
+        self._ensure_listening()
+        return super().subscribe(channels, last_event_id)
+
+    def _ensure_listening(self):
+        if self._listener is not None:
+            return
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name='seedsync-push-listener', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(f'{self.prefix}*')
+                for message in pubsub.listen():
+                    self.deliver(json.loads(message['data']))
+            except Exception as e:
+                logger.error(f"Push listener lost Redis: {str(e)}; reconnecting")
+                time.sleep(1)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.PUSH_BROKER_BACKEND)()
+    return _broker
+
+
+def publish(channels, event_type, data):
+    """Publish one delta to several channels; never raises into the caller"""
+    if not settings.PUSH_ENABLED:
+        return
+    broker = get_broker()
+    for channel in channels:
+        try:
+            broker.publish(channel, event_type, data)
+        except Exception as e:
+            logger.error(f"Push publish to {channel} failed: {str(e)}")
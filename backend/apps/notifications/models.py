@@ -16,6 +16,9 @@ class Notification(TimeStampedModel):
     class Meta:
         db_table = 'notifications'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'updated_at']),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.user.phone_number}"
@@ -1,8 +1,9 @@
 """Notifications Serializers"""
 from rest_framework import serializers
+from apps.core.fieldsets import SparseFieldsetMixin
 from .models import Notification, PushToken
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Notification
         fields = '__all__'
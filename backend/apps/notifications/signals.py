@@ -0,0 +1,153 @@
+"""
+Notifications Signals
+Publish bid, acceptance, lot and notification deltas to the push broker
+
+Each delta carries the changed object's list fields, so clients patch the
+list they already hold instead of refetching it. Publishing waits for the
+transaction to commit: clients never see a change that was rolled back.
+"""
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from apps.bids.models import Bid, BidAcceptance
+from apps.lots.models import ProcurementLot
+from .broker import MARKETPLACE_CHANNEL, lot_channel, publish, user_channel
+from .models import Notification
+
+MARKETPLACE_LISTING_TYPES = ('individual', 'fpo_aggregated')
+
+
+def _publish_on_commit(channels, event_type, data):
+    transaction.on_commit(lambda: publish(channels, event_type, data))
+
+
+def _lot_owner_user_id(lot_id):
+    """User behind a lot: the farmer, or the FPO for aggregated lots"""
+    owner = ProcurementLot.objects.filter(pk=lot_id).values('farmer__user_id', 'fpo__user_id').first()
+    if not owner:
+        return None
+    return owner['farmer__user_id'] or owner['fpo__user_id']
+
+
+def lot_delta(lot):
+    return {
+        'id': lot.id,
+        'lot_number': lot.lot_number,
+        'status': lot.status,
+        'listing_type': lot.listing_type,
+        'crop_type': lot.crop_type,
+        'quality_grade': lot.quality_grade,
+        'quantity_quintals': lot.quantity_quintals,
+        'available_quantity_quintals': lot.available_quantity_quintals,
+        'expected_price_per_quintal': lot.expected_price_per_quintal,
+        'bid_count': lot.bid_count,
+        'updated_at': lot.updated_at,
+    }
+
+
+def bid_delta(bid):
+    return {
+        'id': bid.id,
+        'lot_id': bid.lot_id,
+        'bidder_type': bid.bidder_type,
+        'bidder_name': bid.bidder_name,
+        'offered_price_per_quintal': bid.offered_price_per_quintal,
+        'quantity_quintals': bid.quantity_quintals,
+        'total_amount': bid.total_amount,
+        'status': bid.status,
+        'submitted_at': bid.submitted_at,
+        'responded_at': bid.responded_at,
+    }
+
+
+def notification_delta(notification):
+    return {
+        'id': notification.id,
+        'title': notification.title,
+        'message': notification.message,
+        'notification_type': notification.notification_type,
+        'is_read': notification.is_read,
+        'created_at': notification.created_at,
+    }
+
+
+def _push_lot(lot, event_type, owner_id):
+    channels = [lot_channel(lot.id)]
+    if owner_id:
+        channels.append(user_channel(owner_id))
+    if lot.listing_type in MARKETPLACE_LISTING_TYPES:
+        channels.append(MARKETPLACE_CHANNEL)
+    _publish_on_commit(channels, event_type, lot_delta(lot))
+
+
+def _push_bid(bid, event_type, owner_id):
+    channels = [user_channel(bid.bidder_user_id)]
+    if owner_id and owner_id != bid.bidder_user_id:
+        channels.append(user_channel(owner_id))
+    _publish_on_commit(channels, event_type, bid_delta(bid))
+    _publish_on_commit(
+        [lot_channel(bid.lot_id)], event_type,
+        {'id': bid.id, 'lot_id': bid.lot_id, 'status': bid.status}
+    )
+
+
+@receiver(post_save, sender=ProcurementLot)
+def push_lot_change(sender, instance, created, **kwargs):
+    """Lot page watchers, the owner, and marketplace browsers for listed lots"""
+    owner_id = _lot_owner_user_id(instance.id) if not created else None
+    _push_lot(instance, 'lot.created' if created else 'lot.updated', owner_id)
+
+
+@receiver(post_save, sender=Bid)
+def push_bid_change(sender, instance, created, **kwargs):
+    """Full bid to the lot owner and bidder; lot watchers only learn that bidding moved"""
+    _push_bid(instance, 'bid.created' if created else 'bid.updated', _lot_owner_user_id(instance.lot_id))
+
+
+def push_lot_updates(lots):
+    """
+    lot.updated for lots changed with queryset .update(), which sends no post_save
+    Pass the lots with their new values set and farmer/fpo selected.
+    """
+    for lot in lots:
+        owner = lot.farmer if lot.farmer_id else lot.fpo
+        _push_lot(lot, 'lot.updated', owner.user_id if owner else None)
+
+
+def push_bid_updates(bids):
+    """bid.updated for bids changed with queryset .update(), which sends no post_save"""
+    owners = {}
+    for bid in bids:
+        if bid.lot_id not in owners:
+            owners[bid.lot_id] = _lot_owner_user_id(bid.lot_id)
+        _push_bid(bid, 'bid.updated', owners[bid.lot_id])
+
+
+@receiver(post_save, sender=BidAcceptance)
+def push_bid_acceptance(sender, instance, created, **kwargs):
+    if not created:
+        return
+    bid = Bid.objects.filter(pk=instance.bid_id).values('lot_id', 'bidder_user_id').first()
+    if not bid:
+        return
+    channels = [user_channel(bid['bidder_user_id'])]
+    owner_id = _lot_owner_user_id(bid['lot_id'])
+    if owner_id:
+        channels.append(user_channel(owner_id))
+    _publish_on_commit(channels, 'bid.accepted', {
+        'id': instance.id,
+        'bid_id': instance.bid_id,
+        'lot_id': bid['lot_id'],
+        'pickup_scheduled_date': instance.pickup_scheduled_date,
+        'accepted_at': instance.accepted_at,
+    })
+
+
+@receiver(post_save, sender=Notification)
+def push_notification(sender, instance, created, **kwargs):
+    _publish_on_commit(
+        [user_channel(instance.user_id)],
+        'notification.created' if created else 'notification.updated',
+        notification_delta(instance)
+    )
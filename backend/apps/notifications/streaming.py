@@ -0,0 +1,210 @@
+"""
+Live Update Streams
+Server-Sent Events and WebSocket endpoints over the push broker
+
+    GET /api/notifications/stream/?lots=<id>,<id>&marketplace=1&token=<jwt>
+    ws://<host>/ws/stream/?lots=<id>&marketplace=1&token=<jwt>
+
+Every stream carries the user's own channel (bids, acceptances,
+notifications); lots= and marketplace= add lot and listing channels.
+Browsers' EventSource cannot send headers, hence ?token=; the Authorization
+header works too. SSE clients resume with Last-Event-ID. Over WebSocket,
+clients may send {"subscribe": ["lot:<id>"]} / {"unsubscribe": [...]}.
+
+Served by ASGI, a stream holds no worker thread while idle. Under WSGI
+(runserver) it works but occupies one thread per client.
+"""
+import json
+import time
+import uuid
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from apps.core.utils import response_error
+from .broker import MARKETPLACE_CHANNEL, encode_event, get_broker, lot_channel, user_channel
+
+MAX_LOT_CHANNELS = 100
+
+
+def authenticate_token(raw_token):
+    """User for a JWT access token, or None"""
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+    from rest_framework.exceptions import AuthenticationFailed
+
+    if not raw_token:
+        return None
+    authentication = JWTAuthentication()
+    try:
+        return authentication.get_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None
+
+
+def requested_channels(user, params):
+    """Channels for a stream: the user's own plus the lot/marketplace ones asked for"""
+    channels = {user_channel(user.id)}
+    for value in params.get('lots', '').split(','):
+        value = value.strip()
+        if not value:
+            continue
+        try:
+            channels.add(lot_channel(uuid.UUID(value)))
+        except ValueError:
+            continue
+        if len(channels) > MAX_LOT_CHANNELS:
+            break
+    if params.get('marketplace') in ('1', 'true'):
+        channels.add(MARKETPLACE_CHANNEL)
+    return channels
+
+
+def allowed_channel(user, channel):
+    """Users may follow their own channel, any lot, and the marketplace"""
+    if channel == MARKETPLACE_CHANNEL or channel == user_channel(user.id):
+        return True
+    prefix, _, value = channel.partition(':')
+    if prefix != 'lot':
+        return False
+    try:
+        uuid.UUID(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _sse(event):
+    lines = []
+    if event['id'] is not None:
+        lines.append(f"id: {event['id']}")
+    lines.append(f"event: {event['type']}")
+    lines.append(f"data: {encode_event(event)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+def _retry_hint():
+    return f"retry: {settings.PUSH_RETRY_MS}\n\n"
+
+
+def _waits():
+    """
+    Heartbeat-sized waits until the stream's lifetime is up
+
+    Django 4.2 does not notice a vanished client until a write fails, so
+    streams end after PUSH_STREAM_MAX_SECONDS and EventSource reconnects
+    with its Last-Event-ID; nothing is missed.
+    """
+    deadline = time.monotonic() + settings.PUSH_STREAM_MAX_SECONDS
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        yield min(settings.PUSH_HEARTBEAT_SECONDS, remaining)
+
+
+def _sync_stream(channels, last_event_id):
+    subscription = get_broker().subscribe(channels, last_event_id)
+    try:
+        yield _retry_hint()
+        for timeout in _waits():
+            event = subscription.get(timeout=timeout)
+            yield _sse(event) if event else ': ping\n\n'
+    finally:
+        subscription.close()
+
+
+async def _async_stream(channels, last_event_id):
+    # Subscribed here, inside the server's event loop, so delivery is loop-safe
+    subscription = get_broker().subscribe(channels, last_event_id)
+    try:
+        yield _retry_hint()
+        for timeout in _waits():
+            event = await subscription.aget(timeout=timeout)
+            yield _sse(event) if event else ': ping\n\n'
+    finally:
+        subscription.close()
+
+
+def _last_event_id(value):
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+@require_GET
+def event_stream(request):
+    """Server-Sent Events stream of the caller's channels"""
+    if not settings.PUSH_ENABLED:
+        return JsonResponse(response_error(message="Live updates are disabled"), status=503)
+
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    raw_token = header[7:] if header.startswith('Bearer ') else request.GET.get('token')
+    user = authenticate_token(raw_token)
+    if user is None:
+        return JsonResponse(response_error(message="Authentication credentials were not provided or are invalid"), status=401)
+
+    channels = requested_channels(user, request.GET)
+    last_event_id = _last_event_id(request.META.get('HTTP_LAST_EVENT_ID') or request.GET.get('last_event_id'))
+
+    # ASGIRequest carries the ASGI scope; stream natively there, from a thread under WSGI
+    stream = _async_stream if hasattr(request, 'scope') else _sync_stream
+    response = StreamingHttpResponse(stream(channels, last_event_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx: do not buffer the stream
+    return response
+
+
+async def websocket_application(scope, receive, send):
+    """Raw ASGI WebSocket endpoint (no Channels dependency)"""
+    import asyncio
+
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+    if scope['path'].rstrip('/') != '/ws/stream' or not settings.PUSH_ENABLED:
+        await send({'type': 'websocket.close', 'code': 4404})
+        return
+
+    params = {key: values[-1] for key, values in parse_qs(scope.get('query_string', b'').decode()).items()}
+    user = await sync_to_async(authenticate_token)(params.get('token'))
+    if user is None:
+        await send({'type': 'websocket.close', 'code': 4401})
+        return
+
+    subscription = get_broker().subscribe(requested_channels(user, params), _last_event_id(params.get('last_event_id')))
+    await send({'type': 'websocket.accept'})
+
+    async def pump():
+        while True:
+            event = await subscription.aget(timeout=settings.PUSH_HEARTBEAT_SECONDS)
+            payload = encode_event(event) if event else '{"type":"ping"}'
+            await send({'type': 'websocket.send', 'text': payload})
+
+    pumping = asyncio.ensure_future(pump())
+    try:
+        while True:
+            message = await receive()
+            if message['type'] == 'websocket.disconnect':
+                break
+            if message['type'] != 'websocket.receive' or not message.get('text'):
+                continue
+            try:
+                command = json.loads(message['text'])
+            except ValueError:
+                continue
+            if not isinstance(command, dict):
+                continue
+            subscribe = [c for c in command.get('subscribe', []) if isinstance(c, str) and allowed_channel(user, c)]
+            unsubscribe = [c for c in command.get('unsubscribe', []) if isinstance(c, str) and c != user_channel(user.id)]
+            if subscribe and len(subscription.channels) + len(subscribe) <= MAX_LOT_CHANNELS + 2:
+                subscription.add_channels(subscribe)
+            if unsubscribe:
+                subscription.remove_channels(unsubscribe)
+    finally:
+        pumping.cancel()
+        subscription.close()
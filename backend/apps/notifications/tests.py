@@ -1,3 +1,108 @@
-from django.test import TestCase
+import datetime
+import uuid
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.bids.models import Bid
+from apps.farmers.models import FarmerProfile
+from apps.lots.models import ProcurementLot
+from apps.users.models import User
+from .broker import InProcessBroker, lot_channel, user_channel
+
+
+@override_settings(PUSH_REPLAY_SIZE=10, PUSH_QUEUE_SIZE=3)
+class InProcessBrokerTests(SimpleTestCase):
+    """Fan-out, Last-Event-ID replay and slow-client overflow of the in-process broker"""
+
+    def setUp(self):
+        self.broker = InProcessBroker()
+
+    def _drain(self, subscription):
+        events = []
+        while (event := subscription.get(timeout=0)) is not None:
+            events.append(event)
+        return events
+
+    def test_publish_fans_out_to_channel_subscribers_only(self):
+        watcher = self.broker.subscribe([lot_channel(1)])
+        owner = self.broker.subscribe([lot_channel(1), user_channel(7)])
+        other = self.broker.subscribe([lot_channel(2)])
+
+        event = self.broker.publish(lot_channel(1), 'lot.updated', {'id': 1, 'status': 'sold'})
+        self.broker.publish(user_channel(7), 'bid.created', {'id': 9})
+
+        self.assertEqual(self._drain(watcher), [event])
+        self.assertEqual([e['type'] for e in self._drain(owner)], ['lot.updated', 'bid.created'])
+        self.assertEqual(self._drain(other), [])
+
+        owner.close()
+        self.broker.publish(lot_channel(1), 'lot.updated', {'id': 1})
+        self.assertEqual(self._drain(owner), [])
+        self.assertEqual(self.broker.subscriber_count(), 2)
+
+    def test_reconnect_replays_events_after_last_event_id(self):
+        first = self.broker.publish(lot_channel(1), 'lot.updated', {'id': 1, 'step': 1})
+        second = self.broker.publish(user_channel(7), 'bid.updated', {'id': 9})
+        third = self.broker.publish(lot_channel(1), 'lot.updated', {'id': 1, 'step': 2})
+        self.broker.publish(lot_channel(2), 'lot.updated', {'id': 2})
+
+        subscription = self.broker.subscribe([lot_channel(1), user_channel(7)], last_event_id=first['id'])
+        live = self.broker.publish(user_channel(7), 'notification.created', {'id': 3})
+
+        self.assertEqual(self._drain(subscription), [second, third, live])
+
+    def test_slow_client_gets_a_single_resync(self):
+        subscription = self.broker.subscribe([lot_channel(1)])
+        for step in range(5):
+            self.broker.publish(lot_channel(1), 'lot.updated', {'id': 1, 'step': step})
+
+        resync = subscription.get(timeout=0)
+        self.assertEqual(resync['type'], 'resync')
+        self.assertIsNone(resync['id'])
+        # The queued events follow, without a second resync
+        self.assertEqual([e['data']['step'] for e in self._drain(subscription)], [0, 1, 2])
+
+        self.broker.publish(lot_channel(1), 'lot.updated', {'id': 1, 'step': 5})
+        self.assertEqual(subscription.get(timeout=0)['data']['step'], 5)
+
+
+class ExplicitPushTests(TestCase):
+    """Changes made with queryset .update() are still pushed"""
+
+    def setUp(self):
+        farmer = FarmerProfile.objects.create(
+            user=User.objects.create_user('9000000501', 'farmer'), full_name='Push Farmer',
+            total_land_acres=Decimal('2.5'), farming_experience_years=5, district='Indore', state='madhya_pradesh',
+        )
+        self.lot = ProcurementLot.objects.create(
+            farmer=farmer, crop_type='soybean', quantity_quintals=Decimal('10'),
+            available_quantity_quintals=Decimal('10'), quality_grade='A',
+            expected_price_per_quintal=Decimal('4500'), harvest_date=datetime.date(2026, 10, 1),
+        )
+        self.bids = [
+            Bid.objects.create(
+                lot=self.lot, bidder_type='processor', bidder_id=uuid.uuid4(), bidder_name=f'Mill {index}',
+                bidder_user=User.objects.create_user(f'90000005{index + 10}', 'processor'),
+                offered_price_per_quintal=Decimal('4600') + index, quantity_quintals=Decimal('10'),
+                expected_pickup_date=datetime.date(2026, 10, 20),
+            )
+            for index in range(3)
+        ]
+
+    def test_losing_bidders_hear_of_the_auto_rejection(self):
+        winner, *losers = self.bids
+        with mock.patch('apps.notifications.signals.publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                winner.accept()
+
+        rejected = {
+            channels[0]: data
+            for (channels, event_type, data), _ in publish.call_args_list
+            if event_type == 'bid.updated' and data.get('status') == 'rejected' and 'bidder_name' in data
+        }
+        self.assertEqual(set(rejected), {user_channel(bid.bidder_user_id) for bid in losers})
+        self.assertEqual(
+            set(Bid.objects.filter(status='rejected').values_list('id', flat=True)), {bid.id for bid in losers}
+        )
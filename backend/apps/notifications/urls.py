@@ -1,6 +1,7 @@
 """Notifications URLs"""
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from .streaming import event_stream
 from .views import NotificationViewSet, PushTokenViewSet
 
 router = DefaultRouter()
@@ -8,4 +9,7 @@ router.register(r'notifications', NotificationViewSet, basename='notification')
 router.register(r'push-tokens', PushTokenViewSet, basename='push-token')
 
 app_name = 'notifications'
-urlpatterns = [path('', include(router.urls))]
+urlpatterns = [
+    path('stream/', event_stream, name='event-stream'),
+    path('', include(router.urls)),
+]
@@ -1,12 +1,14 @@
 """Notifications Views"""
+from django.utils import timezone
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from .models import Notification, PushToken
 from .serializers import NotificationSerializer, PushTokenSerializer
+from apps.core.fieldsets import SparseFieldsetViewMixin
 
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     queryset = Notification.objects.filter(is_active=True)
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
@@ -23,7 +25,8 @@ class NotificationViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['post'])
     def mark_all_read(self, request):
-        self.get_queryset().update(is_read=True)
+        # updated_at by hand: .update() skips auto_now and /api/sync/ reads it
+        self.get_queryset().filter(is_read=False).update(is_read=True, updated_at=timezone.now())
         return Response({'status': 'All marked as read'})
 
 class PushTokenViewSet(viewsets.ModelViewSet):
@@ -1,7 +1,8 @@
 """Payments Admin"""
 from django.contrib import admin
-from .models import Payment, Transaction, Wallet
+from .models import Payment, Transaction, Wallet, WalletPosting
 
 admin.site.register(Payment)
 admin.site.register(Transaction)
 admin.site.register(Wallet)
+admin.site.register(WalletPosting)
@@ -0,0 +1,338 @@
+"""
+Wallet Ledger Service
+Double-entry postings for wallet balance changes and payment settlement
+
+Every transaction that posts entries runs through run_serialized
+(apps.core.write_queue): on the writer thread when the caller is outside a
+transaction, inline when it is already inside one.
+"""
+import logging
+import uuid
+from collections import namedtuple
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from apps.core.write_queue import run_serialized
+from .models import Payment, Transaction, Wallet, WalletPosting
+
+logger = logging.getLogger(__name__)
+
+MAX_SETTLEMENT_BATCH = 1000
+
+# One leg of an entry: wallet is None for system accounts
+Leg = namedtuple('Leg', ['wallet', 'amount', 'posting_type', 'account'], defaults=[WalletPosting.ACCOUNT_WALLET])
+
+# Legs must sum to zero
+LedgerEntry = namedtuple('LedgerEntry', ['legs', 'payment', 'description'])
+
+
+def lock_wallets(user_ids):
+    """
+    Lock the wallets of the given users, creating empty ones if missing
+    Rows are locked in id order so concurrent settlements cannot deadlock.
+    Must be called inside transaction.atomic(). Returns {user_id: wallet}.
+    """
+    user_ids = set(user_ids)
+    existing = set(Wallet.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True))
+    missing = user_ids - existing
+    if missing:
+        Wallet.objects.bulk_create(
+            [Wallet(user_id=user_id, balance=Decimal('0')) for user_id in missing],
+            ignore_conflicts=True
+        )
+
+    wallets = Wallet.objects.select_for_update().filter(user_id__in=user_ids).order_by('id')
+    return {wallet.user_id: wallet for wallet in wallets}
+
+
+def post_entries(entries):
+    """
+    Append entries to the ledger and apply them to the cached balances
+    Wallets referenced by the legs must already be locked (lock_wallets) in
+    the current transaction, which the callers below open through
+    run_serialized. Writes all postings with one INSERT and one
+    F() UPDATE per wallet; the wallet objects are updated in memory.
+    """
+    postings = []
+    wallets = {}
+    deltas = {}
+
+    for entry in entries:
+        if sum(leg.amount for leg in entry.legs) != 0:
+            raise ValueError(f"Unbalanced ledger entry: {entry.description}")
+
+        entry_id = uuid.uuid4()
+        for leg in entry.legs:
+            balance_after = None
+            if leg.wallet is not None:
+                wallets[leg.wallet.id] = leg.wallet
+                deltas[leg.wallet.id] = deltas.get(leg.wallet.id, Decimal('0')) + leg.amount
+                balance_after = leg.wallet.balance + deltas[leg.wallet.id]
+
+            postings.append(WalletPosting(
+                entry_id=entry_id,
+                account=leg.account,
+                wallet=leg.wallet,
+                posting_type=leg.posting_type,
+                amount=leg.amount,
+                balance_after=balance_after,
+                payment=entry.payment,
+                description=entry.description[:255]
+            ))
+
+    WalletPosting.objects.bulk_create(postings)
+
+    now = timezone.now()
+    for wallet_id, delta in deltas.items():
+        if delta:
+            Wallet.objects.filter(id=wallet_id).update(balance=F('balance') + delta, updated_at=now)
+        wallets[wallet_id].balance += delta
+
+    return postings
+
+
+def open_wallet(user, initial_balance=Decimal('0')):
+    """Get or create a user's wallet, posting the opening balance for new ones"""
+    return run_serialized(_open_wallet, user, initial_balance)
+
+
+def _open_wallet(user, initial_balance):
+    with transaction.atomic():
+        wallet, created = Wallet.objects.get_or_create(user=user, defaults={'balance': Decimal('0')})
+        if created and initial_balance:
+            post_entries([LedgerEntry(
+                legs=[
+                    Leg(wallet, initial_balance, 'opening_balance'),
+                    Leg(None, -initial_balance, 'opening_balance', WalletPosting.ACCOUNT_EXTERNAL),
+                ],
+                payment=None,
+                description='Opening balance'
+            )])
+    return wallet
+
+
+def adjust_balance(wallet, amount, reason=''):
+    """Credit (positive) or debit (negative) a wallet against external funding"""
+    return run_serialized(_adjust_balance, wallet, amount, reason)
+
+
+def _adjust_balance(wallet, amount, reason):
+    with transaction.atomic():
+        locked = lock_wallets([wallet.user_id])[wallet.user_id]
+        if amount < 0 and locked.get_available_balance() < -amount:
+            raise ValueError(f"Insufficient balance. Available: ₹{locked.get_available_balance()}, Required: ₹{-amount}")
+
+        post_entries([LedgerEntry(
+            legs=[
+                Leg(locked, amount, 'adjustment'),
+                Leg(None, -amount, 'adjustment', WalletPosting.ACCOUNT_EXTERNAL),
+            ],
+            payment=None,
+            description=reason or 'Balance adjustment'
+        )])
+
+    wallet.balance = locked.balance
+    wallet.locked_amount = locked.locked_amount
+    return wallet.balance
+
+
+def _profile_users(profile_ids):
+    """Map farmer/processor/FPO profile ids to their user ids"""
+    from apps.farmers.models import FarmerProfile
+    from apps.processors.models import ProcessorProfile
+    from apps.fpos.models import FPOProfile
+
+    users = {}
+    remaining = set(profile_ids)
+    for model in (FarmerProfile, ProcessorProfile, FPOProfile):
+        if not remaining:
+            break
+        found = dict(model.objects.filter(id__in=remaining).values_list('id', 'user_id'))
+        users.update(found)
+        remaining -= set(found)
+    return users
+
+
+def _payment_reference(payment):
+    if payment.lot_id:
+        return f"lot {payment.lot.lot_number}"
+    return payment.notes or "order"
+
+
+def settle_payments(payment_ids, payer_user, payer_profile_id):
+    """
+    Pay out pending payments from the payer's wallet in one transaction
+
+    Payment rows are locked first, then all wallets involved in id order.
+    Each payment becomes one balanced ledger entry: payer debit, payee
+    credit, and FPO commission / tax legs where applicable. Payments that
+    cannot be settled (not found, already completed, failed, unknown payee,
+    insufficient balance) are skipped and reported; the rest are settled.
+
+    Returns {'settled': [...], 'failed': [...], 'total_amount': Decimal, 'payer_balance': Decimal}
+    """
+    return run_serialized(_settle_payments, payment_ids, payer_user, payer_profile_id)
+
+
+def _settle_payments(payment_ids, payer_user, payer_profile_id):
+    settled, failed = [], []
+    total_amount = Decimal('0')
+
+    valid_ids = []
+    for payment_id in payment_ids:
+        try:
+            valid_ids.append(str(uuid.UUID(str(payment_id))))
+        except ValueError:
+            failed.append({'payment_id': str(payment_id), 'error': 'Payment not found or you are not authorized'})
+    payment_ids = valid_ids
+
+    with transaction.atomic():
+        payments = {
+            str(payment.id): payment
+            for payment in Payment.objects.select_for_update(of=('self',)).filter(
+                id__in=payment_ids,
+                payer_id=payer_profile_id,
+                is_active=True
+            ).select_related('lot')
+        }
+
+        payable = []
+        for payment_id in dict.fromkeys(payment_ids):
+            payment = payments.get(payment_id)
+            if not payment:
+                failed.append({'payment_id': payment_id, 'error': 'Payment not found or you are not authorized'})
+            elif payment.status == 'completed':
+                failed.append({'payment_id': payment_id, 'error': 'Payment already completed'})
+            elif payment.status == 'failed':
+                failed.append({'payment_id': payment_id, 'error': 'Payment has failed. Please contact support'})
+            else:
+                payable.append(payment)
+
+        profile_users = _profile_users(
+            {payment.payee_id for payment in payable}
+            | {payment.commission_payee_id for payment in payable if payment.commission_payee_id}
+        )
+        wallets = lock_wallets({payer_user.id} | set(profile_users.values()))
+        payer_wallet = wallets[payer_user.id]
+
+        entries = []
+        available = payer_wallet.get_available_balance()
+        for payment in payable:
+            payee_user_id = profile_users.get(payment.payee_id)
+            if not payee_user_id:
+                logger.error(f"Payee profile not found for payee_id: {payment.payee_id}")
+                failed.append({'payment_id': str(payment.id), 'error': 'Payee profile not found'})
+                continue
+
+            if available < payment.gross_amount:
+                failed.append({
+                    'payment_id': str(payment.id),
+                    'error': f"Insufficient wallet balance. Available: ₹{available}, Required: ₹{payment.gross_amount}"
+                })
+                continue
+            available -= payment.gross_amount
+
+            # Payee gets the remainder so the entry always balances to the paisa
+            legs = [
+                Leg(payer_wallet, -payment.gross_amount, 'payment_debit'),
+                Leg(wallets[payee_user_id], payment.gross_amount - payment.commission_amount - payment.tax_amount, 'payment_credit'),
+            ]
+            if payment.commission_amount:
+                commission_user_id = profile_users.get(payment.commission_payee_id)
+                if commission_user_id:
+                    legs.append(Leg(wallets[commission_user_id], payment.commission_amount, 'commission_credit'))
+                else:
+                    legs.append(Leg(None, payment.commission_amount, 'commission_credit',
+                                    WalletPosting.ACCOUNT_PLATFORM_COMMISSION))
+            if payment.tax_amount:
+                legs.append(Leg(None, payment.tax_amount, 'tax', WalletPosting.ACCOUNT_TAX_PAYABLE))
+
+            entries.append(LedgerEntry(legs, payment, f"Payment for {_payment_reference(payment)}"))
+
+        post_entries(entries)
+
+        now = timezone.now()
+        audit = []
+        for entry in entries:
+            payment = entry.payment
+            payment.status = 'completed'
+            payment.completed_at = now
+            payment.gateway_transaction_id = f"WALLET-{now.strftime('%Y%m%d%H%M%S')}-{payment.id}"
+            payment.updated_at = now
+
+            audit.append(Transaction(
+                payment=payment,
+                transaction_type='payment_processing',
+                amount=payment.gross_amount,
+                status='processing',
+                status_message=f"Deducted ₹{payment.gross_amount} from payer wallet"
+            ))
+            audit.append(Transaction(
+                payment=payment,
+                transaction_type='payment_completed',
+                amount=payment.net_amount,
+                status='completed',
+                status_message=f"Credited ₹{payment.net_amount} to payee wallet"
+            ))
+            if payment.commission_amount:
+                audit.append(Transaction(
+                    payment=payment,
+                    transaction_type='payment_completed',
+                    amount=payment.commission_amount,
+                    status='completed',
+                    status_message=f"Credited ₹{payment.commission_amount} commission to FPO wallet"
+                ))
+
+            total_amount += payment.gross_amount
+            settled.append({
+                'payment_id': str(payment.id),
+                'amount': float(payment.gross_amount),
+                'net_amount': float(payment.net_amount),
+                'status': payment.status
+            })
+
+        Payment.objects.bulk_update(
+            [entry.payment for entry in entries],
+            ['status', 'completed_at', 'gateway_transaction_id', 'updated_at']
+        )
+        Transaction.objects.bulk_create(audit)
+
+    return {
+        'settled': settled,
+        'failed': failed,
+        'total_amount': total_amount,
+        'payer_balance': payer_wallet.balance
+    }
+
+
+def rebuild_balances(wallet_ids=None, apply=True):
+    """
+    Recompute cached wallet balances from their postings
+    Returns a list of wallets whose cached balance disagreed with the ledger.
+    """
+    wallets = Wallet.objects.all()
+    if wallet_ids is not None:
+        wallets = wallets.filter(id__in=wallet_ids)
+
+    drift = []
+    with transaction.atomic():
+        # Lock first so no posting lands between the sum and the update
+        cached = list(wallets.select_for_update().order_by('id').values_list('id', 'balance'))
+        ledger = dict(
+            WalletPosting.objects.filter(wallet_id__in=[wallet_id for wallet_id, _ in cached])
+            .values('wallet_id').annotate(total=Sum('amount'))
+            .values_list('wallet_id', 'total')
+        )
+
+        now = timezone.now()
+        for wallet_id, balance in cached:
+            # SQLite sums decimals as floats; compare at the field's precision
+            expected = (ledger.get(wallet_id) or Decimal('0')).quantize(Decimal('0.01'))
+            if expected != balance:
+                drift.append({'wallet_id': str(wallet_id), 'cached': balance, 'ledger': expected})
+                if apply:
+                    Wallet.objects.filter(id=wallet_id).update(balance=expected, updated_at=now)
+    return drift
@@ -0,0 +1,26 @@
+"""
+Recompute cached wallet balances from the wallet ledger
+"""
+from django.core.management.base import BaseCommand
+
+from apps.payments.ledger_service import rebuild_balances
+
+
+class Command(BaseCommand):
+    help = "Rebuild Wallet.balance from wallet postings (use --check to only report drift)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help="Report mismatches without fixing them")
+
+    def handle(self, *args, **options):
+        drift = rebuild_balances(apply=not options['check'])
+
+        for row in drift:
+            self.stdout.write(f"{row['wallet_id']}: cached ₹{row['cached']} ledger ₹{row['ledger']}")
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("All wallet balances match the ledger"))
+        elif options['check']:
+            self.stdout.write(self.style.WARNING(f"{len(drift)} wallet(s) out of sync"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(drift)} wallet balance(s)"))
@@ -0,0 +1,77 @@
+# Generated by Django 4.2.27 on 2026-10-19 09:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+import re
+import uuid
+
+
+def backfill_ledger(apps, schema_editor):
+    """
+    Move FPO commission payees out of payment notes and open the ledger
+    with one opening-balance entry per existing wallet
+    """
+    Payment = apps.get_model('payments', 'Payment')
+    Wallet = apps.get_model('payments', 'Wallet')
+    WalletPosting = apps.get_model('payments', 'WalletPosting')
+
+    payments = []
+    for payment in Payment.objects.filter(notes__contains='FPO:', commission_payee_id__isnull=True):
+        match = re.search(r'FPO:.*\(ID: ([a-f0-9\-]+)\)', payment.notes)
+        if match:
+            payment.commission_payee_id = match.group(1)
+            payments.append(payment)
+    Payment.objects.bulk_update(payments, ['commission_payee_id'], batch_size=500)
+
+    postings = []
+    for wallet in Wallet.objects.exclude(balance=0):
+        entry_id = uuid.uuid4()
+        postings.append(WalletPosting(
+            entry_id=entry_id, account='wallet', wallet=wallet, posting_type='opening_balance',
+            amount=wallet.balance, balance_after=wallet.balance, description='Opening balance'
+        ))
+        postings.append(WalletPosting(
+            entry_id=entry_id, account='external', posting_type='opening_balance',
+            amount=-wallet.balance, description='Opening balance'
+        ))
+    WalletPosting.objects.bulk_create(postings, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0005_alter_payment_bid_alter_payment_lot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='commission_payee_id',
+            field=models.UUIDField(blank=True, help_text='UUID of FPO receiving the commission', null=True),
+        ),
+        migrations.CreateModel(
+            name='WalletPosting',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('entry_id', models.UUIDField(db_index=True, help_text='Groups the legs of one entry')),
+                ('account', models.CharField(choices=[('wallet', 'User Wallet'), ('tax_payable', 'Tax Payable'), ('platform_commission', 'Platform Commission'), ('external', 'External Funding')], default='wallet', max_length=30)),
+                ('posting_type', models.CharField(choices=[('opening_balance', 'Opening Balance'), ('payment_debit', 'Payment Debit'), ('payment_credit', 'Payment Credit'), ('commission_credit', 'Commission Credit'), ('tax', 'Tax'), ('adjustment', 'Adjustment')], max_length=30)),
+                ('amount', models.DecimalField(decimal_places=2, help_text='Positive credits, negative debits', max_digits=15)),
+                ('balance_after', models.DecimalField(blank=True, decimal_places=2, help_text='Wallet balance after this posting', max_digits=15, null=True)),
+                ('description', models.CharField(blank=True, max_length=255)),
+                ('payment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='postings', to='payments.payment')),
+                ('wallet', models.ForeignKey(blank=True, help_text='Set for wallet legs only', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='postings', to='payments.wallet')),
+            ],
+            options={
+                'verbose_name': 'Wallet Posting',
+                'verbose_name_plural': 'Wallet Postings',
+                'db_table': 'wallet_postings',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['wallet', 'created_at'], name='wallet_post_wallet__ef555a_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.27 on 2026-10-19 10:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0006_wallet_ledger'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['payer_id', 'updated_at'], name='payments_payer_i_841310_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['payee_id', 'updated_at'], name='payments_payee_i_801fb5_idx'),
+        ),
+    ]
@@ -46,6 +46,11 @@ class Payment(TimeStampedModel):
     payee_name = models.CharField(max_length=200)
     payee_account_number = models.CharField(max_length=20, blank=True)
     payee_ifsc_code = models.CharField(max_length=11, blank=True)
+    commission_payee_id = models.UUIDField(
+        null=True,
+        blank=True,
+        help_text="UUID of FPO receiving the commission"
+    )
     
     # Amount Details
     gross_amount = models.DecimalField(
@@ -117,6 +122,8 @@ class Payment(TimeStampedModel):
             models.Index(fields=['status', 'initiated_at']),
             models.Index(fields=['payer_id']),
             models.Index(fields=['payee_id']),
+            models.Index(fields=['payer_id', 'updated_at']),
+            models.Index(fields=['payee_id', 'updated_at']),
         ]
     
     def __str__(self):
@@ -125,8 +132,14 @@ class Payment(TimeStampedModel):
     def save(self, *args, **kwargs):
         # Generate payment ID
         if not self.payment_id:
-            from apps.core.utils import generate_unique_code
-            self.payment_id = generate_unique_code('PAY', 12)
+            from django.utils import timezone
+            from django.utils.crypto import get_random_string
+            from apps.core.services import next_sequence_value
+            # PAY + year + 8-digit sequence + random tail. Payment IDs are shown to
+            # payers and payees, so the tail keeps them from guessing other IDs.
+            year = timezone.now().strftime('%Y')
+            tail = get_random_string(6, allowed_chars='ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789')
+            self.payment_id = f"PAY{year}{next_sequence_value('PAY', year):08d}{tail}"
         
         # Calculate net amount
         self.net_amount = self.gross_amount - self.commission_amount - self.tax_amount
@@ -225,47 +238,140 @@ class Wallet(TimeStampedModel):
         return self.get_available_balance() >= Decimal(str(amount))
     
     def deduct_balance(self, amount, reason=""):
-        """Deduct amount from wallet balance"""
+        """Deduct amount from wallet balance (posted to the ledger)"""
         from decimal import Decimal
-        amount = Decimal(str(amount))
+        from .ledger_service import adjust_balance
         
-        if not self.has_sufficient_balance(amount):
-            raise ValueError(f"Insufficient balance. Available: ₹{self.get_available_balance()}, Required: ₹{amount}")
-        
-        self.balance -= amount
-        self.save(update_fields=['balance', 'updated_at'])
-        
-        return self.balance
+        return adjust_balance(self, -Decimal(str(amount)), reason)
     
     def add_balance(self, amount, reason=""):
-        """Add amount to wallet balance"""
+        """Add amount to wallet balance (posted to the ledger)"""
         from decimal import Decimal
-        amount = Decimal(str(amount))
+        from .ledger_service import adjust_balance
         
-        self.balance += amount
-        self.save(update_fields=['balance', 'updated_at'])
-        
-        return self.balance
+        return adjust_balance(self, Decimal(str(amount)), reason)
     
     def lock_amount(self, amount):
         """Lock amount for pending transaction"""
         from decimal import Decimal
+        from django.db.models import F
+        from django.utils import timezone
         amount = Decimal(str(amount))
         
-        if not self.has_sufficient_balance(amount):
-            raise ValueError(f"Insufficient balance to lock. Available: ₹{self.get_available_balance()}, Required: ₹{amount}")
+        # Conditional update: only succeeds while enough balance is unlocked
+        updated = Wallet.objects.filter(
+            id=self.id,
+            balance__gte=F('locked_amount') + amount
+        ).update(locked_amount=F('locked_amount') + amount, updated_at=timezone.now())
+        self.refresh_from_db(fields=['balance', 'locked_amount'])
         
-        self.locked_amount += amount
-        self.save(update_fields=['locked_amount', 'updated_at'])
+        if not updated:
+            raise ValueError(f"Insufficient balance to lock. Available: ₹{self.get_available_balance()}, Required: ₹{amount}")
         
         return self.locked_amount
     
     def unlock_amount(self, amount):
         """Unlock amount after transaction completion"""
         from decimal import Decimal
+        from django.db.models import F, Value
+        from django.db.models.functions import Greatest
+        from django.utils import timezone
         amount = Decimal(str(amount))
         
-        self.locked_amount = max(0, self.locked_amount - amount)
-        self.save(update_fields=['locked_amount', 'updated_at'])
+        Wallet.objects.filter(id=self.id).update(
+            locked_amount=Greatest(F('locked_amount') - amount, Value(Decimal('0'))),
+            updated_at=timezone.now()
+        )
+        self.refresh_from_db(fields=['locked_amount'])
         
         return self.locked_amount
+
+
+class WalletPosting(TimeStampedModel):
+    """
+    One leg of a double-entry wallet ledger entry
+    Append-only: every balance change is a set of postings sharing an
+    entry_id whose amounts sum to zero. Wallet.balance is a cache of the
+    sum of a wallet's postings and can be rebuilt from them.
+    """
+    ACCOUNT_WALLET = 'wallet'
+    ACCOUNT_TAX_PAYABLE = 'tax_payable'
+    ACCOUNT_PLATFORM_COMMISSION = 'platform_commission'
+    ACCOUNT_EXTERNAL = 'external'
+    
+    entry_id = models.UUIDField(db_index=True, help_text="Groups the legs of one entry")
+    
+    # Account
+    account = models.CharField(
+        max_length=30,
+        choices=[
+            (ACCOUNT_WALLET, 'User Wallet'),
+            (ACCOUNT_TAX_PAYABLE, 'Tax Payable'),
+            (ACCOUNT_PLATFORM_COMMISSION, 'Platform Commission'),
+            (ACCOUNT_EXTERNAL, 'External Funding')
+        ],
+        default=ACCOUNT_WALLET
+    )
+    wallet = models.ForeignKey(
+        Wallet,
+        on_delete=models.PROTECT,
+        related_name='postings',
+        null=True,
+        blank=True,
+        help_text="Set for wallet legs only"
+    )
+    
+    # Posting Details
+    posting_type = models.CharField(
+        max_length=30,
+        choices=[
+            ('opening_balance', 'Opening Balance'),
+            ('payment_debit', 'Payment Debit'),
+            ('payment_credit', 'Payment Credit'),
+            ('commission_credit', 'Commission Credit'),
+            ('tax', 'Tax'),
+            ('adjustment', 'Adjustment')
+        ]
+    )
+    amount = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        help_text="Positive credits, negative debits"
+    )
+    balance_after = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        help_text="Wallet balance after this posting"
+    )
+    
+    # Reference
+    payment = models.ForeignKey(
+        Payment,
+        on_delete=models.SET_NULL,
+        related_name='postings',
+        null=True,
+        blank=True
+    )
+    description = models.CharField(max_length=255, blank=True)
+    
+    class Meta:
+        db_table = 'wallet_postings'
+        verbose_name = 'Wallet Posting'
+        verbose_name_plural = 'Wallet Postings'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['wallet', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.posting_type} {self.account} ₹{self.amount}"
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Wallet postings are append-only")
+        super().save(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        raise ValueError("Wallet postings are append-only")
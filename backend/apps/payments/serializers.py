@@ -1,15 +1,19 @@
 """Payments Serializers"""
 from rest_framework import serializers
+from apps.core.fieldsets import SparseFieldsetMixin
 from .models import Payment, Transaction, Wallet
 
-class PaymentSerializer(serializers.ModelSerializer):
-    payer_name = serializers.CharField(source='payer.get_full_name', read_only=True)
-    payee_name = serializers.CharField(source='payee.get_full_name', read_only=True)
+class PaymentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Payment; supports ?fields= and ?expand=lot,bid"""
     
     class Meta:
         model = Payment
         fields = '__all__'
         read_only_fields = ['id', 'payment_id', 'created_at', 'updated_at']
+        expandable_fields = {
+            'lot': ('apps.lots.serializers.ProcurementLotSerializer', {}),
+            'bid': ('apps.bids.serializers.BidSerializer', {}),
+        }
 
 class TransactionSerializer(serializers.ModelSerializer):
     class Meta:
@@ -6,7 +6,8 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 from decimal import Decimal
 from apps.users.models import User
-from .models import Wallet, Payment
+from .models import Payment
+from .ledger_service import open_wallet
 
 
 @receiver(post_save, sender=User)
@@ -23,10 +24,7 @@ def create_user_wallet(sender, instance, created, **kwargs):
         if instance.role in ['processor', 'fpo', 'retailer']:
             initial_balance = Decimal('100000.00')  # ₹1,00,000 demo balance
         
-        Wallet.objects.create(
-            user=instance,
-            balance=initial_balance
-        )
+        open_wallet(instance, initial_balance)
 
 
 @receiver(post_save, sender=Payment)
@@ -1,3 +1,138 @@
+import uuid
+from concurrent.futures import Future
+from decimal import Decimal
+from unittest import mock
+
+from django.db import DatabaseError
+from django.db.models import Sum
 from django.test import TestCase
+from rest_framework.test import APITestCase
+
+from apps.core.write_queue import WritePending
+from apps.farmers.models import FarmerProfile
+from apps.users.models import User
+from .ledger_service import Leg, LedgerEntry, lock_wallets, post_entries, rebuild_balances, settle_payments
+from .models import Payment, Transaction, Wallet, WalletPosting
+from .views import WalletViewSet
+
+
+class WalletLedgerTests(TestCase):
+    """Postings balance, settlement is all-or-nothing, and balances can be rebuilt from the ledger"""
+
+    def setUp(self):
+        # Processors open with a demo balance of 1,00,000 (payments.signals)
+        self.payer = User.objects.create_user('9000000001', 'processor')
+        self.payer_profile_id = uuid.uuid4()
+        self.farmers = []
+        for index in range(3):
+            user = User.objects.create_user(f'90000001{index:02d}', 'farmer')
+            self.farmers.append(FarmerProfile.objects.create(
+                user=user, full_name=f'Ledger Farmer {index}', total_land_acres=Decimal('2.5'),
+                farming_experience_years=5, district='Indore', state='madhya_pradesh',
+            ))
+
+    def _payments(self, count, gross=Decimal('50.00'), commission=Decimal('1.25'), tax=Decimal('0.90')):
+        payments = [
+            Payment(
+                payment_id=f'PAYTEST{index:08d}',
+                payer_id=self.payer_profile_id, payer_name='Test Mills', payer_type='processor',
+                payee_id=self.farmers[index % len(self.farmers)].id, payee_name='Ledger Farmer',
+                gross_amount=gross, commission_amount=commission, tax_amount=tax,
+                net_amount=gross - commission - tax, payment_method='bank_transfer',
+            )
+            for index in range(count)
+        ]
+        Payment.objects.bulk_create(payments)
+        return [payment.id for payment in payments]
+
+    def _balances(self):
+        return dict(Wallet.objects.values_list('user_id', 'balance'))
+
+    def test_every_entry_balances_to_zero(self):
+        result = settle_payments(self._payments(10), self.payer, self.payer_profile_id)
+
+        self.assertEqual(len(result['settled']), 10)
+        self.assertEqual(result['failed'], [])
+        entries = WalletPosting.objects.values('entry_id').annotate(total=Sum('amount'))
+        self.assertTrue(entries)
+        for entry in entries:
+            self.assertEqual(Decimal(entry['total']).quantize(Decimal('0.01')), 0)
+        # Payer debit, payee credit, platform commission and tax per payment
+        self.assertEqual(WalletPosting.objects.filter(payment__isnull=False).count(), 40)
+
+    def test_unbalanced_entry_is_rejected(self):
+        with self.assertRaises(ValueError):
+            wallet = lock_wallets([self.payer.id])[self.payer.id]
+            post_entries([LedgerEntry([Leg(wallet, Decimal('10'), 'adjustment')], None, 'one-legged')])
+        self.assertFalse(WalletPosting.objects.filter(description='one-legged').exists())
+
+    def test_settling_1000_payments(self):
+        payment_ids = self._payments(1000)
+        before = self._balances()
+
+        result = settle_payments(payment_ids, self.payer, self.payer_profile_id)
+
+        self.assertEqual(len(result['settled']), 1000)
+        self.assertEqual(result['total_amount'], Decimal('50000.00'))
+        self.assertEqual(self._balances()[self.payer.id], before[self.payer.id] - Decimal('50000.00'))
+        self.assertEqual(Payment.objects.filter(status='completed').count(), 1000)
+
+    def test_failed_settlement_of_1000_payments_changes_nothing(self):
+        payment_ids = self._payments(1000)
+        before = self._balances()
+        postings = WalletPosting.objects.count()
+
+        # Fail on the last write, after postings and balances were written
+        with mock.patch.object(Transaction.objects, 'bulk_create', side_effect=DatabaseError('disk full')):
+            with self.assertRaises(DatabaseError):
+                settle_payments(payment_ids, self.payer, self.payer_profile_id)
+
+        self.assertEqual(self._balances(), before)
+        self.assertEqual(WalletPosting.objects.count(), postings)
+        self.assertEqual(Payment.objects.filter(status='pending').count(), 1000)
+
+    def test_rebuild_balances_reproduces_cached_balances(self):
+        settle_payments(self._payments(25), self.payer, self.payer_profile_id)
+        balances = self._balances()
+
+        self.assertEqual(rebuild_balances(), [])
+
+        Wallet.objects.filter(user=self.payer).update(balance=Decimal('1.00'))
+        drift = rebuild_balances()
+        self.assertEqual(len(drift), 1)
+        self.assertEqual(drift[0]['ledger'], balances[self.payer.id])
+        self.assertEqual(self._balances(), balances)
+
+
+class SettlementTimeoutTests(APITestCase):
+    """A settlement the writer has started but not finished is reported as processing, not failed"""
+
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_user('9000000201', 'processor'))
+        patcher = mock.patch.object(WalletViewSet, '_payer_profile_id', return_value=uuid.uuid4())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _settle_raising(self, error, url, body):
+        with mock.patch('apps.payments.ledger_service.settle_payments', side_effect=error):
+            return self.client.post(url, body, format='json')
+
+    def test_running_settlement_is_accepted(self):
+        payment_id = str(uuid.uuid4())
+        response = self._settle_raising(
+            WritePending(Future(), 30), '/api/payments/wallets/process_payment/', {'payment_id': payment_id}
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['data'], {'payment_id': payment_id, 'status': 'processing'})
+
+        response = self._settle_raising(
+            WritePending(Future(), 30), '/api/payments/wallets/settle/', {'payment_ids': [payment_id]}
+        )
+        self.assertEqual(response.status_code, 202)
 
-# Create your tests here.
+    def test_cancelled_settlement_is_an_error(self):
+        response = self._settle_raising(
+            TimeoutError("Write not started within 30s"), '/api/payments/wallets/process_payment/',
+            {'payment_id': str(uuid.uuid4())},
+        )
+        self.assertEqual(response.status_code, 500)
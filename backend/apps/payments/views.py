@@ -3,32 +3,31 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db.models import Sum, Q
 from decimal import Decimal
 from .models import Payment, Transaction, Wallet
+from .ledger_service import open_wallet
 from .serializers import PaymentSerializer, TransactionSerializer, WalletSerializer
+from apps.core.fieldsets import SparseFieldsetViewMixin
 from apps.core.utils import response_success, response_error
+from apps.core.services import get_role_profile
+from apps.core.write_queue import WritePending
+from apps.farmers.models import FarmerProfile
 
-class PaymentViewSet(viewsets.ModelViewSet):
+class PaymentViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     queryset = Payment.objects.filter(is_active=True)
     serializer_class = PaymentSerializer
     permission_classes = [IsAuthenticated]
-    filterset_fields = ['status', 'payer', 'payee']
+    filterset_fields = ['status', 'payer_id', 'payee_id']
     
     @action(detail=False, methods=['get'])
     def my_payments(self, request):
         """Get all payments for current user (as payer or payee)"""
         try:
             # Get user's profile ID based on role
-            user_profile_ids = []
-            if hasattr(request.user, 'processor_profile'):
-                user_profile_ids.append(request.user.processor_profile.id)
-            if hasattr(request.user, 'fpo_profile'):
-                user_profile_ids.append(request.user.fpo_profile.id)
-            if hasattr(request.user, 'retailer_profile'):
-                user_profile_ids.append(request.user.retailer_profile.id)
-            if hasattr(request.user, 'farmer_profile'):
-                user_profile_ids.append(request.user.farmer_profile.id)
+            profile = get_role_profile(request)
+            user_profile_ids = [profile.id] if profile else []
             
             if not user_profile_ids:
                 return Response(
@@ -36,9 +35,9 @@ class PaymentViewSet(viewsets.ModelViewSet):
                 )
             
             # Get payments where user is payer or payee
-            payments = self.get_queryset().filter(
+            payments = self.narrow_queryset(self.get_queryset().filter(
                 Q(payer_id__in=user_profile_ids) | Q(payee_id__in=user_profile_ids)
-            ).order_by('-initiated_at')
+            ).order_by('-initiated_at'))
             
             serializer = self.get_serializer(payments, many=True)
             return Response(
@@ -60,21 +59,11 @@ class PaymentViewSet(viewsets.ModelViewSet):
             # Get or create wallet for user
             # Give demo balance to buyers for testing
             initial_balance = Decimal('100000.00') if request.user.role in ['processor', 'fpo', 'retailer'] else Decimal('0.00')
-            wallet, created = Wallet.objects.get_or_create(
-                user=request.user,
-                defaults={'balance': initial_balance}
-            )
+            wallet = open_wallet(request.user, initial_balance)
             
             # Get user's profile IDs based on role
-            user_profile_ids = []
-            if hasattr(request.user, 'processor_profile'):
-                user_profile_ids.append(request.user.processor_profile.id)
-            if hasattr(request.user, 'fpo_profile'):
-                user_profile_ids.append(request.user.fpo_profile.id)
-            if hasattr(request.user, 'retailer_profile'):
-                user_profile_ids.append(request.user.retailer_profile.id)
-            if hasattr(request.user, 'farmer_profile'):
-                user_profile_ids.append(request.user.farmer_profile.id)
+            profile = get_role_profile(request)
+            user_profile_ids = [profile.id] if profile else []
             
             # Calculate pending payments (where user is payee)
             pending_payments = Decimal('0.00')
@@ -123,12 +112,17 @@ class WalletViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = WalletSerializer
     permission_classes = [IsAuthenticated]
     
+    def _payer_profile_id(self, request):
+        """Profile ID the user pays from, based on role"""
+        profile = get_role_profile(request)
+        if profile and request.user.role in ['processor', 'fpo', 'retailer']:
+            return profile.id
+        return None
+    
     @action(detail=False, methods=['post'])
     def process_payment(self, request):
         """Process wallet payment for a bid"""
-        from django.db import transaction
-        from django.utils import timezone
-        from decimal import Decimal
+        from .ledger_service import settle_payments
         
         payment_id = request.data.get('payment_id')
         
@@ -138,230 +132,119 @@ class WalletViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        user_profile_id = self._payer_profile_id(request)
+        if not user_profile_id:
+            return Response(
+                response_error(message="User profile not found"),
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
         try:
-            # Get user's profile ID based on role
-            user_profile_id = None
-            if hasattr(request.user, 'processor_profile'):
-                user_profile_id = request.user.processor_profile.id
-            elif hasattr(request.user, 'fpo_profile'):
-                user_profile_id = request.user.fpo_profile.id
-            elif hasattr(request.user, 'retailer_profile'):
-                user_profile_id = request.user.retailer_profile.id
-            
-            if not user_profile_id:
-                return Response(
-                    response_error(message="User profile not found"),
-                    status=status.HTTP_403_FORBIDDEN
-                )
-            
-            # Get payment
-            payment = Payment.objects.select_for_update().get(
-                id=payment_id,
-                payer_id=user_profile_id,
-                is_active=True
+            result = settle_payments([payment_id], request.user, user_profile_id)
+        except WritePending:
+            # The settlement has started and will commit; it has not failed
+            return Response(
+                response_success(
+                    message="Payment is being processed",
+                    data={'payment_id': payment_id, 'status': 'processing'}
+                ),
+                status=status.HTTP_202_ACCEPTED
             )
-        except Payment.DoesNotExist:
+        except (ValueError, DjangoValidationError) as e:
             return Response(
-                response_error(message="Payment not found or you are not authorized"),
-                status=status.HTTP_404_NOT_FOUND
+                response_error(message=str(e)),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            return Response(
+                response_error(message=f"Payment processing failed: {str(e)}"),
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
         
-        # Check if payment is already completed
-        if payment.status == 'completed':
+        if result['failed']:
+            error = result['failed'][0]['error']
             return Response(
-                response_error(message="Payment already completed"),
-                status=status.HTTP_400_BAD_REQUEST
+                response_error(message=error),
+                status=status.HTTP_404_NOT_FOUND if error.startswith('Payment not found') else status.HTTP_400_BAD_REQUEST
             )
         
-        # Check if payment is failed
-        if payment.status == 'failed':
+        return Response(
+            response_success(
+                message="Payment processed successfully",
+                data={
+                    **result['settled'][0],
+                    'payer_balance': float(result['payer_balance'])
+                }
+            )
+        )
+    
+    @action(detail=False, methods=['post'])
+    def settle(self, request):
+        """
+        Settle many pending payments from the payer's wallet in one transaction
+        Body: {"payment_ids": [...]}; payments that cannot be settled are
+        reported in `failed` and the rest are paid out
+        """
+        from .ledger_service import settle_payments, MAX_SETTLEMENT_BATCH
+        
+        payment_ids = request.data.get('payment_ids')
+        if not isinstance(payment_ids, list) or not payment_ids:
             return Response(
-                response_error(message="Payment has failed. Please contact support"),
+                response_error(message="payment_ids must be a non-empty list"),
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(payment_ids) > MAX_SETTLEMENT_BATCH:
+            return Response(
+                response_error(message=f"At most {MAX_SETTLEMENT_BATCH} payments can be settled at once"),
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        user_profile_id = self._payer_profile_id(request)
+        if not user_profile_id:
+            return Response(
+                response_error(message="User profile not found"),
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
         try:
-            with transaction.atomic():
-                # Get or create payer wallet
-                payer_wallet, _ = Wallet.objects.select_for_update().get_or_create(
-                    user=request.user,
-                    defaults={'balance': Decimal('0')}
-                )
-                
-                # Check sufficient balance
-                if not payer_wallet.has_sufficient_balance(payment.gross_amount):
-                    return Response(
-                        response_error(
-                            message=f"Insufficient wallet balance. Available: ₹{payer_wallet.get_available_balance()}, Required: ₹{payment.gross_amount}"
-                        ),
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                
-                # Deduct from payer wallet
-                lot_ref = f"lot {payment.lot.lot_number}" if payment.lot and hasattr(payment.lot, 'lot_number') else (payment.notes if payment.notes else "order")
-                payer_wallet.deduct_balance(
-                    payment.gross_amount,
-                    reason=f"Payment for {lot_ref}"
-                )
-                
-                # Create transaction record
-                Transaction.objects.create(
-                    payment=payment,
-                    transaction_type='payment_processing',
-                    amount=payment.gross_amount,
-                    status='processing',
-                    status_message=f"Deducted ₹{payment.gross_amount} from payer wallet"
-                )
-                
-                # Distribute payment (farmer + FPO commission if applicable)
-                self._distribute_payment(payment)
-                
-                # Update payment status
-                payment.status = 'completed'
-                payment.completed_at = timezone.now()
-                payment.gateway_transaction_id = f"WALLET-{timezone.now().strftime('%Y%m%d%H%M%S')}-{payment.id}"
-                payment.save()
-                
-                # Create completion transaction
-                Transaction.objects.create(
-                    payment=payment,
-                    transaction_type='payment_completed',
-                    amount=payment.net_amount,
-                    status='completed',
-                    status_message=f"Payment completed successfully. Net amount: ₹{payment.net_amount}"
-                )
-                
-                return Response(
-                    response_success(
-                        message="Payment processed successfully",
-                        data={
-                            'payment_id': str(payment.id),
-                            'amount': float(payment.gross_amount),
-                            'net_amount': float(payment.net_amount),
-                            'status': payment.status,
-                            'payer_balance': float(payer_wallet.balance)
-                        }
-                    )
-                )
-                
-        except ValueError as e:
+            result = settle_payments(payment_ids, request.user, user_profile_id)
+        except WritePending:
+            return Response(
+                response_success(
+                    message="Settlement is being processed",
+                    data={'payment_ids': payment_ids, 'status': 'processing'}
+                ),
+                status=status.HTTP_202_ACCEPTED
+            )
+        except (ValueError, DjangoValidationError) as e:
             return Response(
                 response_error(message=str(e)),
                 status=status.HTTP_400_BAD_REQUEST
             )
         except Exception as e:
             return Response(
-                response_error(message=f"Payment processing failed: {str(e)}"),
+                response_error(message=f"Settlement failed: {str(e)}"),
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-    
-    def _distribute_payment(self, payment):
-        """Distribute payment to payee (farmer or processor) and FPO commission if applicable"""
-        from django.utils import timezone
-        from apps.farmers.models import FarmerProfile
-        from apps.processors.models import ProcessorProfile
-        from apps.users.models import User
-        
-        # Determine payment reason text
-        if payment.lot and hasattr(payment.lot, 'lot_number'):
-            lot_reference = f"lot {payment.lot.lot_number}"
-        else:
-            # Extract order number from notes or use generic text
-            lot_reference = payment.notes if payment.notes else "order"
         
-        # Credit payee (farmer or processor)
-        try:
-            payee_user = None
-            
-            # Try to get farmer first
-            try:
-                farmer = FarmerProfile.objects.select_related('user').get(id=payment.payee_id)
-                payee_user = farmer.user
-            except FarmerProfile.DoesNotExist:
-                # Try processor for retailer orders
-                try:
-                    processor = ProcessorProfile.objects.select_related('user').get(id=payment.payee_id)
-                    payee_user = processor.user
-                except ProcessorProfile.DoesNotExist:
-                    # Try FPO for aggregated lots
-                    try:
-                        from apps.fpos.models import FPOProfile
-                        fpo = FPOProfile.objects.select_related('user').get(id=payment.payee_id)
-                        payee_user = fpo.user
-                    except:
-                        pass
-            
-            if payee_user:
-                payee_wallet, _ = Wallet.objects.get_or_create(
-                    user=payee_user,
-                    defaults={'balance': Decimal('0')}
-                )
-                
-                payee_wallet.add_balance(
-                    payment.net_amount,
-                    reason=f"Payment received for {lot_reference}"
-                )
-                
-                Transaction.objects.create(
-                    payment=payment,
-                    transaction_type='payment_completed',
-                    amount=payment.net_amount,
-                    status='completed',
-                    status_message=f"Credited ₹{payment.net_amount} to payee wallet"
-                )
-            else:
-                # Log error if payee not found
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.error(f"Payee profile not found for payee_id: {payment.payee_id}")
-        except Exception as e:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Error distributing payment: {str(e)}")
-        
-        # Credit FPO commission if applicable
-        if payment.commission_amount > 0 and 'FPO:' in payment.notes:
-            try:
-                # Extract FPO ID from notes
-                import re
-                fpo_id_match = re.search(r'FPO:.*\(ID: ([a-f0-9\-]+)\)', payment.notes)
-                if fpo_id_match:
-                    from apps.fpos.models import FPOProfile
-                    fpo_id = fpo_id_match.group(1)
-                    fpo = FPOProfile.objects.get(id=fpo_id)
-                    fpo_wallet, _ = Wallet.objects.get_or_create(
-                        user=fpo.user,
-                        defaults={'balance': Decimal('0')}
-                    )
-                    
-                    lot_ref = f"lot {payment.lot.lot_number}" if payment.lot and hasattr(payment.lot, 'lot_number') else (payment.notes if payment.notes else "order")
-                    fpo_wallet.add_balance(
-                        payment.commission_amount,
-                        reason=f"Commission from {lot_ref}"
-                    )
-                    
-                    Transaction.objects.create(
-                        payment=payment,
-                        transaction_type='payment_completed',
-                        amount=payment.commission_amount,
-                        status='completed',
-                        status_message=f"Credited ₹{payment.commission_amount} commission to FPO wallet"
-                    )
-            except:
-                pass
+        return Response(
+            response_success(
+                message=f"Settled {len(result['settled'])} of {len(payment_ids)} payments",
+                data={
+                    'settled': result['settled'],
+                    'failed': result['failed'],
+                    'total_amount': float(result['total_amount']),
+                    'payer_balance': float(result['payer_balance'])
+                }
+            )
+        )
     
     @action(detail=False, methods=['get'])
     def pending_payments(self, request):
         """Get pending payments for current user (as payer)"""
         try:
             # Get user's profile ID based on role
-            user_profile_id = None
-            if hasattr(request.user, 'processor_profile'):
-                user_profile_id = request.user.processor_profile.id
-            elif hasattr(request.user, 'fpo_profile'):
-                user_profile_id = request.user.fpo_profile.id
-            elif hasattr(request.user, 'retailer_profile'):
-                user_profile_id = request.user.retailer_profile.id
+            user_profile_id = self._payer_profile_id(request)
             
             if not user_profile_id:
                 return Response(
@@ -394,14 +277,14 @@ class WalletViewSet(viewsets.ReadOnlyModelViewSet):
         """Get payment history for farmer"""
         try:
             # Check if user is a farmer
-            if not hasattr(request.user, 'farmer_profile'):
+            try:
+                farmer = get_role_profile(request, FarmerProfile)
+            except FarmerProfile.DoesNotExist:
                 return Response(
                     response_error(message="Only farmers can access earnings"),
                     status=status.HTTP_403_FORBIDDEN
                 )
             
-            farmer = request.user.farmer_profile
-            
             # Get all payments where farmer is payee
             payments = Payment.objects.filter(
                 payee_id=farmer.id,
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.27 on 2026-10-19 10:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('processors', '0005_processorprofile_latitude_processorprofile_longitude'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='processorprofile',
+            index=models.Index(fields=['latitude', 'longitude'], name='processor_p_latitud_10b208_idx'),
+        ),
+    ]
@@ -25,6 +25,10 @@ class ProcessorProfile(TimeStampedModel):
     
     class Meta:
         db_table = 'processor_profiles'
+        indexes = [
+            # Map tile bounding boxes
+            models.Index(fields=['latitude', 'longitude']),
+        ]
     
     def __str__(self):
         return self.company_name
@@ -121,6 +125,26 @@ class ProcessingBatch(TimeStampedModel):
     def __str__(self):
         return f"{self.batch_number} - {self.get_current_stage_display()}"
     
+    def save(self, *args, **kwargs):
+        if not self.batch_number:
+            self.batch_number = self.generate_batch_number()
+        super().save(*args, **kwargs)
+    
+    @classmethod
+    def generate_batch_number(cls):
+        """Generate unique batch number: BATCH-YYYYMMDD-XXX"""
+        from django.utils import timezone
+        from apps.core.services import next_sequence_value, max_numeric_suffix
+        
+        today = timezone.now().strftime('%Y%m%d')
+        prefix = f'BATCH-{today}'
+        
+        seq = next_sequence_value(
+            'BATCH', today,
+            seed=lambda: max_numeric_suffix(cls.objects.all(), 'batch_number', prefix)
+        )
+        return f'{prefix}-{seq:03d}'
+    
     @property
     def oil_yield_percentage(self):
         """Calculate oil yield percentage"""
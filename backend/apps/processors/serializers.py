@@ -61,25 +61,7 @@ class ProcessingBatchSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         """Auto-generate batch number if not provided"""
         if 'batch_number' not in validated_data or not validated_data['batch_number']:
-            # Generate batch number: BATCH-YYYYMMDD-XXX
-            from django.utils import timezone
-            from django.db.models import Max
-            
-            today = timezone.now().strftime('%Y%m%d')
-            prefix = f'BATCH-{today}'
-            
-            # Get last batch number for today
-            last_batch = ProcessingBatch.objects.filter(
-                batch_number__startswith=prefix
-            ).aggregate(Max('batch_number'))
-            
-            if last_batch['batch_number__max']:
-                last_num = int(last_batch['batch_number__max'].split('-')[-1])
-                new_num = last_num + 1
-            else:
-                new_num = 1
-            
-            validated_data['batch_number'] = f'{prefix}-{new_num:03d}'
+            validated_data['batch_number'] = ProcessingBatch.generate_batch_number()
         
         return super().create(validated_data)
 
@@ -95,25 +77,7 @@ class ProcessingBatchCreateSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         """Auto-generate batch number if not provided"""
         if 'batch_number' not in validated_data or not validated_data.get('batch_number'):
-            # Generate batch number: BATCH-YYYYMMDD-XXX
-            from django.utils import timezone
-            from django.db.models import Max
-            
-            today = timezone.now().strftime('%Y%m%d')
-            prefix = f'BATCH-{today}'
-            
-            # Get last batch number for today
-            last_batch = ProcessingBatch.objects.filter(
-                batch_number__startswith=prefix
-            ).aggregate(Max('batch_number'))
-            
-            if last_batch['batch_number__max']:
-                last_num = int(last_batch['batch_number__max'].split('-')[-1])
-                new_num = last_num + 1
-            else:
-                new_num = 1
-            
-            validated_data['batch_number'] = f'{prefix}-{new_num:03d}'
+            validated_data['batch_number'] = ProcessingBatch.generate_batch_number()
         
         return ProcessingBatch.objects.create(**validated_data)
 
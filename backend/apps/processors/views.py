@@ -14,6 +14,8 @@ from datetime import timedelta, datetime
 from decimal import Decimal
 
 from apps.core.utils import response_success, response_error
+from apps.core.services import get_role_profile
+from apps.core.db_router import ReplicaReadMixin
 from apps.core.permissions import IsProcessor
 from .models import ProcessorProfile, ProcessingPlant, ProcessingBatch, ProcessingStageLog, FinishedProduct, ProcessedProduct
 from .serializers import (
@@ -44,7 +46,7 @@ class ProcessorProfileAPIView(APIView):
     def get(self, request):
         """Get Processor profile"""
         try:
-            processor = ProcessorProfile.objects.get(user=request.user)
+            processor = get_role_profile(request, ProcessorProfile)
         except ProcessorProfile.DoesNotExist:
             # Auto-create profile if it doesn't exist
             processor = ProcessorProfile.objects.create(
@@ -98,7 +100,7 @@ class ProcessorProfileAPIView(APIView):
     def patch(self, request):
         """Update Processor profile"""
         try:
-            processor = ProcessorProfile.objects.get(user=request.user)
+            processor = get_role_profile(request, ProcessorProfile)
             serializer = ProcessorProfileSerializer(processor, data=request.data, partial=True)
             if serializer.is_valid():
                 serializer.save()
@@ -140,7 +142,7 @@ class BidSuggestionAPIView(APIView):
             )
         
         try:
-            processor = ProcessorProfile.objects.get(user=request.user)
+            processor = get_role_profile(request, ProcessorProfile)
         except ProcessorProfile.DoesNotExist:
             return Response(
                 response_error(message="Processor profile not found"),
@@ -336,7 +338,7 @@ class ProcessingPlantViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Return plants owned by the current processor"""
         try:
-            processor = ProcessorProfile.objects.get(user=self.request.user)
+            processor = get_role_profile(self.request, ProcessorProfile)
             return ProcessingPlant.objects.filter(processor=processor).order_by('-created_at')
         except ProcessorProfile.DoesNotExist:
             return ProcessingPlant.objects.none()
@@ -344,7 +346,7 @@ class ProcessingPlantViewSet(viewsets.ModelViewSet):
     def create(self, request):
         """Create a new processing plant"""
         try:
-            processor = ProcessorProfile.objects.get(user=request.user)
+            processor = get_role_profile(request, ProcessorProfile)
         except ProcessorProfile.DoesNotExist:
             return Response(
                 response_error(message="Processor profile not found"),
@@ -456,7 +458,7 @@ class ProcessingPlantViewSet(viewsets.ModelViewSet):
             )
 
 
-class ProcessorDashboardAPIView(APIView):
+class ProcessorDashboardAPIView(ReplicaReadMixin, APIView):
     """
     Processor Dashboard with comprehensive metrics and analytics
     GET: /api/processors/dashboard/
@@ -465,7 +467,7 @@ class ProcessorDashboardAPIView(APIView):
     
     def get(self, request):
         try:
-            processor = ProcessorProfile.objects.get(user=request.user)
+            processor = get_role_profile(request, ProcessorProfile)
         except ProcessorProfile.DoesNotExist:
             return Response(
                 response_error(message="Processor profile not found"),
@@ -635,7 +637,7 @@ class ProcessorBidsAPIView(APIView):
     def get(self, request):
         """Get all processor bids"""
         try:
-            processor = ProcessorProfile.objects.get(user=request.user)
+            processor = get_role_profile(request, ProcessorProfile)
         except ProcessorProfile.DoesNotExist:
             return Response(
                 response_error(message="Processor profile not found"),
@@ -719,7 +721,7 @@ class ProcessorBidsAPIView(APIView):
     def post(self, request):
         """Place a new bid"""
         try:
-            processor = ProcessorProfile.objects.get(user=request.user)
+            processor = get_role_profile(request, ProcessorProfile)
         except ProcessorProfile.DoesNotExist:
             return Response(
                 response_error(message="Processor profile not found"),
@@ -783,10 +785,10 @@ class ProcessorBidsAPIView(APIView):
             message=message
         )
         
-        # Update lot status to bidding
+        # Update lot status to bidding (status only: bid_count is bumped by a queued F() update)
         if lot.status == 'available':
             lot.status = 'bidding'
-            lot.save()
+            lot.save(update_fields=['status', 'updated_at'])
         
         return Response(
             response_success(
@@ -811,7 +813,7 @@ class ProcessorProcurementAPIView(APIView):
     def get(self, request):
         """Browse available lots or view procurement history"""
         try:
-            processor = ProcessorProfile.objects.get(user=request.user)
+            processor = get_role_profile(request, ProcessorProfile)
         except ProcessorProfile.DoesNotExist:
             return Response(
                 response_error(message="Processor profile not found"),
@@ -935,7 +937,7 @@ class ProcessingBatchesAPIView(APIView):
     def get(self, request):
         """Get all processing batches"""
         try:
-            processor = ProcessorProfile.objects.get(user=request.user)
+            processor = get_role_profile(request, ProcessorProfile)
         except ProcessorProfile.DoesNotExist:
             return Response(
                 response_error(message="Processor profile not found"),
@@ -1004,7 +1006,7 @@ class ProcessingBatchesAPIView(APIView):
     def post(self, request):
         """Create new processing batch"""
         try:
-            processor = ProcessorProfile.objects.get(user=request.user)
+            processor = get_role_profile(request, ProcessorProfile)
         except ProcessorProfile.DoesNotExist:
             return Response(
                 response_error(message="Processor profile not found"),
@@ -1038,7 +1040,7 @@ class ProcessorInventoryAPIView(APIView):
     def get(self, request):
         """Get inventory data"""
         try:
-            processor = ProcessorProfile.objects.get(user=request.user)
+            processor = get_role_profile(request, ProcessorProfile)
         except ProcessorProfile.DoesNotExist:
             return Response(
                 response_error(message="Processor profile not found"),
@@ -1123,7 +1125,7 @@ class LotAvailabilityAPIView(APIView):
     def get(self, request, lot_id):
         """Get lot availability information"""
         try:
-            processor = ProcessorProfile.objects.get(user=request.user)
+            processor = get_role_profile(request, ProcessorProfile)
         except ProcessorProfile.DoesNotExist:
             return Response(
                 response_error(message="Processor profile not found"),
@@ -1197,7 +1199,7 @@ class ProcessingBatchViewSet(viewsets.ModelViewSet):
     serializer_class = ProcessingBatchSerializer
     
     def get_queryset(self):
-        processor = ProcessorProfile.objects.get(user=self.request.user)
+        processor = get_role_profile(self.request, ProcessorProfile)
         return ProcessingBatch.objects.filter(
             plant__processor=processor
         ).select_related('plant', 'lot').prefetch_related('stage_logs', 'finished_products')
@@ -1208,7 +1210,7 @@ class ProcessingBatchViewSet(viewsets.ModelViewSet):
         Validates ownership, quantity, and deducts from warehouse if applicable
         """
         try:
-            processor = ProcessorProfile.objects.get(user=request.user)
+            processor = get_role_profile(request, ProcessorProfile)
         except ProcessorProfile.DoesNotExist:
             return Response(
                 response_error(message="Processor profile not found"),
@@ -1609,7 +1611,7 @@ class ProcessingStageLogAPIView(APIView):
     permission_classes = [IsAuthenticated, IsProcessor]
     
     def get(self, request, batch_id):
-        processor = ProcessorProfile.objects.get(user=request.user)
+        processor = get_role_profile(request, ProcessorProfile)
         
         try:
             batch = ProcessingBatch.objects.get(
@@ -1641,7 +1643,7 @@ class FinishedProductAPIView(APIView):
     permission_classes = [IsAuthenticated, IsProcessor]
     
     def get(self, request):
-        processor = ProcessorProfile.objects.get(user=request.user)
+        processor = get_role_profile(request, ProcessorProfile)
         
         products = FinishedProduct.objects.filter(
             batch__plant__processor=processor
@@ -1677,7 +1679,7 @@ class ProcessedProductListCreateAPIView(APIView):
     
     def get(self, request):
         """List processor's products"""
-        processor = ProcessorProfile.objects.get(user=request.user)
+        processor = get_role_profile(request, ProcessorProfile)
         
         products = ProcessedProduct.objects.filter(
             processor=processor
@@ -1746,7 +1748,7 @@ class ProcessedProductDetailAPIView(APIView):
     
     def get(self, request, pk):
         """Get product details"""
-        processor = ProcessorProfile.objects.get(user=request.user)
+        processor = get_role_profile(request, ProcessorProfile)
         product = self.get_object(pk, processor)
         
         if not product:
@@ -1765,7 +1767,7 @@ class ProcessedProductDetailAPIView(APIView):
     
     def patch(self, request, pk):
         """Update product"""
-        processor = ProcessorProfile.objects.get(user=request.user)
+        processor = get_role_profile(request, ProcessorProfile)
         product = self.get_object(pk, processor)
         
         if not product:
@@ -1799,7 +1801,7 @@ class ProcessedProductDetailAPIView(APIView):
     
     def delete(self, request, pk):
         """Delete product"""
-        processor = ProcessorProfile.objects.get(user=request.user)
+        processor = get_role_profile(request, ProcessorProfile)
         product = self.get_object(pk, processor)
         
         if not product:
@@ -2163,7 +2165,7 @@ class ProcessorOrdersAPIView(APIView):
     def get(self, request):
         """Get all orders from retailers for this processor"""
         try:
-            processor = ProcessorProfile.objects.get(user=request.user)
+            processor = get_role_profile(request, ProcessorProfile)
         except ProcessorProfile.DoesNotExist:
             return Response(
                 response_error(message="Processor profile not found"),
@@ -2203,7 +2205,7 @@ class ProcessorOrderDetailAPIView(APIView):
     def get(self, request, pk):
         """Get order details"""
         try:
-            processor = ProcessorProfile.objects.get(user=request.user)
+            processor = get_role_profile(request, ProcessorProfile)
         except ProcessorProfile.DoesNotExist:
             return Response(
                 response_error(message="Processor profile not found"),
@@ -2245,7 +2247,7 @@ class ProcessorOrderStatusUpdateAPIView(APIView):
     def patch(self, request, pk):
         """Update order status with inventory management"""
         try:
-            processor = ProcessorProfile.objects.get(user=request.user)
+            processor = get_role_profile(request, ProcessorProfile)
         except ProcessorProfile.DoesNotExist:
             return Response(
                 response_error(message="Processor profile not found"),
@@ -99,18 +99,16 @@ class RetailerOrder(TimeStampedModel):
         """Generate order number if not set"""
         if not self.order_number:
             from django.utils import timezone
+            from apps.core.services import next_sequence_value, max_numeric_suffix
             date_str = timezone.now().strftime('%Y%m%d')
-            last_order = RetailerOrder.objects.filter(
-                order_number__startswith=f'ORD-{date_str}'
-            ).order_by('-order_number').first()
+            prefix = f'ORD-{date_str}'
             
-            if last_order:
-                last_num = int(last_order.order_number.split('-')[-1])
-                new_num = last_num + 1
-            else:
-                new_num = 1
+            new_num = next_sequence_value(
+                'ORD', date_str,
+                seed=lambda: max_numeric_suffix(RetailerOrder.objects.all(), 'order_number', prefix)
+            )
             
-            self.order_number = f'ORD-{date_str}-{new_num:04d}'
+            self.order_number = f'{prefix}-{new_num:04d}'
         
         super().save(*args, **kwargs)
 
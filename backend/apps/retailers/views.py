@@ -17,6 +17,8 @@ from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
 from io import BytesIO
 
 from apps.core.utils import response_success, response_error
+from apps.core.services import get_role_profile
+from apps.core.db_router import ReplicaReadMixin
 from apps.core.permissions import IsRetailer
 from .models import RetailerProfile, Store, RetailerOrder, OrderItem, RetailerInventory
 from .serializers import (
@@ -40,7 +42,7 @@ class RetailerProfileAPIView(APIView):
     def get(self, request):
         """Get retailer profile"""
         try:
-            retailer = RetailerProfile.objects.get(user=request.user)
+            retailer = get_role_profile(request, RetailerProfile)
             serializer = RetailerProfileSerializer(retailer)
             return Response(
                 response_success(
@@ -88,7 +90,7 @@ class RetailerProfileAPIView(APIView):
     def patch(self, request):
         """Update retailer profile"""
         try:
-            retailer = RetailerProfile.objects.get(user=request.user)
+            retailer = get_role_profile(request, RetailerProfile)
             serializer = RetailerProfileSerializer(retailer, data=request.data, partial=True)
             if serializer.is_valid():
                 serializer.save()
@@ -119,7 +121,7 @@ class StoreViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
 
-class RetailerDashboardAPIView(APIView):
+class RetailerDashboardAPIView(ReplicaReadMixin, APIView):
     """
     Retailer dashboard with stats and recent data
     GET /api/retailers/dashboard/
@@ -129,7 +131,7 @@ class RetailerDashboardAPIView(APIView):
     def get(self, request):
         """Get retailer dashboard stats"""
         try:
-            retailer = RetailerProfile.objects.get(user=request.user)
+            retailer = get_role_profile(request, RetailerProfile)
         except RetailerProfile.DoesNotExist:
             return Response(
                 response_error(message="Retailer profile not found"),
@@ -206,7 +208,7 @@ class RetailerOrderListCreateAPIView(APIView):
     def get(self, request):
         """List retailer orders"""
         try:
-            retailer = RetailerProfile.objects.get(user=request.user)
+            retailer = get_role_profile(request, RetailerProfile)
         except RetailerProfile.DoesNotExist:
             return Response(
                 response_error(message="Retailer profile not found"),
@@ -234,7 +236,7 @@ class RetailerOrderListCreateAPIView(APIView):
     def post(self, request):
         """Create new order"""
         try:
-            retailer = RetailerProfile.objects.get(user=request.user)
+            retailer = get_role_profile(request, RetailerProfile)
         except RetailerProfile.DoesNotExist:
             return Response(
                 response_error(message="Retailer profile not found"),
@@ -276,7 +278,7 @@ class RetailerOrderDetailAPIView(APIView):
     def get(self, request, pk):
         """Get order details"""
         try:
-            retailer = RetailerProfile.objects.get(user=request.user)
+            retailer = get_role_profile(request, RetailerProfile)
         except RetailerProfile.DoesNotExist:
             return Response(
                 response_error(message="Retailer profile not found"),
@@ -310,7 +312,7 @@ class RetailerInventoryAPIView(APIView):
     def get(self, request):
         """Get retailer inventory"""
         try:
-            retailer = RetailerProfile.objects.get(user=request.user)
+            retailer = get_role_profile(request, RetailerProfile)
         except RetailerProfile.DoesNotExist:
             return Response(
                 response_error(message="Retailer profile not found"),
@@ -351,7 +353,7 @@ class RetailerSuppliersAPIView(APIView):
     def get(self, request):
         """Get list of suppliers"""
         try:
-            retailer = RetailerProfile.objects.get(user=request.user)
+            retailer = get_role_profile(request, RetailerProfile)
         except RetailerProfile.DoesNotExist:
             return Response(
                 response_error(message="Retailer profile not found"),
@@ -409,7 +411,7 @@ class RetailerQuickOrderAPIView(APIView):
     def post(self, request):
         """Create quick order with auto-filled delivery details"""
         try:
-            retailer = RetailerProfile.objects.get(user=request.user)
+            retailer = get_role_profile(request, RetailerProfile)
         except RetailerProfile.DoesNotExist:
             return Response(
                 response_error(message="Retailer profile not found"),
@@ -526,7 +528,7 @@ class RetailerInvoiceDownloadAPIView(APIView):
     def get(self, request, pk):
         """Generate invoice PDF"""
         try:
-            retailer = RetailerProfile.objects.get(user=request.user)
+            retailer = get_role_profile(request, RetailerProfile)
         except RetailerProfile.DoesNotExist:
             return Response(
                 response_error(message="Retailer profile not found"),
@@ -13,4 +13,14 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from apps.notifications.streaming import websocket_application  # noqa: E402  (needs the app registry)
+
+
+async def application(scope, receive, send):
+    # WebSocket connections go to the live update stream, everything else to Django
+    if scope['type'] == 'websocket':
+        await websocket_application(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
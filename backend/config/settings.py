@@ -9,6 +9,7 @@ from pathlib import Path
 from decouple import config
 from datetime import timedelta
 import os
+import sys
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -56,12 +57,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'apps.core.middleware.RequestInstrumentationMiddleware',  # query counts / latency
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # CORS
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.core.middleware.RoleProfileMiddleware',  # request.role_profile
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -87,13 +90,156 @@ TEMPLATES = [
 WSGI_APPLICATION = 'config.wsgi.application'
 
 
-# Database (SQLite for hackathon - fast and easy)
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Database: SQLite by default; DB_ENGINE=postgres for production (multi-worker gunicorn)
+DB_ENGINE = config('DB_ENGINE', default='sqlite')
+# Behind pgbouncer in transaction mode: server-side cursors cannot span transactions
+DB_POOLER = config('DB_POOLER', default='')
+# Second alias pointing at the primary, to exercise replica routing without a replica
+DB_REPLICA_STANDIN = config('DB_REPLICA_STANDIN', default=False, cast=bool)
+
+
+def _postgres_database(host, port, read_only=False):
+    options = {'connect_timeout': 5, 'application_name': 'seedsync'}
+    if read_only:
+        options['options'] = '-c default_transaction_read_only=on'
+    return {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': config('DB_NAME', default='seedsync'),
+        'USER': config('DB_USER', default='seedsync'),
+        'PASSWORD': config('DB_PASSWORD', default=''),
+        'HOST': host,
+        'PORT': port,
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': True,
+        'DISABLE_SERVER_SIDE_CURSORS': DB_POOLER == 'pgbouncer',
+        'OPTIONS': options,
     }
-}
+
+
+if DB_ENGINE == 'postgres':
+    DATABASES = {
+        'default': _postgres_database(config('DB_HOST', default='localhost'), config('DB_PORT', default='5432')),
+    }
+    DB_REPLICA_HOST = config('DB_REPLICA_HOST', default='')
+    if DB_REPLICA_HOST or DB_REPLICA_STANDIN:
+        DATABASES['replica'] = _postgres_database(
+            DB_REPLICA_HOST or DATABASES['default']['HOST'],
+            config('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+            read_only=True,
+        )
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        }
+    }
+    if DB_REPLICA_STANDIN:
+        # Same file opened read-only, so a write routed to it fails loudly
+        DATABASES['replica'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': f"file:{DATABASES['default']['NAME']}?mode=ro",
+        }
+
+if 'replica' in DATABASES:
+    # Tests run against the primary only
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+# Read-only analytics views (ReplicaReadMixin) read from 'replica' when configured
+DATABASE_ROUTERS = ['apps.core.db_router.AnalyticsReplicaRouter']
+
+# Applied to every new SQLite connection (apps.core.sqlite_tuning); empty dict = driver defaults
+SQLITE_TUNING = config('SQLITE_TUNING', default=True, cast=bool)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',  # readers no longer block on the writer
+    'synchronous': 'normal',  # fsync at checkpoints, not every commit
+    'busy_timeout': config('SQLITE_BUSY_TIMEOUT', default=5000, cast=int),  # ms to wait for the write lock
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,  # KiB (64 MB page cache per connection)
+    'temp_store': 'memory',
+} if SQLITE_TUNING else {}
+
+
+# Cache - shared by all workers: Redis when REDIS_URL is set, else files on disk
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': config('CACHE_DIR', default=str(BASE_DIR / '.cache')),
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
+# Response caching for public read endpoints (apps.core.cache)
+RESPONSE_CACHE_ENABLED = config('RESPONSE_CACHE_ENABLED', default=True, cast=bool)
+RESPONSE_CACHE_ALIAS = 'default'
+
+# Seconds a user's role profile may be served from the shared cache (0 = per request only)
+ROLE_PROFILE_CACHE_TTL = config('ROLE_PROFILE_CACHE_TTL', default=0, cast=int)
+
+# Request instrumentation (apps.core.instrumentation)
+RUNNING_TESTS = len(sys.argv) > 1 and sys.argv[1] == 'test' or 'pytest' in sys.argv[0]
+INSTRUMENTATION_ENABLED = config('INSTRUMENTATION_ENABLED', default=True, cast=bool)
+INSTRUMENTATION_BUFFER_SIZE = config('INSTRUMENTATION_BUFFER_SIZE', default=5000, cast=int)
+INSTRUMENTATION_HEADERS = config('INSTRUMENTATION_HEADERS', default=DEBUG, cast=bool)  # X-Query-Count, Server-Timing
+INSTRUMENTATION_DUMP_INTERVAL = config('INSTRUMENTATION_DUMP_INTERVAL', default=0, cast=int)  # seconds, 0 = off
+INSTRUMENTATION_DUMP_DIR = config('INSTRUMENTATION_DUMP_DIR', default='')  # CSV + Prometheus files; empty = log only
+QUERY_BUDGET_STRICT = config('QUERY_BUDGET_STRICT', default=RUNNING_TESTS, cast=bool)  # raise instead of warn
+
+# Ledger and counter writes go through one writer thread per process (apps.core.write_queue)
+WRITE_QUEUE_ENABLED = config('WRITE_QUEUE_ENABLED', default=DB_ENGINE == 'sqlite' and not RUNNING_TESTS, cast=bool)
+WRITE_QUEUE_BATCH_SIZE = config('WRITE_QUEUE_BATCH_SIZE', default=100, cast=int)  # jobs per commit
+
+# Live bid/lot/notification push (apps.notifications.broker); Redis fans out across workers
+PUSH_ENABLED = config('PUSH_ENABLED', default=True, cast=bool)
+PUSH_BROKER_BACKEND = config(
+    'PUSH_BROKER_BACKEND',
+    default='apps.notifications.broker.RedisBroker' if REDIS_URL else 'apps.notifications.broker.InProcessBroker'
+)
+PUSH_REPLAY_SIZE = config('PUSH_REPLAY_SIZE', default=200, cast=int)  # events kept per channel for Last-Event-ID
+PUSH_QUEUE_SIZE = config('PUSH_QUEUE_SIZE', default=500, cast=int)  # per client before it is told to resync
+PUSH_HEARTBEAT_SECONDS = config('PUSH_HEARTBEAT_SECONDS', default=15, cast=int)
+PUSH_RETRY_MS = config('PUSH_RETRY_MS', default=3000, cast=int)  # SSE reconnect delay hint
+PUSH_STREAM_MAX_SECONDS = config('PUSH_STREAM_MAX_SECONDS', default=300, cast=int)  # SSE clients then reconnect
+
+# Shipment GPS telemetry (apps.logistics.services.telemetry_service)
+TELEMETRY_MAX_BATCH_PINGS = config('TELEMETRY_MAX_BATCH_PINGS', default=5000, cast=int)  # per request
+TELEMETRY_CHUNK_POINTS = config('TELEMETRY_CHUNK_POINTS', default=720, cast=int)  # an hour of 5 s pings per row
+TELEMETRY_RAW_RETENTION_HOURS = config('TELEMETRY_RAW_RETENTION_HOURS', default=24, cast=int)  # then downsampled
+TELEMETRY_BUCKET_SECONDS = config('TELEMETRY_BUCKET_SECONDS', default=30, cast=int)  # at most one point per bucket
+TELEMETRY_SIMPLIFY_METERS = config('TELEMETRY_SIMPLIFY_METERS', default=15, cast=float)  # Douglas-Peucker tolerance
+TELEMETRY_TRACK_MAX_POINTS = config('TELEMETRY_TRACK_MAX_POINTS', default=500, cast=int)  # per track in API responses
+
+# Mobile delta sync, /api/sync/ (apps.core.services.sync_service)
+SYNC_PAGE_SIZE = config('SYNC_PAGE_SIZE', default=500, cast=int)  # rows per collection per request
+SYNC_MAX_PAGE_SIZE = config('SYNC_MAX_PAGE_SIZE', default=2000, cast=int)
+SYNC_SETTLE_SECONDS = config('SYNC_SETTLE_SECONDS', default=2, cast=int)  # rows this fresh wait for the next sync
+
+# Clustered entity map tiles, /api/government/entity-map/z/x/y/ (apps.government.services.map_tile_service)
+MAP_TILE_GRID = config('MAP_TILE_GRID', default=8, cast=int)  # clusters per tile side
+MAP_TILE_POINT_ZOOM = config('MAP_TILE_POINT_ZOOM', default=12, cast=int)  # first zoom with individual markers
+MAP_TILE_MAX_POINTS = config('MAP_TILE_MAX_POINTS', default=2000, cast=int)  # above this a tile stays clustered
+MAP_TILE_MAX_ZOOM = config('MAP_TILE_MAX_ZOOM', default=18, cast=int)
+MAP_TILE_TAG_ZOOM = config('MAP_TILE_TAG_ZOOM', default=6, cast=int)  # deeper tiles share their ancestor's cache tag
+
+# Government CSV/Parquet exports (apps.core.services.export_service, apps.government.services.export_jobs)
+EXPORT_ROOT = config('EXPORT_ROOT', default=str(BASE_DIR / 'exports'))  # files of background export jobs
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=2000, cast=int)  # rows per keyset chunk / Parquet row group
+EXPORT_JOBS_IN_PROCESS = config('EXPORT_JOBS_IN_PROCESS', default=True, cast=bool)  # else only manage.py run_export_jobs
+EXPORT_JOB_STALE_SECONDS = config('EXPORT_JOB_STALE_SECONDS', default=300, cast=int)  # running job without a checkpoint is resumed
+
+# Full-text search, /api/search/ (apps.core.services.search_service)
+SEARCH_RESULTS_LIMIT = config('SEARCH_RESULTS_LIMIT', default=20, cast=int)  # default results per query
+SEARCH_MAX_RESULTS = config('SEARCH_MAX_RESULTS', default=100, cast=int)
+SEARCH_REINDEX_BATCH_SIZE = config('SEARCH_REINDEX_BATCH_SIZE', default=500, cast=int)  # rows per bulk insert
 
 
 # Custom User Model
@@ -143,7 +289,7 @@ REST_FRAMEWORK = {
     ),
     'EXCEPTION_HANDLER': 'apps.core.exceptions.custom_exception_handler',
     'DEFAULT_RENDERER_CLASSES': (
-        'rest_framework.renderers.JSONRenderer',
+        'apps.core.renderers.FastJSONRenderer',  # orjson; plain JSONRenderer without it
     ),
 }
 
@@ -183,6 +329,8 @@ RAZORPAY_KEY_SECRET = config('RAZORPAY_KEY_SECRET', default='')
 
 # External API Settings
 ENAM_API_URL = config('ENAM_API_URL', default='https://api.data.gov.in/resource/')
+# Full mandi price feed URL (CSV/JSON); empty uses the bundled sample feed
+MANDI_PRICE_FEED_URL = config('MANDI_PRICE_FEED_URL', default='')
 WEATHER_API_KEY = config('WEATHER_API_KEY', default='')
 
 
@@ -193,6 +341,7 @@ BLOCKCHAIN_ENABLED = True
 # File Upload Settings
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB
+DATA_UPLOAD_MAX_NUMBER_FILES = 1000  # Bulk disease screening uploads
 
 
 # Security Settings (Relaxed for hackathon)
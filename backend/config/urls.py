@@ -9,6 +9,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework_simplejwt.views import TokenRefreshView
+from apps.core.views import SearchAPIView, SyncAPIView
 
 urlpatterns = [
     # Admin
@@ -31,6 +32,9 @@ urlpatterns = [
     path('api/notifications/', include('apps.notifications.urls')),
     path('api/government/', include('apps.government.urls')),
     path('api/advisories/', include('apps.advisories.urls')),  # New endpoints
+    path('api/core/', include('apps.core.urls')),  # Staff-only operational endpoints
+    path('api/sync/', SyncAPIView.as_view(), name='sync'),  # Mobile delta sync
+    path('api/search/', SearchAPIView.as_view(), name='search'),  # Full-text typeahead search
     
     # JWT Token Refresh
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),